@@ -0,0 +1,346 @@
+'''
+cases: the benchmark cases
+
+Each case is timed on the synthetic table of one size and returns the number
+of records it processed (for the plot case, the number of plots). Cases are
+grouped by what they time:
+
+- kernel: every PTF of the registry, run through PTFdatabase.runKernel on its
+  own view of the input table (the input columns are parsed once per table)
+- curve: the van Genuchten and Brooks-Corey curves and their inverses, the
+  Mualem-van Genuchten conductivity, the van Genuchten fit and the pressure
+  grid, on parameters calculated once per table
+- validation: the input checks of the PTFs (SSC, carbon, BD) on all records
+- read: parsing the input fields of the dBASE, CSV and GeoTIFF inputs
+- write: saving result columns with the dBASE and CSV writers of table_io
+  and writing a GeoTIFF
+- plot: rendering water retention curves with the plot pool
+
+Some cases are only run up to a number of records (maxRecords), e.g. the CSV
+backend holds the whole table as text.
+'''
+
+import os
+import numpy as np
+from collections import namedtuple
+
+import NB_PTFs.lib.table_io as table_io
+import NB_PTFs.lib.PTFdatabase as PTFdatabase
+import NB_PTFs.lib.validation as validation
+import NB_PTFs.lib.vanGenuchten as vanGenuchten
+import NB_PTFs.lib.brooksCorey as brooksCorey
+import NB_PTFs.lib.pressure_grid as pressure_grid
+import NB_PTFs.lib.vg_fit as vg_fit
+import NB_PTFs.lib.raster_io as raster_io
+import NB_PTFs.lib.plot_pool as plot_pool
+import NB_PTFs.benchmarks.soils as soils
+
+# A case: name, group, function(context) returning the number of records, function(context) preparing
+# what the case uses (not timed, or None) and the largest table it is run on (None for all)
+Case = namedtuple('Case', ['name', 'group', 'function', 'prepare', 'maxRecords'])
+
+groups = ['kernel', 'curve', 'validation', 'read', 'write', 'plot']
+
+# Pressures (kPa) of the curve cases, as used by the VG and BC tools
+pressures = [1.0, 3.0, 10.0, 33.0, 100.0, 200.0, 1000.0, 1500.0]
+
+# Plots rendered by the plot case, whatever the size of the table
+numPlots = 20
+
+options = {'carbonConFactor': 1.724, 'carbContent': 'OC', 'MVGChoice': True}
+
+# Raster of the raster cases, as wide as this (the height follows from the number of records)
+rasterWidth = 1000
+
+class Grid(object):
+
+    # Size of the raster written by the raster case (no georeferencing)
+    def __init__(self, width, height):
+        self.width = width
+        self.height = height
+
+class Context(object):
+
+    ''' Synthetic tables of one size, and the values shared by the cases on them (prepared once, not timed) '''
+
+    def __init__(self, folder, numRecords, seed=0):
+
+        self.folder = folder
+        self.numRecords = numRecords
+        self.seed = seed
+
+        self.dbfPath = soils.getTable(folder, numRecords, seed, 'dbf')
+        self.outputFolder = os.path.join(folder, 'output_' + str(numRecords))
+
+        if not os.path.exists(self.outputFolder):
+            os.makedirs(self.outputFolder)
+
+        self.shared = {}
+
+    def getTable(self):
+
+        # The input table, with its input fields parsed
+        if 'table' not in self.shared:
+            table = table_io.openTable(self.dbfPath)
+            table.readColumns(soils.fieldNames)
+            self.shared['table'] = table
+
+        return self.shared['table']
+
+    def getCSVPath(self):
+        return soils.getTable(self.folder, self.numRecords, self.seed, 'csv')
+
+    def getRasterGrid(self):
+
+        # Bulk densities of the table as a raster (rows of rasterWidth pixels, the last row padded)
+        if 'grid' not in self.shared:
+            BD = self.getTable().readColumn("BD")
+            height = -(-self.numRecords // rasterWidth)
+
+            values = np.full(height * rasterWidth, np.nan)
+            values[0:self.numRecords] = BD
+
+            self.shared['grid'] = values.reshape(height, rasterWidth)
+
+        return self.shared['grid']
+
+    def getRasterPath(self):
+
+        path = os.path.join(self.outputFolder, 'benchmark_BD.tif')
+        if not os.path.exists(path):
+            writeRaster(self)
+
+        return path
+
+    def getVGParams(self):
+
+        # van Genuchten parameters (WC_res, WC_sat, alpha, n, m) of Wosten et al. (1999)
+        if 'vg' not in self.shared:
+            results = runPTF(self, "Wosten_1999_top")
+            self.shared['vg'] = [np.asarray(values, dtype=np.float64) for values in results[0:5]]
+            self.shared['K_sat'] = np.asarray(results[6], dtype=np.float64)
+            self.shared['l_MvG'] = np.asarray(results[5], dtype=np.float64)
+
+        return self.shared['vg']
+
+    def getBCParams(self):
+
+        # Brooks-Corey parameters (hb, WC_res, WC_sat, lambda) of Cosby et al. (1984)
+        if 'bc' not in self.shared:
+            warning, WC_res, WC_sat, lambda_BC, hb_BC = runPTF(self, "Cosby_1984_SSC_BC")
+            self.shared['bc'] = [np.asarray(values, dtype=np.float64) for values in [hb_BC, WC_res, WC_sat, lambda_BC]]
+
+        return self.shared['bc']
+
+    def getPointWC(self):
+
+        # Water contents of Nguyen et al. (2014), soils x pressures of the PTF
+        if 'pointWC' not in self.shared:
+            results = runPTF(self, "Nguyen_2014")
+            self.shared['pointWC'] = np.column_stack([np.asarray(column, dtype=np.float64) for column in results[1:]])
+
+        return self.shared['pointWC']
+
+def runPTF(context, PTFOption):
+
+    # Runs a PTF on its own view of the input table, without reporting its data checks
+    table = context.getTable()
+    view = table_io.TableView(table)
+
+    PTFType = PTFdatabase.checkPTF(PTFOption).PTFType
+
+    if PTFType == "pointPTF":
+        args = [context.outputFolder, view, PTFOption]
+    elif PTFType == "ksatPTF":
+        args = [context.outputFolder, view]
+    else:
+        args = [view, PTFOption]
+
+    validation.holdSummaries()
+
+    try:
+        return PTFdatabase.runKernel(PTFOption, args, options)
+    finally:
+        validation.discardSummaries()
+
+def kernelCase(PTFOption):
+
+    def run(context):
+        runPTF(context, PTFOption)
+        return context.numRecords
+
+    return run
+
+### Curve cases ###
+
+def vgMatrix(context):
+    vanGenuchten.calcVGMatrix(pressures, *context.getVGParams())
+    return context.numRecords
+
+def vgInverse(context):
+    WC_res, WC_sat, alpha, n, m = context.getVGParams()
+    targets = np.column_stack([WC_res + 0.75 * (WC_sat - WC_res), WC_res + 0.25 * (WC_sat - WC_res)])
+    vanGenuchten.calcVGInverse(targets, WC_res, WC_sat, alpha, n, m)
+    return context.numRecords
+
+def mvgConductivity(context):
+    WC_res, WC_sat, alpha, n, m = context.getVGParams()
+    vanGenuchten.calcKhMatrix(pressures, context.shared['K_sat'], alpha, n, m, context.shared['l_MvG'])
+    return context.numRecords
+
+def bcMatrix(context):
+    brooksCorey.calcBrooksCoreyMatrix(pressures, *context.getBCParams())
+    return context.numRecords
+
+def bcInverse(context):
+    hb, WC_res, WC_sat, lambda_BC = context.getBCParams()
+    targets = np.column_stack([WC_res + 0.75 * (WC_sat - WC_res), WC_res + 0.25 * (WC_sat - WC_res)])
+    brooksCorey.calcBrooksCoreyInverse(targets, hb, WC_res, WC_sat, lambda_BC)
+    return context.numRecords
+
+def vgFit(context):
+    PTFInfo = PTFdatabase.checkPTF("Nguyen_2014")
+    vg_fit.fitVG([float(pressure) for pressure in PTFInfo.PTFPressures], context.getPointWC())
+    return context.numRecords
+
+def pressureGrid(context):
+    pressure_grid.resamplePTF("Nguyen_2014", context.getPointWC(), pressures)
+    return context.numRecords
+
+### Validation, read, write and plot cases ###
+
+def inputChecks(context):
+
+    table = context.getTable()
+    sand, silt, clay, OC, BD = table.readColumns(["Sand", "Silt", "Clay", "OC", "BD"])
+
+    validator = validation.Validator(table.readColumn("soilname"))
+    validator.checkSSC(sand, silt, clay)
+    validator.checkCarbon(OC, "OC")
+    validator.checkValue("Bulk density", BD)
+    validator.warnings()
+
+    return context.numRecords
+
+def readDBF(context):
+    table_io.openTable(context.dbfPath).readColumns(soils.fieldNames)
+    return context.numRecords
+
+def readCSV(context):
+    table_io.openTable(context.getCSVPath()).readColumns(soils.fieldNames)
+    return context.numRecords
+
+def resultColumns(context):
+
+    # Water contents as written by the point-PTF tool
+    WC = context.getPointWC()
+    fields = ['WC_' + ('%g' % pressure) + 'kPa' for pressure in PTFdatabase.checkPTF("Nguyen_2014").PTFPressures]
+
+    return fields, [WC[:, i] for i in range(0, WC.shape[1])]
+
+def writeTable(context, inputPath, ext):
+
+    fields, columns = resultColumns(context)
+
+    outputPath = os.path.join(context.outputFolder, 'benchmark_output' + ext)
+    table = table_io.openTable(inputPath, outputPath, deferred=True, spillFolder=context.outputFolder)
+
+    table.writeColumns(fields, columns)
+    table.flush()
+
+    return context.numRecords
+
+def writeDBF(context):
+    return writeTable(context, context.dbfPath, '.dbf')
+
+def writeCSV(context):
+    return writeTable(context, context.getCSVPath(), '.csv')
+
+def writeRaster(context):
+
+    values = context.getRasterGrid()
+    blockRows = raster_io.getBlockRows(rasterWidth)
+
+    writer = raster_io.GeoTiffWriter(os.path.join(context.outputFolder, 'benchmark_BD.tif'), Grid(rasterWidth, values.shape[0]))
+
+    for start in range(0, values.shape[0], blockRows):
+        writer.writeRows(values[start:start + blockRows])
+
+    writer.close()
+
+    return context.numRecords
+
+def readRaster(context):
+
+    raster = raster_io.openRaster(context.getRasterPath())
+
+    try:
+        blockRows = raster_io.getBlockRows(raster.width)
+        for start in range(0, raster.height, blockRows):
+            raster.readRows(start, min(start + blockRows, raster.height))
+    finally:
+        raster.close()
+
+    return context.numRecords
+
+def plotCurves(context):
+
+    WC = vanGenuchten.calcVGMatrix(vanGenuchten.curvePressures, *[values[0:numPlots] for values in context.getVGParams()])
+
+    jobs = []
+    for i in range(0, WC.shape[0]):
+        outPath = os.path.join(context.outputFolder, 'benchmark_plot_' + str(i) + '.png')
+        jobs.append(plot_pool.curveJob(outPath, 'Soil ' + str(i), [(-vanGenuchten.curvePressures, WC[i], None)],
+                                       'Pressure (kPa)', 'Water content', xscale='symlog'))
+
+    plot_pool.renderPlots(jobs)
+
+    return len(jobs)
+
+def getCases():
+
+    ''' All benchmark cases, in the order they are run '''
+
+    cases = []
+
+    table = lambda context: context.getTable()
+    vgParams = lambda context: context.getVGParams()
+    bcParams = lambda context: context.getBCParams()
+    pointWC = lambda context: context.getPointWC()
+    csvTable = lambda context: (context.getCSVPath(), context.getPointWC())
+
+    for PTFOption in sorted(PTFdatabase.PTFs):
+        cases.append(Case(PTFOption, 'kernel', kernelCase(PTFOption), table, None))
+
+    cases += [Case('vg_matrix', 'curve', vgMatrix, vgParams, None),
+              Case('vg_inverse', 'curve', vgInverse, vgParams, None),
+              Case('mvg_conductivity', 'curve', mvgConductivity, vgParams, None),
+              Case('bc_matrix', 'curve', bcMatrix, bcParams, None),
+              Case('bc_inverse', 'curve', bcInverse, bcParams, None),
+              Case('vg_fit', 'curve', vgFit, pointWC, 1000000),
+              Case('pressure_grid', 'curve', pressureGrid, pointWC, None),
+              Case('input_checks', 'validation', inputChecks, table, None),
+              Case('read_dbf', 'read', readDBF, None, None),
+              Case('read_csv', 'read', readCSV, csvTable, 1000000),
+              Case('read_raster', 'read', readRaster, lambda context: context.getRasterPath(), None),
+              Case('write_dbf', 'write', writeDBF, pointWC, None),
+              Case('write_csv', 'write', writeCSV, csvTable, 1000000),
+              Case('write_raster', 'write', writeRaster, lambda context: context.getRasterGrid(), None),
+              Case('plot_curves', 'plot', plotCurves, vgParams, None)]
+
+    return cases
+
+def selectCases(groupNames=None, caseNames=None):
+
+    # Cases of the given groups and/or with the given names (all cases if neither is given)
+    selected = []
+
+    for case in getCases():
+        if groupNames and case.group not in groupNames:
+            continue
+        if caseNames and case.name not in caseNames:
+            continue
+
+        selected.append(case)
+
+    return selected
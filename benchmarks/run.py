@@ -0,0 +1,296 @@
+'''
+Runs the benchmarks and keeps their results in a history file
+
+    python benchmarks/run.py --sizes 1e3,1e5,1e6 --groups kernel,curve --repeat 3
+    python benchmarks/run.py --compare
+
+Each case is prepared (untimed), run once with tracemalloc to measure its peak
+memory (Python 3 only), then timed repeat times; the best time gives the
+records per second. The stage timings of lib/metrics.py of the best run are
+kept with the result.
+
+One JSON line per case and size is appended to the history file
+(benchmarks/history.jsonl unless --history is given), with the version of the
+code (git describe), Python and NumPy versions and the number of kernel
+workers, so the results of different versions can be compared. --compare
+compares the latest version in the history with the one before it (or
+--baseline) and lists the cases that became slower by more than --tolerance
+or failed (a failed case is kept in the history with its error); it exits with
+status 1 if there are any.
+
+The synthetic tables and outputs are written to --folder (a folder in the
+temporary directory unless given) and reused by later runs.
+'''
+
+import sys
+import os
+
+# The toolbox modules are imported as NB_PTFs.<package>.<module>
+repoPath = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if repoPath not in sys.path:
+    sys.path.insert(0, repoPath)
+
+import configuration
+
+import json
+import time
+import logging
+import argparse
+import datetime
+import platform
+import tempfile
+import subprocess
+import numpy as np
+from collections import OrderedDict
+
+import NB_PTFs.lib.metrics as metrics
+import NB_PTFs.lib.kernel_pool as kernel_pool
+import NB_PTFs.lib.refresh_modules as refresh_modules
+import NB_PTFs.benchmarks.cases as cases
+
+try:
+    import tracemalloc
+except ImportError:
+    tracemalloc = None
+
+defaultHistory = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'history.jsonl')
+defaultSizes = [1000, 10000, 100000]
+
+def getVersion():
+
+    # Version of the code being benchmarked, from git if available
+    try:
+        with open(os.devnull, 'w') as devnull:
+            version = subprocess.check_output(['git', 'describe', '--always', '--dirty'], cwd=repoPath, stderr=devnull)
+
+        return version.decode('ascii', 'replace').strip()
+
+    except Exception:
+        return 'unknown'
+
+def getEnvironment(label=None):
+
+    return OrderedDict([('version', getVersion()),
+                        ('label', label),
+                        ('time', datetime.datetime.now().isoformat()),
+                        ('python', platform.python_version()),
+                        ('numpy', np.__version__),
+                        ('platform', platform.platform()),
+                        ('kernelWorkers', kernel_pool.getWorkerCount())])
+
+def timeCase(case, context, repeat):
+
+    ''' Runs a prepared case: once traced for the peak memory, then repeat times timed '''
+
+    peakMB = None
+
+    if tracemalloc is not None:
+        tracemalloc.start()
+
+        try:
+            case.function(context)
+            peakMB = tracemalloc.get_traced_memory()[1] / 1048576.0
+        finally:
+            tracemalloc.stop()
+
+    times = []
+    best = None
+
+    for i in range(0, max(1, repeat)):
+        run = metrics.startRun(case.name)
+        start = metrics.timer()
+
+        try:
+            records = case.function(context)
+            seconds = metrics.timer() - start
+        finally:
+            summary = metrics.finishRun(run)
+
+        times.append(seconds)
+
+        if best is None or seconds < best[0]:
+            best = (seconds, summary)
+
+    seconds, summary = best
+
+    stages = OrderedDict((path, round(values['seconds'], 6)) for path, values in summary.items() if path != 'total')
+
+    return OrderedDict([('processed', records),
+                        ('repeat', len(times)),
+                        ('seconds', round(seconds, 6)),
+                        ('median', round(float(np.median(times)), 6)),
+                        ('recordsPerSec', round(records / seconds, 1) if seconds > 0.0 else None),
+                        ('peakMB', round(peakMB, 2) if peakMB is not None else None),
+                        ('stages', stages)])
+
+def runBenchmarks(sizes, selected, folder, repeat, historyPath, label=None):
+
+    environment = getEnvironment(label)
+    print('Benchmarking ' + environment['version'] + ' with ' + str(environment['kernelWorkers']) + ' kernel workers')
+
+    with open(historyPath, 'a') as history:
+
+        for size in sizes:
+            context = cases.Context(folder, size, seed=0)
+
+            for case in selected:
+                if case.maxRecords is not None and size > case.maxRecords:
+                    continue
+
+                result = OrderedDict(environment)
+                result['case'] = case.name
+                result['group'] = case.group
+                result['records'] = size
+
+                try:
+                    if case.prepare is not None:
+                        case.prepare(context)
+
+                    result.update(timeCase(case, context, repeat))
+
+                except Exception as e:
+                    result['error'] = str(e)
+
+                # Failed cases are kept too, so that --compare reports them
+                history.write(json.dumps(result) + '\n')
+                history.flush()
+
+                if 'error' in result:
+                    print('{:<28}{:>12,}  failed: {}'.format(case.name, size, result['error']))
+                    continue
+
+                print('{:<28}{:>12,}{:>16,.0f} records/s{:>10.3f} s{:>10} MB'.format(
+                      case.name, size, result['recordsPerSec'] or 0.0, result['seconds'],
+                      '-' if result['peakMB'] is None else '%.1f' % result['peakMB']))
+
+def readHistory(historyPath):
+
+    results = []
+
+    if os.path.exists(historyPath):
+        with open(historyPath, 'r') as f:
+            for line in f:
+                if line.strip():
+                    results.append(json.loads(line))
+
+    return results
+
+def compareVersions(results, baseline=None, tolerance=0.1):
+
+    '''
+    Compares the best records per second of each case and size of the latest version with the baseline
+    version (the version before the latest if not given). Returns the baseline, the latest version and
+    a list of (case, records, baseline records/s, latest records/s, change), slowest change first.
+    Cases that only failed in the latest version come first, with None as their records/s and change
+    (and as the baseline records/s if there is no baseline result).
+    '''
+
+    # Versions in the order they were last run
+    versions = []
+    for result in results:
+        if result['version'] in versions:
+            versions.remove(result['version'])
+        versions.append(result['version'])
+
+    if len(versions) == 0:
+        return None, None, []
+
+    latest = versions[-1]
+
+    if baseline is None:
+        if len(versions) < 2:
+            return None, latest, []
+        baseline = versions[-2]
+
+    best = {}
+    for result in results:
+        if result['version'] in [baseline, latest] and result.get('recordsPerSec'):
+            key = (result['version'], result['case'], result['records'])
+            best[key] = max(best.get(key, 0.0), result['recordsPerSec'])
+
+    changes = []
+    for (version, case, records), rate in best.items():
+        if version == latest and (baseline, case, records) in best:
+            baseRate = best[(baseline, case, records)]
+            changes.append((case, records, baseRate, rate, rate / baseRate - 1.0))
+
+    changes.sort(key=lambda change: change[4])
+
+    # Cases of the latest version with an error and no successful run
+    failed = []
+    for result in results:
+        key = (result['case'], result['records'])
+        if result['version'] == latest and 'error' in result and (latest,) + key not in best and key not in failed:
+            failed.append(key)
+
+    changes = [(case, records, best.get((baseline, case, records)), None, None) for case, records in failed] + changes
+
+    return baseline, latest, changes
+
+def main(argv=None):
+
+    parser = argparse.ArgumentParser(description='Benchmarks of the NB_PTFs kernels, curves, validation, readers, writers and plots')
+    parser.add_argument('--sizes', help='Comma-separated numbers of records, e.g. 1e3,1e5,1e7')
+    parser.add_argument('--groups', help='Comma-separated groups: ' + ', '.join(cases.groups))
+    parser.add_argument('--cases', help='Comma-separated case names (PTF options for the kernels)')
+    parser.add_argument('--repeat', type=int, default=3, help='Timed runs of each case (the best is kept)')
+    parser.add_argument('--workers', type=int, help='Kernel worker processes (kernelWorkers)')
+    parser.add_argument('--folder', default=os.path.join(tempfile.gettempdir(), 'NB_PTFs_benchmarks'))
+    parser.add_argument('--history', default=defaultHistory)
+    parser.add_argument('--label', help='Note stored with the results')
+    parser.add_argument('--list', action='store_true', help='List the cases')
+    parser.add_argument('--compare', action='store_true', help='Compare the latest version in the history with the baseline')
+    parser.add_argument('--baseline', help='Version to compare with (the version before the latest if not given)')
+    parser.add_argument('--tolerance', type=float, default=0.1, help='Slowdown reported as a regression')
+
+    args = parser.parse_args(argv)
+
+    if args.compare:
+        baseline, latest, changes = compareVersions(readHistory(args.history), args.baseline, args.tolerance)
+
+        if baseline is None:
+            print('Nothing to compare: the history needs results of two versions')
+            return 0
+
+        print('Records per second of ' + str(latest) + ' compared with ' + str(baseline))
+
+        regressions = 0
+        for case, records, baseRate, rate, change in changes:
+            if rate is None:
+                regressions += 1
+                print('{:<28}{:>12,}{:>16}{:>16}{:>9}  FAILED'.format(case, records, '-' if baseRate is None else '{:,.0f}'.format(baseRate), '-', '-'))
+                continue
+
+            flag = '  REGRESSION' if change < -args.tolerance else ''
+            regressions += 1 if flag else 0
+            print('{:<28}{:>12,}{:>16,.0f}{:>16,.0f}{:>+9.1%}{}'.format(case, records, baseRate, rate, change, flag))
+
+        return 1 if regressions else 0
+
+    splitList = lambda text: [value.strip() for value in text.split(',') if value.strip()] if text else None
+
+    selected = cases.selectCases(splitList(args.groups), splitList(args.cases))
+
+    if args.list:
+        for case in selected:
+            print('{:<28}{}'.format(case.name, case.group))
+        return 0
+
+    sizes = [int(float(size)) for size in splitList(args.sizes)] if args.sizes else defaultSizes
+
+    if not os.path.exists(args.folder):
+        os.makedirs(args.folder)
+
+    if args.workers is not None:
+        refresh_modules.readUserSettings()['kernelWorkers'] = str(args.workers)
+
+    # Messages of the toolbox go to a log file instead of the console
+    logging.getLogger().addHandler(logging.FileHandler(os.path.join(args.folder, 'benchmark_log.txt')))
+    logging.getLogger().setLevel(logging.INFO)
+
+    runBenchmarks(sizes, selected, args.folder, args.repeat, args.history, args.label)
+
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,203 @@
+'''
+soils: reproducible synthetic soil attribute tables for the benchmarks
+
+The soils are generated in blocks of blockRecords records, each from its own
+random state (seed, block number), so a table of any size is the same as the
+first records of a larger table with the same seed, and tables of 1e7 records
+are written without holding them in memory.
+
+- Sand, silt and clay (%) are drawn from a logistic-normal distribution and
+  sum to 100; texture is the USDA texture class.
+- OC (%) is log-normal (median 1.2 %), OM = 1.724 * OC.
+- BD (g/cm3) mixes a mineral bulk density (lower for clay soils) with the
+  organic matter (Adams, 1973), so soils rich in OM are lighter.
+- CEC (cmol/kg) rises with clay and OM, pH is normal around 6.2.
+- WC_sat is the porosity (1 - BD / 2.65); wc_satCalc and wc_fcCalc are
+  plausible water contents at saturation and field capacity, the inputs of
+  the Ksat PTFs that use the output of the point-PTF tool.
+
+Tables are written as dBASE (.dbf, read by the dbf backend of table_io) or
+comma separated (.csv) files.
+'''
+
+import os
+import csv
+import struct
+import datetime
+import numpy as np
+from collections import OrderedDict
+from NB_PTFs.lib.external import six # Python 2/3 compatibility module
+
+# Records generated (and written) at a time
+blockRecords = 100000
+
+numericFields = ['Sand', 'Silt', 'Clay', 'OC', 'OM', 'BD', 'CEC', 'pH', 'WC_sat', 'wc_satCalc', 'wc_fcCalc']
+fieldNames = ['soilname', 'texture'] + numericFields
+
+# dBASE field specifications, as written by table_io for numeric columns
+numericSpec = ('N', 19, 11)
+textureWidth = 16
+
+textureClasses = ['sand', 'loamy sand', 'sandy loam', 'silt', 'silt loam', 'sandy clay loam', 'sandy clay',
+                  'silty clay', 'clay', 'silty clay loam', 'clay loam', 'loam']
+
+def usdaTexture(sand, silt, clay):
+
+    # USDA texture class of each soil, from the limits of the texture triangle
+    conditions = [silt + 1.5 * clay < 15.0,
+                  silt + 2.0 * clay < 30.0,
+                  ((clay >= 7.0) & (clay < 20.0) & (sand > 52.0)) | ((clay < 7.0) & (silt < 50.0)),
+                  (silt >= 80.0) & (clay < 12.0),
+                  (silt >= 50.0) & (clay < 27.0),
+                  (clay >= 20.0) & (clay < 35.0) & (silt < 28.0) & (sand > 45.0),
+                  (clay >= 35.0) & (sand > 45.0),
+                  (clay >= 40.0) & (silt >= 40.0),
+                  clay >= 40.0,
+                  (clay >= 27.0) & (sand <= 20.0),
+                  clay >= 27.0]
+
+    return np.select(conditions, textureClasses[:-1], textureClasses[-1]).astype(object)
+
+def generateBlock(start, stop, seed=0):
+
+    ''' Soils start to stop (within one block of blockRecords records), as an OrderedDict of columns '''
+
+    blockNumber = start // blockRecords
+    rng = np.random.RandomState([seed, blockNumber])
+
+    # Draw the whole block, so the soils do not depend on where the table ends
+    numRecords = blockRecords
+    offset = start - blockNumber * blockRecords
+
+    # Particle size fractions (sand, silt, clay), rounded to 0.1 % with silt taking the remainder
+    logits = rng.normal([0.3, 0.0, -0.5], [0.9, 0.6, 0.8], (numRecords, 3))
+    fractions = np.exp(logits)
+    fractions = 100.0 * fractions / fractions.sum(axis=1)[:, None]
+
+    sand = np.round(fractions[:, 0], 1)
+    clay = np.round(fractions[:, 2], 1)
+    silt = np.round(100.0 - sand - clay, 1)
+
+    OC = np.clip(np.exp(rng.normal(np.log(1.2), 0.7, numRecords)), 0.05, 12.0)
+    OM = OC * 1.724
+
+    mineralBD = np.clip(rng.normal(1.65 - 0.004 * clay, 0.08), 1.1, 1.85)
+    BD = 100.0 / (OM / 0.224 + (100.0 - OM) / mineralBD)
+
+    CEC = np.clip(0.5 * clay + 2.0 * OM + rng.normal(0.0, 3.0, numRecords), 1.0, 80.0)
+    pH = np.clip(rng.normal(6.2, 1.0, numRecords), 3.5, 9.0)
+
+    WC_sat = 1.0 - BD / 2.65
+    wc_satCalc = np.clip(WC_sat * rng.uniform(0.88, 0.98, numRecords), 0.2, 0.9)
+    wc_fcCalc = np.minimum(0.06 + 0.0045 * clay + 0.0015 * silt + 0.01 * OM, wc_satCalc - 0.02)
+
+    columns = OrderedDict()
+    columns['soilname'] = np.array(['S' + str(i) for i in range(start, stop)], dtype=object)
+    columns['texture'] = usdaTexture(sand, silt, clay)[offset:offset + stop - start]
+
+    for name, values in zip(numericFields, [sand, silt, clay, OC, OM, BD, CEC, pH, WC_sat, wc_satCalc, wc_fcCalc]):
+        columns[name] = values[offset:offset + stop - start]
+
+    return columns
+
+def blocks(numRecords, seed=0):
+
+    # Yields the soils of the table, one block at a time
+    for start in range(0, numRecords, blockRecords):
+        yield generateBlock(start, min(start + blockRecords, numRecords), seed)
+
+def generateSoils(numRecords, seed=0):
+
+    ''' All soils of a table of numRecords records, as an OrderedDict of columns '''
+
+    parts = list(blocks(numRecords, seed))
+
+    columns = OrderedDict()
+    for name in fieldNames:
+        columns[name] = np.concatenate([part[name] for part in parts]) if parts else np.array([])
+
+    return columns
+
+def formatNumbers(values):
+    return np.char.mod('%19.11f', values).astype('S19')
+
+def writeDBF(path, numRecords, seed=0):
+
+    ''' Writes the soils to a dBASE table (numeric fields N 19.11, as table_io writes them) '''
+
+    nameWidth = max(1, len('S' + str(max(0, numRecords - 1))))
+
+    specs = [('soilname', 'C', nameWidth, 0), ('texture', 'C', textureWidth, 0)]
+    specs += [(name, numericSpec[0], numericSpec[1], numericSpec[2]) for name in numericFields]
+
+    recordType = np.dtype({'names': ['deleted'] + [spec[0] for spec in specs],
+                           'formats': ['S1'] + ['S' + str(spec[2]) for spec in specs]})
+
+    today = datetime.date.today()
+    headerLength = 32 + (32 * len(specs)) + 1
+    header = struct.pack('<BBBBIHH20x', 3, today.year - 1900, today.month, today.day,
+                         numRecords, headerLength, recordType.itemsize)
+
+    with open(path, 'wb') as f:
+        f.write(header)
+
+        for name, fieldType, length, decimals in specs:
+            f.write(struct.pack('<11sc4xBB14x', name.encode('ascii'), fieldType.encode('ascii'), length, decimals))
+
+        f.write(b'\r')
+
+        for columns in blocks(numRecords, seed):
+            records = np.empty(len(columns['soilname']), dtype=recordType)
+            records['deleted'] = b' '
+            records['soilname'] = [six.text_type(name).ljust(nameWidth).encode('ascii') for name in columns['soilname']]
+            records['texture'] = [six.text_type(texture).ljust(textureWidth).encode('ascii') for texture in columns['texture']]
+
+            for name in numericFields:
+                records[name] = formatNumbers(columns[name])
+
+            f.write(records.tobytes())
+
+        f.write(b'\x1a')
+
+    return path
+
+def writeCSV(path, numRecords, seed=0):
+
+    # Writes the soils to a comma separated table
+    if six.PY2:
+        f = open(path, 'wb')
+    else:
+        f = open(path, 'w', newline='')
+
+    with f:
+        writer = csv.writer(f)
+        writer.writerow(fieldNames)
+
+        for columns in blocks(numRecords, seed):
+            text = [columns['soilname'], columns['texture']] + [np.char.mod('%.10g', columns[name]) for name in numericFields]
+            writer.writerows(zip(*[column.tolist() for column in text]))
+
+    return path
+
+def getTable(folder, numRecords, seed=0, fileFormat='dbf'):
+
+    ''' Path of the synthetic table of numRecords soils in folder, written if it does not exist yet '''
+
+    if not os.path.exists(folder):
+        os.makedirs(folder)
+
+    path = os.path.join(folder, 'soils_' + str(numRecords) + '_' + str(seed) + '.' + fileFormat)
+
+    if not os.path.exists(path):
+
+        # Written under another name first, so an interrupted run does not leave a partial table
+        partPath = path + '.part'
+
+        if fileFormat == 'dbf':
+            writeDBF(partPath, numRecords, seed)
+        else:
+            writeCSV(partPath, numRecords, seed)
+
+        os.rename(partPath, path)
+
+    return path
@@ -2,7 +2,6 @@
 configuration.py adds the parent directory of the NB_PTFs repo in sys.path so that modules can be imported using "from NB_PTFs..."
 '''
 
-import arcpy
 import sys
 import os
 
@@ -37,5 +36,6 @@ try:
     clippingTolerance = 0.00000000001
 
 except Exception:
+    import arcpy
     arcpy.AddError("Configuration file not read successfully")
     raise
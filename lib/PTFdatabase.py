@@ -4,16 +4,19 @@ Nature Braid PTFs Database
 
 import sys
 import os
+from collections import namedtuple
 import configuration
 import numpy as np
-import arcpy
 import math
 import NB_PTFs.lib.log as log
 import NB_PTFs.lib.common as common
+import NB_PTFs.lib.point_engine as point_engine
+import NB_PTFs.lib.metrics as metrics
+import NB_PTFs.lib.cross_check as cross_check
 from NB_PTFs.lib.external import six # Python 2/3 compatibility module
 
 from NB_PTFs.lib.refresh_modules import refresh_modules
-refresh_modules([log, common])
+refresh_modules([log, common, point_engine, metrics, cross_check])
 
 def setOutputFields(pressureArray, unit):
     # Returns an array of field names
@@ -24,270 +27,213 @@ def setOutputFields(pressureArray, unit):
         name = "WC_" + str(pressure) + str(unit)
         fields.append(name)
 
-    return fields
-
-def checkPTF(PTFOption):
-
-    class PTF:
-        def __init__(self, PTFType, PTFPressures, PTFUnit, PTFFields=None):
-            self.PTFType = PTFType
-            self.PTFPressures = PTFPressures
-            self.PTFUnit = PTFUnit
-            self.PTFFields = PTFFields
-
-    if PTFOption == "Nguyen_2014":
-        PTFType = "pointPTF"
-        PTFPressures = [1, 3, 6, 10, 20, 33, 100, 1500]
-        PTFUnit = "kPa"
-        PTFFields = setOutputFields(PTFPressures, PTFUnit)
-
-    elif PTFOption == "Adhikary_2008":
-        PTFType = "pointPTF"
-        PTFPressures = [10, 33, 100, 300, 500, 1000, 1500]
-        PTFUnit = "kPa"
-        PTFFields = setOutputFields(PTFPressures, PTFUnit)
-
-    elif PTFOption == "Rawls_1982":
-        PTFType = "pointPTF"
-        PTFPressures = [10, 20, 33, 50, 100, 200, 400, 700, 1000, 1500]
-        PTFUnit = "kPa"
-        PTFFields = setOutputFields(PTFPressures, PTFUnit)
-
-    elif PTFOption == "Hall_1977_top":
-        PTFType = "pointPTF"
-        PTFPressures = [5, 10, 33, 200, 1500]
-        PTFUnit = "kPa"
-        PTFFields = setOutputFields(PTFPressures, PTFUnit)
-
-    elif PTFOption == "Hall_1977_sub":
-        PTFType = "pointPTF"
-        PTFPressures = [5, 10, 33, 200, 1500]
-        PTFUnit = "kPa"
-        PTFFields = setOutputFields(PTFPressures, PTFUnit)
-
-    elif PTFOption == "GuptaLarson_1979":
-        PTFType = "pointPTF"
-        PTFPressures = [4, 7, 10, 20, 33, 60, 100, 200, 400, 700, 1000, 1500]
-        PTFUnit = "kPa"
-        PTFFields = setOutputFields(PTFPressures, PTFUnit)
-
-    elif PTFOption == "Batjes_1996":
-        PTFType = "pointPTF"
-        PTFPressures = [0, 1, 3, 5, 10, 20, 33, 50, 250, 1500]
-        PTFUnit = "kPa"
-        PTFFields = setOutputFields(PTFPressures, PTFUnit)
-
-    elif PTFOption == "SaxtonRawls_2006":
-        PTFType = "pointPTF"
-        PTFPressures = [0, 33, 1500]
-        PTFUnit = "kPa"
-        PTFFields = setOutputFields(PTFPressures, PTFUnit)
-
-    elif PTFOption == "Pidgeon_1972":
-        PTFType = "pointPTF"
-        PTFPressures = [10, 33, 1500]
-        PTFUnit = "kPa"
-        PTFFields = setOutputFields(PTFPressures, PTFUnit)
-
-    elif str(PTFOption[0:8]) == "Lal_1978":
-        PTFType = "pointPTF"
-        PTFPressures = [0, 10, 33, 1500]
-        PTFUnit = "kPa"
-        PTFFields = setOutputFields(PTFPressures, PTFUnit)
-
-    elif PTFOption == "AinaPeriaswamy_1985":
-        PTFType = "pointPTF"
-        PTFPressures = [33, 1500]
-        PTFUnit = "kPa"
-        PTFFields = setOutputFields(PTFPressures, PTFUnit)
-
-    elif PTFOption == "ManriqueJones_1991":
-        PTFType = "pointPTF"
-        PTFPressures = [33, 1500]
-        PTFUnit = "kPa"
-        PTFFields = setOutputFields(PTFPressures, PTFUnit)
-
-    elif PTFOption == "vanDenBerg_1997":
-        PTFType = "pointPTF"
-        PTFPressures = [10, 1500]
-        PTFUnit = "kPa"
-        PTFFields = setOutputFields(PTFPressures, PTFUnit)
-
-    elif PTFOption == "TomasellaHodnett_1998":
-        PTFType = "pointPTF"
-        PTFPressures = [0, 1, 3, 6, 10, 33, 100, 500, 1500]
-        PTFUnit = "kPa"
-        PTFFields = setOutputFields(PTFPressures, PTFUnit)
-
-    elif PTFOption == "Reichert_2009_OM":
-        PTFType = "pointPTF"
-        PTFPressures = [6, 10, 33, 100, 500, 1500]
-        PTFUnit = "kPa"
-        PTFFields = setOutputFields(PTFPressures, PTFUnit)
-
-    elif PTFOption == "Reichert_2009":
-        PTFType = "pointPTF"
-        PTFPressures = [10, 33, 1500]
-        PTFUnit = "kPa"
-        PTFFields = setOutputFields(PTFPressures, PTFUnit)
-
-    elif PTFOption == "Botula_2013":
-        PTFType = "pointPTF"
-        PTFPressures = [1, 3, 6, 10, 20, 33, 100, 1500]
-        PTFUnit = "kPa"
-        PTFFields = setOutputFields(PTFPressures, PTFUnit)
-
-    elif PTFOption == "ShwethaVarija_2013":
-        PTFType = "pointPTF"
-        PTFPressures = [33, 100, 300, 500, 1000, 1500]
-        PTFUnit = "kPa"
-        PTFFields = setOutputFields(PTFPressures, PTFUnit)
-
-    elif PTFOption == "Dashtaki_2010_point":
-        PTFType = "pointPTF"
-        PTFPressures = [10, 30, 100, 300, 500, 1500]
-        PTFUnit = "kPa"
-        PTFFields = setOutputFields(PTFPressures, PTFUnit)
-
-    elif PTFOption == "Santra_2018_OC":
-        PTFType = "pointPTF"
-        PTFPressures = [33, 1500]
-        PTFUnit = "kPa"
-        PTFFields = setOutputFields(PTFPressures, PTFUnit)
-
-    elif PTFOption == "Santra_2018":
-        PTFType = "pointPTF"
-        PTFPressures = [33, 1500]
-        PTFUnit = "kPa"
-        PTFFields = setOutputFields(PTFPressures, PTFUnit)
-
-    elif str(PTFOption[0:11]) == "Wosten_1999":
-        PTFType = "vgPTF"
-        PTFPressures = "SMRC"
-        PTFUnit = "cm" # original units of Wosten et al. (1999)
-        PTFFields = ["warning"]
-
-    elif PTFOption == "Vereecken_1989":
-        PTFType = "vgPTF"
-        PTFPressures = "SMRC"
-        PTFUnit = "cm" # original units of Vereecken et al. (1989)
-        PTFFields = ["warning"]
-
-    elif PTFOption == "ZachariasWessolek_2007":
-        PTFType = "vgPTF"
-        PTFPressures = "SMRC"
-        PTFUnit = "kPa" # original units of Zacharias and Wessolek (2007)
-        PTFFields = ["warning"]
-
-    elif PTFOption == "Weynants_2009":
-        PTFType = "vgPTF"
-        PTFPressures = "SMRC"
-        PTFUnit = "cm" # original units of Weynants et al. (2009)
-        PTFFields = ["warning"]
-
-    elif PTFOption == "Dashtaki_2010_vg":
-        PTFType = "vgPTF"
-        PTFPressures = "SMRC"
-        PTFUnit = "cm" # original units of Dashtaki et al. (2010)
-        PTFFields = ["warning"]
-
-    elif PTFOption == "HodnettTomasella_2002":
-        PTFType = "vgPTF"
-        PTFPressures = "SMRC"
-        PTFUnit = "kPa" # original units of Hodnett and Tomasella (2002)
-        PTFFields = ["warning"]
-
-    elif PTFOption == "Cosby_1984":
-        PTFType = "ksatPTF"
-        PTFPressures = "Ksat"
-        PTFUnit = "mmhr"
-        PTFFields = ["warning", "K_sat"]
-
-    elif PTFOption == "Puckett_1985":
-        PTFType = "ksatPTF"
-        PTFPressures = "Ksat"
-        PTFUnit = "mmhr"
-        PTFFields = ["warning", "K_sat"]
-
-    elif PTFOption == "Jabro_1992":
-        PTFType = "ksatPTF"
-        PTFPressures = "Ksat"
-        PTFUnit = "mmhr"
-        PTFFields = ["warning", "K_sat"]
-
-    elif PTFOption == "CampbellShiozawa_1994":
-        PTFType = "ksatPTF"
-        PTFPressures = "Ksat"
-        PTFUnit = "mmhr"
-        PTFFields = ["warning", "K_sat"]
-
-    elif PTFOption == "FerrerJulia_2004_1":
-        PTFType = "ksatPTF"
-        PTFPressures = "Ksat"
-        PTFUnit = "mmhr"
-        PTFFields = ["warning", "K_sat"]
-
-    elif PTFOption == "FerrerJulia_2004_2":
-        PTFType = "ksatPTF"
-        PTFPressures = "Ksat"
-        PTFUnit = "mmhr"
-        PTFFields = ["warning", "K_sat"]
-
-    elif PTFOption == "Ahuja_1989":
-        PTFType = "ksatPTF"
-        PTFPressures = "Ksat"
-        PTFUnit = "mmhr"
-        PTFFields = ["warning", "K_sat"]
-
-    elif PTFOption == "MinasnyMcBratney_2000":
-        PTFType = "ksatPTF"
-        PTFPressures = "Ksat"
-        PTFUnit = "mmhr"
-        PTFFields = ["warning", "K_sat"]
-
-    elif PTFOption == "Brakensiek_1984":
-        PTFType = "ksatPTF"
-        PTFPressures = "Ksat"
-        PTFUnit = "mmhr"
-        PTFFields = ["warning", "K_sat"]
-
-    elif PTFOption == "Cosby_1984_SandC_BC":
-        PTFType = "bcPTF"
-        PTFPressures = "bc"
-        PTFUnit = "cm"
-        PTFFields = ["warning", "WC_res", "WC_sat", "lambda_BC", "hb_BC"]
-
-    elif PTFOption == "Cosby_1984_SSC_BC":
-        PTFType = "bcPTF"
-        PTFPressures = "bc"
-        PTFUnit = "cm"
-        PTFFields = ["warning", "WC_res", "WC_sat", "lambda_BC", "hb_BC"]
-
-    elif PTFOption == "RawlsBrakensiek_1985_BC":
-        PTFType = "bcPTF"
-        PTFPressures = "bc"
-        PTFUnit = "cm"
-        PTFFields = ["warning", "WC_res", "WC_sat", "lambda_BC", "hb_BC"]
-
-    elif PTFOption == "CampbellShiozawa_1992_BC":
-        PTFType = "bcPTF"
-        PTFPressures = "bc"
-        PTFUnit = "cm"
-        PTFFields = ["warning", "WC_res", "WC_sat", "lambda_BC", "hb_BC"]
-
-    elif PTFOption == "Saxton_1986_BC":
-        PTFType = "bcPTF"
-        PTFPressures = "bc"
-        PTFUnit = "kPa"
-        PTFFields = ["warning", "WC_res", "WC_sat", "lambda_BC", "hb_BC"]
-
-    elif PTFOption == "SaxtonRawls_2006_BC":
-        PTFType = "bcPTF"
-        PTFPressures = "bc"
-        PTFUnit = "kPa"
-        PTFFields = ["warning", "WC_res", "WC_sat", "lambda_BC", "hb_BC"]
-
-    else:
+    return tuple(fields)
+
+# Information held for each PTF in the registry
+# - PTFType: pointPTF, vgPTF, ksatPTF or bcPTF
+# - PTFPressures: pressures of a point-PTF, otherwise a label ("SMRC", "Ksat", "bc")
+# - PTFUnit: unit of the pressures
+# - PTFFields: fields written to the output table
+# - inputFields: fields read from the input table ("carbon" is the OC or OM field)
+# - kernel: (module in NB_PTFs.lib, function) that calculates the PTF
+# - kernelArgs: keyword arguments passed to the kernel on top of the positional ones
+PTF = namedtuple('PTF', ['PTFType', 'PTFPressures', 'PTFUnit', 'PTFFields', 'inputFields', 'kernel', 'kernelArgs'])
+
+carbonArgs = ('carbonConFactor', 'carbContent')
+
+def pointPTF(PTFOption, PTFPressures):
+
+    # Point-PTFs are all calculated by the vectorised engine
+    inputFields = tuple(['carbon' if name == 'carbon' else point_engine.inputFieldNames[name]
+                         for name in point_engine.getSpec(PTFOption)['inputs']])
+
+    return PTF("pointPTF", tuple(PTFPressures), "kPa", setOutputFields(PTFPressures, "kPa"),
+               inputFields, ("point_PTFs", "calcPointPTFs"), carbonArgs)
+
+def vgPTF(PTFUnit, inputFields, function, kernelArgs=carbonArgs):
+    return PTF("vgPTF", "SMRC", PTFUnit, ("warning",), tuple(inputFields), ("vg_PTFs", function), kernelArgs)
+
+def ksatPTF(inputFields, function, kernelArgs=()):
+    return PTF("ksatPTF", "Ksat", "mmhr", ("warning", "K_sat"), tuple(inputFields), ("ksat_PTFs", function), kernelArgs)
+
+def bcPTF(PTFUnit, inputFields, function, kernelArgs=()):
+    return PTF("bcPTF", "bc", PTFUnit, ("warning", "WC_res", "WC_sat", "lambda_BC", "hb_BC"),
+               tuple(inputFields), ("bc_PTFs", function), kernelArgs)
+
+mvgArgs = carbonArgs + ('MVGChoice',)
+
+# Results returned by the van Genuchten PTFs (l_MvG and K_sat only by Wosten et al. (1999) and Weynants et al. (2009))
+vgResults = ("WC_res", "WC_sat", "alpha_VG", "n_VG", "m_VG", "l_MvG", "K_sat")
+
+# Modules of the per-record functions the PTFs of each type are cross-checked against (the reference path),
+# named as the kernels (point-PTFs: as the PTF option, unless in referenceFunctions)
+referenceModules = {
+    "pointPTF": "point_PTFs",
+    "vgPTF": "vg_reference",
+    "bcPTF": "bc_reference",
+    "ksatPTF": "ksat_reference",
+}
+
+# Point-PTFs whose per-record function in point_PTFs has another name
+referenceFunctions = {
+    "Lal_1978_Group1": "Lal_1978",
+    "Lal_1978_Group2": "Lal_1978",
+    "Dashtaki_2010_point": "Dashtaki_2010",
+}
+
+# Registry of all PTFs, keyed by PTF option. Built once at import and not modified afterwards.
+PTFs = {
+    # Point-PTFs
+    "Nguyen_2014": pointPTF("Nguyen_2014", [1, 3, 6, 10, 20, 33, 100, 1500]),
+    "Adhikary_2008": pointPTF("Adhikary_2008", [10, 33, 100, 300, 500, 1000, 1500]),
+    "Rawls_1982": pointPTF("Rawls_1982", [10, 20, 33, 50, 100, 200, 400, 700, 1000, 1500]),
+    "Hall_1977_top": pointPTF("Hall_1977_top", [5, 10, 33, 200, 1500]),
+    "Hall_1977_sub": pointPTF("Hall_1977_sub", [5, 10, 33, 200, 1500]),
+    "GuptaLarson_1979": pointPTF("GuptaLarson_1979", [4, 7, 10, 20, 33, 60, 100, 200, 400, 700, 1000, 1500]),
+    "Batjes_1996": pointPTF("Batjes_1996", [0, 1, 3, 5, 10, 20, 33, 50, 250, 1500]),
+    "SaxtonRawls_2006": pointPTF("SaxtonRawls_2006", [0, 33, 1500]),
+    "Pidgeon_1972": pointPTF("Pidgeon_1972", [10, 33, 1500]),
+    "Lal_1978_Group1": pointPTF("Lal_1978_Group1", [0, 10, 33, 1500]),
+    "Lal_1978_Group2": pointPTF("Lal_1978_Group2", [0, 10, 33, 1500]),
+    "AinaPeriaswamy_1985": pointPTF("AinaPeriaswamy_1985", [33, 1500]),
+    "ManriqueJones_1991": pointPTF("ManriqueJones_1991", [33, 1500]),
+    "vanDenBerg_1997": pointPTF("vanDenBerg_1997", [10, 1500]),
+    "TomasellaHodnett_1998": pointPTF("TomasellaHodnett_1998", [0, 1, 3, 6, 10, 33, 100, 500, 1500]),
+    "Reichert_2009_OM": pointPTF("Reichert_2009_OM", [6, 10, 33, 100, 500, 1500]),
+    "Reichert_2009": pointPTF("Reichert_2009", [10, 33, 1500]),
+    "Botula_2013": pointPTF("Botula_2013", [1, 3, 6, 10, 20, 33, 100, 1500]),
+    "ShwethaVarija_2013": pointPTF("ShwethaVarija_2013", [33, 100, 300, 500, 1000, 1500]),
+    "Dashtaki_2010_point": pointPTF("Dashtaki_2010_point", [10, 30, 100, 300, 500, 1500]),
+    "Santra_2018_OC": pointPTF("Santra_2018_OC", [33, 1500]),
+    "Santra_2018": pointPTF("Santra_2018", [33, 1500]),
+
+    # van Genuchten PTFs (units are the original units of each PTF)
+    "Wosten_1999_top": vgPTF("cm", ["Sand", "Silt", "Clay", "carbon", "BD", "soilname", "texture"], "Wosten_1999", mvgArgs),
+    "Wosten_1999_sub": vgPTF("cm", ["Sand", "Silt", "Clay", "carbon", "BD", "soilname", "texture"], "Wosten_1999", mvgArgs),
+    "Vereecken_1989": vgPTF("cm", ["Sand", "Clay", "carbon", "BD", "soilname", "texture"], "Vereecken_1989"),
+    "ZachariasWessolek_2007": vgPTF("kPa", ["Sand", "Clay", "BD", "soilname", "texture"], "ZachariasWessolek_2007"),
+    "Weynants_2009": vgPTF("cm", ["Sand", "Clay", "carbon", "BD", "soilname", "texture"], "Weynants_2009", mvgArgs),
+    "Dashtaki_2010_vg": vgPTF("cm", ["Sand", "Clay", "BD", "soilname", "texture"], "Dashtaki_2010"),
+    "HodnettTomasella_2002": vgPTF("kPa", ["Sand", "Silt", "Clay", "OC", "BD", "CEC", "pH", "soilname", "texture"], "HodnettTomasella_2002"),
+
+    # Ksat PTFs
+    "Cosby_1984": ksatPTF(["Sand", "Clay"], "Cosby_1984"),
+    "Puckett_1985": ksatPTF(["Clay"], "Puckett_1985"),
+    "Jabro_1992": ksatPTF(["Silt", "Clay", "BD"], "Jabro_1992"),
+    "CampbellShiozawa_1994": ksatPTF(["Silt", "Clay"], "CampbellShiozawa_1994"),
+    "FerrerJulia_2004_1": ksatPTF(["Sand"], "FerrerJulia_2004_1"),
+    "FerrerJulia_2004_2": ksatPTF(["Sand", "Clay", "carbon", "BD"], "FerrerJulia_2004_2", carbonArgs),
+    "Ahuja_1989": ksatPTF(["wc_satCalc", "wc_fcCalc"], "Ahuja_1989"),
+    "MinasnyMcBratney_2000": ksatPTF(["wc_satCalc", "wc_fcCalc"], "MinasnyMcBratney_2000"),
+    "Brakensiek_1984": ksatPTF(["Sand", "Clay", "wc_satCalc"], "Brakensiek_1984"),
+
+    # Brooks-Corey PTFs
+    "Cosby_1984_SandC_BC": bcPTF("cm", ["Sand", "Clay"], "Cosby_1984_SandC_BC"),
+    "Cosby_1984_SSC_BC": bcPTF("cm", ["Sand", "Silt", "Clay"], "Cosby_1984_SSC_BC"),
+    "RawlsBrakensiek_1985_BC": bcPTF("cm", ["Sand", "Clay", "WC_sat"], "RawlsBrakensiek_1985_BC"),
+    "CampbellShiozawa_1992_BC": bcPTF("cm", ["Silt", "Clay", "BD", "WC_sat"], "CampbellShiozawa_1992_BC"),
+    "Saxton_1986_BC": bcPTF("kPa", ["Sand", "Clay"], "Saxton_1986_BC"),
+    "SaxtonRawls_2006_BC": bcPTF("kPa", ["Sand", "Clay", "carbon", "soilname"], "SaxtonRawls_2006_BC", carbonArgs),
+}
+
+def checkPTF(PTFOption, PTFType=None):
+
+    # Returns the registry entry of a PTF, optionally checking it is of the expected type
+    if PTFOption not in PTFs:
         log.error("PTF option not recognised: " + str(PTFOption))
+        sys.exit()
 
-    return PTF(PTFType, PTFPressures, PTFUnit, PTFFields)
+    PTFInfo = PTFs[PTFOption]
+
+    if PTFType is not None and PTFInfo.PTFType != PTFType:
+        log.error("PTF option " + str(PTFOption) + " is not a " + str(PTFType))
+        sys.exit()
+
+    return PTFInfo
+
+def getInputFields(PTFOption, carbContent):
+
+    # Returns the input fields of a PTF, with the carbon field set to OC or OM
+    return [carbContent if field == 'carbon' else field for field in checkPTF(PTFOption).inputFields]
+
+def getKernel(PTFOption):
+
+    # Returns the function that calculates the PTF
+    moduleName, functionName = checkPTF(PTFOption).kernel
+    module = __import__('NB_PTFs.lib.' + moduleName, fromlist=[functionName])
+
+    return getattr(module, functionName)
+
+def callKernel(PTFOption, args, options, function=None):
+
+    # Calls the kernel (or function) with the keyword arguments it takes from the options dictionary
+    kernelArgs = {}
+    for name in checkPTF(PTFOption).kernelArgs:
+        kernelArgs[name] = options[name]
+
+    if function is None:
+        function = getKernel(PTFOption)
+
+    return function(*args, **kernelArgs)
+
+def getResultNames(PTFOption):
+
+    # Names of the results returned by the kernel of a PTF
+    PTFInfo = checkPTF(PTFOption)
+
+    if PTFInfo.PTFType == "vgPTF":
+        return vgResults
+
+    return PTFInfo.PTFFields
+
+def runReference(PTFOption, args, options):
+
+    '''
+    Calculates a PTF through its reference path: its per-record function in
+    point_PTFs, vg_reference, bc_reference or ksat_reference
+    '''
+
+    PTFInfo = checkPTF(PTFOption)
+    moduleName = referenceModules[PTFInfo.PTFType]
+    module = __import__('NB_PTFs.lib.' + moduleName, fromlist=[moduleName])
+
+    # The reference functions of the other PTFs take the arguments of their kernels
+    if PTFInfo.PTFType != "pointPTF":
+        return callKernel(PTFOption, args, options, getattr(module, PTFInfo.kernel[1]))
+
+    function = getattr(module, referenceFunctions.get(PTFOption, PTFOption))
+
+    # The per-record functions take some of these arguments, in their own order
+    values = {'outputFolder': args[0], 'outputTable': args[1], 'PTFOption': PTFOption,
+              'carbonConFactor': options['carbonConFactor'], 'carbContent': options['carbContent']}
+
+    code = function.__code__
+    return function(*[values[name] for name in code.co_varnames[0:code.co_argcount]])
+
+def runKernel(PTFOption, args, options):
+
+    '''
+    Calls the kernel of a PTF with the positional arguments of its PTF type,
+    plus the keyword arguments it takes from the options dictionary.
+    If crossCheck is set in the user settings, the results of a sample of the
+    records are compared with those of the reference path of the PTF.
+    '''
+
+    # Table (or block) the PTF is run on, for the stage timings and the cross-check
+    tableIndex = None
+    for i in range(0, len(args)):
+        if hasattr(args[i], 'numRecords'):
+            tableIndex = i
+            break
+
+    records = args[tableIndex].numRecords if tableIndex is not None else None
+
+    with metrics.stage('compute', records):
+        results = callKernel(PTFOption, args, options)
+
+    if tableIndex is not None and cross_check.getSampleSize() > 0:
+        with metrics.stage('crossCheck'):
+            cross_check.crossCheck(PTFOption, getResultNames(PTFOption), results, args, tableIndex,
+                                   lambda sampleArgs: runReference(PTFOption, sampleArgs, options))
+
+    return results
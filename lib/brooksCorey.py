@@ -1,235 +1,152 @@
-import arcpy
 import os
 import sys
 import csv
+import numpy as np
 
 from NB_PTFs.lib.external import six # Python 2/3 compatibility module
 import configuration
 import NB_PTFs.lib.log as log
 import NB_PTFs.lib.common as common
+import NB_PTFs.lib.plot_pool as plot_pool
+import NB_PTFs.lib.metrics as metrics
+import NB_PTFs.lib.validation as validation
 
 from NB_PTFs.lib.refresh_modules import refresh_modules
-refresh_modules([log, common])
+refresh_modules([log, common, plot_pool, metrics, validation])
+
+# Value of lambda_BC for soils where the Brooks-Corey parameters could not be calculated
+invalidLambda = -9999
 
 def calcBrooksCoreyFXN(pressure, hb_BC, theta_r, theta_s, lambda_BC):
 
-    # log.info('DEBUG: pressure: ' + str(pressure))
-    # log.info('DEBUG: hb_BC: ' + str(hb_BC))
-    # log.info('DEBUG: theta_r: ' + str(theta_r))
-    # log.info('DEBUG: theta_s: ' + str(theta_s))
-    # log.info('DEBUG: lambda_BC: ' + str(lambda_BC))
+    # Calculate the WC @ pressure using Brooks-Corey for one soil
+    # WC is theta_s if pressure is less than hb_BC
+    return list(calcBrooksCoreyMatrix(pressure, [hb_BC], [theta_r], [theta_s], [lambda_BC])[0])
 
-    bcArray = []
+def calcBrooksCoreyMatrix(pressures, hb_BC, theta_r, theta_s, lambda_BC):
 
-    for i in range(0, len(pressure)):
+    '''
+    Calculates the WC using Brooks-Corey for N soils at P pressures, returned as an (N x P) matrix.
+    Soils with an invalid lambda (-9999) are masked and get -9999 at every pressure.
+    '''
 
-        pressureVal = pressure[i]
+    h = np.asarray(pressures, dtype=np.float64).reshape(1, -1)
+    hb_BC = np.asarray(hb_BC, dtype=np.float64).reshape(-1, 1)
+    theta_r = np.asarray(theta_r, dtype=np.float64).reshape(-1, 1)
+    theta_s = np.asarray(theta_s, dtype=np.float64).reshape(-1, 1)
+    lambda_BC = np.asarray(lambda_BC, dtype=np.float64).reshape(-1, 1)
 
-        # Calculate the WC @ pressure using Brooks-Corey
-        if float(pressure[i]) < float(hb_BC):
-            # if pressure is less than to hb_BC
-            bc_WC = theta_s
-            bcArray.append(bc_WC)
+    invalid = (lambda_BC == invalidLambda)
 
-        else:
-            # if pressure is greater than hb_BC
-            # bc_WC = theta_r + (((theta_s - theta_r) * (hb_BC ** lambda_BC)) / (pressure[i] ** lambda_BC))
-            
-            # if pressure is greater than hb_BC
-            # bc_WC = theta_r + ((theta_s - theta_r) * (hb_BC / float(pressureVal)) ** lambda_BC)
-            # bc_WC = theta_r + (theta_s - theta_r) * (hb_BC / float(pressureVal) ** lambda_BC)
+    # Pressures below the bubbling pressure are not evaluated by the power law
+    with np.errstate(divide='ignore', invalid='ignore', over='ignore'):
+        bc_WC = theta_r + (theta_s - theta_r) * (hb_BC / h) ** lambda_BC
 
-            bc_WC = theta_r + (theta_s - theta_r) * (hb_BC / float(pressureVal)) ** lambda_BC
+    bc_WC = np.where(h < hb_BC, theta_s, bc_WC)
+    bc_WC = np.where(invalid, float(invalidLambda), bc_WC)
 
-            bcArray.append(bc_WC)
+    return bc_WC
 
-    return bcArray
+def calcBrooksCoreyInverse(WC, hb_BC, theta_r, theta_s, lambda_BC):
 
-def writeBCParams(outputShp, warning, WC_res, WC_sat, lambda_BC, hb_BC):
+    '''
+    Pressure h(theta) at which N soils reach the water contents WC, in closed form, as an (N x T) matrix.
+    Water contents at or above theta_s give 0 (the soil is saturated up to hb_BC), those at or below
+    theta_r are never reached (NaN). Soils with an invalid lambda (-9999) get -9999.
+    '''
 
-    # Write BC Params to shapefile
+    WC = np.asarray(WC, dtype=np.float64)
+    hb_BC = np.asarray(hb_BC, dtype=np.float64).reshape(-1, 1)
+    theta_r = np.asarray(theta_r, dtype=np.float64).reshape(-1, 1)
+    theta_s = np.asarray(theta_s, dtype=np.float64).reshape(-1, 1)
+    lambda_BC = np.asarray(lambda_BC, dtype=np.float64).reshape(-1, 1)
 
-    # Add fields
-    arcpy.AddField_management(outputShp, "warning", "TEXT")
-    arcpy.AddField_management(outputShp, "WC_res", "DOUBLE", 10, 6)
-    arcpy.AddField_management(outputShp, "WC_sat_BC", "DOUBLE", 10, 6)
-    arcpy.AddField_management(outputShp, "lambda_BC", "DOUBLE", 10, 6)
-    arcpy.AddField_management(outputShp, "hb_BC", "DOUBLE", 10, 6)
+    if WC.ndim < 2:
+        WC = WC.reshape(1, -1)
 
-    outputFields = ["warning", "WC_res", "WC_sat_BC", "lambda_BC", "hb_BC"]
+    invalid = (lambda_BC == invalidLambda)
+
+    with np.errstate(divide='ignore', invalid='ignore', over='ignore'):
+        Se = (WC - theta_r) / (theta_s - theta_r)
+        h = hb_BC * np.minimum(Se, 1.0) ** (-1.0 / lambda_BC)
+
+    h = np.where(Se >= 1.0, 0.0, h)
+    h = np.where(Se > 0.0, h, np.nan)
+    h = np.where(invalid, float(invalidLambda), h)
 
-    recordNum = 0
-    with arcpy.da.UpdateCursor(outputShp, outputFields) as cursor:
-        for row in cursor:
-            row[0] = warning[recordNum]
-            row[1] = WC_res[recordNum]
-            row[2] = WC_sat[recordNum]
-            row[3] = lambda_BC[recordNum]
-            row[4] = hb_BC[recordNum]
+    return h
 
-            cursor.updateRow(row)
-            recordNum += 1
+def writeBCParams(outputTable, warning, WC_res, WC_sat, lambda_BC, hb_BC):
 
-def plotBrooksCorey(outputFolder, WC_resArray, WC_satArray, hbArray, lambdaArray, nameArray, fcValue, sicValue, pwpValue):
+    # Write BC Params to shapefile
+    outputFields = ["warning", "WC_res", "WC_sat_BC", "lambda_BC", "hb_BC"]
+    outputTable.writeColumns(outputFields, [warning, WC_res, WC_sat, lambda_BC, hb_BC])
+
+def plotBrooksCorey(outputFolder, WC_resArray, WC_satArray, hbArray, lambdaArray, nameArray, fcValue, sicValue, pwpValue, firstBlock=True):
     # Create Brooks-Corey plots
-    import matplotlib.pyplot as plt
-    import numpy as np
 
     # Check what unit the user wants to output
     PTFUnit = common.getInputValue(outputFolder, 'Pressure_units_plot')
+    pressureUnit, unitMult = plot_pool.getPlotUnit(PTFUnit)
 
     # Check what axis was chosen
     AxisChoice = common.getInputValue(outputFolder, 'Plot_axis')
+    swapAxes = plot_pool.checkAxisChoice(AxisChoice)
+
+    # Check for any soils that we were not able to calculate BC parameters for (lambda_BC == -9999)
+    invalid = np.asarray(lambdaArray) == invalidLambda
 
-    # Check for any soils that we were not able to calculate BC parameters for    
-    errors = []
-    for i in range(0, len(lambdaArray)):
-        if lambdaArray[i] == -9999:
-            log.warning('Invalid lambda found for ' + str(nameArray[i]))
-            errors.append(i)
+    validator = validation.Validator(nameArray)
+    validator.addCount('an invalid lambda', invalid)
+    validator.summarise()
 
-    # Define output folder for CSVs
-    outFolder = os.path.join(outputFolder, 'BC_waterContents')
-    if not os.path.exists(outFolder):
-        os.mkdir(outFolder)
+    validSoils = np.flatnonzero(~invalid)
+
+    # Calculate WC over the pressure vector for all soils at once
+    psi_kPa = np.linspace(0.0, 1500.0, 1501)
+    with metrics.stage('compute', len(nameArray)):
+        bc_WCMatrix = calcBrooksCoreyMatrix(psi_kPa, hbArray, WC_resArray, WC_satArray, lambdaArray)
+
+    # Water contents of the valid soils in one file (curveExport in the user settings)
+    with metrics.stage('write', len(validSoils)):
+        common.writeCurves(outputFolder, 'BC_waterContents', np.asarray(nameArray, dtype=object)[validSoils], psi_kPa,
+                           bc_WCMatrix[validSoils], 'Pressures_kPa', 'WaterContents', append=not firstBlock)
+
+    # Only the soils of the first block are plotted in the chunked mode
+    if not firstBlock:
+        return
+
+    # Convert the pressures to negative for plotting
+    psi_neg = -unitMult * psi_kPa
+    thresholds = plot_pool.thresholdLines(fcValue, sicValue, pwpValue, -unitMult)
+
+    soils = plot_pool.capSoils(validSoils)
+    jobs = []
 
     ################################
     ### Plot 0: individual plots ###
     ################################
 
-    # Plot 0: pressure on the y-axis and water content on the x-axis
-    for i in [x for x in range(0, len(nameArray)) if x not in errors]:
+    for i in soils:
 
         outName = 'bc_' + str(nameArray[i]) + '.png'
-        outPath = os.path.join(outputFolder, outName)
         title = 'Brooks-Corey plot for ' + str(nameArray[i])
 
-        # Set pressure vector
-        psi_kPa = np.linspace(0.0, 1500.0, 1501)
-
-        # Calculate WC over that pressure vector
-        bc_WC = calcBrooksCoreyFXN(psi_kPa, hbArray[i], WC_resArray[i], WC_satArray[i], lambdaArray[i])
-        
-        common.writeWCCSV(outFolder, nameArray[i], psi_kPa, bc_WC, 'Pressures_kPa', 'WaterContents')
-
-        ## Figure out what to do about multipliers
-        if PTFUnit == 'kPa':
-            pressureUnit = 'kPa'
-            psi_plot = psi_kPa
-
-            fc_plot = float(fcValue) * -1.0
-            sic_plot = float(sicValue) * -1.0
-            pwp_plot = float(pwpValue) * -1.0
-
-        elif PTFUnit == 'cm':
-            pressureUnit = 'cm'
-            psi_plot = 10.0 * psi_kPa
-
-            fc_plot = float(fcValue) * -10.0
-            sic_plot = float(sicValue) * -10.0
-            pwp_plot = float(pwpValue) * -10.0
-
-        elif PTFUnit == 'm':
-            pressureUnit = 'm'
-            psi_plot = 0.1 * psi_kPa
-
-            fc_plot = float(fcValue) * -0.1
-            sic_plot = float(sicValue) * -0.1
-            pwp_plot = float(pwpValue) * -0.1
-
-        # Convert psi_plot to negative for plotting
-        psi_neg = -1.0 * psi_plot
-
-        if AxisChoice == 'Y-axis':
-            plt.plot(psi_neg, bc_WC, label=str(nameArray[i]))        
-            plt.xscale('symlog')
-            plt.axvline(x=fc_plot, color='g', linestyle='dashed', label='FC')
-            plt.axvline(x=sic_plot, color='m', linestyle='dashed', label='SIC')
-            plt.axvline(x=pwp_plot, color='r', linestyle='dashed', label='PWP')
-            plt.legend(loc="best")
-            plt.title(title)
-            plt.xlabel('Pressure (' + str(pressureUnit) + ')')
-            plt.ylabel('Volumetric water content')
-            plt.savefig(outPath, transparent=False)
-            plt.close()
-            log.info('Plot created for soil ' + str(nameArray[i]))
-
-        elif AxisChoice == 'X-axis':
-            plt.plot(bc_WC, psi_neg, label=str(nameArray[i]))        
-            plt.yscale('symlog')
-            plt.axhline(y=fc_plot, color='g', linestyle='dashed', label='FC')
-            plt.axhline(y=sic_plot, color='m', linestyle='dashed', label='SIC')
-            plt.axhline(y=pwp_plot, color='r', linestyle='dashed', label='PWP')
-            plt.legend(loc="best")
-            plt.title(title)
-            plt.ylabel('Pressure (' + str(pressureUnit) + ')')
-            plt.xlabel('Volumetric water content')
-            plt.savefig(outPath, transparent=False)
-            plt.close()
-            log.info('Plot created for soil ' + str(nameArray[i]))
-
-        else:
-            log.error('Invalid choice for axis plotting, please select Y-axis or X-axis')
-            sys.exit()
+        jobs.append(plot_pool.curveJob(os.path.join(outputFolder, outName), title,
+                                       [(psi_neg, bc_WCMatrix[i], str(nameArray[i]))],
+                                       'Pressure (' + str(pressureUnit) + ')', 'Volumetric water content',
+                                       xscale='symlog', lines=thresholds, legend={'loc': 'best'},
+                                       swapAxes=swapAxes, message='Plot created for soil ' + str(nameArray[i])))
 
     #########################
     ### Plot 1: all soils ###
     #########################
 
-    outPath = os.path.join(outputFolder, 'plotBC_logPressure.png')
-    title = 'Brooks-Corey plots of ' + str(len(nameArray)) + ' soils (log scale)'
-
-    # Define pressure vector 
-    psi_kPa = np.linspace(0.0, 1500.0, 1501)
+    jobs.append(plot_pool.curveJob(os.path.join(outputFolder, 'plotBC_logPressure.png'),
+                                   'Brooks-Corey plots of ' + str(len(soils)) + ' soils (log scale)',
+                                   [(psi_neg, bc_WCMatrix[i], str(nameArray[i])) for i in soils],
+                                   'Pressure (' + str(pressureUnit) + ')', 'Water content',
+                                   xscale='symlog', lines=thresholds, legend={'ncol': 2, 'fontsize': 12, 'loc': 'best'},
+                                   swapAxes=swapAxes, message='Plot created with water content on the ' + ('x-axis' if swapAxes else 'y-axis')))
 
-    for i in [x for x in range(0, len(nameArray)) if x not in errors]:
-
-        # Calculate WC over pressure vector 
-        bc_WC = calcBrooksCoreyFXN(psi_kPa, hbArray[i], WC_resArray[i], WC_satArray[i], lambdaArray[i])
-        
-        if PTFUnit == 'kPa':
-            pressureUnit = 'kPa'
-            psi_plot = psi_kPa
-
-        elif PTFUnit == 'cm':
-            pressureUnit = 'cm'
-            psi_plot = 10.0 * psi_kPa
-
-        elif PTFUnit == 'm':
-            pressureUnit = 'm'
-            psi_plot = 0.1 * psi_kPa
-
-        # Convert psi to negative for plotting purposes
-        psi_neg = -1.0 * psi_plot
-
-        plt.plot(psi_neg, bc_WC, label=str(nameArray[i]))
-    
-    if AxisChoice == 'Y-axis':
-        plt.xscale('symlog')
-        plt.title(title)
-        plt.axvline(x=fc_plot, color='g', linestyle='dashed', label='FC')
-        plt.axvline(x=sic_plot, color='m', linestyle='dashed', label='SIC')
-        plt.axvline(x=pwp_plot, color='r', linestyle='dashed', label='PWP')
-        plt.ylabel('Water content')
-        plt.xlabel('Pressure (' + str(pressureUnit) + ')')
-        plt.legend(ncol=2, fontsize=12, loc="best")
-        plt.savefig(outPath, transparent=False)
-        plt.close()
-        log.info('Plot created with water content on the y-axis')
-
-    elif AxisChoice == 'X-axis':
-        plt.yscale('symlog')
-        plt.title(title)
-        plt.axhline(y=fc_plot, color='g', linestyle='dashed', label='FC')
-        plt.axhline(y=sic_plot, color='m', linestyle='dashed', label='SIC')
-        plt.axhline(y=pwp_plot, color='r', linestyle='dashed', label='PWP')
-        plt.xlabel('Water content')
-        plt.ylabel('Pressure (' + str(pressureUnit) + ')')
-        plt.legend(ncol=2, fontsize=12, loc="best")
-        plt.savefig(outPath, transparent=False)
-        plt.close()
-        log.info('Plot created with water content on the y-axis')
-
-    else:
-        log.error('Invalid choice for axis plotting, please select Y-axis or X-axis')
-        sys.exit()
\ No newline at end of file
+    plot_pool.renderPlots(jobs)
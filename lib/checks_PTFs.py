@@ -6,7 +6,6 @@ import sys
 import os
 import configuration
 import numpy as np
-import arcpy
 import math
 import NB_PTFs.lib.log as log
 import NB_PTFs.lib.common as common
@@ -162,6 +161,8 @@ def checkNegValue(nameValue, value, nameSoil):
 
 def pressureFields(outputFolder, inputShp, fieldFC, fieldSIC, fieldPWP):
 
+    import arcpy
+
     # Check PTF information
     PTFxml = os.path.join(outputFolder, "ptfinfo.xml")
     PTFOption = common.readXML(PTFxml, 'VGOption')
@@ -1,6 +1,6 @@
-import arcpy
 import os
 import sys
+import csv
 import shutil
 import datetime # For writing current date/time to inputs.xml
 import time # For logging warnings that are very close together
@@ -10,7 +10,7 @@ from NB_PTFs.lib.external import six # Python 2/3 compatibility module
 import configuration
 import NB_PTFs.lib.log as log
 
-from NB_PTFs.lib.refresh_modules import refresh_modules
+from NB_PTFs.lib.refresh_modules import refresh_modules, getUserSetting
 refresh_modules([log])
 
 def strToBool(s):
@@ -26,6 +26,7 @@ def strToBool(s):
 
 def runSystemChecks(folder=None, rerun=False):
 
+    import arcpy
     import NB_PTFs.lib.progress as progress
 
     # Set overwrite output
@@ -56,20 +57,7 @@ def runSystemChecks(folder=None, rerun=False):
         if scratchGDB is None:
 
             # Set scratch path from values in user settings file if values present
-            scratchPath = None
-            try:
-                if os.path.exists(configuration.userSettingsFile):
-
-                    tree = ET.parse(configuration.userSettingsFile)
-                    root = tree.getroot()
-                    scratchPath = root.find("scratchPath").text
-
-            except Exception:
-                pass # If any errors occur, ignore them. Just use the default scratch path.
-
-            # Set scratch path if needed
-            if scratchPath is None:
-                scratchPath = configuration.scratchPath
+            scratchPath = getUserSetting("scratchPath", configuration.scratchPath)
 
             # Create scratch path folder
             if not os.path.exists(scratchPath):
@@ -157,6 +145,8 @@ def paramsAsText(params):
 
 def listFeatureLayers(localVars):
 
+    import arcpy
+
     layersToDelete = []
     for v in localVars:
         if isinstance(localVars[v], arcpy.mapping.Layer):
@@ -221,7 +211,7 @@ def readXML(XMLfile, nodeNameList, showErrors=True):
             tree = ET.parse(XMLfile)
         except IOError:
             if showErrors:
-                arcpy.AddError("XML File \"" + XMLfile + "\" does not exist or cannot be opened")
+                log.error("XML File \"" + XMLfile + "\" does not exist or cannot be opened")
             raise
 
         root = tree.getroot()
@@ -250,7 +240,7 @@ def readXML(XMLfile, nodeNameList, showErrors=True):
 
     except Exception:
         if showErrors:
-            arcpy.AddError("Data not read from XML file")
+            log.error("Data not read from XML file")
         raise
 
 def writeXML(XMLfile, nodeNameValueList):
@@ -392,6 +382,11 @@ def logWarnings(folder, warningMsg):
 def CheckField(checkfile, fieldname):
 
     try:
+        # Tables opened with table_io are checked directly
+        if hasattr(checkfile, 'hasField'):
+            return int(checkfile.hasField(fieldname))
+
+        import arcpy
         List = arcpy.ListFields(checkfile, fieldname)
         if len(List) == 1:
             exist = 1
@@ -400,11 +395,13 @@ def CheckField(checkfile, fieldname):
         return exist
 
     except Exception:
-        log.error("Error occurred while checking if field " + fieldname + " exists in file " + checkfile)
+        log.error("Error occurred while checking if field " + fieldname + " exists in file " + str(checkfile))
         raise
 
 def CleanFields(checkfile, fieldstokeep):
 
+    import arcpy
+
     try:
         desc = arcpy.Describe(checkfile)
         List = arcpy.ListFields(checkfile)
@@ -427,18 +424,6 @@ def CleanFields(checkfile, fieldstokeep):
         raise
 
 
-def writeFields(outputShp, fieldArray):
-
-    # Writes fields to the outputShp
-
-    # Write warning fields
-    arcpy.AddField_management(outputShp, "warning", "TEXT")
-
-    # Write the rest of the fields (1 to end)
-
-    for x in range(1, len(fieldArray)):
-        arcpy.AddField_management(outputShp, fieldArray[x], "DOUBLE", 10, 6)
-
 def getInputValue(folder, paramName):
  
     inputsXML = os.path.join(folder, 'inputs.xml')
@@ -450,90 +435,95 @@ def getInputValue(folder, paramName):
  
     return inputValue
 
-def writeWarning(outputShp, warningArray):
+def writeWarning(outputTable, warningArray):
 
     # Write the warnings to output shapefile
-    arcpy.AddField_management(outputShp, "warning", "TEXT")
+    outputTable.writeColumns(["warning"], [warningArray])
 
-    outputFields = ["warning"]
-    
-    recordNum = 0
-    with arcpy.da.UpdateCursor(outputShp, outputFields) as cursor:
-        for row in cursor:
-            row[0] = warningArray[recordNum]
+def getOIDField(shapefile):
 
-            cursor.updateRow(row)
-            recordNum += 1
+    # Tables opened with table_io know their own OID field
+    if hasattr(shapefile, 'oidField'):
+        return shapefile.oidField
 
-def getOIDField(shapefile):
+    import arcpy
     OID = str(arcpy.Describe(shapefile).oidFieldName)
 
     return OID
 
-def writeOutputWC(outputShp, WC_1kPaArray, WC_3kPaArray, WC_10kPaArray, WC_33kPaArray, WC_100kPaArray, WC_200kPaArray, WC_1000kPaArray, WC_1500kPaArray):
+def writeOutputWC(outputTable, WC_1kPaArray, WC_3kPaArray, WC_10kPaArray, WC_33kPaArray, WC_100kPaArray, WC_200kPaArray, WC_1000kPaArray, WC_1500kPaArray):
     # Write outputs of VG or BC equations to output shapefile
 
-    # Add fields
-    arcpy.AddField_management(outputShp, "WC_1kPa", "DOUBLE", 10, 6)
-    arcpy.AddField_management(outputShp, "WC_3kPa", "DOUBLE", 10, 6)
-    arcpy.AddField_management(outputShp, "WC_10kPa", "DOUBLE", 10, 6)
-    arcpy.AddField_management(outputShp, "WC_33kPa", "DOUBLE", 10, 6)
-    arcpy.AddField_management(outputShp, "WC_100kPa", "DOUBLE", 10, 6)
-    arcpy.AddField_management(outputShp, "WC_200kPa", "DOUBLE", 10, 6)
-    arcpy.AddField_management(outputShp, "WC_1000kPa", "DOUBLE", 10, 6)
-    arcpy.AddField_management(outputShp, "WC_1500kPa", "DOUBLE", 10, 6)
-
-    outputFields = ["WC_1kPa", "WC_3kPa", "WC_10kPa", "WC_33kPa", "WC_100kPa", "WC_200kPa", "WC_1000kPa", "WC_1500kpa"]
-
-    recordNum = 0
-    with arcpy.da.UpdateCursor(outputShp, outputFields) as cursor:
-        for row in cursor:
-            row[0] = WC_1kPaArray[recordNum]
-            row[1] = WC_3kPaArray[recordNum]
-            row[2] = WC_10kPaArray[recordNum]
-            row[3] = WC_33kPaArray[recordNum]
-            row[4] = WC_100kPaArray[recordNum]
-            row[5] = WC_200kPaArray[recordNum]
-            row[6] = WC_1000kPaArray[recordNum]
-            row[7] = WC_1500kPaArray[recordNum]
-
-            cursor.updateRow(row)
-            recordNum += 1
+    outputFields = ["WC_1kPa", "WC_3kPa", "WC_10kPa", "WC_33kPa", "WC_100kPa", "WC_200kPa", "WC_1000kPa", "WC_1500kPa"]
+    outputColumns = [WC_1kPaArray, WC_3kPaArray, WC_10kPaArray, WC_33kPaArray, WC_100kPaArray, WC_200kPaArray, WC_1000kPaArray, WC_1500kPaArray]
 
-    log.info("Water content at default pressures written to output shapefile")
+    outputTable.writeColumns(outputFields, outputColumns)
 
-def writeOutputCriticalWC(outputShp, wc_sat, wc_fc, wc_sic, wc_pwp, wc_DW, wc_RAW, wc_NRAW, wc_PAW):
+    log.info("Water content at default pressures written to output shapefile")
 
-    # Add fields
-    arcpy.AddField_management(outputShp, "wc_satCalc", "DOUBLE", 10, 6)
-    arcpy.AddField_management(outputShp, "wc_fcCalc", "DOUBLE", 10, 6)
-    arcpy.AddField_management(outputShp, "wc_sicCalc", "DOUBLE", 10, 6)
-    arcpy.AddField_management(outputShp, "wc_pwpCalc", "DOUBLE", 10, 6)
-    arcpy.AddField_management(outputShp, "wc_DW", "DOUBLE", 10, 6)
-    arcpy.AddField_management(outputShp, "wc_RAW", "DOUBLE", 10, 6)
-    arcpy.AddField_management(outputShp, "wc_NRAW", "DOUBLE", 10, 6)
-    arcpy.AddField_management(outputShp, "wc_PAW", "DOUBLE", 10, 6)
+def writeOutputCriticalWC(outputTable, wc_sat, wc_fc, wc_sic, wc_pwp, wc_DW, wc_RAW, wc_NRAW, wc_PAW):
 
     wcFields = ["wc_satCalc", "wc_fcCalc", "wc_sicCalc", "wc_pwpCalc", "wc_DW", "wc_RAW", "wc_NRAW", "wc_PAW"]
-
-    recordNum = 0
-    with arcpy.da.UpdateCursor(outputShp, wcFields) as cursor:
-        for row in cursor:
-            row[0] = wc_sat[recordNum]
-            row[1] = wc_fc[recordNum]
-            row[2] = wc_sic[recordNum]
-            row[3] = wc_pwp[recordNum]
-            row[4] = wc_DW[recordNum]
-            row[5] = wc_RAW[recordNum]
-            row[6] = wc_NRAW[recordNum]
-            row[7] = wc_PAW[recordNum]
-
-            cursor.updateRow(row)
-            recordNum += 1
+    outputTable.writeColumns(wcFields, [wc_sat, wc_fc, wc_sic, wc_pwp, wc_DW, wc_RAW, wc_NRAW, wc_PAW])
 
     log.info('Water contents for critical thresholds written to output shapefile')
 
-def writeWCCSV(outputFolder, soilName, pressureArray, WCArray, pressureTitle, WCTitle):
+def getNumberListSetting(name):
+
+    # Numbers separated by commas in the user settings, or None if the setting is not set
+    setting = getUserSetting(name)
+
+    if setting is None or str(setting).strip() == '':
+        return None
+
+    try:
+        return [float(value) for value in str(setting).replace(';', ',').split(',') if value.strip() != '']
+    except ValueError:
+        log.error('User setting ' + str(name) + ' not recognised: ' + str(setting) + ', please give numbers separated by commas')
+        sys.exit()
+
+def fieldNumber(value):
+
+    # A number as text for a field name: dBASE, shapefile and geodatabase names only take letters, digits and _
+    return ('%g' % value).replace('.', '_').replace('-', 'm').replace('+', '')
+
+def getInverseTargets(wc_fc, wc_pwp):
+
+    '''
+    Water contents at which the pressure is calculated, from targetWC (water contents) and
+    PAWDepletion (percentages of the plant available water used up) in the user settings.
+    Returns the output field names and an (N x T) matrix of target water contents, or ([], None).
+    '''
+
+    import numpy as np
+
+    wc_fc = np.asarray(wc_fc, dtype=np.float64).reshape(-1, 1)
+    wc_pwp = np.asarray(wc_pwp, dtype=np.float64).reshape(-1, 1)
+
+    fields = []
+    targets = []
+
+    # Field names such as h_WC20 (targetWC 0.2, as a percentage) and h_PAW12_5 (PAWDepletion 12.5)
+    for value in getNumberListSetting("targetWC") or []:
+        fields.append('h_WC' + fieldNumber(value * 100.0))
+        targets.append(np.full(wc_fc.shape, value))
+
+    for depletion in getNumberListSetting("PAWDepletion") or []:
+        fields.append('h_PAW' + fieldNumber(depletion))
+        targets.append(wc_fc - (depletion / 100.0) * (wc_fc - wc_pwp))
+
+    if not fields:
+        return [], None
+
+    return fields, np.hstack(targets)
+
+def writeOutputInverse(outputTable, fields, hMatrix):
+
+    outputTable.writeColumns(fields, [hMatrix[:, i] for i in range(0, len(fields))])
+
+    log.info('Pressures at the target water contents written to output shapefile')
+
+def writeWCCSV(outputFolder, soilName, pressureArray, WCArray, pressureTitle, WCTitle, showMessage=True):
     import csv
 
     # This function writes a CSV containing pressure and WC
@@ -560,7 +550,186 @@ def writeWCCSV(outputFolder, soilName, pressureArray, WCArray, pressureTitle, WC
             row = outArray[i]
             writer.writerow(row)
 
-        msg = 'Output CSV with water contents and pressure saved to: ' + str(outCSV)
-        log.info(msg)
+        if showMessage:
+            msg = 'Output CSV with water contents and pressure saved to: ' + str(outCSV)
+            log.info(msg)
+
+    csv_file.close()
+
+# Layouts of the curve export: one file with a row per soil (wide), one file with a row per soil and
+# pressure (long), one compressed numpy file (npz), or one CSV per soil in a folder (perSoil)
+curveExportFormats = ['wide', 'long', 'npz', 'perSoil']
+
+# Values formatted at a time when writing the curves to a CSV
+curveBlockValues = 1000000
+
+# Soils whose 0-1500 kPa curves are held in memory at a time (about 50 MB per curve matrix);
+# the tools that calculate the curves process larger tables in blocks of this many soils
+maxCurveSoils = 4000
+
+# npz curve files being written in blocks: path -> part files and layout, zipped by flushCurves()
+pendingCurves = {}
+
+# Date of the entries of the npz curve files, so that the same curves give the same file
+npzEntryTime = 946684800
+
+def openCSV(path, mode='w'):
+
+    # Opens a file for csv.writer (in binary mode in Python 2)
+    if six.PY2:
+        return open(path, mode + 'b')
+
+    return open(path, mode, newline='')
+
+def getCurveExportFormat():
+
+    # Set by curveExport in the user settings, the default is the wide CSV
+    exportFormat = getUserSetting("curveExport", "wide")
+
+    if exportFormat not in curveExportFormats:
+        log.warning('Curve export format ' + str(exportFormat) + ' not recognised, using wide')
+        exportFormat = 'wide'
+
+    return exportFormat
+
+def writeCurves(outputFolder, baseName, nameArray, pressureArray, valueMatrix, pressureTitle, valueTitle, exportFormat=None, append=False):
+
+    '''
+    Writes the curves of all soils (valueMatrix, soils x pressures) in one go.
+    The consolidated files are named after baseName (e.g. VG_waterContents.csv),
+    and the per-soil CSVs are written to the folder baseName.
+    With append, the curves are added to the files of the earlier blocks of a chunked run.
+    '''
+
+    import numpy as np
+
+    if exportFormat is None:
+        exportFormat = getCurveExportFormat()
+
+    names = np.array([str(name) for name in nameArray], dtype=object)
+    pressures = np.asarray(pressureArray, dtype=np.float64)
+    values = np.asarray(valueMatrix, dtype=np.float64).reshape(len(names), len(pressures))
+
+    # Soils formatted and written at a time by the CSV layouts
+    blockSoils = max(1, curveBlockValues // max(1, len(pressures)))
+
+    if exportFormat == 'perSoil':
+
+        outFolder = os.path.join(outputFolder, baseName)
+        if not os.path.exists(outFolder):
+            os.mkdir(outFolder)
+
+        for i in range(0, len(names)):
+            writeWCCSV(outFolder, names[i], pressures, values[i], pressureTitle, valueTitle, showMessage=False)
+
+        outPath = outFolder
+
+    elif exportFormat == 'npz':
+
+        # The values are streamed to a part file and zipped once by flushCurves(), so the memory used is bounded by the block
+        outPath = os.path.join(outputFolder, baseName + '.npz')
+
+        if not append or outPath not in pendingCurves:
+            pendingCurves[outPath] = {'values': outPath + '.values.part', 'names': outPath + '.names.part', 'numSoils': 0,
+                                      'pressures': pressures, 'titles': [pressureTitle, valueTitle]}
+
+            for partPath in [pendingCurves[outPath]['values'], pendingCurves[outPath]['names']]:
+                open(partPath, 'wb').close()
+
+        part = pendingCurves[outPath]
+
+        with open(part['values'], 'ab') as outFile:
+            np.ascontiguousarray(values).tofile(outFile)
+
+        with openCSV(part['names'], 'a') as outFile:
+            csv.writer(outFile, lineterminator='\n').writerows([name] for name in names)
+
+        part['numSoils'] += len(names)
+
+    elif exportFormat == 'wide':
+
+        # soilname, then one column per pressure; written in blocks of soils to bound the memory used
+        outPath = os.path.join(outputFolder, baseName + '.csv')
+
+        with openCSV(outPath, 'a' if append else 'w') as outFile:
+            writer = csv.writer(outFile, lineterminator='\n')
+            if not append:
+                writer.writerow(['soilname'] + [valueTitle + '_' + ('%g' % pressure) for pressure in pressures])
+
+            for start in range(0, len(names), blockSoils):
+                stop = start + blockSoils
+                text = np.char.mod('%.10g', values[start:stop]).tolist()
+
+                writer.writerows([name] + row for name, row in zip(names[start:stop], text))
+
+    elif exportFormat == 'long':
+
+        # soilname, pressure, value; written in blocks of soils to bound the memory used
+        outPath = os.path.join(outputFolder, baseName + '_long.csv')
+        pressureText = np.char.mod('%.10g', pressures).tolist()
+
+        with openCSV(outPath, 'a' if append else 'w') as outFile:
+            writer = csv.writer(outFile, lineterminator='\n')
+            if not append:
+                writer.writerow(['soilname', pressureTitle, valueTitle])
+
+            for start in range(0, len(names), blockSoils):
+                stop = start + blockSoils
+                text = np.char.mod('%.10g', values[start:stop]).tolist()
+
+                for name, row in zip(names[start:stop], text):
+                    writer.writerows([name, pressure, value] for pressure, value in zip(pressureText, row))
+
+    else:
+        log.error('Curve export format not recognised: ' + str(exportFormat))
+        sys.exit()
+
+    log.info('Curves of ' + str(len(nameArray)) + ' soils saved to: ' + str(outPath))
+
+    return outPath
+
+def flushCurves():
+
+    '''
+    Zips the npz curve files written by writeCurves (soilname, pressure, values and titles arrays).
+    The values are copied from their part file in blocks rather than loaded.
+    '''
+
+    import zipfile
+    import numpy as np
+
+    for outPath in sorted(pendingCurves):
+        part = pendingCurves.pop(outPath)
+
+        with openCSV(part['names'], 'r') as inFile:
+            names = np.array([row[0] if row else '' for row in csv.reader(inFile)], dtype=six.text_type)
+
+        entries = [('soilname', names), ('pressure', part['pressures']), ('values', None),
+                   ('titles', np.array(part['titles'], dtype=six.text_type))]
+        entryPaths = []
+
+        for name, array in entries:
+            entryPath = outPath + '.' + name + '.npy'
+            entryPaths.append((name, entryPath))
+
+            if array is not None:
+                np.save(entryPath, array)
+                continue
+
+            # The header for all soils, then the values of the blocks in order
+            header = {'descr': np.lib.format.dtype_to_descr(np.dtype(np.float64)), 'fortran_order': False,
+                      'shape': (part['numSoils'], len(part['pressures']))}
+
+            with open(entryPath, 'wb') as outFile:
+                np.lib.format.write_array_header_1_0(outFile, header)
+
+                with open(part['values'], 'rb') as inFile:
+                    shutil.copyfileobj(inFile, outFile, 16 * 1024 * 1024)
+
+        with zipfile.ZipFile(outPath, 'w', zipfile.ZIP_DEFLATED, allowZip64=True) as zipFile:
+            for name, entryPath in entryPaths:
+                os.utime(entryPath, (npzEntryTime, npzEntryTime))
+                zipFile.write(entryPath, name + '.npy')
 
-    csv_file.close()
\ No newline at end of file
+        for partPath in [part['values'], part['names']] + [entryPath for name, entryPath in entryPaths]:
+            os.remove(partPath)
@@ -0,0 +1,238 @@
+'''
+cross_check: compares the results of the PTFs with those of their reference path
+
+With crossCheck set in the user settings (a number of records), every PTF run
+is repeated on a random sample of that many records of the table (or of each
+block in the chunked mode) through the reference path of the PTF:
+
+- point-PTFs: the per-record functions of point_PTFs
+- van Genuchten, Brooks-Corey and Ksat PTFs: the per-record functions of
+  vg_reference, bc_reference and ksat_reference, as they were before the
+  kernels
+
+The maximum absolute and relative differences of each result are logged. A
+value differs if its difference is over crossCheckTolerance (1e-9 unless set
+in the user settings) both in absolute terms and relative to the reference
+value; text results (the warnings) differ if they are not the same. The tool
+stops with an error if any value differs.
+
+Records the reference cannot calculate are not compared. Records for which
+it returns a NaN or infinite value (e.g. the log of a zero carbon content)
+get NaN for all results, as in the PTFs, so the PTF should return NaN there.
+
+The reference path only logs errors, and the data checks it repeats are not
+added to the summary of the run.
+'''
+
+import sys
+import numpy as np
+import NB_PTFs.lib.log as log
+import NB_PTFs.lib.table_io as table_io
+import NB_PTFs.lib.validation as validation
+
+from NB_PTFs.lib.refresh_modules import refresh_modules, getUserSetting
+refresh_modules([log, table_io, validation])
+
+defaultTolerance = 1e-9
+
+# Differences listed for each result that differs
+maxListed = 10
+
+def getSampleSize():
+
+    # Records sampled for the cross-check, 0 if the cross-check is off
+    try:
+        return max(0, int(getUserSetting("crossCheck")))
+    except (TypeError, ValueError):
+        return 0
+
+def getTolerance():
+
+    try:
+        return float(getUserSetting("crossCheckTolerance"))
+    except (TypeError, ValueError):
+        return defaultTolerance
+
+def sampleRecords(numRecords, sampleSize, seed=0):
+
+    # Positions of the sampled records, in record order (the same sample for the same number of records)
+    if sampleSize >= numRecords:
+        return np.arange(numRecords)
+
+    rng = np.random.RandomState(seed)
+
+    # Drawn without replacement, so that sampleSize records are compared
+    return np.sort(rng.choice(numRecords, sampleSize, replace=False))
+
+def toValues(result):
+
+    # Numeric results as float arrays, text results as object arrays
+    values = np.asarray(result)
+
+    if values.dtype.kind in 'biuf':
+        return values.astype(np.float64)
+
+    return values.astype(object)
+
+def compareResult(fast, reference, tolerance):
+
+    '''
+    Compares one result of the sampled records.
+    Returns the maximum absolute and relative differences (None for text results)
+    and the positions of the values that differ.
+    '''
+
+    if fast.dtype.kind != 'f' or reference.dtype.kind != 'f':
+        differs = np.array([str(a) != str(b) for a, b in zip(fast, reference)], dtype=bool)
+        return None, None, np.nonzero(differs)[0]
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        absDiff = np.abs(fast - reference)
+        relDiff = absDiff / np.abs(reference)
+
+    # Values missing from both results are the same
+    bothNaN = np.isnan(fast) & np.isnan(reference)
+    absDiff[bothNaN] = 0.0
+    relDiff[bothNaN | (absDiff == 0.0)] = 0.0
+
+    differs = (absDiff > tolerance) & (relDiff > tolerance)
+    differs |= np.isnan(absDiff) & ~bothNaN
+
+    maxAbs = float(np.nanmax(absDiff)) if len(absDiff) else 0.0
+    maxRel = float(np.nanmax(relDiff)) if len(relDiff) else 0.0
+
+    return maxAbs, maxRel, np.nonzero(differs)[0]
+
+def setInvalid(results):
+
+    # As in the PTFs (validation.Validator.checkResults), records with a NaN or infinite result get NaN for all numeric results
+    numeric = [values for values in results if values.dtype.kind == 'f']
+
+    if not numeric:
+        return results
+
+    numRecords = len(numeric[0])
+    invalid = np.zeros(numRecords, dtype=bool)
+
+    for values in numeric:
+        invalid |= ~np.isfinite(values.reshape(numRecords, -1)).all(axis=1)
+
+    for values in numeric:
+        values[invalid] = np.nan
+
+    return results
+
+def runSample(runReference, args, tableIndex, indices):
+
+    # Results of the reference for the records at indices, which only logs errors (and no numpy warnings out of the domain of its equations)
+    sampleArgs = list(args)
+    sampleArgs[tableIndex] = table_io.TableSample(args[tableIndex], indices)
+
+    with log.quiet, np.errstate(divide='ignore', invalid='ignore', over='ignore'):
+        return runReference(sampleArgs)
+
+def runRecords(runReference, args, tableIndex, indices):
+
+    '''
+    Runs the reference for one record at a time.
+    Returns the indices of the records calculated, their results and the indices of the records not calculated.
+    '''
+
+    calculated = []
+    skipped = []
+    parts = []
+
+    for index in indices:
+        try:
+            parts.append(runSample(runReference, args, tableIndex, [index]))
+            calculated.append(index)
+
+        except Exception:
+            skipped.append(index)
+
+    if not parts:
+        return np.array(calculated, dtype=np.int64), None, skipped
+
+    results = [np.concatenate([toValues(part[i]) for part in parts]) for i in range(0, len(parts[0]))]
+
+    return np.array(calculated, dtype=np.int64), results, skipped
+
+def crossCheck(PTFOption, resultNames, results, args, tableIndex, runReference, sampleSize=None, tolerance=None):
+
+    '''
+    Repeats a PTF on a sample of the records of the table in args[tableIndex] with
+    runReference(sampleArgs) and compares its results with the results of the PTF.
+    Returns a list of (result name, maximum absolute difference, maximum relative difference).
+    '''
+
+    if sampleSize is None:
+        sampleSize = getSampleSize()
+
+    if tolerance is None:
+        tolerance = getTolerance()
+
+    table = args[tableIndex]
+
+    if sampleSize <= 0 or table.numRecords == 0:
+        return []
+
+    indices = sampleRecords(table.numRecords, sampleSize)
+
+    # The data checks of the sample are already in the summary of the run
+    heldCounts = validation.heldCounts
+    validation.holdSummaries()
+
+    try:
+        try:
+            referenceResults = runSample(runReference, args, tableIndex, indices)
+
+        except Exception as e:
+            # Records the reference cannot calculate (e.g. the log of a negative water content) are left out
+            indices, referenceResults, skipped = runRecords(runReference, args, tableIndex, indices)
+
+            record = table.readColumn(table.oidField)
+            log.warning('Cross-check of ' + str(PTFOption) + ': ' + str(len(skipped)) + ' records could not be calculated by the reference (' +
+                        str(e) + ') and are not compared: ' + ', '.join([str(record[j]) for j in skipped[0:maxListed]]))
+
+    finally:
+        validation.heldCounts = heldCounts
+
+    if referenceResults is None:
+        return []
+
+    if len(referenceResults) != len(results):
+        log.error('Cross-check of ' + str(PTFOption) + ': ' + str(len(results)) + ' results, ' +
+                  str(len(referenceResults)) + ' from the reference')
+        sys.exit()
+
+    referenceResults = setInvalid([toValues(result) for result in referenceResults])
+
+    record = np.asarray(table.readColumn(table.oidField))[indices]
+
+    differences = []
+    failed = []
+
+    for i in range(0, len(results)):
+        name = resultNames[i] if i < len(resultNames) else 'result ' + str(i + 1)
+
+        fast = toValues(results[i])[indices]
+        reference = toValues(referenceResults[i])
+
+        maxAbs, maxRel, differs = compareResult(fast, reference, tolerance)
+        differences.append((name, maxAbs, maxRel))
+
+        if maxAbs is not None:
+            log.info('Cross-check of ' + str(PTFOption) + ', ' + name + ': maximum difference ' +
+                     ('%.3g' % maxAbs) + ' (relative ' + ('%.3g' % maxRel) + ') over ' + str(len(indices)) + ' records')
+
+        if len(differs) > 0:
+            listed = ', '.join(['%s (%s, reference %s)' % (record[j], fast[j], reference[j]) for j in differs[0:maxListed]])
+            log.warning('Cross-check of ' + str(PTFOption) + ': ' + str(len(differs)) + ' records differ in ' + name + ': ' + listed)
+            failed.append(name)
+
+    if failed:
+        log.error('Cross-check of ' + str(PTFOption) + ' failed for ' + ', '.join(failed) +
+                  ': the results differ from the reference by more than ' + str(tolerance))
+        sys.exit()
+
+    return differences
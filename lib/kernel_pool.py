@@ -0,0 +1,219 @@
+'''
+kernel_pool: runs the compute stage of the PTFs over record blocks in a pool of worker processes
+
+A kernel is a module-level function kernel(cols, *args), where cols is a
+dictionary of input columns, that returns per-record arrays (or tuples, lists
+or dictionaries of them). The records are split into contiguous blocks, each
+block is calculated by a worker and the results are joined in record order,
+so they are the same as those of a serial run.
+
+The pool is started by the first kernel of a run and reused by the kernels
+of all its blocks, so the worker processes are only started once per run
+(which is slow under the spawn start method of Windows). It is closed when
+the run finishes (metrics.finishRun), or after the kernel outside a run.
+
+The workers map a buffer of shared memory when they start. Each kernel copies
+its input columns into the buffer; the tasks only hold the layout of the
+columns and the first and last record of a block. A kernel whose columns do
+not fit starts the pool again with a larger buffer.
+
+The number of worker processes is read from the user settings (kernelWorkers).
+By default the kernels run in the tool's own process.
+'''
+
+import multiprocessing
+import numpy as np
+import NB_PTFs.lib.log as log
+import NB_PTFs.lib.plot_pool as plot_pool
+import NB_PTFs.lib.metrics as metrics
+
+from NB_PTFs.lib.refresh_modules import refresh_modules, getUserSetting
+refresh_modules([log, plot_pool, metrics])
+
+# Tables with fewer records than this are always calculated in one block
+minPoolRecords = 10000
+
+# Blocks per worker, so that the workers finish at about the same time
+blocksPerWorker = 4
+
+# Shared buffer of a worker process, mapped from shared memory by initWorker
+workerBuffer = None
+
+# Pool of the run in progress: the pool, its number of workers, its shared buffer and its log queue
+pool = None
+poolWorkers = 0
+poolBuffer = None
+poolLogQueue = None
+
+def getWorkerCount():
+
+    # Defaults to a single (serial) worker
+    try:
+        workers = int(getUserSetting("kernelWorkers"))
+    except (TypeError, ValueError):
+        workers = 1
+
+    return max(1, workers)
+
+def shareColumns(cols):
+
+    '''
+    Copies the input columns into the shared buffer of the pool, one after the other.
+    Returns the layout of the columns: (name, offset) pairs.
+    '''
+
+    buffer = np.frombuffer(poolBuffer, dtype=np.float64)
+    layout = []
+    offset = 0
+
+    for name, column in cols.items():
+        column = np.asarray(column, dtype=np.float64)
+        buffer[offset:offset + len(column)] = column
+
+        layout.append((name, offset))
+        offset += len(column)
+
+    return layout
+
+def initWorker(buffer, logQueue=None):
+
+    global workerBuffer
+
+    log.initWorker(logQueue)
+
+    workerBuffer = np.frombuffer(buffer, dtype=np.float64)
+
+def runBlock(task):
+
+    # Runs in the worker processes
+    kernel, args, layout, start, stop = task
+
+    cols = {}
+    for name, offset in layout:
+        cols[name] = workerBuffer[offset + start:offset + stop]
+
+    with np.errstate(divide='ignore', invalid='ignore', over='ignore'):
+        return kernel(cols, *args)
+
+def joinResults(parts):
+
+    # Joins the results of the blocks in record order
+    first = parts[0]
+
+    if isinstance(first, dict):
+        return type(first)((key, joinResults([part[key] for part in parts])) for key in first)
+
+    elif isinstance(first, (tuple, list)):
+        return type(first)(joinResults([part[i] for part in parts]) for i in range(0, len(first)))
+
+    else:
+        return np.concatenate([np.atleast_1d(part) for part in parts], axis=0)
+
+def getBlocks(numRecords, workers):
+
+    # Splits the records into contiguous blocks of about the same size
+    numBlocks = min(numRecords, workers * blocksPerWorker)
+    bounds = np.linspace(0, numRecords, numBlocks + 1).astype(int)
+
+    return [(bounds[i], bounds[i + 1]) for i in range(0, numBlocks)]
+
+def getPool(workers, numValues):
+
+    '''
+    Returns the pool of the run, started on first use (or again if the number of workers
+    changes or the columns do not fit in its buffer)
+    '''
+
+    global pool, poolWorkers, poolBuffer, poolLogQueue
+
+    if pool is not None and (poolWorkers != workers or len(poolBuffer) < numValues):
+        closePool()
+
+    if pool is None:
+        plot_pool.setWorkerExecutable()
+        logQueue = log.startWorkerLogging()
+        buffer = multiprocessing.RawArray('d', max(1, numValues))
+
+        try:
+            pool = multiprocessing.Pool(workers, initWorker, (buffer, logQueue))
+        except Exception:
+            log.stopWorkerLogging(logQueue)
+            raise
+
+        poolWorkers = workers
+        poolBuffer = buffer
+        poolLogQueue = logQueue
+
+        # Closed with the run (the pool is not kept outside a run, see calcKernel)
+        metrics.onFinish(closePool)
+
+    return pool
+
+def closePool(terminate=False):
+
+    # Stops the worker processes of the run and forwards their remaining messages
+    global pool, poolWorkers, poolBuffer, poolLogQueue
+
+    if pool is None:
+        return
+
+    try:
+        if terminate:
+            pool.terminate()
+        else:
+            pool.close()
+
+        pool.join()
+
+    finally:
+        log.stopWorkerLogging(poolLogQueue)
+        pool, poolWorkers, poolBuffer, poolLogQueue = None, 0, None, None
+
+def runKernel(kernel, cols, args=(), workers=None):
+
+    '''
+    Calculates kernel(cols, *args) for all records, in a pool of worker processes
+    if there is more than one worker and enough records
+    '''
+
+    numRecords = len(list(cols.values())[0]) if cols else 0
+
+    with metrics.stage('kernel', numRecords):
+        return calcKernel(kernel, cols, args, workers, numRecords)
+
+def calcKernel(kernel, cols, args, workers, numRecords):
+
+    if workers is None:
+        workers = getWorkerCount()
+
+    if workers > 1 and numRecords >= minPoolRecords:
+        try:
+            workerPool = getPool(workers, numRecords * len(cols))
+
+        except Exception:
+            log.warning('Could not start the calculation processes, calculating in one process')
+            workers = 1
+
+    else:
+        workers = 1
+
+    if workers <= 1:
+        with np.errstate(divide='ignore', invalid='ignore', over='ignore'):
+            return kernel(cols, *args)
+
+    try:
+        layout = shareColumns(cols)
+        tasks = [(kernel, tuple(args), layout, start, stop) for start, stop in getBlocks(numRecords, workers)]
+
+        # map returns the results of the blocks in the order of the tasks
+        results = joinResults(workerPool.map(runBlock, tasks, 1))
+
+    except Exception:
+        closePool(terminate=True)
+        raise
+
+    # Outside a run there is no end of the run to close the pool at
+    if not metrics.runs:
+        closePool()
+
+    return results
@@ -2,484 +2,250 @@ import sys
 import os
 import configuration
 import numpy as np
-import arcpy
 import math
+from collections import OrderedDict
 import NB_PTFs.lib.log as log
 import NB_PTFs.lib.common as common
 import NB_PTFs.lib.checks_PTFs as checks_PTFs
 import NB_PTFs.lib.PTFdatabase as PTFdatabase
+import NB_PTFs.lib.validation as validation
+import NB_PTFs.lib.kernel_pool as kernel_pool
 from NB_PTFs.lib.external import six # Python 2/3 compatibility module
 
 from NB_PTFs.lib.refresh_modules import refresh_modules
-refresh_modules([log, common, checks_PTFs, PTFdatabase])
-
-def Cosby_1984(outputFolder, outputShp):
-
-    # Returns these arrays
-    warningArray = []
-    K_satArray = []
-
-    log.info('Calculating saturated hydraulic conductivity using Cosby et al. (1984)')
-
-    PTFInfo = PTFdatabase.checkPTF("Cosby_1984")
-    PTFType = PTFInfo.PTFType
-    PTFPressures = PTFInfo.PTFPressures
-    PTFFields = PTFInfo.PTFFields
-
-    # Requirements: sand and clay
-
-    # Get OID field
-    OIDField = common.getOIDField(outputShp)
-
-    reqFields = [OIDField, "Sand", "Clay"]
-
-    checks_PTFs.checkInputFields(reqFields, outputShp)
-
-    # Retrieve info from input
-    record = []
-    sandPerc = []
-    clayPerc = []
-
-    with arcpy.da.SearchCursor(outputShp, reqFields) as searchCursor:
-        for row in searchCursor:
-            objectID = row[0]
-            sand = row[1]
-            clay = row[2]
-
-            record.append(objectID)
-            sandPerc.append(sand)
-            clayPerc.append(clay)
-
-    for x in range(0, len(record)):
-        # Data checks
-        warningFlag = checks_PTFs.checkValue("Sand", sandPerc[x], record[x])
-        warningFlag = checks_PTFs.checkValue("Clay", clayPerc[x], record[x])
-        warningArray.append(warningFlag)
-
-        K_sat = 25.4 * 10**(-0.6 + (0.0126 * sandPerc[x]) - (0.0064 * clayPerc[x]))
-
-        checks_PTFs.checkValue("Ksat", K_sat, record[x])
-
-        K_satArray.append(K_sat)
+refresh_modules([log, common, checks_PTFs, PTFdatabase, validation, kernel_pool])
+
+# Input field of each Ksat input ('carbon' is the OC or OM field)
+inputFieldNames = {'sand': 'Sand', 'silt': 'Silt', 'clay': 'Clay', 'BD': 'BD',
+                   'WC_sat': 'wc_satCalc', 'WC_FC': 'wc_fcCalc'}
+
+# Name used in the warnings for each Ksat input
+checkNames = {'sand': 'Sand', 'silt': 'Silt', 'clay': 'Clay', 'BD': 'Bulk density',
+              'WC_sat': 'WC at sat', 'WC_FC': 'WC at FC'}
+
+def _FerrerJulia_2004_2(c, carbonConFactor):
+    return - 4.994 + (0.56728 * c['sand']) - (0.131 * c['clay']) - (0.0127 * c['carbon'] * carbonConFactor)
+
+def _Brakensiek_1984(c, carbonConFactor):
+    sand = c['sand']
+    clay = c['clay']
+    WC_sat = c['WC_sat']
+
+    return 10 * np.exp((19.52348 * WC_sat) - 8.96847 - (0.028212 * clay) + (0.00018107 * sand**2) - (0.0094125 * clay**2) - (8.395215 * WC_sat**2) + (0.077718 * sand * WC_sat) - (0.00298 * sand**2 * WC_sat**2) - (0.019492 * clay**2 * WC_sat**2) + (0.0000173 * sand**2 * clay) + (0.02733 * clay**2 * WC_sat) + (0.001434 * sand**2 * WC_sat) - (0.0000035 * clay**2 * sand))
+
+# Ksat models: inputs are checked in order and the warning of each record is the result of the last check
+# The kernel takes a dictionary of input arrays and returns the K_sat array (mm/hr)
+ksatModels = {
+    'Cosby_1984': {
+        'title': 'Cosby et al. (1984)',
+        'inputs': ['sand', 'clay'],
+        'kernel': lambda c, f: 25.4 * 10**(-0.6 + (0.0126 * c['sand']) - (0.0064 * c['clay'])),
+    },
+    'Puckett_1985': {
+        'title': 'Puckett et al. (1985)',
+        'inputs': ['clay'],
+        'kernel': lambda c, f: 156.96 * np.exp(-0.1975 * c['clay']),
+    },
+    'Jabro_1992': {
+        'title': 'Jabro (1992)',
+        'inputs': ['silt', 'clay', 'BD'],
+        'kernel': lambda c, f: 10**(9.56 - (0.81 * np.log10(c['silt'])) - (1.09 * np.log10(c['clay'])) - (4.64 * c['BD'])) * 10.0,
+    },
+    'CampbellShiozawa_1994': {
+        'title': 'Campbell and Shiozawa (1994)',
+        'inputs': ['silt', 'clay'],
+        'kernel': lambda c, f: 54.0 * np.exp((- 0.07 * c['silt']) - (0.167 * c['clay'])),
+    },
+    'FerrerJulia_2004_1': {
+        'title': 'Ferrer Julia et al. (2004) - Sand',
+        'inputs': ['sand'],
+        'kernel': lambda c, f: 0.920 * np.exp(0.0491 * c['sand']),
+    },
+    'FerrerJulia_2004_2': {
+        'title': 'Ferrer Julia et al. (2004) - Sand, clay, OM',
+        'inputs': ['carbon', 'sand', 'clay', 'BD'],
+        'kernel': _FerrerJulia_2004_2,
+    },
+    'Ahuja_1989': {
+        'title': 'Ahuja et al. (1989)',
+        'inputs': ['WC_sat', 'WC_FC'],
+        'kernel': lambda c, f: 7645.0 * (c['WC_sat'] - c['WC_FC']) ** 3.29,
+    },
+    'MinasnyMcBratney_2000': {
+        'title': 'Minasny and McBratney (2000)',
+        'inputs': ['WC_sat', 'WC_FC'],
+        'kernel': lambda c, f: 23190.55 * (c['WC_sat'] - c['WC_FC']) ** 3.66,
+    },
+    'Brakensiek_1984': {
+        'title': 'Brakensiek et al. (1984)',
+        'inputs': ['sand', 'clay', 'WC_sat'],
+        'kernel': _Brakensiek_1984,
+    },
+}
+
+def getModel(KsatOption):
+
+    if KsatOption not in ksatModels:
+        log.error("Invalid KsatOption: " + str(KsatOption))
+        sys.exit()
+
+    return ksatModels[KsatOption]
+
+def ksatKernel(cols, KsatOption, carbonConFactor):
+
+    # Module-level entry to the kernel of a model, as called by kernel_pool
+    return getModel(KsatOption)['kernel'](cols, carbonConFactor)
+
+def getInputFields(KsatOptions, carbContent=None):
+
+    # Returns the input fields needed by one or more Ksat models, without duplicates
+    if isinstance(KsatOptions, six.string_types):
+        KsatOptions = [KsatOptions]
+
+    fields = []
+    for KsatOption in KsatOptions:
+        for name in getModel(KsatOption)['inputs']:
+
+            if name == 'carbon':
+                field = carbContent
+            else:
+                field = inputFieldNames[name]
+
+            if field not in fields:
+                fields.append(field)
+
+    return fields
+
+def calcKsat(KsatOption, cols, record, carbContent=None, carbonConFactor=1.0):
+
+    '''
+    Calculates K_sat for all records at once.
+    cols is a dictionary of input arrays keyed by input name (sand, silt, clay, carbon, BD, WC_sat, WC_FC).
+    Returns the warning array and the K_sat array.
+    '''
+
+    model = getModel(KsatOption)
+
+    # Ferrer Julia et al. (2004) is fitted on OM
+    if KsatOption == 'FerrerJulia_2004_2':
+        if carbContent == 'OC':
+            carbonConFactor = 1.724
+
+        elif carbContent == 'OM':
+            carbonConFactor = 1.0
+
+    # Data checks for all records at once
+    validator = validation.Validator(record)
+
+    for name in model['inputs']:
+        if name == 'carbon':
+            validator.checkCarbon(cols['carbon'], carbContent)
+        else:
+            validator.checkValue(checkNames[name], cols[name])
+
+    warningArray = validator.warningArray
+
+    # Only the inputs of this model are passed to the kernel
+    kernelCols = dict((name, cols[name]) for name in model['inputs'])
+    K_satArray = kernel_pool.runKernel(ksatKernel, kernelCols, (KsatOption, float(carbonConFactor)))
+
+    # Records outside the domain of the equations (e.g. a log of zero) get NaN
+    K_satArray, = validator.checkResults([K_satArray])
+
+    # The Ksat check is reported but does not change the warning column
+    validator.checkValue("Ksat", K_satArray, setWarning=False)
+    validator.summarise()
 
     return warningArray, K_satArray
 
-def Puckett_1985(outputFolder, outputShp):
+def readInputs(outputTable, KsatOptions, carbContent=None):
 
-    # Returns these arrays
-    warningArray = []
-    K_satArray = []
+    # Reads the inputs of one or more Ksat models from the table in one read
+    if isinstance(KsatOptions, six.string_types):
+        KsatOptions = [KsatOptions]
 
-    log.info('Calculating saturated hydraulic conductivity using Puckett et al. (1985)')
+    OIDField = common.getOIDField(outputTable)
+    inputFields = getInputFields(KsatOptions, carbContent)
+    reqFields = [OIDField] + inputFields
 
-    PTFInfo = PTFdatabase.checkPTF("Puckett_1985")
-    PTFType = PTFInfo.PTFType
-    PTFPressures = PTFInfo.PTFPressures
-    PTFFields = PTFInfo.PTFFields
-
-    # Requirements: Clay
+    checks_PTFs.checkInputFields(reqFields, outputTable)
 
-    # Get OID field
-    OIDField = common.getOIDField(outputShp)
+    columns = outputTable.readColumns(reqFields)
+    record = columns[0]
 
-    reqFields = [OIDField, "Clay"]
+    cols = {}
+    for name, field in list(inputFieldNames.items()) + [('carbon', carbContent)]:
+        if field in inputFields:
+            cols[name] = columns[1 + inputFields.index(field)]
 
-    checks_PTFs.checkInputFields(reqFields, outputShp)
+    return record, cols
 
-    # Retrieve info from input
-    record = []
-    clayPerc = []
+def calcKsatBatch(outputTable, KsatOptions, carbonConFactor=1.0, carbContent=None):
 
-    with arcpy.da.SearchCursor(outputShp, reqFields) as searchCursor:
-        for row in searchCursor:
-            objectID = row[0]
-            clay = row[1]
+    '''
+    Calculates several Ksat models over the same input arrays.
+    Returns an ordered dictionary of KsatOption: (warning array, K_sat array).
+    '''
 
-            record.append(objectID)
-            clayPerc.append(clay)
+    record, cols = readInputs(outputTable, KsatOptions, carbContent)
 
-    for x in range(0, len(record)):
-        # Data checks
-        warningFlag = checks_PTFs.checkValue("Clay", clayPerc[x], record[x])
-        warningArray.append(warningFlag)
+    results = OrderedDict()
+    for KsatOption in KsatOptions:
+        log.info('Calculating saturated hydraulic conductivity using ' + getModel(KsatOption)['title'])
+        results[KsatOption] = calcKsat(KsatOption, cols, record, carbContent, carbonConFactor)
 
-        K_sat = 156.96 * math.exp(-0.1975 * clayPerc[x])
+    return results
 
-        checks_PTFs.checkValue("Ksat", K_sat, record[x])
-
-        K_satArray.append(K_sat)
-
-    return warningArray, K_satArray
+def runKsatPTF(KsatOption, outputTable, carbonConFactor=1.0, carbContent=None):
 
-def Jabro_1992(outputFolder, outputShp):
+    # Calculates one Ksat model from the table
+    log.info('Calculating saturated hydraulic conductivity using ' + getModel(KsatOption)['title'])
 
-    # Returns these arrays
-    warningArray = []
-    K_satArray = []
+    record, cols = readInputs(outputTable, [KsatOption], carbContent)
 
-    log.info('Calculating saturated hydraulic conductivity using Jabro (1992)')
+    return calcKsat(KsatOption, cols, record, carbContent, carbonConFactor)
 
-    PTFInfo = PTFdatabase.checkPTF("Jabro_1992")
-    PTFType = PTFInfo.PTFType
-    PTFPressures = PTFInfo.PTFPressures
-    PTFFields = PTFInfo.PTFFields
+def Cosby_1984(outputFolder, outputTable):
 
     # Requirements: sand and clay
+    return runKsatPTF("Cosby_1984", outputTable)
 
-    # Get OID field
-    OIDField = common.getOIDField(outputShp)
-
-    reqFields = [OIDField, "Silt", "Clay", "BD"]
-
-    checks_PTFs.checkInputFields(reqFields, outputShp)
-
-    # Retrieve info from input
-    record = []
-    siltPerc = []
-    clayPerc = []
-    BDg_cm3 = []
-
-    with arcpy.da.SearchCursor(outputShp, reqFields) as searchCursor:
-        for row in searchCursor:
-            objectID = row[0]
-            silt = row[1]
-            clay = row[2]
-            BD = row[3]
-
-            record.append(objectID)
-            siltPerc.append(silt)
-            clayPerc.append(clay)
-            BDg_cm3.append(BD)
-
-    for x in range(0, len(record)):
-        # Data checks
-        warningFlag = checks_PTFs.checkValue("Silt", siltPerc[x], record[x])
-        warningFlag = checks_PTFs.checkValue("Clay", clayPerc[x], record[x])
-        warningFlag = checks_PTFs.checkValue("Bulk density", BDg_cm3[x], record[x])
-        warningArray.append(warningFlag)
+def Puckett_1985(outputFolder, outputTable):
 
-        K_sat = 10**(9.56 - (0.81 * math.log(siltPerc[x], 10.0)) - (1.09 * math.log(clayPerc[x], 10.0)) - (4.64 * BDg_cm3[x])) * 10.0
-
-        checks_PTFs.checkValue("Ksat", K_sat, record[x])
-
-        K_satArray.append(K_sat)
-
-    return warningArray, K_satArray
-
-def CampbellShiozawa_1994(outputFolder, outputShp):
+    # Requirements: Clay
+    return runKsatPTF("Puckett_1985", outputTable)
 
-    # Returns these arrays
-    warningArray = []
-    K_satArray = []
+def Jabro_1992(outputFolder, outputTable):
 
-    log.info('Calculating saturated hydraulic conductivity using Campbell and Shiozawa (1994)')
+    # Requirements: silt, clay and BD
+    return runKsatPTF("Jabro_1992", outputTable)
 
-    PTFInfo = PTFdatabase.checkPTF("CampbellShiozawa_1994")
-    PTFType = PTFInfo.PTFType
-    PTFPressures = PTFInfo.PTFPressures
-    PTFFields = PTFInfo.PTFFields
+def CampbellShiozawa_1994(outputFolder, outputTable):
 
     # Requirements: silt and clay
+    return runKsatPTF("CampbellShiozawa_1994", outputTable)
 
-    # Get OID field
-    OIDField = common.getOIDField(outputShp)
-
-    reqFields = [OIDField, "Silt", "Clay"]
-
-    checks_PTFs.checkInputFields(reqFields, outputShp)
-
-    # Retrieve info from input
-    record = []
-    siltPerc = []
-    clayPerc = []
-
-    with arcpy.da.SearchCursor(outputShp, reqFields) as searchCursor:
-        for row in searchCursor:
-            objectID = row[0]
-            silt = row[1]
-            clay = row[2]
-
-            record.append(objectID)
-            siltPerc.append(silt)
-            clayPerc.append(clay)
-
-    for x in range(0, len(record)):
-        # Data checks
-        warningFlag = checks_PTFs.checkValue("Silt", siltPerc[x], record[x])
-        warningFlag = checks_PTFs.checkValue("Clay", clayPerc[x], record[x])
-        warningArray.append(warningFlag)
-
-        K_sat = 54.0 * math.exp((- 0.07 * siltPerc[x]) - (0.167 * clayPerc[x]))
-
-        checks_PTFs.checkValue("Ksat", K_sat, record[x])
-
-        K_satArray.append(K_sat)
-
-    return warningArray, K_satArray
-
-def FerrerJulia_2004_1(outputFolder, outputShp):
-
-    # Returns these arrays
-    warningArray = []
-    K_satArray = []
-
-    log.info('Calculating saturated hydraulic conductivity using Ferrer Julia et al. (2004) - Sand')
-
-    PTFInfo = PTFdatabase.checkPTF("FerrerJulia_2004_1")
-    PTFType = PTFInfo.PTFType
-    PTFPressures = PTFInfo.PTFPressures
-    PTFFields = PTFInfo.PTFFields
+def FerrerJulia_2004_1(outputFolder, outputTable):
 
     # Requirements: sand
+    return runKsatPTF("FerrerJulia_2004_1", outputTable)
 
-    # Get OID field
-    OIDField = common.getOIDField(outputShp)
-
-    reqFields = [OIDField, "Sand"]
-
-    checks_PTFs.checkInputFields(reqFields, outputShp)
-
-    # Retrieve info from input
-    record = []
-    sandPerc = []
-
-    with arcpy.da.SearchCursor(outputShp, reqFields) as searchCursor:
-        for row in searchCursor:
-            objectID = row[0]
-            sand = row[1]
-
-            record.append(objectID)
-            sandPerc.append(sand)
-
-    for x in range(0, len(record)):
-        # Data checks
-        warningFlag = checks_PTFs.checkValue("Sand", sandPerc[x], record[x])
-        warningArray.append(warningFlag)
-
-        K_sat = 0.920 * math.exp(0.0491 * sandPerc[x])
-
-        checks_PTFs.checkValue("Ksat", K_sat, record[x])
-
-        K_satArray.append(K_sat)
-
-    return warningArray, K_satArray
-
-def FerrerJulia_2004_2(outputFolder, outputShp, carbonConFactor, carbContent):
-
-    # Returns these arrays
-    warningArray = []
-    K_satArray = []
-
-    log.info('Calculating saturated hydraulic conductivity using Ferrer Julia et al. (2004) - Sand, clay, OM')
-
-    PTFInfo = PTFdatabase.checkPTF("FerrerJulia_2004_2")
-    PTFType = PTFInfo.PTFType
-    PTFPressures = PTFInfo.PTFPressures
-    PTFFields = PTFInfo.PTFFields
-
-    # Get OID field
-    OIDField = common.getOIDField(outputShp)
+def FerrerJulia_2004_2(outputFolder, outputTable, carbonConFactor, carbContent):
 
     # Requirements: sand, clay, OM, BD
-    if carbContent == 'OC':
-        reqFields = [OIDField, "Sand", "Clay", "OC", "BD"]
-        carbonConFactor = 1.724
-
-    elif carbContent == 'OM':
-        reqFields = [OIDField, "Sand", "Clay", "OM", "BD"]
-        carbonConFactor = 1.0
-        
-    checks_PTFs.checkInputFields(reqFields, outputShp)
-
-    # Retrieve info from input
-    record = []
-    sandPerc = []
-    clayPerc = []
-    carbPerc = []
-    BDg_cm3 = []
-
-    with arcpy.da.SearchCursor(outputShp, reqFields) as searchCursor:
-        for row in searchCursor:
-            objectID = row[0]
-            sand = row[1]
-            clay = row[2]
-            carbon = row[3]
-            BD = row[4]
-
-            record.append(objectID)
-            sandPerc.append(sand)
-            clayPerc.append(clay)
-            carbPerc.append(carbon)
-            BDg_cm3.append(BD)
-
-    for x in range(0, len(record)):
-        # Data checks
-        warningFlag = checks_PTFs.checkCarbon(carbPerc[x], carbContent, record[x])
-        warningFlag = checks_PTFs.checkValue("Sand", sandPerc[x], record[x])
-        warningFlag = checks_PTFs.checkValue("Clay", clayPerc[x], record[x])
-        warningFlag = checks_PTFs.checkValue("Bulk density", BDg_cm3[x], record[x])
-        warningArray.append(warningFlag)
-
-        K_sat = - 4.994 + (0.56728 * sandPerc[x]) - (0.131 * clayPerc[x]) - (0.0127 * carbPerc[x]*float(carbonConFactor))
-
-        checks_PTFs.checkValue("Ksat", K_sat, record[x])
-
-        K_satArray.append(K_sat)
-
-    return warningArray, K_satArray
+    return runKsatPTF("FerrerJulia_2004_2", outputTable, carbonConFactor, carbContent)
 
-def Ahuja_1989(outputFolder, outputShp):
-
-    # Returns these arrays
-    warningArray = []
-    K_satArray = []
-
-    log.info('Calculating saturated hydraulic conductivity using Ahuja et al. (1989)')
-
-    PTFInfo = PTFdatabase.checkPTF("Ahuja_1989")
-    PTFType = PTFInfo.PTFType
-    PTFPressures = PTFInfo.PTFPressures
-    PTFFields = PTFInfo.PTFFields
-
-    # Get OID field
-    OIDField = common.getOIDField(outputShp)
+def Ahuja_1989(outputFolder, outputTable):
 
     # Requirements: WC @ Sat and WC @ FC
-    reqFields = [OIDField, "wc_satCalc", "wc_fcCalc"]
-
-    checks_PTFs.checkInputFields(reqFields, outputShp)
-
-    # Retrieve info from input
-    record = []
-    WC_satArray = []
-    WC_FCArray = []
-
-    with arcpy.da.SearchCursor(outputShp, reqFields) as searchCursor:
-        for row in searchCursor:
-            objectID = row[0]
-            WC_sat = row[1]
-            WC_FC = row[2]
-
-            record.append(objectID)
-            WC_satArray.append(WC_sat)
-            WC_FCArray.append(WC_FC)
-
-    for x in range(0, len(record)):
-        # Data checks
-        warningFlag = checks_PTFs.checkValue("WC at sat", WC_satArray[x], record[x])
-        warningFlag = checks_PTFs.checkValue("WC at FC", WC_FCArray[x], record[x])
-        warningArray.append(warningFlag)
-
-        Eff_porosity = WC_satArray[x] - WC_FCArray[x]
-        K_sat = 7645.0 * Eff_porosity **3.29
-
-        checks_PTFs.checkValue("Ksat", K_sat, record[x])
-        
-        K_satArray.append(K_sat)
-
-    return warningArray, K_satArray
+    return runKsatPTF("Ahuja_1989", outputTable)
 
-def MinasnyMcBratney_2000(outputFolder, outputShp):
-
-    # Returns these arrays
-    warningArray = []
-    K_satArray = []
-
-    log.info('Calculating saturated hydraulic conductivity using Minasny and McBratney (2000)')
-
-    PTFInfo = PTFdatabase.checkPTF("MinasnyMcBratney_2000")
-    PTFType = PTFInfo.PTFType
-    PTFPressures = PTFInfo.PTFPressures
-    PTFFields = PTFInfo.PTFFields
-
-    # Get OID field
-    OIDField = common.getOIDField(outputShp)
+def MinasnyMcBratney_2000(outputFolder, outputTable):
 
     # Requirements: WC @ Sat and WC @ FC
-    reqFields = [OIDField, "wc_satCalc", "wc_fcCalc"]
-
-    checks_PTFs.checkInputFields(reqFields, outputShp)
-
-    # Retrieve info from input
-    record = []
-    WC_satArray = []
-    WC_FCArray = []
-
-    with arcpy.da.SearchCursor(outputShp, reqFields) as searchCursor:
-        for row in searchCursor:
-            objectID = row[0]
-            WC_sat = row[1]
-            WC_FC = row[2]
-
-            record.append(objectID)
-            WC_satArray.append(WC_sat)
-            WC_FCArray.append(WC_FC)
-
-    for x in range(0, len(record)):
-        # Data checks
-        warningFlag = checks_PTFs.checkValue("WC at sat", WC_satArray[x], record[x])
-        warningFlag = checks_PTFs.checkValue("WC at FC", WC_FCArray[x], record[x])
-        warningArray.append(warningFlag)
-
-        Eff_porosity = WC_satArray[x] - WC_FCArray[x]
-        K_sat = 23190.55 * Eff_porosity ** 3.66
-
-        checks_PTFs.checkValue("Ksat", K_sat, record[x])
-        
-        K_satArray.append(K_sat)
-
-    return warningArray, K_satArray
+    return runKsatPTF("MinasnyMcBratney_2000", outputTable)
 
-def Brakensiek_1984(outputFolder, outputShp):
-
-    # Returns these arrays
-    warningArray = []
-    K_satArray = []
-
-    log.info('Calculating saturated hydraulic conductivity using Brakensiek et al. (1984)')
-
-    PTFInfo = PTFdatabase.checkPTF("Brakensiek_1984")
-    PTFType = PTFInfo.PTFType
-    PTFPressures = PTFInfo.PTFPressures
-    PTFFields = PTFInfo.PTFFields
-
-    # Get OID field
-    OIDField = common.getOIDField(outputShp)
+def Brakensiek_1984(outputFolder, outputTable):
 
     # Requirements: Clay, sand, WC @ Sat
-    reqFields = [OIDField, "Sand", "Clay", "wc_satCalc"]
-
-    checks_PTFs.checkInputFields(reqFields, outputShp)
-
-    # Retrieve info from input
-    record = []
-    sandPerc = []
-    clayPerc = []
-    WC_satArray = []
-
-    with arcpy.da.SearchCursor(outputShp, reqFields) as searchCursor:
-        for row in searchCursor:
-            objectID = row[0]
-            sand = row[1]
-            clay = row[2]
-            WC_sat = row[3]
-
-            record.append(objectID)
-            sandPerc.append(sand)
-            clayPerc.append(clay)
-            WC_satArray.append(WC_sat)
-
-    for x in range(0, len(record)):
-        # Data checks
-        warningFlag = checks_PTFs.checkValue("Sand", sandPerc[x], record[x])
-        warningFlag = checks_PTFs.checkValue("Clay", clayPerc[x], record[x])
-        warningFlag = checks_PTFs.checkValue("WC at sat", WC_satArray[x], record[x])
-        warningArray.append(warningFlag)
-
-        K_sat = 10 * math.exp((19.52348 * WC_satArray[x]) - 8.96847 - (0.028212 * clayPerc[x]) + (0.00018107 * sandPerc[x]**2) - (0.0094125 * clayPerc[x]**2) - (8.395215 * WC_satArray[x]**2) + (0.077718 * sandPerc[x] * WC_satArray[x]) - (0.00298 * sandPerc[x]**2 * WC_satArray[x]**2) - (0.019492 * clayPerc[x]**2 * WC_satArray[x]**2) + (0.0000173 * sandPerc[x]**2 * clayPerc[x]) + (0.02733 * clayPerc[x]**2 * WC_satArray[x]) + (0.001434 * sandPerc[x]**2 * WC_satArray[x]) - (0.0000035 * clayPerc[x]**2 * sandPerc[x]))
-
-        checks_PTFs.checkValue("Ksat", K_sat, record[x])
-
-        K_satArray.append(K_sat)
-
-    return warningArray, K_satArray
\ No newline at end of file
+    return runKsatPTF("Brakensiek_1984", outputTable)
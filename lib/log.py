@@ -1,7 +1,74 @@
+'''
+Logging to the tool messages and to a log file in the output folder
+
+Once setupLogging() has been called, log calls only put the message on a
+queue; one listener thread formats the messages and sends them to ArcGIS and
+to the log file, in the order they were logged. Errors wait for the queue to
+be written, so they are shown before the tool stops. stopLogging() writes the
+remaining messages and closes the log file.
+
+Repeated messages are only shown once, and messages that only differ in their
+numbers (e.g. 'Plot created for soil 17') are shown up to logRepeats times
+(20 unless set in the user settings). The number of messages not shown is
+logged when logging stops. Errors are always shown.
+
+Worker processes send their messages to the tool's process: startWorkerLogging()
+returns a queue that is passed to initWorker() in the initializer of the pool.
+'''
+
 import logging
-import arcpy
 import os
+import re
 import datetime
+import threading
+import multiprocessing
+from collections import OrderedDict
+from NB_PTFs.lib.external.six.moves import queue as Queue
+
+from NB_PTFs.lib.refresh_modules import getUserSetting
+
+# Listener thread and message filter of the current run (None before setupLogging)
+listener = None
+messageFilter = None
+
+# Numbers in a message, replaced to find messages that only differ in their numbers
+numberPattern = re.compile(r'-?\d+(\.\d+)?(e-?\d+)?')
+
+# Messages below errors are dropped while this is above 0 (see Quiet)
+quietDepth = 0
+
+# arcpy module once resolved by getArcpy(), False if it is not available (None before the first message)
+_arcpy = None
+
+def getArcpy():
+
+    # Imports arcpy once, so a missing arcpy is not searched for again on every message
+    global _arcpy
+
+    if _arcpy is None:
+        try:
+            import arcpy
+            _arcpy = arcpy
+        except ImportError:
+            _arcpy = False
+
+    return _arcpy
+
+def addArcpyMessage(level, msg):
+
+    ''' Sends the message to ArcGIS. arcpy is only imported when the first message is sent, and messages are printed when arcpy is not available (headless runs) '''
+    arcpy = getArcpy()
+
+    if not arcpy:
+        print(msg)
+        return
+
+    if level >= logging.ERROR:
+        arcpy.AddError(msg)
+    elif level >= logging.WARNING:
+        arcpy.AddWarning(msg)
+    else:
+        arcpy.AddMessage(msg)
 
 class ArcpyMessageHandler(logging.FileHandler):
 
@@ -19,20 +86,141 @@ class ArcpyMessageHandler(logging.FileHandler):
             msg = record.msg
 
         # Log message to arcpy.AddMessage, AddWarning or AddError
-        if record.levelno >= logging.ERROR:
-            arcpy.AddError(msg)
-        elif record.levelno >= logging.WARNING:
-            arcpy.AddWarning(msg)
-        else:
-            arcpy.AddMessage(msg)
+        addArcpyMessage(record.levelno, msg)
 
         # Also log message to file using FileHandler's emit function
         logging.FileHandler.emit(self, record)
 
+def getMaxRepeats():
+
+    try:
+        return max(1, int(getUserSetting("logRepeats")))
+    except (TypeError, ValueError):
+        return 20
+
+class MessageFilter(logging.Filter):
+
+    ''' Drops repeated messages and limits the number of messages that only differ in their numbers '''
+
+    def __init__(self, maxRepeats=20):
+
+        super(MessageFilter, self).__init__()
+
+        self.maxRepeats = maxRepeats
+        self.lock = threading.Lock()
+
+        self.shown = set()              # Messages shown (only kept while their template is under the limit)
+        self.templates = {}             # Template: number of messages shown
+        self.dropped = OrderedDict()    # Template: [number of messages not shown, first message not shown]
+
+    def allow(self, level, msg):
+
+        if level >= logging.ERROR:
+            return True
+
+        msg = str(msg)
+        template = numberPattern.sub('#', msg)
+
+        with self.lock:
+            if msg in self.shown or self.templates.get(template, 0) >= self.maxRepeats:
+
+                if template in self.dropped:
+                    self.dropped[template][0] += 1
+                else:
+                    self.dropped[template] = [1, msg]
+
+                return False
+
+            self.templates[template] = self.templates.get(template, 0) + 1
+
+            if self.templates[template] < self.maxRepeats:
+                self.shown.add(msg)
+
+            return True
+
+    def filter(self, record):
+        return self.allow(record.levelno, record.getMessage())
+
+    def summary(self):
+
+        # One line per kind of message not shown
+        with self.lock:
+            dropped = list(self.dropped.values())
+            self.dropped = OrderedDict()
+
+        return ['{:,} repeated or similar messages not shown, e.g. {}'.format(count, msg) for count, msg in dropped]
+
+class QueueHandler(logging.Handler):
+
+    ''' Puts the log records on a queue, with the message already formatted so that the record can be pickled '''
+
+    def __init__(self, queue):
+
+        super(QueueHandler, self).__init__()
+        self.queue = queue
+
+    def prepare(self, record):
+
+        record.msg = record.getMessage()
+        record.args = None
+
+        if record.exc_info:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+
+        return record
+
+    def emit(self, record):
+
+        try:
+            self.queue.put(self.prepare(record))
+
+            # Errors are written before the tool continues (or stops)
+            if record.levelno >= logging.ERROR and hasattr(self.queue, 'join'):
+                self.queue.join()
+
+        except Exception:
+            self.handleError(record)
+
+class LogListener(threading.Thread):
+
+    ''' Takes the records off the queue and passes them to the handlers '''
+
+    def __init__(self, queue, handlers):
+
+        super(LogListener, self).__init__()
+        self.daemon = True
+
+        self.queue = queue
+        self.handlers = handlers
+
+    def run(self):
+
+        while True:
+            record = self.queue.get()
+
+            try:
+                if record is None:
+                    break
+
+                for handler in self.handlers:
+                    if record.levelno >= handler.level:
+                        handler.handle(record)
+
+            except Exception:
+                pass
+
+            finally:
+                self.queue.task_done()
 
 def setupLogging(outputFolder, level=logging.DEBUG):
-    
+
+    global listener, messageFilter
+
     try:
+        # Messages of an earlier run are written to its own log file
+        stopLogging()
+
         # Create folder to contain logs within output folder if it does not already exist
         logsFolder = os.path.join(outputFolder, 'logs')
         if not os.path.exists(logsFolder):
@@ -49,15 +237,25 @@ def setupLogging(outputFolder, level=logging.DEBUG):
         for handler in root_logger.handlers[:]:
             root_logger.removeHandler(handler)
 
-        # Create new log handler
+        # Create new log handler, used by the listener thread
         handler = ArcpyMessageHandler(filename=logFile, mode='w')
 
         # Set format of each log message
         formatter = logging.Formatter('%(asctime)s %(levelname)-8s %(message)s', '%a, %d %b %Y %H:%M:%S')
         handler.setFormatter(formatter)
 
+        # The logger only puts the records on the queue
+        queue = Queue.Queue()
+        listener = LogListener(queue, [handler])
+        listener.start()
+
+        messageFilter = MessageFilter(getMaxRepeats())
+
+        queueHandler = QueueHandler(queue)
+        queueHandler.addFilter(messageFilter)
+
         # Add the handler to the logger
-        root_logger.addHandler(handler)
+        root_logger.addHandler(queueHandler)
 
         # Set the logging level
         root_logger.setLevel(level)
@@ -65,17 +263,134 @@ def setupLogging(outputFolder, level=logging.DEBUG):
     except Exception:
         raise
 
+def flush():
+
+    # Waits until the messages logged so far have been written
+    if listener is not None and listener.is_alive():
+        listener.queue.join()
+
+def stopLogging():
+
+    ''' Logs the number of messages not shown, writes the remaining messages and closes the log file '''
+
+    global listener, messageFilter
+
+    if listener is None:
+        return
+
+    root_logger = logging.getLogger()
+
+    if messageFilter is not None:
+        for line in messageFilter.summary():
+            root_logger.handle(logging.LogRecord('root', logging.INFO, __file__, 0, line, None, None))
+
+    for handler in root_logger.handlers[:]:
+        if isinstance(handler, QueueHandler):
+            root_logger.removeHandler(handler)
+
+    if listener.is_alive():
+        listener.queue.put(None)
+        listener.join()
+
+    for handler in listener.handlers:
+        handler.close()
+
+    listener = None
+    messageFilter = None
+
+def forwardRecords(queue):
+
+    # Runs in a thread of the tool's process: passes the records of the worker processes to the logger
+    while True:
+        record = queue.get()
+        if record is None:
+            break
+
+        logging.getLogger().handle(record)
+
+def startWorkerLogging():
+
+    '''
+    Returns a queue for the messages of worker processes, or None if logging has not been set up
+    (the workers then send their messages to ArcGIS, or print them, themselves)
+    '''
+
+    if listener is None:
+        return None
+
+    queue = multiprocessing.Queue()
+
+    forwarder = threading.Thread(target=forwardRecords, args=(queue,))
+    forwarder.daemon = True
+    forwarder.start()
+
+    queue.forwarder = forwarder
+
+    return queue
+
+def stopWorkerLogging(queue):
+
+    # Called once the pool has finished: forwards the remaining messages of the workers
+    if queue is None:
+        return
+
+    queue.put(None)
+    queue.forwarder.join()
+
+def initWorker(queue):
+
+    # Runs when a worker process starts: its messages are sent to the tool's process
+    if queue is None:
+        return
+
+    root_logger = logging.getLogger()
+
+    for handler in root_logger.handlers[:]:
+        root_logger.removeHandler(handler)
+
+    root_logger.addHandler(QueueHandler(queue))
+    root_logger.setLevel(logging.DEBUG)
+
+class Quiet(object):
+
+    ''' Context in which only errors are logged, e.g. while a calculation is repeated to check it '''
+
+    def __enter__(self):
+
+        global quietDepth
+        quietDepth += 1
+
+        return self
+
+    def __exit__(self, excType, excValue, tb):
+
+        global quietDepth
+        quietDepth -= 1
+
+        return False
+
+quiet = Quiet()
+
+def emit(level, msg, logFunction):
+
+    ''' Logs the message, or sends it to ArcGIS if logging has not been set up '''
+
+    if quietDepth > 0 and level < logging.ERROR:
+        return
+
+    root_logger = logging.getLogger()
+
+    if len(root_logger.handlers) > 0:
+        logFunction(msg)
+
+    elif messageFilter is None or messageFilter.allow(level, msg):
+        addArcpyMessage(level, msg)
 
 def info(msg):
 
     ''' Wrapper function to avoid exception being thrown if logging function is called without a log handler being set up in advance '''
     try:
-        root_logger = logging.getLogger()
-        if len(root_logger.handlers) > 0:
-            logging.info(msg)
-        else:
-            arcpy.AddMessage(msg)
-
+        emit(logging.INFO, msg, logging.info)
     except:
         pass
 
@@ -84,12 +399,7 @@ def warning(msg):
 
     ''' Wrapper function to avoid exception being thrown if logging function is called without a log handler being set up in advance '''
     try:
-        root_logger = logging.getLogger()
-        if len(root_logger.handlers) > 0:
-            logging.warning(msg)
-        else:
-            arcpy.AddWarning(msg)
-
+        emit(logging.WARNING, msg, logging.warning)
     except:
         pass
 
@@ -98,12 +408,7 @@ def error(msg):
 
     ''' Wrapper function to avoid exception being thrown if logging function is called without a log handler being set up in advance '''
     try:
-        root_logger = logging.getLogger()
-        if len(root_logger.handlers) > 0:
-            logging.error(msg)
-        else:
-            arcpy.AddError(msg)
-
+        emit(logging.ERROR, msg, logging.error)
     except:
         pass
 
@@ -112,12 +417,6 @@ def exception(msg):
 
     ''' Wrapper function to avoid exception being thrown if logging function is called without a log handler being set up in advance '''
     try:
-        root_logger = logging.getLogger()
-        if len(root_logger.handlers) > 0:
-            logging.exception(msg)
-        else:
-            arcpy.AddError(msg)
-
+        emit(logging.ERROR, msg, logging.exception)
     except:
         pass
-
@@ -0,0 +1,270 @@
+'''
+metrics: time spent in each stage of a run
+
+A run (started by the solo functions) times nested stages, e.g. read,
+validate, compute, write and plot, with a monotonic timer. Each stage that
+ends is written as one JSON line to logs/metrics.jsonl in the output folder
+(the file is only appended to, so the lines of earlier runs are kept), with
+its duration and, where known, the number of records and records per second.
+
+The run also keeps a summary in memory: the total time, number of calls and
+records of each stage (by its path, e.g. compute/read). finishRun() returns
+the summary, and the solo functions return it to their callers.
+
+Outside a run (or in the worker processes) stage() only returns a context
+that does nothing, so the library functions can be timed wherever they are
+called from.
+'''
+
+import os
+import time
+import json
+import datetime
+from collections import OrderedDict
+
+import NB_PTFs.lib.log as log
+
+from NB_PTFs.lib.refresh_modules import refresh_modules
+refresh_modules([log])
+
+# Monotonic timer (time.perf_counter is not available in Python 2)
+timer = getattr(time, 'perf_counter', time.time)
+
+# Runs in progress, the innermost last
+runs = []
+
+# Functions called when the outermost run finishes, e.g. to close the worker pool of the run (see onFinish)
+finishHandlers = []
+
+class Stage(object):
+
+    ''' A timed stage of a run, used as a context (with metrics.stage('read'): ...) '''
+
+    def __init__(self, run, name, records):
+
+        self.run = run
+        self.name = name
+        self.records = records
+
+    def __enter__(self):
+
+        self.run.stack.append(self.name)
+        self.path = '/'.join(self.run.stack)
+
+        # Stages are listed in the summary in the order they first start
+        if self.path not in self.run.stages:
+            self.run.stages[self.path] = [0.0, 0, 0]
+
+        self.start = timer()
+
+        return self
+
+    def __exit__(self, excType, excValue, tb):
+
+        seconds = timer() - self.start
+
+        self.run.stack.pop()
+        self.run.endStage(self.path, len(self.run.stack), self.start, seconds, self.records)
+
+        return False
+
+class NoStage(object):
+
+    # Context used outside a run
+    records = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, excType, excValue, tb):
+        return False
+
+noStage = NoStage()
+
+class Run(object):
+
+    def __init__(self, name, outputFolder=None):
+
+        self.name = name
+        self.records = 0
+        self.stack = []
+        self.stages = OrderedDict()    # Stage path: [seconds, calls, records]
+        self.finished = False
+
+        self.id = datetime.datetime.now().strftime("%Y%m%d_%H%M%S") + '_' + str(os.getpid())
+        self.start = timer()
+
+        # Metrics file in the logs folder of the output folder (the summary is kept if it cannot be written)
+        self.file = None
+
+        if outputFolder is not None:
+            try:
+                logsFolder = os.path.join(outputFolder, 'logs')
+                if not os.path.exists(logsFolder):
+                    os.makedirs(logsFolder)
+
+                self.path = os.path.join(logsFolder, 'metrics.jsonl')
+                self.file = open(self.path, 'a')
+
+            except Exception:
+                log.warning('Could not open the metrics file in ' + str(outputFolder) + ', stage timings are not saved')
+                self.file = None
+
+        self.writeLine(OrderedDict([('run', self.name), ('id', self.id), ('event', 'start'),
+                                    ('time', datetime.datetime.now().isoformat())]))
+
+    def writeLine(self, values):
+
+        if self.file is None:
+            return
+
+        try:
+            self.file.write(json.dumps(values) + '\n')
+        except Exception:
+            self.file = None
+
+    def stage(self, name, records=None):
+        return Stage(self, name, records)
+
+    def addRecords(self, records):
+        self.records += int(records)
+
+    def endStage(self, path, depth, start, seconds, records):
+
+        totals = self.stages[path]
+        totals[0] += seconds
+        totals[1] += 1
+
+        line = OrderedDict([('run', self.name), ('id', self.id), ('stage', path), ('depth', depth),
+                            ('start', round(start - self.start, 6)), ('seconds', round(seconds, 6))])
+
+        if records is not None:
+            totals[2] += int(records)
+            line['records'] = int(records)
+            line['recordsPerSec'] = rate(records, seconds)
+
+        self.writeLine(line)
+
+    def summary(self):
+
+        ''' Dictionary of stage path: seconds, calls, records and records per second, plus the total of the run '''
+
+        summary = OrderedDict()
+
+        for path, (seconds, calls, records) in self.stages.items():
+            summary[path] = {'seconds': seconds, 'calls': calls, 'records': records, 'recordsPerSec': rate(records, seconds)}
+
+        seconds = (self.end if self.finished else timer()) - self.start
+        summary['total'] = {'seconds': seconds, 'calls': 1, 'records': self.records, 'recordsPerSec': rate(self.records, seconds)}
+
+        return summary
+
+    def finish(self):
+
+        if self.finished:
+            return self.summary()
+
+        self.end = timer()
+        self.finished = True
+
+        summary = self.summary()
+        total = summary['total']
+
+        self.writeLine(OrderedDict([('run', self.name), ('id', self.id), ('event', 'end'),
+                                    ('seconds', round(total['seconds'], 6)), ('records', total['records']),
+                                    ('recordsPerSec', total['recordsPerSec'])]))
+
+        if self.file is not None:
+            try:
+                self.file.close()
+            except Exception:
+                pass
+
+            self.file = None
+
+        return summary
+
+def rate(records, seconds):
+
+    if not records or seconds <= 0.0:
+        return None
+
+    return round(records / seconds, 1)
+
+def startRun(name, outputFolder=None):
+
+    ''' Starts timing a run; stages are timed in the innermost run in progress '''
+
+    run = Run(name, outputFolder)
+    runs.append(run)
+
+    return run
+
+def finishRun(run):
+
+    ''' Ends the run (and any runs started within it), logs the time of its main stages and returns its summary '''
+
+    if run.finished:
+        return run.summary()
+
+    while runs and runs[-1] is not run:
+        runs.pop().finish()
+
+    if runs:
+        runs.pop()
+
+    summary = run.finish()
+
+    if not runs:
+        callFinishHandlers()
+
+    log.info(formatSummary(summary))
+
+    return summary
+
+def onFinish(function):
+
+    # Calls function() once, when the outermost run in progress finishes
+    if function not in finishHandlers:
+        finishHandlers.append(function)
+
+def callFinishHandlers():
+
+    while finishHandlers:
+        try:
+            finishHandlers.pop(0)()
+        except Exception as e:
+            log.warning('Could not finish the run: ' + str(e))
+
+def stage(name, records=None):
+
+    # Times a stage of the run in progress, if there is one
+    if not runs:
+        return noStage
+
+    return runs[-1].stage(name, records)
+
+def addRecords(records):
+
+    # Records processed by the run in progress
+    if runs:
+        runs[-1].addRecords(records)
+
+def formatSummary(summary):
+
+    # One line with the time of the run and of its stages (not of the stages within stages)
+    total = summary['total']
+    text = 'Time taken ' + ('%.2f' % total['seconds']) + ' s'
+
+    if total['recordsPerSec'] is not None:
+        text += ' (' + '{:,}'.format(int(total['recordsPerSec'])) + ' records/s)'
+
+    parts = []
+    for path, values in summary.items():
+        if path != 'total' and '/' not in path:
+            parts.append(path + ' ' + ('%.2f' % values['seconds']) + ' s')
+
+    if parts:
+        text += ': ' + ', '.join(parts)
+
+    return text
@@ -0,0 +1,216 @@
+'''
+plot_pool: renders the curve plots in a pool of worker processes
+
+Each plot is described by a job (a dictionary holding its curves, reference
+lines and axis settings) and drawn with the object-oriented Figure API on an
+Agg canvas, so the workers do not share the pyplot state machine. The curves
+are computed once by the caller and shared by the individual and the combined
+plots.
+
+Jobs are written with the pressure on the x-axis; with swapAxes the data,
+scales, labels, limits and reference lines are swapped to the other axis.
+
+The number of worker processes and the maximum number of soils plotted are
+read from the user settings (plotWorkers and maxPlots).
+'''
+
+import os
+import sys
+import multiprocessing
+import NB_PTFs.lib.log as log
+import NB_PTFs.lib.metrics as metrics
+
+from NB_PTFs.lib.refresh_modules import refresh_modules, getUserSetting
+refresh_modules([log, metrics])
+
+def getWorkerCount():
+
+    # Defaults to one worker per processor, leaving one for the tool itself
+    try:
+        workers = int(getUserSetting("plotWorkers"))
+    except (TypeError, ValueError):
+        workers = multiprocessing.cpu_count() - 1
+
+    return max(1, workers)
+
+def getMaxPlots():
+
+    # No cap unless maxPlots is set in the user settings
+    try:
+        return int(getUserSetting("maxPlots"))
+    except (TypeError, ValueError):
+        return None
+
+def capSoils(indices, maxPlots=None):
+
+    # Returns the soils to plot, limited to maxPlots
+    indices = list(indices)
+
+    if maxPlots is None:
+        maxPlots = getMaxPlots()
+
+    if maxPlots is not None and len(indices) > maxPlots:
+        log.warning('Plotting the first ' + str(maxPlots) + ' of ' + str(len(indices)) + ' soils (maxPlots in the user settings)')
+        indices = indices[:maxPlots]
+
+    return indices
+
+def checkAxisChoice(AxisChoice):
+
+    if AxisChoice not in ['Y-axis', 'X-axis']:
+        log.error('Invalid choice for axis plotting, please select Y-axis or X-axis')
+        sys.exit()
+
+    # The pressure is on the y-axis if the water content is on the x-axis
+    return AxisChoice == 'X-axis'
+
+def getPlotUnit(PTFUnit):
+
+    # Multiplier from kPa to the pressure unit chosen for the plots
+    if PTFUnit == 'kPa':
+        return 'kPa', 1.0
+
+    elif PTFUnit == 'cm':
+        return 'cm', 10.0
+
+    elif PTFUnit == 'm':
+        return 'm', 0.1
+
+    else:
+        log.error('Pressure unit for PTF not recognised')
+        sys.exit()
+
+def thresholdLines(fcValue, sicValue, pwpValue, multiplier):
+
+    # Dashed lines at field capacity, stoma closure and permanent wilting point
+    return [(float(fcValue) * multiplier, 'g', 'FC'),
+            (float(sicValue) * multiplier, 'm', 'SIC'),
+            (float(pwpValue) * multiplier, 'r', 'PWP')]
+
+def curveJob(outPath, title, curves, xlabel, ylabel, xscale=None, yscale=None, xlim=None, ylim=None,
+             lines=None, legend=None, swapAxes=False, scatter=False, message=None):
+
+    ''' curves is a list of (x, y, label) and lines a list of (x value, colour, label) '''
+
+    return {'outPath': outPath, 'title': title, 'curves': curves,
+            'xlabel': xlabel, 'ylabel': ylabel, 'xscale': xscale, 'yscale': yscale,
+            'xlim': xlim, 'ylim': ylim, 'lines': lines or [], 'legend': legend,
+            'swapAxes': swapAxes, 'scatter': scatter, 'message': message}
+
+def renderPlot(job):
+
+    # Runs in the worker processes: matplotlib is only imported here
+    from matplotlib.figure import Figure
+    from matplotlib.backends.backend_agg import FigureCanvasAgg
+
+    fig = Figure()
+    FigureCanvasAgg(fig)
+    ax = fig.add_subplot(111)
+
+    swap = job['swapAxes']
+
+    for x, y, label in job['curves']:
+        if swap:
+            x, y = y, x
+
+        if job['scatter']:
+            ax.scatter(x, y, label=label, c='b')
+        else:
+            ax.plot(x, y, label=label)
+
+    xscale, yscale = job['xscale'], job['yscale']
+    xlabel, ylabel = job['xlabel'], job['ylabel']
+    xlim, ylim = job['xlim'], job['ylim']
+
+    if swap:
+        xscale, yscale = yscale, xscale
+        xlabel, ylabel = ylabel, xlabel
+        xlim, ylim = ylim, xlim
+
+    if xscale is not None:
+        ax.set_xscale(xscale)
+    if yscale is not None:
+        ax.set_yscale(yscale)
+
+    for value, colour, label in job['lines']:
+        if swap:
+            ax.axhline(y=value, color=colour, linestyle='dashed', label=label)
+        else:
+            ax.axvline(x=value, color=colour, linestyle='dashed', label=label)
+
+    ax.set_title(job['title'])
+    ax.set_xlabel(xlabel)
+    ax.set_ylabel(ylabel)
+
+    if xlim is not None:
+        ax.set_xlim(xlim)
+    if ylim is not None:
+        ax.set_ylim(ylim)
+
+    if job['legend'] is not None:
+        ax.legend(**job['legend'])
+
+    fig.savefig(job['outPath'], transparent=False)
+
+    return job['message']
+
+def setWorkerExecutable():
+
+    # Inside ArcMap/ArcGIS Pro sys.executable is not Python, so the workers are started with the Python interpreter
+    if sys.platform == 'win32' and not os.path.basename(sys.executable).lower().startswith('python'):
+        multiprocessing.set_executable(os.path.join(sys.exec_prefix, 'python.exe'))
+
+def renderPlots(jobs, workers=None):
+
+    ''' Renders the plot jobs, in a pool of worker processes if there is more than one worker '''
+
+    # The records of the plot stage are the plots
+    with metrics.stage('plot', len(jobs)):
+        drawPlots(jobs, workers)
+
+def drawPlots(jobs, workers):
+
+    if workers is None:
+        workers = getWorkerCount()
+
+    workers = min(workers, len(jobs))
+
+    logQueue = None
+
+    if workers > 1:
+        try:
+            setWorkerExecutable()
+
+            # Messages logged in the workers are written by the listener of this process
+            logQueue = log.startWorkerLogging()
+            pool = multiprocessing.Pool(workers, log.initWorker, (logQueue,))
+
+        except Exception:
+            log.stopWorkerLogging(logQueue)
+            log.warning('Could not start the plotting processes, creating the plots one at a time')
+            workers = 1
+
+    if workers <= 1:
+        for job in jobs:
+            message = renderPlot(job)
+            if message is not None:
+                log.info(message)
+
+        return
+
+    try:
+        chunkSize = max(1, len(jobs) // (workers * 4))
+
+        for message in pool.imap_unordered(renderPlot, jobs, chunkSize):
+            if message is not None:
+                log.info(message)
+
+        pool.close()
+
+    except Exception:
+        pool.terminate()
+        raise
+
+    finally:
+        pool.join()
+        log.stopWorkerLogging(logQueue)
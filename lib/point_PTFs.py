@@ -6,16 +6,18 @@ import sys
 import os
 import configuration
 import numpy as np
-import arcpy
 import math
 import NB_PTFs.lib.log as log
 import NB_PTFs.lib.common as common
 import NB_PTFs.lib.checks_PTFs as checks_PTFs
 import NB_PTFs.lib.PTFdatabase as PTFdatabase
+import NB_PTFs.lib.point_engine as point_engine
+import NB_PTFs.lib.validation as validation
+import NB_PTFs.lib.kernel_pool as kernel_pool
 from NB_PTFs.lib.external import six # Python 2/3 compatibility module
 
 from NB_PTFs.lib.refresh_modules import refresh_modules
-refresh_modules([log, common, checks_PTFs, PTFdatabase])
+refresh_modules([log, common, checks_PTFs, PTFdatabase, point_engine, validation, kernel_pool])
 
 def calcWaterContent(WCArray1, WCArray2, WCName, nameArray):
 
@@ -32,7 +34,149 @@ def calcWaterContent(WCArray1, WCArray2, WCName, nameArray):
 
     return wcArray
 
-def Nguyen_2014(outputFolder, outputShp, carbonConFactor, carbContent):
+def calcThresholds(PTFOption, results, fcVal, sicVal, pwpVal, nameArray):
+
+    '''
+    Water contents at the critical thresholds (saturation, FC, SIC and PWP) and the derived
+    quantities (DW, PAW, RAW and NRAW) for all soils at once, from the results of a point-PTF.
+    Only the thresholds at pressures of the PTF are calculated.
+    Returns the output field names and columns, in the order they are written to the output table.
+    '''
+
+    PTFInfo = PTFdatabase.checkPTF(PTFOption, "pointPTF")
+    PTFFields = list(PTFInfo.PTFFields)
+    PTFUnit = PTFInfo.PTFUnit
+
+    if PTFOption == "Reichert_2009_OM":
+        log.info('For Reichert et al. (2009) - Sand, silt, clay, OM, BD saturation is at 6kPa')
+        satField = "WC_6kPa"
+    else:
+        satField = "WC_0" + str(PTFUnit)
+
+    thresholdFields = [("wc_satCalc", satField, 'saturation'),
+                       ("wc_fcCalc", "WC_" + str(int(fcVal)) + str(PTFUnit), 'field capacity'),
+                       ("wc_sicCalc", "WC_" + str(int(sicVal)) + str(PTFUnit), 'water stress-induced stomatal closure'),
+                       ("wc_pwpCalc", "WC_" + str(int(pwpVal)) + str(PTFUnit), 'permanent wilting point')]
+
+    # Columns of the result matrix, looked up by output field (results[0] is the warning column)
+    wc = {}
+    for name, field, label in thresholdFields:
+        if field in PTFFields:
+            log.info('Field with WC at ' + label + ' found!')
+            wc[name] = np.asarray(results[PTFFields.index(field)], dtype=np.float64)
+        else:
+            log.warning('Field with WC at ' + label + ' not found')
+
+    validator = validation.Validator(nameArray)
+
+    if "wc_satCalc" in wc:
+        validator.addCount('water content at saturation over 1.0', wc["wc_satCalc"] > 1.0)
+
+    if "wc_pwpCalc" in wc:
+        validator.addCount('water content at PWP below 0.01', wc["wc_pwpCalc"] < 0.01)
+        validator.addCount('water content at PWP between 0.01 and 0.05', (wc["wc_pwpCalc"] >= 0.01) & (wc["wc_pwpCalc"] < 0.05))
+
+    fields = [name for name, field, label in thresholdFields if name in wc]
+    columns = [wc[name] for name in fields]
+
+    def derive(name, upper, lower, label):
+        values = wc[upper] - wc[lower]
+        validator.checkNegValue(label, values)
+        log.info(label + ' calculated')
+
+        fields.append(name)
+        columns.append(values)
+
+        return values
+
+    if "wc_satCalc" in wc and "wc_fcCalc" in wc:
+        derive("wc_DW", "wc_satCalc", "wc_fcCalc", 'Drainable water')
+
+    PAW = None
+    if "wc_fcCalc" in wc and "wc_pwpCalc" in wc:
+        PAW = derive("wc_PAW", "wc_fcCalc", "wc_pwpCalc", 'Plant available water')
+
+    if "wc_fcCalc" in wc and "wc_sicCalc" in wc:
+        derive("wc_RAW", "wc_fcCalc", "wc_sicCalc", 'Readily available water')
+
+    elif PAW is not None:
+        # If PAW exists, get RAW = 0.5 * PAW
+        log.info('Readily available water calculated based on PAW')
+        fields.append("wc_RAW")
+        columns.append(0.5 * PAW)
+
+    else:
+        log.info('Readily available water not calculated')
+
+    if "wc_sicCalc" in wc and "wc_pwpCalc" in wc:
+        derive("wc_NRAW", "wc_sicCalc", "wc_pwpCalc", 'Not readily available water')
+
+    validator.summarise()
+
+    return fields, columns
+
+def calcPointPTFs(outputFolder, outputTable, PTFOption, carbonConFactor, carbContent):
+
+    # Calculates water content at points for any point-PTF with the vectorised engine
+    log.info('Calculating water content at points using ' + str(PTFOption))
+
+    PTFInfo = PTFdatabase.checkPTF(PTFOption)
+    PTFFields = PTFInfo.PTFFields
+    spec = point_engine.getSpec(PTFOption)
+
+    # Get OID field
+    OIDField = common.getOIDField(outputTable)
+
+    inputFields = point_engine.getInputFields(PTFOption, carbContent)
+    reqFields = [OIDField] + inputFields
+    checks_PTFs.checkInputFields(reqFields, outputTable)
+
+    # Retrieve info from input
+    columns = outputTable.readColumns(reqFields)
+    record = columns[0]
+    cols = dict(zip(spec['inputs'], columns[1:]))
+
+    # Data checks for all records at once (the warning flag holds the result of the last check, as in the per-PTF functions)
+    validator = validation.Validator(record)
+
+    for check in spec['checks']:
+        if check[0] == 'SSC':
+            validator.checkSSC(cols['sand'], cols['silt'], cols['clay'])
+        elif check[0] == 'carbon':
+            validator.checkCarbon(cols['carbon'], carbContent)
+        elif check[0] == 'value':
+            validator.checkValue(check[1], cols[check[2]])
+
+    warningArray = validator.warnings()
+
+    # Calculate water content for all records at once (in record blocks over kernelWorkers processes)
+    WC, extras = kernel_pool.runKernel(point_engine.calcPointColumns, cols, (PTFOption, carbContent, carbonConFactor))
+
+    # Records outside the domain of the equations (e.g. a log of zero) get NaN for all results
+    extraNames = list(extras.keys())
+    checked = validator.checkResults([WC] + [extras[name] for name in extraNames])
+    WC = checked[0]
+    extras = dict(zip(extraNames, checked[1:]))
+
+    validator.checkNegOutput(WC)
+    validator.summarise()
+
+    # Write the water contents and any extra outputs (e.g. K_sat) to the output shapefile
+    outputFields = list(PTFFields) + list(extras.keys())
+    outputColumns = [warningArray] + [WC[:, i] for i in range(0, WC.shape[1])] + list(extras.values())
+    outputTable.writeColumns(outputFields, outputColumns)
+
+    log.info("Results written to the output shapefile inside the output folder")
+
+    results = []
+    results.append(warningArray)
+
+    for i in range(0, WC.shape[1]):
+        results.append(WC[:, i].tolist())
+
+    return results
+
+def Nguyen_2014(outputFolder, outputTable, carbonConFactor, carbContent):
 
     log.info('Calculating water content at points using Nguyen et al. (2014)')
 
@@ -55,7 +199,7 @@ def Nguyen_2014(outputFolder, outputShp, carbonConFactor, carbContent):
     # Requirements: sand, silt, clay, OC, and BD
 
     # Get OID field
-    OIDField = common.getOIDField(outputShp)
+    OIDField = common.getOIDField(outputTable)
 
     if carbContent == 'OC':
         reqFields = [OIDField, "Sand", "Silt", "Clay", "OC", "BD"]
@@ -64,31 +208,10 @@ def Nguyen_2014(outputFolder, outputShp, carbonConFactor, carbContent):
     elif carbContent == 'OM':
         reqFields = [OIDField, "Sand", "Silt", "Clay", "OM", "BD"]
 
-    checks_PTFs.checkInputFields(reqFields, outputShp)
+    checks_PTFs.checkInputFields(reqFields, outputTable)
 
     # Retrieve info from input
-    record = []
-    sandPerc = []
-    siltPerc = []
-    clayPerc = []
-    carbPerc = []
-    BDg_cm3 = []
-
-    with arcpy.da.SearchCursor(outputShp, reqFields) as searchCursor:
-        for row in searchCursor:
-            objectID = row[0]
-            sand = row[1]
-            silt = row[2]
-            clay = row[3]
-            carbon = row[4]
-            BD = row[5]
-
-            record.append(objectID)
-            sandPerc.append(sand)
-            siltPerc.append(silt)
-            clayPerc.append(clay)
-            carbPerc.append(carbon)
-            BDg_cm3.append(BD)
+    record, sandPerc, siltPerc, clayPerc, carbPerc, BDg_cm3 = outputTable.readColumns(reqFields)
 
     for x in range(0, len(record)):
 
@@ -122,23 +245,7 @@ def Nguyen_2014(outputFolder, outputShp, carbonConFactor, carbContent):
         WC_1500kPaArray.append(WC_1500kPa)
 
     # Write fields to output shapefile
-    common.writeFields(outputShp, PTFFields)
-
-    recordNum = 0
-    with arcpy.da.UpdateCursor(outputShp, PTFFields) as cursor:
-        for row in cursor:
-            row[0] = warningArray[recordNum]
-            row[1] = WC_1kPaArray[recordNum]
-            row[2] = WC_3kPaArray[recordNum]
-            row[3] = WC_6kPaArray[recordNum]
-            row[4] = WC_10kPaArray[recordNum]
-            row[5] = WC_20kPaArray[recordNum]
-            row[6] = WC_33kPaArray[recordNum]
-            row[7] = WC_100kPaArray[recordNum]
-            row[8] = WC_1500kPaArray[recordNum]
-
-            cursor.updateRow(row)
-            recordNum += 1
+    outputTable.writeColumns(PTFFields, [warningArray, WC_1kPaArray, WC_3kPaArray, WC_6kPaArray, WC_10kPaArray, WC_20kPaArray, WC_33kPaArray, WC_100kPaArray, WC_1500kPaArray])
 
     log.info("Results written to the output shapefile inside the output folder")
 
@@ -155,7 +262,7 @@ def Nguyen_2014(outputFolder, outputShp, carbonConFactor, carbContent):
 
     return results
 
-def Adhikary_2008(outputFolder, outputShp):
+def Adhikary_2008(outputFolder, outputTable):
 
     log.info('Calculating water content at points using Adhikary et al. (2008)')
 
@@ -175,29 +282,14 @@ def Adhikary_2008(outputFolder, outputShp):
     WC_1500kPaArray = []
 
     # Get OID field
-    OIDField = common.getOIDField(outputShp)
+    OIDField = common.getOIDField(outputTable)
 
     # Requirements: sand, silt, clay
     reqFields = [OIDField, "Sand", "Silt", "Clay"]
-    checks_PTFs.checkInputFields(reqFields, outputShp)
+    checks_PTFs.checkInputFields(reqFields, outputTable)
 
     # Retrieve info from input
-    record = []
-    sandPerc = []
-    siltPerc = []
-    clayPerc = []
-
-    with arcpy.da.SearchCursor(outputShp, reqFields) as searchCursor:
-        for row in searchCursor:
-            objectID = row[0]
-            sand = row[1]
-            silt = row[2]
-            clay = row[3]
-
-            record.append(objectID)
-            sandPerc.append(sand)
-            siltPerc.append(silt)
-            clayPerc.append(clay)
+    record, sandPerc, siltPerc, clayPerc = outputTable.readColumns(reqFields)
 
     for x in range(0, len(record)):
 
@@ -226,22 +318,7 @@ def Adhikary_2008(outputFolder, outputShp):
         WC_1500kPaArray.append(WC_1500kPa)
 
     # Write fields to output shapefile
-    common.writeFields(outputShp, PTFFields)
-
-    recordNum = 0
-    with arcpy.da.UpdateCursor(outputShp, PTFFields) as cursor:
-        for row in cursor:
-            row[0] = warningArray[recordNum]
-            row[1] = WC_10kPaArray[recordNum]
-            row[2] = WC_33kPaArray[recordNum]
-            row[3] = WC_100kPaArray[recordNum]
-            row[4] = WC_300kPaArray[recordNum]
-            row[5] = WC_500kPaArray[recordNum]
-            row[6] = WC_1000kPaArray[recordNum]
-            row[7] = WC_1500kPaArray[recordNum]
-
-            cursor.updateRow(row)
-            recordNum += 1
+    outputTable.writeColumns(PTFFields, [warningArray, WC_10kPaArray, WC_33kPaArray, WC_100kPaArray, WC_300kPaArray, WC_500kPaArray, WC_1000kPaArray, WC_1500kPaArray])
 
     log.info("Results written to the output shapefile inside the output folder")
 
@@ -257,7 +334,7 @@ def Adhikary_2008(outputFolder, outputShp):
 
     return results
 
-def Rawls_1982(outputFolder, outputShp, carbonConFactor, carbContent):
+def Rawls_1982(outputFolder, outputTable, carbonConFactor, carbContent):
 
     log.info('Calculating water content at points using Rawls et al. (1982)')
 
@@ -280,7 +357,7 @@ def Rawls_1982(outputFolder, outputShp, carbonConFactor, carbContent):
     WC_1500kPaArray = []
 
     # Get OID field
-    OIDField = common.getOIDField(outputShp)
+    OIDField = common.getOIDField(outputTable)
 
     # Requirements: sand, silt, clay, OC, and BD
     if carbContent == 'OC':
@@ -290,31 +367,10 @@ def Rawls_1982(outputFolder, outputShp, carbonConFactor, carbContent):
         reqFields = [OIDField, "Sand", "Silt", "Clay", "OM", "BD"]
         carbonConFactor = 1.0
     
-    checks_PTFs.checkInputFields(reqFields, outputShp)
+    checks_PTFs.checkInputFields(reqFields, outputTable)
 
     # Retrieve info from input
-    record = []
-    sandPerc = []
-    siltPerc = []
-    clayPerc = []
-    carbPerc = []
-    BDg_cm3 = []
-
-    with arcpy.da.SearchCursor(outputShp, reqFields) as searchCursor:
-        for row in searchCursor:
-            objectID = row[0]
-            sand = row[1]
-            silt = row[2]
-            clay = row[3]
-            carbon = row[4]
-            BD = row[5]
-
-            record.append(objectID)
-            sandPerc.append(sand)
-            siltPerc.append(silt)
-            clayPerc.append(clay)
-            carbPerc.append(carbon)
-            BDg_cm3.append(BD)
+    record, sandPerc, siltPerc, clayPerc, carbPerc, BDg_cm3 = outputTable.readColumns(reqFields)
 
     for x in range(0, len(record)):
 
@@ -351,25 +407,7 @@ def Rawls_1982(outputFolder, outputShp, carbonConFactor, carbContent):
         WC_1500kPaArray.append(WC_1500kPa)
 
     # Write fields to output shapefile
-    common.writeFields(outputShp, PTFFields)
-
-    recordNum = 0
-    with arcpy.da.UpdateCursor(outputShp, PTFFields) as cursor:
-        for row in cursor:
-            row[0] = warningArray[recordNum]
-            row[1] = WC_10kPaArray[recordNum]
-            row[2] = WC_20kPaArray[recordNum]
-            row[3] = WC_33kPaArray[recordNum]
-            row[4] = WC_60kPaArray[recordNum]
-            row[5] = WC_100kPaArray[recordNum]
-            row[6] = WC_200kPaArray[recordNum]
-            row[7] = WC_400kPaArray[recordNum]
-            row[8] = WC_700kPaArray[recordNum]
-            row[9] = WC_1000kPaArray[recordNum]
-            row[10] = WC_1500kPaArray[recordNum]
-
-            cursor.updateRow(row)
-            recordNum += 1
+    outputTable.writeColumns(PTFFields, [warningArray, WC_10kPaArray, WC_20kPaArray, WC_33kPaArray, WC_60kPaArray, WC_100kPaArray, WC_200kPaArray, WC_400kPaArray, WC_700kPaArray, WC_1000kPaArray, WC_1500kPaArray])
 
     results = []
     results.append(warningArray)
@@ -386,7 +424,7 @@ def Rawls_1982(outputFolder, outputShp, carbonConFactor, carbContent):
 
     return results
 
-def Hall_1977_top(outputFolder, outputShp, carbonConFactor, carbContent):
+def Hall_1977_top(outputFolder, outputTable, carbonConFactor, carbContent):
 
     log.info('Calculating water content at points using Hall et al. (1977) for topsoil')
 
@@ -404,7 +442,7 @@ def Hall_1977_top(outputFolder, outputShp, carbonConFactor, carbContent):
     WC_1500kPaArray = []
 
     # Get OID field
-    OIDField = common.getOIDField(outputShp)
+    OIDField = common.getOIDField(outputTable)
 
     # Requirements: silt, clay, OC, and BD
     if carbContent == 'OC':
@@ -414,28 +452,10 @@ def Hall_1977_top(outputFolder, outputShp, carbonConFactor, carbContent):
     elif carbContent == 'OM':
         reqFields = [OIDField, "Clay", "Silt", "OM", "BD"]
 
-    checks_PTFs.checkInputFields(reqFields, outputShp)                   
+    checks_PTFs.checkInputFields(reqFields, outputTable)                   
 
     # Retrieve info from input
-    record = []
-    clayPerc = []
-    siltPerc = []
-    carbPerc = []
-    BDg_cm3 = []
-
-    with arcpy.da.SearchCursor(outputShp, reqFields) as searchCursor:
-        for row in searchCursor:
-            objectID = row[0]
-            clay = row[1]
-            silt = row[2]
-            carbon = row[3]
-            BD = row[4]
-
-            record.append(objectID)
-            clayPerc.append(clay)
-            siltPerc.append(silt)
-            carbPerc.append(carbon)
-            BDg_cm3.append(BD)
+    record, clayPerc, siltPerc, carbPerc, BDg_cm3 = outputTable.readColumns(reqFields)
 
     for x in range(0, len(record)):
 
@@ -462,20 +482,7 @@ def Hall_1977_top(outputFolder, outputShp, carbonConFactor, carbContent):
         WC_1500kPaArray.append(WC_1500kPa)
 
     # Write fields to output shapefile
-    common.writeFields(outputShp, PTFFields)
-
-    recordNum = 0
-    with arcpy.da.UpdateCursor(outputShp, PTFFields) as cursor:
-        for row in cursor:
-            row[0] = warningArray[recordNum]
-            row[1] = WC_5kPaArray[recordNum]
-            row[2] = WC_10kPaArray[recordNum]
-            row[3] = WC_33kPaArray[recordNum]
-            row[4] = WC_200kPaArray[recordNum]
-            row[5] = WC_1500kPaArray[recordNum]
-
-            cursor.updateRow(row)
-            recordNum += 1
+    outputTable.writeColumns(PTFFields, [warningArray, WC_5kPaArray, WC_10kPaArray, WC_33kPaArray, WC_200kPaArray, WC_1500kPaArray])
 
     log.info("Results written to the output shapefile inside the output folder")
 
@@ -489,7 +496,7 @@ def Hall_1977_top(outputFolder, outputShp, carbonConFactor, carbContent):
 
     return results
 
-def Hall_1977_sub(outputFolder, outputShp, carbonConFactor, carbContent):
+def Hall_1977_sub(outputFolder, outputTable, carbonConFactor, carbContent):
 
     log.info('Calculating water content at points using Hall et al. (1977) for topsoil')
 
@@ -507,7 +514,7 @@ def Hall_1977_sub(outputFolder, outputShp, carbonConFactor, carbContent):
     WC_1500kPaArray = []
 
     # Get OID field
-    OIDField = common.getOIDField(outputShp)
+    OIDField = common.getOIDField(outputTable)
 
     # Requirements: silt, clay, OC, and BD
     if carbContent == 'OC':
@@ -517,28 +524,10 @@ def Hall_1977_sub(outputFolder, outputShp, carbonConFactor, carbContent):
     elif carbContent == 'OM':
         reqFields = [OIDField, "Clay", "Silt", "OM", "BD"]
 
-    checks_PTFs.checkInputFields(reqFields, outputShp)                   
+    checks_PTFs.checkInputFields(reqFields, outputTable)                   
 
     # Retrieve info from input
-    record = []
-    clayPerc = []
-    siltPerc = []
-    carbPerc = []
-    BDg_cm3 = []
-
-    with arcpy.da.SearchCursor(outputShp, reqFields) as searchCursor:
-        for row in searchCursor:
-            objectID = row[0]
-            clay = row[1]
-            silt = row[2]
-            carbon = row[3]
-            BD = row[4]
-
-            record.append(objectID)
-            clayPerc.append(clay)
-            siltPerc.append(silt)
-            carbPerc.append(carbon)
-            BDg_cm3.append(BD)
+    record, clayPerc, siltPerc, carbPerc, BDg_cm3 = outputTable.readColumns(reqFields)
 
     for x in range(0, len(record)):
 
@@ -565,20 +554,7 @@ def Hall_1977_sub(outputFolder, outputShp, carbonConFactor, carbContent):
         WC_1500kPaArray.append(WC_1500kPa)
 
     # Write fields to output shapefile
-    common.writeFields(outputShp, PTFFields)
-
-    recordNum = 0
-    with arcpy.da.UpdateCursor(outputShp, PTFFields) as cursor:
-        for row in cursor:
-            row[0] = warningArray[recordNum]
-            row[1] = WC_5kPaArray[recordNum]
-            row[2] = WC_10kPaArray[recordNum]
-            row[3] = WC_33kPaArray[recordNum]
-            row[4] = WC_200kPaArray[recordNum]
-            row[5] = WC_1500kPaArray[recordNum]
-
-            cursor.updateRow(row)
-            recordNum += 1
+    outputTable.writeColumns(PTFFields, [warningArray, WC_5kPaArray, WC_10kPaArray, WC_33kPaArray, WC_200kPaArray, WC_1500kPaArray])
 
     log.info("Results written to the output shapefile inside the output folder")
     
@@ -592,7 +568,7 @@ def Hall_1977_sub(outputFolder, outputShp, carbonConFactor, carbContent):
 
     return results
 
-def GuptaLarson_1979(outputFolder, outputShp, carbonConFactor, carbContent):
+def GuptaLarson_1979(outputFolder, outputTable, carbonConFactor, carbContent):
 
     log.info('Calculating water content at points using Gupta and Larson (1979)')
 
@@ -617,7 +593,7 @@ def GuptaLarson_1979(outputFolder, outputShp, carbonConFactor, carbContent):
     WC_1500kPaArray = []
 
     # Get OID field
-    OIDField = common.getOIDField(outputShp)
+    OIDField = common.getOIDField(outputTable)
 
     # Requirements: sand, silt, clay, OM, and BD
     if carbContent == 'OC':
@@ -627,31 +603,10 @@ def GuptaLarson_1979(outputFolder, outputShp, carbonConFactor, carbContent):
         reqFields = [OIDField, "Sand", "Silt", "Clay", "OM", "BD"]
         carbonConFactor = 1.0
     
-    checks_PTFs.checkInputFields(reqFields, outputShp)
+    checks_PTFs.checkInputFields(reqFields, outputTable)
 
     # Retrieve info from input
-    record = []
-    sandPerc = []
-    siltPerc = []
-    clayPerc = []
-    carbPerc = []
-    BDg_cm3 = []
-
-    with arcpy.da.SearchCursor(outputShp, reqFields) as searchCursor:
-        for row in searchCursor:
-            objectID = row[0]
-            sand = row[1]
-            silt = row[2]
-            clay = row[3]
-            carbon = row[4]
-            BD = row[5]
-
-            record.append(objectID)
-            sandPerc.append(sand)
-            siltPerc.append(silt)
-            clayPerc.append(clay)
-            carbPerc.append(carbon)
-            BDg_cm3.append(BD)
+    record, sandPerc, siltPerc, clayPerc, carbPerc, BDg_cm3 = outputTable.readColumns(reqFields)
 
     for x in range(0, len(record)):
 
@@ -692,27 +647,7 @@ def GuptaLarson_1979(outputFolder, outputShp, carbonConFactor, carbContent):
         WC_1500kPaArray.append(WC_1500kPa)
 
     # Write fields to output shapefile
-    common.writeFields(outputShp, PTFFields)
-
-    recordNum = 0
-    with arcpy.da.UpdateCursor(outputShp, PTFFields) as cursor:
-        for row in cursor:
-            row[0] = warningArray[recordNum]
-            row[1] = WC_4kPaArray[recordNum]
-            row[2] = WC_7kPaArray[recordNum]
-            row[3] = WC_10kPaArray[recordNum]
-            row[4] = WC_20kPaArray[recordNum]
-            row[5] = WC_33kPaArray[recordNum]
-            row[6] = WC_60kPaArray[recordNum]
-            row[7] = WC_100kPaArray[recordNum]
-            row[8] = WC_200kPaArray[recordNum]
-            row[9] = WC_400kPaArray[recordNum]
-            row[10] = WC_700kPaArray[recordNum]
-            row[11] = WC_1000kPaArray[recordNum]
-            row[12] = WC_1500kPaArray[recordNum]
-
-            cursor.updateRow(row)
-            recordNum += 1
+    outputTable.writeColumns(PTFFields, [warningArray, WC_4kPaArray, WC_7kPaArray, WC_10kPaArray, WC_20kPaArray, WC_33kPaArray, WC_60kPaArray, WC_100kPaArray, WC_200kPaArray, WC_400kPaArray, WC_700kPaArray, WC_1000kPaArray, WC_1500kPaArray])
 
     log.info("Results written to the output shapefile inside the output folder")
 
@@ -733,7 +668,7 @@ def GuptaLarson_1979(outputFolder, outputShp, carbonConFactor, carbContent):
 
     return results
 
-def Batjes_1996(outputFolder, outputShp, carbonConFactor, carbContent):
+def Batjes_1996(outputFolder, outputTable, carbonConFactor, carbContent):
 
     log.info('Calculating water content at points using Batjes (1996)')
 
@@ -756,7 +691,7 @@ def Batjes_1996(outputFolder, outputShp, carbonConFactor, carbContent):
     WC_1500kPaArray = []
 
     # Get OID field
-    OIDField = common.getOIDField(outputShp)
+    OIDField = common.getOIDField(outputTable)
 
     # Requirements: silt, clay, and OC
     if carbContent == 'OC':
@@ -766,25 +701,10 @@ def Batjes_1996(outputFolder, outputShp, carbonConFactor, carbContent):
     elif carbContent == 'OM':
         reqFields = [OIDField, "Silt", "Clay", "OM"]                    
     
-    checks_PTFs.checkInputFields(reqFields, outputShp)
+    checks_PTFs.checkInputFields(reqFields, outputTable)
 
     # Retrieve info from input
-    record = []
-    siltPerc = []
-    clayPerc = []
-    carbPerc = []
-
-    with arcpy.da.SearchCursor(outputShp, reqFields) as searchCursor:
-        for row in searchCursor:
-            objectID = row[0]
-            silt = row[1]
-            clay = row[2]
-            carbon = row[3]
-
-            record.append(objectID)
-            siltPerc.append(silt)
-            clayPerc.append(clay)
-            carbPerc.append(carbon)
+    record, siltPerc, clayPerc, carbPerc = outputTable.readColumns(reqFields)
 
     for x in range(0, len(record)):
 
@@ -821,25 +741,7 @@ def Batjes_1996(outputFolder, outputShp, carbonConFactor, carbContent):
         WC_1500kPaArray.append(WC_1500kPa)
 
     # Write fields to output shapefile
-    common.writeFields(outputShp, PTFFields)
-
-    recordNum = 0
-    with arcpy.da.UpdateCursor(outputShp, PTFFields) as cursor:
-        for row in cursor:
-            row[0] = warningArray[recordNum]
-            row[1] = WC_0kPaArray[recordNum]
-            row[2] = WC_1kPaArray[recordNum]
-            row[3] = WC_3kPaArray[recordNum]
-            row[4] = WC_5kPaArray[recordNum]
-            row[5] = WC_10kPaArray[recordNum]
-            row[6] = WC_20kPaArray[recordNum]
-            row[7] = WC_33kPaArray[recordNum]
-            row[8] = WC_50kPaArray[recordNum]
-            row[9] = WC_250kPaArray[recordNum]
-            row[10] = WC_1500kPaArray[recordNum]
-
-            cursor.updateRow(row)
-            recordNum += 1
+    outputTable.writeColumns(PTFFields, [warningArray, WC_0kPaArray, WC_1kPaArray, WC_3kPaArray, WC_5kPaArray, WC_10kPaArray, WC_20kPaArray, WC_33kPaArray, WC_50kPaArray, WC_250kPaArray, WC_1500kPaArray])
 
     results = []
     results.append(warningArray)
@@ -856,7 +758,7 @@ def Batjes_1996(outputFolder, outputShp, carbonConFactor, carbContent):
 
     return results
 
-def SaxtonRawls_2006(outputFolder, outputShp, carbonConFactor, carbContent):
+def SaxtonRawls_2006(outputFolder, outputTable, carbonConFactor, carbContent):
 
     log.info('Calculating water content at points using Saxton and Rawls (2006)')
 
@@ -874,7 +776,7 @@ def SaxtonRawls_2006(outputFolder, outputShp, carbonConFactor, carbContent):
     K_satArray = []
 
     # Get OID field
-    OIDField = common.getOIDField(outputShp)
+    OIDField = common.getOIDField(outputTable)
 
     # Requirements: sand, clay, and OM
     if carbContent == 'OC':
@@ -884,25 +786,10 @@ def SaxtonRawls_2006(outputFolder, outputShp, carbonConFactor, carbContent):
         reqFields = [OIDField, "Sand", "Clay", "OM"]
         carbonConFactor = 1.0
     
-    checks_PTFs.checkInputFields(reqFields, outputShp)
+    checks_PTFs.checkInputFields(reqFields, outputTable)
 
     # Retrieve info from input
-    record = []
-    sandPerc = []
-    clayPerc = []
-    carbPerc = []
-
-    with arcpy.da.SearchCursor(outputShp, reqFields) as searchCursor:
-        for row in searchCursor:
-            objectID = row[0]
-            sand = row[1]
-            clay = row[2]
-            carbon = row[3]
-
-            record.append(objectID)
-            sandPerc.append(sand)
-            clayPerc.append(clay)
-            carbPerc.append(carbon)
+    record, sandPerc, clayPerc, carbPerc = outputTable.readColumns(reqFields)
 
     for x in range(0, len(record)):
 
@@ -934,30 +821,10 @@ def SaxtonRawls_2006(outputFolder, outputShp, carbonConFactor, carbContent):
         K_satArray.append(K_sat)
 
     # Write K_sat to output shapefile
-    arcpy.AddField_management(outputShp, "K_sat", "DOUBLE", 10, 6)
-
-    outputFields = ["K_sat"]
-    recordNum = 0
-    with arcpy.da.UpdateCursor(outputShp, outputFields) as cursor:
-        for row in cursor:
-            row[0] = K_satArray[recordNum]
-
-            cursor.updateRow(row)
-            recordNum += 1
+    outputTable.writeColumns(["K_sat"], [K_satArray])
 
     # Write fields to output shapefile
-    common.writeFields(outputShp, PTFFields)
-
-    recordNum = 0
-    with arcpy.da.UpdateCursor(outputShp, PTFFields) as cursor:
-        for row in cursor:
-            row[0] = warningArray[recordNum]
-            row[1] = WC_0kPaArray[recordNum]
-            row[2] = WC_33kPaArray[recordNum]
-            row[3] = WC_1500kPaArray[recordNum]
-
-            cursor.updateRow(row)
-            recordNum += 1
+    outputTable.writeColumns(PTFFields, [warningArray, WC_0kPaArray, WC_33kPaArray, WC_1500kPaArray])
 
     log.info("Results written to the output shapefile inside the output folder")
 
@@ -969,7 +836,7 @@ def SaxtonRawls_2006(outputFolder, outputShp, carbonConFactor, carbContent):
 
     return results
 
-def Pidgeon_1972(outputFolder, outputShp, carbonConFactor, carbContent):
+def Pidgeon_1972(outputFolder, outputTable, carbonConFactor, carbContent):
 
     log.info('Calculating water content at points using Pidgeon (1972)')
 
@@ -987,7 +854,7 @@ def Pidgeon_1972(outputFolder, outputShp, carbonConFactor, carbContent):
     WC_FCArray = []
 
     # Get OID field
-    OIDField = common.getOIDField(outputShp)
+    OIDField = common.getOIDField(outputTable)
 
     # Requirements: silt, clay, BD, and OM
     if carbContent == 'OC':
@@ -997,28 +864,10 @@ def Pidgeon_1972(outputFolder, outputShp, carbonConFactor, carbContent):
         reqFields = [OIDField, "Silt", "Clay", "OM", "BD"]
         carbonConFactor = 1.0
     
-    checks_PTFs.checkInputFields(reqFields, outputShp)
+    checks_PTFs.checkInputFields(reqFields, outputTable)
 
     # Retrieve info from input
-    record = []
-    siltPerc = []
-    clayPerc = []
-    carbPerc = []
-    BDg_cm3 = []
-
-    with arcpy.da.SearchCursor(outputShp, reqFields) as searchCursor:
-        for row in searchCursor:
-            objectID = row[0]
-            silt = row[1]
-            clay = row[2]
-            carbon = row[3]
-            BD = row[4]
-
-            record.append(objectID)
-            siltPerc.append(silt)
-            clayPerc.append(clay)
-            carbPerc.append(carbon)
-            BDg_cm3.append(BD)
+    record, siltPerc, clayPerc, carbPerc, BDg_cm3 = outputTable.readColumns(reqFields)
 
     for x in range(0, len(record)):
 
@@ -1044,18 +893,7 @@ def Pidgeon_1972(outputFolder, outputShp, carbonConFactor, carbContent):
         WC_1500kPaArray.append(WC_1500kPa)
 
     # Write fields to output shapefile
-    common.writeFields(outputShp, PTFFields)
-
-    recordNum = 0
-    with arcpy.da.UpdateCursor(outputShp, PTFFields) as cursor:
-        for row in cursor:
-            row[0] = warningArray[recordNum]
-            row[1] = WC_10kPaArray[recordNum]
-            row[2] = WC_33kPaArray[recordNum]
-            row[3] = WC_1500kPaArray[recordNum]
-            
-            cursor.updateRow(row)
-            recordNum += 1
+    outputTable.writeColumns(PTFFields, [warningArray, WC_10kPaArray, WC_33kPaArray, WC_1500kPaArray])
 
     log.info("Results written to the output shapefile inside the output folder")
     
@@ -1067,11 +905,11 @@ def Pidgeon_1972(outputFolder, outputShp, carbonConFactor, carbContent):
 
     return results
 
-def Lal_1978(outputFolder, outputShp, PTFOption):
+def Lal_1978(outputFolder, outputTable, PTFOption):
 
     log.info('Calculating water content at points using Lal (1978)')
 
-    PTFInfo = PTFdatabase.checkPTF("Lal_1978")
+    PTFInfo = PTFdatabase.checkPTF(PTFOption)
     PTFType = PTFInfo.PTFType
     PTFPressures = PTFInfo.PTFPressures
     PTFFields = PTFInfo.PTFFields
@@ -1084,26 +922,14 @@ def Lal_1978(outputFolder, outputShp, PTFOption):
     WC_1500kPaArray = []
 
     # Get OID field
-    OIDField = common.getOIDField(outputShp)
+    OIDField = common.getOIDField(outputTable)
 
     # Requirements: Clay and BD
     reqFields = [OIDField, "Clay", "BD"]
-    checks_PTFs.checkInputFields(reqFields, outputShp)
+    checks_PTFs.checkInputFields(reqFields, outputTable)
 
     # Retrieve info from input
-    record = []
-    clayPerc = []
-    BDg_cm3 = []
-
-    with arcpy.da.SearchCursor(outputShp, reqFields) as searchCursor:
-        for row in searchCursor:
-            objectID = row[0]
-            clay = row[1]
-            BD = row[2]
-
-            record.append(objectID)
-            clayPerc.append(clay)
-            BDg_cm3.append(BD)
+    record, clayPerc, BDg_cm3 = outputTable.readColumns(reqFields)
 
     for x in range(0, len(record)):
 
@@ -1137,19 +963,7 @@ def Lal_1978(outputFolder, outputShp, PTFOption):
         WC_1500kPaArray.append(WC_1500kPa)
 
     # Write fields to output shapefile
-    common.writeFields(outputShp, PTFFields)
-
-    recordNum = 0
-    with arcpy.da.UpdateCursor(outputShp, PTFFields) as cursor:
-        for row in cursor:
-            row[0] = warningArray[recordNum]
-            row[1] = WC_0kPaArray[recordNum]
-            row[2] = WC_10kPaArray[recordNum]
-            row[3] = WC_33kPaArray[recordNum]
-            row[4] = WC_1500kPaArray[recordNum]
-
-            cursor.updateRow(row)
-            recordNum += 1
+    outputTable.writeColumns(PTFFields, [warningArray, WC_0kPaArray, WC_10kPaArray, WC_33kPaArray, WC_1500kPaArray])
 
     log.info("Results written to the output shapefile inside the output folder")
 
@@ -1162,7 +976,7 @@ def Lal_1978(outputFolder, outputShp, PTFOption):
 
     return results
 
-def AinaPeriaswamy_1985(outputFolder, outputShp):
+def AinaPeriaswamy_1985(outputFolder, outputTable):
 
     log.info('Calculating water content at points using Aina and Periaswamy (1985)')
 
@@ -1177,29 +991,14 @@ def AinaPeriaswamy_1985(outputFolder, outputShp):
     WC_1500kPaArray = []
 
     # Get OID field
-    OIDField = common.getOIDField(outputShp)
+    OIDField = common.getOIDField(outputTable)
 
     # Requirements: Sand, clay and BD
     reqFields = [OIDField, "Sand", "Clay", "BD"]
-    checks_PTFs.checkInputFields(reqFields, outputShp)
+    checks_PTFs.checkInputFields(reqFields, outputTable)
 
     # Retrieve info from input
-    record = []
-    sandPerc = []
-    clayPerc = []
-    BDg_cm3 = []
-
-    with arcpy.da.SearchCursor(outputShp, reqFields) as searchCursor:
-        for row in searchCursor:
-            objectID = row[0]
-            sand = row[1]
-            clay = row[2]
-            BD = row[3]
-
-            record.append(objectID)
-            sandPerc.append(sand)
-            clayPerc.append(clay)
-            BDg_cm3.append(BD)
+    record, sandPerc, clayPerc, BDg_cm3 = outputTable.readColumns(reqFields)
 
     for x in range(0, len(record)):
 
@@ -1220,17 +1019,7 @@ def AinaPeriaswamy_1985(outputFolder, outputShp):
         WC_1500kPaArray.append(WC_1500kPa)
 
     # Write fields to output shapefile
-    common.writeFields(outputShp, PTFFields)
-
-    recordNum = 0
-    with arcpy.da.UpdateCursor(outputShp, PTFFields) as cursor:
-        for row in cursor:
-            row[0] = warningArray[recordNum]
-            row[1] = WC_33kPaArray[recordNum]
-            row[2] = WC_1500kPaArray[recordNum]
-
-            cursor.updateRow(row)
-            recordNum += 1
+    outputTable.writeColumns(PTFFields, [warningArray, WC_33kPaArray, WC_1500kPaArray])
 
     log.info("Results written to the output shapefile inside the output folder")
 
@@ -1241,7 +1030,7 @@ def AinaPeriaswamy_1985(outputFolder, outputShp):
 
     return results
 
-def ManriqueJones_1991(outputFolder, outputShp):
+def ManriqueJones_1991(outputFolder, outputTable):
 
     log.info('Calculating water content at points using Manrique and Jones (1991)')
 
@@ -1256,29 +1045,14 @@ def ManriqueJones_1991(outputFolder, outputShp):
     WC_1500kPaArray = []
 
     # Get OID field
-    OIDField = common.getOIDField(outputShp)
+    OIDField = common.getOIDField(outputTable)
 
     # Requirements: Sand, clay and BD
     reqFields = [OIDField, "Sand", "Clay", "BD"]
-    checks_PTFs.checkInputFields(reqFields, outputShp)
+    checks_PTFs.checkInputFields(reqFields, outputTable)
 
     # Retrieve info from input
-    record = []
-    sandPerc = []
-    clayPerc = []
-    BDg_cm3 = []
-
-    with arcpy.da.SearchCursor(outputShp, reqFields) as searchCursor:
-        for row in searchCursor:
-            objectID = row[0]
-            sand = row[1]
-            clay = row[2]
-            BD = row[3]
-
-            record.append(objectID)
-            sandPerc.append(sand)
-            clayPerc.append(clay)
-            BDg_cm3.append(BD)
+    record, sandPerc, clayPerc, BDg_cm3 = outputTable.readColumns(reqFields)
 
     for x in range(0, len(record)):
 
@@ -1303,17 +1077,7 @@ def ManriqueJones_1991(outputFolder, outputShp):
         WC_1500kPaArray.append(WC_1500kPa)
 
     # Write fields to output shapefile
-    common.writeFields(outputShp, PTFFields)
-
-    recordNum = 0
-    with arcpy.da.UpdateCursor(outputShp, PTFFields) as cursor:
-        for row in cursor:
-            row[0] = warningArray[recordNum]
-            row[1] = WC_33kPaArray[recordNum]
-            row[2] = WC_1500kPaArray[recordNum]
-
-            cursor.updateRow(row)
-            recordNum += 1
+    outputTable.writeColumns(PTFFields, [warningArray, WC_33kPaArray, WC_1500kPaArray])
 
     log.info("Results written to the output shapefile inside the output folder")
 
@@ -1324,7 +1088,7 @@ def ManriqueJones_1991(outputFolder, outputShp):
 
     return results
 
-def vanDenBerg_1997(outputFolder, outputShp, carbonConFactor, carbContent):
+def vanDenBerg_1997(outputFolder, outputTable, carbonConFactor, carbContent):
 
     log.info('Calculating water content at points using van Den Berg et al. (1997)')
 
@@ -1339,7 +1103,7 @@ def vanDenBerg_1997(outputFolder, outputShp, carbonConFactor, carbContent):
     WC_1500kPaArray = []
 
     # Get OID field
-    OIDField = common.getOIDField(outputShp)
+    OIDField = common.getOIDField(outputTable)
 
     # Requirements: Silt, clay, OC
     if carbContent == 'OC':
@@ -1349,28 +1113,10 @@ def vanDenBerg_1997(outputFolder, outputShp, carbonConFactor, carbContent):
     elif carbContent == 'OM':
         reqFields = [OIDField, "Silt", "Clay", "OM", "BD"]
                         
-    checks_PTFs.checkInputFields(reqFields, outputShp)
+    checks_PTFs.checkInputFields(reqFields, outputTable)
 
     # Retrieve info from input
-    record = []
-    siltPerc = []
-    clayPerc = []
-    carbPerc = []
-    BDg_cm3 = []
-
-    with arcpy.da.SearchCursor(outputShp, reqFields) as searchCursor:
-        for row in searchCursor:
-            objectID = row[0]
-            silt = row[1]
-            clay = row[2]
-            carbon = row[3]
-            BD = row[4]
-
-            record.append(objectID)
-            siltPerc.append(silt)
-            clayPerc.append(clay)
-            carbPerc.append(carbon)
-            BDg_cm3.append(BD)
+    record, siltPerc, clayPerc, carbPerc, BDg_cm3 = outputTable.readColumns(reqFields)
 
     for x in range(0, len(record)):
 
@@ -1392,17 +1138,7 @@ def vanDenBerg_1997(outputFolder, outputShp, carbonConFactor, carbContent):
         WC_1500kPaArray.append(WC_1500kPa)
 
     # Write fields to output shapefile
-    common.writeFields(outputShp, PTFFields)
-
-    recordNum = 0
-    with arcpy.da.UpdateCursor(outputShp, PTFFields) as cursor:
-        for row in cursor:
-            row[0] = warningArray[recordNum]
-            row[1] = WC_10kPaArray[recordNum]
-            row[2] = WC_1500kPaArray[recordNum]
-
-            cursor.updateRow(row)
-            recordNum += 1
+    outputTable.writeColumns(PTFFields, [warningArray, WC_10kPaArray, WC_1500kPaArray])
 
     log.info("Results written to the output shapefile inside the output folder")
     
@@ -1413,7 +1149,7 @@ def vanDenBerg_1997(outputFolder, outputShp, carbonConFactor, carbContent):
 
     return results
 
-def TomasellaHodnett_1998(outputFolder, outputShp, carbonConFactor, carbContent):
+def TomasellaHodnett_1998(outputFolder, outputTable, carbonConFactor, carbContent):
 
     log.info('Calculating water content at points using Tomasella and Hodnett (1998)')
 
@@ -1435,7 +1171,7 @@ def TomasellaHodnett_1998(outputFolder, outputShp, carbonConFactor, carbContent)
     WC_1500kPaArray = []
 
     # Get OID field
-    OIDField = common.getOIDField(outputShp)
+    OIDField = common.getOIDField(outputTable)
 
     # Requirements: Silt, clay, OC
     if carbContent == 'OC':
@@ -1445,25 +1181,10 @@ def TomasellaHodnett_1998(outputFolder, outputShp, carbonConFactor, carbContent)
     elif carbContent == 'OM':
         reqFields = [OIDField, "Silt", "Clay", "OM"]
                         
-    checks_PTFs.checkInputFields(reqFields, outputShp)
+    checks_PTFs.checkInputFields(reqFields, outputTable)
 
     # Retrieve info from input
-    record = []
-    siltPerc = []
-    clayPerc = []
-    carbPerc = []
-
-    with arcpy.da.SearchCursor(outputShp, reqFields) as searchCursor:
-        for row in searchCursor:
-            objectID = row[0]
-            silt = row[1]
-            clay = row[2]
-            carbon = row[3]
-
-            record.append(objectID)
-            siltPerc.append(silt)
-            clayPerc.append(clay)
-            carbPerc.append(carbon)
+    record, siltPerc, clayPerc, carbPerc = outputTable.readColumns(reqFields)
 
     for x in range(0, len(record)):
 
@@ -1498,36 +1219,8 @@ def TomasellaHodnett_1998(outputFolder, outputShp, carbonConFactor, carbContent)
         WC_1500kPaArray.append(WC_1500kPa)
 
     # Write results back to the shapefile
-
-    # Add fields
-    arcpy.AddField_management(outputShp, "warning", "TEXT")
-    arcpy.AddField_management(outputShp, "WC_0kPa", "DOUBLE", 10, 6)
-    arcpy.AddField_management(outputShp, "WC_1kPa", "DOUBLE", 10, 6)
-    arcpy.AddField_management(outputShp, "WC_3kPa", "DOUBLE", 10, 6)
-    arcpy.AddField_management(outputShp, "WC_6kPa", "DOUBLE", 10, 6)
-    arcpy.AddField_management(outputShp, "WC_10kPa", "DOUBLE", 10, 6)
-    arcpy.AddField_management(outputShp, "WC_33kPa", "DOUBLE", 10, 6)
-    arcpy.AddField_management(outputShp, "WC_100kPa", "DOUBLE", 10, 6)
-    arcpy.AddField_management(outputShp, "WC_500kPa", "DOUBLE", 10, 6)
-    arcpy.AddField_management(outputShp, "WC_1500kPa", "DOUBLE", 10, 6)
-
     outputFields = ["warning", "WC_0kPa", "WC_1kPa", "WC_3kPa", "WC_6kPa", "WC_10kPa", "WC_33kPa", "WC_100kPa", "WC_500kPa", "WC_1500kPa"]
-    recordNum = 0
-    with arcpy.da.UpdateCursor(outputShp, outputFields) as cursor:
-        for row in cursor:
-            row[0] = warningArray[recordNum]
-            row[1] = WC_0kPaArray[recordNum]
-            row[2] = WC_1kPaArray[recordNum]
-            row[3] = WC_3kPaArray[recordNum]
-            row[4] = WC_6kPaArray[recordNum]
-            row[5] = WC_10kPaArray[recordNum]
-            row[6] = WC_33kPaArray[recordNum]
-            row[7] = WC_100kPaArray[recordNum]
-            row[8] = WC_500kPaArray[recordNum]
-            row[9] = WC_1500kPaArray[recordNum]
-
-            cursor.updateRow(row)
-            recordNum += 1
+    outputTable.writeColumns(outputFields, [warningArray, WC_0kPaArray, WC_1kPaArray, WC_3kPaArray, WC_6kPaArray, WC_10kPaArray, WC_33kPaArray, WC_100kPaArray, WC_500kPaArray, WC_1500kPaArray])
 
     log.info("Results written to the output shapefile inside the output folder")
 
@@ -1545,7 +1238,7 @@ def TomasellaHodnett_1998(outputFolder, outputShp, carbonConFactor, carbContent)
 
     return results
 
-def Reichert_2009_OM(outputFolder, outputShp, carbonConFactor, carbContent):
+def Reichert_2009_OM(outputFolder, outputTable, carbonConFactor, carbContent):
 
     log.info('Calculating water content at points using Reichert et al. (2009) - Sand, silt, clay, OM, BD')
 
@@ -1564,7 +1257,7 @@ def Reichert_2009_OM(outputFolder, outputShp, carbonConFactor, carbContent):
     WC_1500kPaArray = []
 
     # Get OID field
-    OIDField = common.getOIDField(outputShp)
+    OIDField = common.getOIDField(outputTable)
 
     # Requirements: Sand, silt, clay, OM, and BD
     if carbContent == 'OC':
@@ -1574,31 +1267,10 @@ def Reichert_2009_OM(outputFolder, outputShp, carbonConFactor, carbContent):
         reqFields = [OIDField, "Sand", "Silt", "Clay", "OM", "BD"]
         carbonConFactor = 1.0
                         
-    checks_PTFs.checkInputFields(reqFields, outputShp)
+    checks_PTFs.checkInputFields(reqFields, outputTable)
 
     # Retrieve info from input
-    record = []
-    sandPerc = []
-    siltPerc = []
-    clayPerc = []
-    carbPerc = []
-    BDg_cm3 = []
-
-    with arcpy.da.SearchCursor(outputShp, reqFields) as searchCursor:
-        for row in searchCursor:
-            objectID = row[0]
-            sand = row[1]
-            silt = row[2]
-            clay = row[3]
-            carbon = row[4]
-            BD = row[5]
-
-            record.append(objectID)
-            sandPerc.append(sand)
-            siltPerc.append(silt)
-            clayPerc.append(clay)
-            carbPerc.append(carbon)
-            BDg_cm3.append(BD)
+    record, sandPerc, siltPerc, clayPerc, carbPerc, BDg_cm3 = outputTable.readColumns(reqFields)
 
     for x in range(0, len(record)):
 
@@ -1627,21 +1299,7 @@ def Reichert_2009_OM(outputFolder, outputShp, carbonConFactor, carbContent):
         WC_1500kPaArray.append(WC_1500kPa)
 
     # Write fields to output shapefile
-    common.writeFields(outputShp, PTFFields)
-
-    recordNum = 0
-    with arcpy.da.UpdateCursor(outputShp, PTFFields) as cursor:
-        for row in cursor:
-            row[0] = warningArray[recordNum]            
-            row[1] = WC_6kPaArray[recordNum]
-            row[2] = WC_10kPaArray[recordNum]
-            row[3] = WC_33kPaArray[recordNum]
-            row[4] = WC_100kPaArray[recordNum]
-            row[5] = WC_500kPaArray[recordNum]
-            row[6] = WC_1500kPaArray[recordNum]
-
-            cursor.updateRow(row)
-            recordNum += 1
+    outputTable.writeColumns(PTFFields, [warningArray, WC_6kPaArray, WC_10kPaArray, WC_33kPaArray, WC_100kPaArray, WC_500kPaArray, WC_1500kPaArray])
 
     log.info("Results written to the output shapefile inside the output folder")
     
@@ -1656,7 +1314,7 @@ def Reichert_2009_OM(outputFolder, outputShp, carbonConFactor, carbContent):
 
     return results
 
-def Reichert_2009(outputFolder, outputShp):
+def Reichert_2009(outputFolder, outputTable):
 
     log.info('Calculating water content at points using Reichert et al. (2009) - Sand, silt, clay, BD')
 
@@ -1666,7 +1324,7 @@ def Reichert_2009(outputFolder, outputShp):
     PTFFields = PTFInfo.PTFFields
 
     # Get OID field
-    OIDField = common.getOIDField(outputShp)
+    OIDField = common.getOIDField(outputTable)
 
     # Returns these arrays
     warningArray = []
@@ -1676,28 +1334,10 @@ def Reichert_2009(outputFolder, outputShp):
 
     # Requirements: Sand, silt, clay, and BD                
     reqFields = [OIDField, "Sand", "Silt", "Clay", "BD"]           
-    checks_PTFs.checkInputFields(reqFields, outputShp)
+    checks_PTFs.checkInputFields(reqFields, outputTable)
 
     # Retrieve info from input
-    record = []
-    sandPerc = []
-    siltPerc = []
-    clayPerc = []
-    BDg_cm3 = []
-
-    with arcpy.da.SearchCursor(outputShp, reqFields) as searchCursor:
-        for row in searchCursor:
-            objectID = row[0]
-            sand = row[1]
-            silt = row[2]
-            clay = row[3]
-            BD = row[4]
-
-            record.append(objectID)
-            sandPerc.append(sand)
-            siltPerc.append(silt)
-            clayPerc.append(clay)
-            BDg_cm3.append(BD)
+    record, sandPerc, siltPerc, clayPerc, BDg_cm3 = outputTable.readColumns(reqFields)
 
     for x in range(0, len(record)):
 
@@ -1719,18 +1359,7 @@ def Reichert_2009(outputFolder, outputShp):
         WC_1500kPaArray.append(WC_1500kPa)
 
     # Write fields to output shapefile
-    common.writeFields(outputShp, PTFFields)
-
-    recordNum = 0
-    with arcpy.da.UpdateCursor(outputShp, PTFFields) as cursor:
-        for row in cursor:
-            row[0] = warningArray[recordNum]
-            row[1] = WC_10kPaArray[recordNum]
-            row[2] = WC_33kPaArray[recordNum]
-            row[3] = WC_1500kPaArray[recordNum]
-
-            cursor.updateRow(row)
-            recordNum += 1
+    outputTable.writeColumns(PTFFields, [warningArray, WC_10kPaArray, WC_33kPaArray, WC_1500kPaArray])
 
     log.info("Results written to the output shapefile inside the output folder")
     
@@ -1742,7 +1371,7 @@ def Reichert_2009(outputFolder, outputShp):
 
     return results
 
-def Botula_2013(outputFolder, outputShp):
+def Botula_2013(outputFolder, outputTable):
 
     log.info('Calculating water content at points using Botula-Manyala (2013)')
 
@@ -1752,7 +1381,7 @@ def Botula_2013(outputFolder, outputShp):
     PTFFields = PTFInfo.PTFFields
 
     # Get OID field
-    OIDField = common.getOIDField(outputShp)
+    OIDField = common.getOIDField(outputTable)
 
     # Returns these arrays
     warningArray = []
@@ -1767,25 +1396,10 @@ def Botula_2013(outputFolder, outputShp):
 
     # Requirements: Sand, clay, and BD                
     reqFields = [OIDField, "Sand", "Clay", "BD"]           
-    checks_PTFs.checkInputFields(reqFields, outputShp)
+    checks_PTFs.checkInputFields(reqFields, outputTable)
 
     # Retrieve info from input
-    record = []
-    sandPerc = []
-    clayPerc = []
-    BDg_cm3 = []
-
-    with arcpy.da.SearchCursor(outputShp, reqFields) as searchCursor:
-        for row in searchCursor:
-            objectID = row[0]
-            sand = row[1]
-            clay = row[2]
-            BD = row[3]
-
-            record.append(objectID)
-            sandPerc.append(sand)
-            clayPerc.append(clay)
-            BDg_cm3.append(BD)
+    record, sandPerc, clayPerc, BDg_cm3 = outputTable.readColumns(reqFields)
 
     for x in range(0, len(record)):
 
@@ -1803,7 +1417,7 @@ def Botula_2013(outputFolder, outputShp):
         WC_20kPa = (42.302 -  (0.344 * sandPerc[x])) * 10**(-2)        
         WC_33kPa = (41.929 -  (0.349* sandPerc[x])) * 10**(-2)        
         WC_100kPa  = (26.478 -  (0.276* sandPerc[x]) + (0.091* clayPerc[x]) + (4.720* BDg_cm3[x])) * 10**(-2)
-        WC_1500kPa = (8.405 -  (0.159* sandPerc[x]) + (0.207 * clayPerc[x]) + (7.789** BDg_cm3[x])) * 10**(-2)
+        WC_1500kPa = (8.405 -  (0.159* sandPerc[x]) + (0.207 * clayPerc[x]) + (7.789 * BDg_cm3[x])) * 10**(-2)
 
         outValues = [WC_1kPa, WC_3kPa, WC_6kPa, WC_10kPa, WC_20kPa, WC_33kPa, WC_100kPa, WC_1500kPa]
         checks_PTFs.checkNegOutput(outValues, x)
@@ -1818,23 +1432,7 @@ def Botula_2013(outputFolder, outputShp):
         WC_1500kPaArray.append(WC_1500kPa)
 
     # Write fields to output shapefile
-    common.writeFields(outputShp, PTFFields)
-
-    recordNum = 0
-    with arcpy.da.UpdateCursor(outputShp, PTFFields) as cursor:
-        for row in cursor:
-            row[0] = warningArray[recordNum]
-            row[1] = WC_1kPaArray[recordNum]
-            row[2] = WC_3kPaArray[recordNum]
-            row[3] = WC_6kPaArray[recordNum]
-            row[4] = WC_10kPaArray[recordNum]
-            row[5] = WC_20kPaArray[recordNum]
-            row[6] = WC_33kPaArray[recordNum]
-            row[7] = WC_100kPaArray[recordNum]
-            row[8] = WC_1500kPaArray[recordNum]
-
-            cursor.updateRow(row)
-            recordNum += 1
+    outputTable.writeColumns(PTFFields, [warningArray, WC_1kPaArray, WC_3kPaArray, WC_6kPaArray, WC_10kPaArray, WC_20kPaArray, WC_33kPaArray, WC_100kPaArray, WC_1500kPaArray])
 
     log.info("Results written to the output shapefile inside the output folder")
 
@@ -1851,7 +1449,7 @@ def Botula_2013(outputFolder, outputShp):
 
     return results
 
-def ShwethaVarija_2013(outputFolder, outputShp):
+def ShwethaVarija_2013(outputFolder, outputTable):
 
     log.info('Calculating water content at points using Shwetha and Varija (2013)')
 
@@ -1861,7 +1459,7 @@ def ShwethaVarija_2013(outputFolder, outputShp):
     PTFFields = PTFInfo.PTFFields
 
     # Get OID field
-    OIDField = common.getOIDField(outputShp)
+    OIDField = common.getOIDField(outputTable)
 
     # Returns these arrays
     warningArray = []
@@ -1874,28 +1472,10 @@ def ShwethaVarija_2013(outputFolder, outputShp):
 
     # Requirements: Sand, silt, clay, and BD
     reqFields = [OIDField, "Sand", "Silt", "Clay","BD"]           
-    checks_PTFs.checkInputFields(reqFields, outputShp)
+    checks_PTFs.checkInputFields(reqFields, outputTable)
 
     # Retrieve info from input
-    record = []
-    sandPerc = []
-    siltPerc = []
-    clayPerc = []
-    BDg_cm3 = []
-
-    with arcpy.da.SearchCursor(outputShp, reqFields) as searchCursor:
-        for row in searchCursor:
-            objectID = row[0]
-            sand = row[1]
-            silt = row[2]
-            clay = row[3]
-            BD = row[4]
-
-            record.append(objectID)
-            sandPerc.append(sand)
-            siltPerc.append(silt)
-            clayPerc.append(clay)
-            BDg_cm3.append(BD)
+    record, sandPerc, siltPerc, clayPerc, BDg_cm3 = outputTable.readColumns(reqFields)
 
     for x in range(0, len(record)):
 
@@ -1923,21 +1503,7 @@ def ShwethaVarija_2013(outputFolder, outputShp):
         WC_1500kPaArray.append(WC_1500kPa)
 
     # Write fields to output shapefile
-    common.writeFields(outputShp, PTFFields)
-
-    recordNum = 0
-    with arcpy.da.UpdateCursor(outputShp, PTFFields) as cursor:
-        for row in cursor:
-            row[0] = warningArray[recordNum]
-            row[1] = WC_33kPaArray[recordNum]
-            row[2] = WC_100kPaArray[recordNum]
-            row[3] = WC_300kPaArray[recordNum]
-            row[4] = WC_500kPaArray[recordNum]
-            row[5] = WC_1000kPaArray[recordNum]
-            row[6] = WC_1500kPaArray[recordNum]
-
-            cursor.updateRow(row)
-            recordNum += 1
+    outputTable.writeColumns(PTFFields, [warningArray, WC_33kPaArray, WC_100kPaArray, WC_300kPaArray, WC_500kPaArray, WC_1000kPaArray, WC_1500kPaArray])
 
     log.info("Results written to the output shapefile inside the output folder")
     
@@ -1952,7 +1518,7 @@ def ShwethaVarija_2013(outputFolder, outputShp):
 
     return results
 
-def Dashtaki_2010(outputFolder, outputShp):
+def Dashtaki_2010(outputFolder, outputTable):
 
     log.info('Calculating water content at points using Dashtaki et al. (2010)')
 
@@ -1962,7 +1528,7 @@ def Dashtaki_2010(outputFolder, outputShp):
     PTFFields = PTFInfo.PTFFields
 
     # Get OID field
-    OIDField = common.getOIDField(outputShp)
+    OIDField = common.getOIDField(outputTable)
 
     # Returns these arrays
     warningArray = []
@@ -1975,28 +1541,10 @@ def Dashtaki_2010(outputFolder, outputShp):
 
     # Requirements: Sand, silt, clay, and BD
     reqFields = [OIDField, "Sand", "Silt", "Clay","BD"]           
-    checks_PTFs.checkInputFields(reqFields, outputShp)
+    checks_PTFs.checkInputFields(reqFields, outputTable)
 
     # Retrieve info from input
-    record = []
-    sandPerc = []
-    siltPerc = []
-    clayPerc = []
-    BDg_cm3 = []
-
-    with arcpy.da.SearchCursor(outputShp, reqFields) as searchCursor:
-        for row in searchCursor:
-            objectID = row[0]
-            sand = row[1]
-            silt = row[2]
-            clay = row[3]
-            BD = row[4]
-
-            record.append(objectID)
-            sandPerc.append(sand)
-            siltPerc.append(silt)
-            clayPerc.append(clay)
-            BDg_cm3.append(BD)
+    record, sandPerc, siltPerc, clayPerc, BDg_cm3 = outputTable.readColumns(reqFields)
 
     for x in range(0, len(record)):
 
@@ -2024,21 +1572,7 @@ def Dashtaki_2010(outputFolder, outputShp):
         WC_1500kPaArray.append(WC_1500kPa)
 
     # Write fields to output shapefile
-    common.writeFields(outputShp, PTFFields)
-
-    recordNum = 0
-    with arcpy.da.UpdateCursor(outputShp, PTFFields) as cursor:
-        for row in cursor:
-            row[0] = warningArray[recordNum]
-            row[1] = WC_10kPaArray[recordNum]
-            row[2] = WC_30kPaArray[recordNum]
-            row[3] = WC_100kPaArray[recordNum]
-            row[4] = WC_300kPaArray[recordNum]
-            row[5] = WC_500kPaArray[recordNum]
-            row[6] = WC_1500kPaArray[recordNum]
-
-            cursor.updateRow(row)
-            recordNum += 1
+    outputTable.writeColumns(PTFFields, [warningArray, WC_10kPaArray, WC_30kPaArray, WC_100kPaArray, WC_300kPaArray, WC_500kPaArray, WC_1500kPaArray])
 
     log.info("Results written to the output shapefile inside the output folder")
 
@@ -2053,7 +1587,7 @@ def Dashtaki_2010(outputFolder, outputShp):
 
     return results
 
-def Santra_2018_OC(outputFolder, outputShp, carbonConFactor, carbContent):
+def Santra_2018_OC(outputFolder, outputTable, carbonConFactor, carbContent):
 
     log.info('Calculating water content at points using Santra et al. (2018)')
 
@@ -2063,7 +1597,7 @@ def Santra_2018_OC(outputFolder, outputShp, carbonConFactor, carbContent):
     PTFFields = PTFInfo.PTFFields
 
     # Get OID field
-    OIDField = common.getOIDField(outputShp)
+    OIDField = common.getOIDField(outputTable)
 
     # Returns these arrays
     warningArray = []
@@ -2078,28 +1612,10 @@ def Santra_2018_OC(outputFolder, outputShp, carbonConFactor, carbContent):
     elif carbContent == 'OM':
         reqFields = [OIDField, "Sand", "Clay", "OM", "BD"]
                           
-    checks_PTFs.checkInputFields(reqFields, outputShp)
+    checks_PTFs.checkInputFields(reqFields, outputTable)
 
     # Retrieve info from input
-    record = []
-    sandPerc = []
-    clayPerc = []
-    carbPerc = []
-    BDg_cm3 = []
-
-    with arcpy.da.SearchCursor(outputShp, reqFields) as searchCursor:
-        for row in searchCursor:
-            objectID = row[0]
-            sand = row[1]
-            clay = row[2]
-            carbon = row[3]
-            BD = row[4]
-
-            record.append(objectID)
-            sandPerc.append(sand)
-            clayPerc.append(clay)
-            carbPerc.append(carbon)
-            BDg_cm3.append(BD)
+    record, sandPerc, clayPerc, carbPerc, BDg_cm3 = outputTable.readColumns(reqFields)
 
     for x in range(0, len(record)):
 
@@ -2121,17 +1637,7 @@ def Santra_2018_OC(outputFolder, outputShp, carbonConFactor, carbContent):
         WC_1500kPaArray.append(WC_1500kPa)
 
     # Write fields to output shapefile
-    common.writeFields(outputShp, PTFFields)
-
-    recordNum = 0
-    with arcpy.da.UpdateCursor(outputShp, PTFFields) as cursor:
-        for row in cursor:
-            row[0] = warningArray[recordNum]
-            row[1] = WC_33kPaArray[recordNum]
-            row[2] = WC_1500kPaArray[recordNum]
-
-            cursor.updateRow(row)
-            recordNum += 1
+    outputTable.writeColumns(PTFFields, [warningArray, WC_33kPaArray, WC_1500kPaArray])
 
     log.info("Results written to the output shapefile inside the output folder")
     
@@ -2142,7 +1648,7 @@ def Santra_2018_OC(outputFolder, outputShp, carbonConFactor, carbContent):
 
     return results
 
-def Santra_2018(outputFolder, outputShp):
+def Santra_2018(outputFolder, outputTable):
 
     log.info('Calculating water content at points using Santra et al. (2018)')
 
@@ -2159,30 +1665,15 @@ def Santra_2018(outputFolder, outputShp):
     # Requirements: Sand, Clay, and BD
 
     # Get OID field
-    OIDField = common.getOIDField(outputShp)
+    OIDField = common.getOIDField(outputTable)
 
     # Requirements: Sand, Clay, OC, and BD
     reqFields = [OIDField, "Sand", "Clay", "BD"]
                        
-    checks_PTFs.checkInputFields(reqFields, outputShp)
+    checks_PTFs.checkInputFields(reqFields, outputTable)
 
     # Retrieve info from input
-    record = []
-    sandPerc = []
-    clayPerc = []
-    BDg_cm3 = []
-
-    with arcpy.da.SearchCursor(outputShp, reqFields) as searchCursor:
-        for row in searchCursor:
-            objectID = row[0]
-            sand = row[1]
-            clay = row[2]
-            BD = row[3]
-
-            record.append(objectID)
-            sandPerc.append(sand)
-            clayPerc.append(clay)
-            BDg_cm3.append(BD)
+    record, sandPerc, clayPerc, BDg_cm3 = outputTable.readColumns(reqFields)
 
     for x in range(0, len(record)):
 
@@ -2204,17 +1695,7 @@ def Santra_2018(outputFolder, outputShp):
 
     # Write results back to the shapefile
     # Write fields to output shapefile
-    common.writeFields(outputShp, PTFFields)
-
-    recordNum = 0
-    with arcpy.da.UpdateCursor(outputShp, PTFFields) as cursor:
-        for row in cursor:
-            row[0] = warningArray[recordNum]
-            row[1] = WC_33kPaArray[recordNum]
-            row[2] = WC_1500kPaArray[recordNum]
-
-            cursor.updateRow(row)
-            recordNum += 1
+    outputTable.writeColumns(PTFFields, [warningArray, WC_33kPaArray, WC_1500kPaArray])
 
     log.info("Results written to the output shapefile inside the output folder")
     
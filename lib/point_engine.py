@@ -0,0 +1,483 @@
+'''
+point_engine: column-oriented evaluator for the point-PTFs
+
+Every point-PTF in point_PTFs.py is a regression of the form
+
+    WC(h) = scale * sum(coefficient * term) [* BD]
+
+where the terms are products/powers of sand, silt, clay, carbon and BD.
+The coefficients of each PTF are held here as data, so that one batched
+evaluator computes the water content at every pressure of a PTF for all
+records at once and returns an (N x n_pressures) matrix.
+
+PTFs that are not purely linear in their terms (Saxton and Rawls, 2006;
+Pidgeon, 1972) compute intermediate regressions which are passed to a
+transform, and PTFs with a piecewise equation (Manrique and Jones, 1991)
+switch coefficient rows on a threshold.
+'''
+
+import numpy as np
+
+# Functions that build each regression term from the input columns
+termFunctions = {
+    'sand': lambda c: c['sand'],
+    'silt': lambda c: c['silt'],
+    'clay': lambda c: c['clay'],
+    'carbon': lambda c: c['carbon'],
+    'BD': lambda c: c['BD'],
+    'log10C': lambda c: np.log10(c['carbon']),
+    'sand2': lambda c: c['sand'] ** 2,
+    'silt2': lambda c: c['silt'] ** 2,
+    'clay2': lambda c: c['clay'] ** 2,
+    'BD2': lambda c: c['BD'] ** 2,
+    'sand_silt': lambda c: c['sand'] * c['silt'],
+    'sand_clay': lambda c: c['sand'] * c['clay'],
+    'sand_BD': lambda c: c['sand'] * c['BD'],
+    'silt_BD': lambda c: c['silt'] * c['BD'],
+    'clay_BD': lambda c: c['clay'] * c['BD'],
+    'sand_C': lambda c: c['sand'] * c['carbon'],
+    'clay_C': lambda c: c['clay'] * c['carbon'],
+    'clay_silt': lambda c: c['clay'] / c['silt'],
+}
+
+# Input columns: the key used by the engine and the field read from the input
+inputFieldNames = {
+    'sand': 'Sand',
+    'silt': 'Silt',
+    'clay': 'Clay',
+    'BD': 'BD',
+}
+
+'''
+Coefficient table of the point-PTFs
+
+inputs: input columns required by the PTF (carbon is read from OC or OM)
+carbonBasis: carbon content (OC or OM) for which no conversion factor is applied
+checks: data checks run on the inputs, in the order of the original functions
+terms: regression terms
+coeffs: one row of coefficients per output (pressure or intermediate)
+scale: multiplier applied to every output
+bdScaled: multiply the outputs by BD
+split: (term, threshold, coeffs) - coefficient rows used where term >= threshold
+transform: name of the function mapping the intermediate outputs onto WC
+'''
+
+pointPTFs = {
+
+    'Nguyen_2014': {
+        'inputs': ['sand', 'silt', 'clay', 'carbon', 'BD'],
+        'carbonBasis': 'OC',
+        'checks': [('SSC',), ('carbon',), ('value', 'Bulk density', 'BD')],
+        'terms': ['const', 'sand', 'silt', 'clay', 'log10C', 'BD'],
+        'coeffs': [[0.575, 0.0, 0.0, 0.002, 0.055, -0.144],
+                   [0.527, 0.0, 0.0, 0.002, 0.067, -0.125],
+                   [0.367, 0.0, 0.001, 0.003, 0.12, -0.062],
+                   [0.228, 0.0, 0.001, 0.003, 0.127, 0.0],
+                   [0.415, -0.002, 0.0, 0.002, 0.066, -0.058],
+                   [0.493, -0.002, 0.0, 0.001, 0.0, -0.118],
+                   [0.497, -0.003, 0.0, 0.0, 0.0, -0.107],
+                   [0.234, -0.002, 0.0, 0.002, 0.0, -0.032]],
+    },
+
+    'Adhikary_2008': {
+        'inputs': ['sand', 'silt', 'clay'],
+        'checks': [('SSC',)],
+        'terms': ['const', 'sand', 'silt', 'clay'],
+        'coeffs': [[0.625, -0.0058, -0.0021, 0.0],
+                   [0.5637, -0.0051, -0.0027, 0.0],
+                   [0.1258, -0.0009, 0.0, 0.004],
+                   [0.085, -0.0007, 0.0, 0.0038],
+                   [0.0473, -0.0004, 0.0, 0.0042],
+                   [0.0035, 0.0, 0.0, 0.0045],
+                   [0.0071, 0.0, 0.0, 0.0044]],
+    },
+
+    'Rawls_1982': {
+        'inputs': ['sand', 'silt', 'clay', 'carbon', 'BD'],
+        'carbonBasis': 'OM',
+        'checks': [('SSC',), ('carbon',), ('value', 'Bulk density', 'BD')],
+        'terms': ['const', 'sand', 'silt', 'clay', 'carbon'],
+        'coeffs': [[0.4188, -0.0030, 0.0, 0.0023, 0.0317],
+                   [0.3121, -0.0024, 0.0, 0.0032, 0.0314],
+                   [0.2576, -0.002, 0.0, 0.0036, 0.0299],
+                   [0.2065, -0.0016, 0.0, 0.0040, 0.0275],
+                   [0.0349, 0.0, 0.0014, 0.0055, 0.0251],
+                   [0.0281, 0.0, 0.0011, 0.0054, 0.0220],
+                   [0.0238, 0.0, 0.0008, 0.0052, 0.0190],
+                   [0.0216, 0.0, 0.0006, 0.0050, 0.0167],
+                   [0.0205, 0.0, 0.0005, 0.0049, 0.0154],
+                   [0.026, 0.0, 0.0, 0.005, 0.0158]],
+    },
+
+    'Hall_1977_top': {
+        'inputs': ['clay', 'silt', 'carbon', 'BD'],
+        'carbonBasis': 'OC',
+        'checks': [('value', 'Clay', 'clay'), ('value', 'Silt', 'silt'), ('value', 'Bulk density', 'BD')],
+        'terms': ['const', 'clay', 'silt', 'carbon', 'BD', 'clay2'],
+        'coeffs': [[47.0, 0.25, 0.1, 1.12, -16.52, 0.0],
+                   [37.47, 0.32, 0.12, 1.15, -1.25, 0.0],
+                   [22.66, 0.36, 0.12, 1.0, -7.64, 0.0],
+                   [8.7, 0.45, 0.11, 1.03, 0.0, 0.0],
+                   [2.94, 0.83, 0.0, 0.0, 0.0, -0.0054]],
+        'scale': 1.0e-2,
+    },
+
+    'Hall_1977_sub': {
+        'inputs': ['clay', 'silt', 'carbon', 'BD'],
+        'carbonBasis': 'OC',
+        'checks': [('value', 'Clay', 'clay'), ('value', 'Silt', 'silt'), ('value', 'Bulk density', 'BD')],
+        'terms': ['const', 'clay', 'silt', 'BD', 'clay2'],
+        'coeffs': [[37.20, 0.35, 0.12, -11.73, 0.0],
+                   [27.87, 0.41, 0.15, -8.32, 0.0],
+                   [20.81, 0.45, 0.13, -5.96, 0.0],
+                   [7.57, 0.48, 0.11, 0.0, 0.0],
+                   [1.48, 0.84, 0.0, 0.0, -0.0054]],
+        'scale': 1.0e-2,
+    },
+
+    'GuptaLarson_1979': {
+        'inputs': ['sand', 'silt', 'clay', 'carbon', 'BD'],
+        'carbonBasis': 'OM',
+        'checks': [('SSC',), ('carbon',), ('value', 'Bulk density', 'BD')],
+        'terms': ['sand', 'silt', 'clay', 'carbon', 'BD'],
+        'coeffs': [[7.053e-3, 10.242e-3, 10.07e-3, 6.333e-3, -32.12e-2],
+                   [5.678e-3, 9.228e-3, 9.135e-3, 6.103e-3, -26.96e-2],
+                   [5.018e-3, 8.548e-3, 8.833e-3, 4.966e-3, -24.23e-2],
+                   [3.89e-3, 7.066e-3, 8.408e-3, 2.817e-3, -18.78e-2],
+                   [3.075e-3, 5.886e-3, 8.039e-3, 2.208e-3, -14.34e-2],
+                   [2.181e-3, 4.557e-3, 7.557e-3, 2.191e-3, -9.276e-2],
+                   [1.563e-3, 3.62e-3, 7.154e-3, 2.388e-3, -5.759e-2],
+                   [0.932e-3, 2.643e-3, 6.636e-3, 2.717e-3, -2.214e-2],
+                   [0.483e-3, 1.943e-3, 6.128e-3, 2.925e-3, -0.204e-2],
+                   [0.214e-3, 1.538e-3, 5.908e-3, 2.855e-3, 1.53e-2],
+                   [0.076e-3, 1.334e-3, 5.802e-3, 2.653e-3, 2.145e-2],
+                   [-0.059e-3, 1.142e-3, 5.766e-3, 2.228e-3, 2.671e-2]],
+    },
+
+    'Batjes_1996': {
+        'inputs': ['silt', 'clay', 'carbon'],
+        'carbonBasis': 'OC',
+        'checks': [('carbon',), ('value', 'Silt', 'silt'), ('value', 'Clay', 'clay')],
+        'terms': ['clay', 'silt', 'carbon'],
+        'coeffs': [[0.6903, 0.5482, 4.2844],
+                   [0.6463, 0.5436, 3.7091],
+                   [0.5980, 0.3745, 3.7611],
+                   [0.6681, 0.2614, 2.2150],
+                   [0.5266, 0.3999, 3.1752],
+                   [0.5082, 0.4197, 2.5043],
+                   [0.4600, 0.3045, 2.0703],
+                   [0.5032, 0.3636, 2.4461],
+                   [0.4611, 0.2390, 1.5742],
+                   [0.3624, 0.1170, 1.6054]],
+        'scale': 1.0e-2,
+    },
+
+    # Intermediate outputs: WC_33t, WC_sat-33t, WC_1500t
+    'SaxtonRawls_2006': {
+        'inputs': ['sand', 'clay', 'carbon'],
+        'carbonBasis': 'OM',
+        'checks': [('carbon',), ('value', 'Sand', 'sand'), ('value', 'Clay', 'clay')],
+        'terms': ['const', 'sand', 'clay', 'carbon', 'sand_C', 'clay_C', 'sand_clay'],
+        'coeffs': [[0.299, -0.00251, 0.00195, 0.00011, 0.0000006, -0.0000027, 0.0000452],
+                   [0.078, 0.00278, 0.00034, 0.00022, -0.0000018, -0.0000027, -0.0000584],
+                   [0.031, -0.00024, 0.00487, 0.00006, 0.0000005, -0.0000013, 0.0000068]],
+        'transform': 'SaxtonRawls_2006',
+    },
+
+    # Intermediate outputs: WC at field capacity, WC_1500kPa
+    'Pidgeon_1972': {
+        'inputs': ['silt', 'clay', 'carbon', 'BD'],
+        'carbonBasis': 'OM',
+        'checks': [('carbon',), ('value', 'Silt', 'silt'), ('value', 'Clay', 'clay'), ('value', 'Bulk density', 'BD')],
+        'terms': ['const', 'silt', 'clay', 'carbon'],
+        'coeffs': [[7.38, 0.16, 0.3, 1.54],
+                   [-4.19, 0.19, 0.39, 0.9]],
+        'scale': 1.0e-2,
+        'bdScaled': True,
+        'transform': 'Pidgeon_1972',
+    },
+
+    'Lal_1978_Group1': {
+        'inputs': ['clay', 'BD'],
+        'checks': [('value', 'Clay', 'clay'), ('value', 'Bulk density', 'BD')],
+        'terms': ['const', 'clay'],
+        'coeffs': [[0.289, 0.004],
+                   [0.102, 0.003],
+                   [0.065, 0.004],
+                   [0.006, 0.003]],
+        'bdScaled': True,
+    },
+
+    'Lal_1978_Group2': {
+        'inputs': ['clay', 'BD'],
+        'checks': [('value', 'Clay', 'clay'), ('value', 'Bulk density', 'BD')],
+        'terms': ['const', 'clay'],
+        'coeffs': [[0.296, 0.004],
+                   [0.080, 0.003],
+                   [0.047, 0.003],
+                   [0.025, 0.0022]],
+        'bdScaled': True,
+    },
+
+    'AinaPeriaswamy_1985': {
+        'inputs': ['sand', 'clay', 'BD'],
+        'checks': [('value', 'Sand', 'sand'), ('value', 'Clay', 'clay'), ('value', 'Bulk density', 'BD')],
+        'terms': ['const', 'sand', 'clay', 'BD'],
+        'coeffs': [[0.6788, -0.0055, 0.0, -0.0013],
+                   [0.00213, 0.0, 0.0031, 0.0]],
+    },
+
+    'ManriqueJones_1991': {
+        'inputs': ['sand', 'clay', 'BD'],
+        'checks': [('value', 'Sand', 'sand'), ('value', 'Clay', 'clay'), ('value', 'Bulk density', 'BD')],
+        'terms': ['const', 'sand', 'clay', 'BD'],
+        'coeffs': [[0.5784, 0.0, 0.002227, -0.28438],
+                   [0.02413, 0.0, 0.00373, 0.0]],
+        'split': ('sand', 75.0, [[0.73426, -0.00145, 0.0, -0.29176],
+                                 [0.02413, 0.0, 0.00373, 0.0]]),
+    },
+
+    'vanDenBerg_1997': {
+        'inputs': ['silt', 'clay', 'carbon', 'BD'],
+        'carbonBasis': 'OC',
+        'checks': [('carbon',), ('value', 'Silt', 'silt'), ('value', 'Clay', 'clay'), ('value', 'Bulk density', 'BD')],
+        'terms': ['const', 'clay', 'silt', 'carbon', 'clay_BD', 'silt_BD'],
+        'coeffs': [[10.88, 0.347, 0.211, 1.756, 0.0, 0.0],
+                   [0.0, 0.0, 0.0, 0.0, 0.334, 0.104]],
+        'scale': 1.0e-2,
+    },
+
+    'TomasellaHodnett_1998': {
+        'inputs': ['silt', 'clay', 'carbon'],
+        'carbonBasis': 'OC',
+        'checks': [('carbon',), ('value', 'Silt', 'silt'), ('value', 'Clay', 'clay')],
+        'terms': ['const', 'carbon', 'silt', 'clay'],
+        'coeffs': [[37.937, 2.24, 0.298, 0.159],
+                   [23.839, 0.0, 0.53, 0.255],
+                   [18.495, 0.0, 0.552, 0.262],
+                   [12.333, 0.0, 0.576, 0.3],
+                   [9.806, 0.0, 0.543, 0.321],
+                   [4.046, 0.0, 0.426, 0.404],
+                   [3.198, 0.0, 0.369, 0.351],
+                   [1.567, 0.0, 0.258, 0.361],
+                   [0.91, 0.0, 0.15, 0.396]],
+        'scale': 1.0e-2,
+    },
+
+    'Reichert_2009_OM': {
+        'inputs': ['sand', 'silt', 'clay', 'carbon', 'BD'],
+        'carbonBasis': 'OM',
+        'checks': [('SSC',), ('carbon',), ('value', 'Bulk density', 'BD')],
+        'terms': ['const', 'sand', 'silt', 'clay', 'carbon', 'BD'],
+        'coeffs': [[0.415, 0.0, 0.26e-2, 0.26e-2, 0.61e-2, -0.207],
+                   [0.268, 0.0, 0.24e-2, 0.29e-2, 0.85e-2, -0.127],
+                   [0.106, 0.0, 0.29e-2, 0.29e-2, 0.93e-2, -0.048],
+                   [0.102, -0.08e-2, 0.15e-2, 0.23e-2, 1.08e-2, 0.0],
+                   [0.268, -0.31e-2, -0.11e-2, 0.0, 1.28e-2, 0.031],
+                   [-0.04, 0.0, 0.17e-2, 0.32e-2, 0.91e-2, 0.026]],
+        'bdScaled': True,
+    },
+
+    'Reichert_2009': {
+        'inputs': ['sand', 'silt', 'clay', 'BD'],
+        'checks': [('SSC',), ('value', 'Bulk density', 'BD')],
+        'terms': ['const', 'sand', 'silt', 'clay'],
+        'coeffs': [[0.037, 0.0, 0.38e-2, 0.38e-2],
+                   [0.366, -0.34e-2, 0.0, 0.0],
+                   [0.236, -0.21e-2, 0.0, 0.045e-2]],
+        'bdScaled': True,
+    },
+
+    'Botula_2013': {
+        'inputs': ['sand', 'clay', 'BD'],
+        'checks': [('value', 'Sand', 'sand'), ('value', 'Clay', 'clay'), ('value', 'Bulk density', 'BD')],
+        'terms': ['const', 'sand', 'clay', 'BD'],
+        'coeffs': [[67.228, 0.0, 0.089, -20.057],
+                   [48.080, -0.081, 0.067, -6.344],
+                   [44.196, -0.252, 0.0, 0.0],
+                   [43.520, -0.296, 0.0, 0.0],
+                   [42.302, -0.344, 0.0, 0.0],
+                   [41.929, -0.349, 0.0, 0.0],
+                   [26.478, -0.276, 0.091, 4.720],
+                   [8.405, -0.159, 0.207, 7.789]],
+        'scale': 1.0e-2,
+    },
+
+    'ShwethaVarija_2013': {
+        'inputs': ['sand', 'silt', 'clay', 'BD'],
+        'checks': [('SSC',), ('value', 'Bulk density', 'BD')],
+        'terms': ['const', 'sand', 'silt', 'BD', 'sand2', 'sand_silt', 'sand_BD', 'silt2', 'silt_BD', 'BD2'],
+        'coeffs': [[-4.263, 0.00194, 0.02839, 5.568, -0.00005, -0.00011, 0.00106, -0.00005, -0.01158, -1.78],
+                   [-2.081, -0.00776, 0.00589, 3.452, -0.00007, -0.00018, 0.01047, 0.0000003, 0.00402, -1.4],
+                   [-2.029, -0.00039, 0.02393, 2.859, -0.00007, -0.000178, 0.00614, -0.000150, -0.00352, -1.092],
+                   [-1.079, 0.01539, 0.02272, 0.961, -0.00009, -0.00021, -0.00275, -0.000171, -0.00146, -0.287],
+                   [-2.488, -0.01215, 0.00750, 4.051, -0.00007, -0.00016, 0.01333, 0.00002, 0.00131, -1.633],
+                   [-1.076, -0.00234, -0.00334, 1.920, -0.00003, 0.00003, 0.00101, 0.00006, -0.00077, -0.666]],
+    },
+
+    'Dashtaki_2010_point': {
+        'inputs': ['sand', 'silt', 'clay', 'BD'],
+        'checks': [('SSC',), ('value', 'Bulk density', 'BD')],
+        'terms': ['const', 'sand', 'clay', 'BD', 'clay_silt'],
+        'coeffs': [[34.3, -0.38, 0.0, 12.4, 0.0],
+                   [14.1, -0.283, 0.0, 17.1, 0.0],
+                   [12.2, -0.31, 0.0, 14.3, 0.0],
+                   [12.0, -0.22, 0.0, 8.41, 4.3],
+                   [9.4, 0.0, 0.32, 0.0, 0.0],
+                   [6.2, 0.0, 0.33, 0.0, 0.0]],
+        'scale': 1.0e-2,
+    },
+
+    'Santra_2018_OC': {
+        'inputs': ['sand', 'clay', 'carbon', 'BD'],
+        'carbonBasis': 'OC',
+        'checks': [('carbon',), ('value', 'Sand', 'sand'), ('value', 'Clay', 'clay'), ('value', 'Bulk density', 'BD')],
+        'terms': ['const', 'sand', 'clay', 'carbon', 'sand_clay', 'sand_C', 'clay_C'],
+        'coeffs': [[24.98, -0.205, 0.28, 1.92, 0.0, 0.0, 0.0],
+                   [4.341, 0.0, 0.435, 0.0, -0.00431, 0.0190, 0.0169]],
+        'scale': 1.0e-2,
+        'bdScaled': True,
+    },
+
+    'Santra_2018': {
+        'inputs': ['sand', 'clay', 'BD'],
+        'checks': [('value', 'Sand', 'sand'), ('value', 'Clay', 'clay'), ('value', 'Bulk density', 'BD')],
+        'terms': ['const', 'sand', 'clay', 'sand_clay'],
+        'coeffs': [[27.80, -0.231, 0.262, 0.0],
+                   [10.06, -0.0847, 0.303, -0.00186]],
+        'scale': 1.0e-2,
+        'bdScaled': True,
+    },
+}
+
+def _SaxtonRawls_2006(inter, cols):
+
+    # Saxton and Rawls (2006): WC at saturation, 33kPa and 1500kPa from the intermediate regressions
+    WC_33kPa = (1.283 * inter[:, 0] ** 2) + (0.626 * inter[:, 0]) - 0.015
+    WC_sat_33kPa = 1.636 * inter[:, 1] - 0.107
+    WC_sat = WC_33kPa + WC_sat_33kPa - (0.00097 * cols['sand']) + 0.043
+    WC_1500kPa = 1.14 * inter[:, 2] - 0.02
+
+    B_SR = (np.log(1500.0) - np.log(33.0)) / (np.log(WC_33kPa) - np.log(WC_1500kPa))
+    lamda_SR = 1.0 / B_SR
+    K_sat = 1930.0 * ((WC_sat - WC_33kPa) ** (3 - lamda_SR))
+
+    return np.column_stack((WC_sat, WC_33kPa, WC_1500kPa)), {'K_sat': K_sat}
+
+def _Pidgeon_1972(inter, cols):
+
+    # Pidgeon (1972): WC at 10 and 33kPa are derived from the WC at field capacity
+    WC_FC = inter[:, 0]
+    WC_10kPa = ((WC_FC * 100) - 2.54) / 91.0
+    WC_33kPa = ((WC_FC * 100) - 3.77) / 95.0
+
+    return np.column_stack((WC_10kPa, WC_33kPa, inter[:, 1])), {}
+
+transforms = {
+    'SaxtonRawls_2006': _SaxtonRawls_2006,
+    'Pidgeon_1972': _Pidgeon_1972,
+}
+
+def getSpec(PTFOption):
+
+    try:
+        return pointPTFs[PTFOption]
+
+    except KeyError:
+        raise ValueError("Point-PTF not recognised: " + str(PTFOption))
+
+def getInputFields(PTFOption, carbContent):
+    # Returns the input field names required by a point-PTF, in engine order
+
+    spec = getSpec(PTFOption)
+
+    fields = []
+    for name in spec['inputs']:
+        if name == 'carbon':
+            fields.append(carbContent)
+        else:
+            fields.append(inputFieldNames[name])
+
+    return fields
+
+def getCarbonFactor(PTFOption, carbContent, carbonConFactor):
+    # Returns the multiplier applied to the carbon input column
+
+    spec = getSpec(PTFOption)
+
+    if spec.get('carbonBasis') == carbContent:
+        return 1.0
+    else:
+        return float(carbonConFactor)
+
+def buildTerms(terms, cols):
+    # Returns an (N x n_terms) matrix of regression terms
+
+    numRecords = len(next(iter(cols.values())))
+
+    X = np.empty((numRecords, len(terms)), dtype=np.float64)
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        for j, term in enumerate(terms):
+            if term == 'const':
+                X[:, j] = 1.0
+            else:
+                X[:, j] = termFunctions[term](cols)
+
+    return X
+
+def sumTerms(X, coeffs):
+
+    # (N x n_outputs) sums of the terms times their coefficients, added in the order of the terms so that
+    # the result of a record does not depend on the number of records (np.dot sums in blocks set by the shape)
+    WC = np.zeros((X.shape[0], coeffs.shape[0]), dtype=np.float64)
+
+    for j in range(0, X.shape[1]):
+        WC += X[:, j, np.newaxis] * coeffs[:, j]
+
+    return WC
+
+def calcPointPTF(PTFOption, cols, carbContent=None, carbonConFactor=1.0):
+
+    '''
+    Evaluates a point-PTF for all records at once.
+
+    cols is a dictionary of equal-length arrays keyed by the engine input
+    names (sand, silt, clay, carbon, BD). Returns an (N x n_pressures)
+    water content matrix and a dictionary of any extra outputs (e.g. K_sat).
+    '''
+
+    spec = getSpec(PTFOption)
+
+    # Convert inputs to contiguous float arrays and apply the carbon conversion
+    cols = dict((key, np.asarray(value, dtype=np.float64)) for key, value in cols.items())
+    if 'carbon' in spec['inputs']:
+        cols['carbon'] = cols['carbon'] * getCarbonFactor(PTFOption, carbContent, carbonConFactor)
+
+    X = buildTerms(spec['terms'], cols)
+    coeffs = np.asarray(spec['coeffs'], dtype=np.float64)
+
+    with np.errstate(divide='ignore', invalid='ignore', over='ignore'):
+        WC = sumTerms(X, coeffs)
+
+        if 'split' in spec:
+            term, threshold, splitCoeffs = spec['split']
+            mask = cols[term] >= threshold
+            if mask.any():
+                WC[mask] = sumTerms(X[mask], np.asarray(splitCoeffs, dtype=np.float64))
+
+        WC *= spec.get('scale', 1.0)
+
+        if spec.get('bdScaled', False):
+            WC *= cols['BD'][:, np.newaxis]
+
+        extras = {}
+        if 'transform' in spec:
+            WC, extras = transforms[spec['transform']](WC, cols)
+
+    return WC, extras
+
+def calcPointColumns(cols, PTFOption, carbContent=None, carbonConFactor=1.0):
+
+    # calcPointPTF with the input columns first, as called by kernel_pool
+    return calcPointPTF(PTFOption, cols, carbContent, carbonConFactor)
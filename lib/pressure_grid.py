@@ -0,0 +1,129 @@
+'''
+pressure_grid: resamples PTF water contents onto a common pressure grid
+
+Each point-PTF predicts at its own pressures. resampleWC maps the water
+contents of all soils onto the pressures of a grid at once, interpolating
+linearly in log10(pressure). The pressures of a PTF are the same for all
+soils, so the interpolation weights are calculated once and applied to the
+(soils x pressures) matrix.
+
+A retention curve does not rise with pressure, so the water contents are made
+non-increasing before they are interpolated (the mean of the running minimum
+from the wet end and the running maximum from the dry end), which keeps the
+interpolated curve monotonic. Grid pressures outside the pressures of the PTF
+are not extrapolated and get NaN.
+
+The grid used by the point-PTF tool is read from the user settings
+(pressureGrid, as comma-separated pressures in kPa).
+'''
+
+import sys
+import numpy as np
+import NB_PTFs.lib.log as log
+import NB_PTFs.lib.common as common
+import NB_PTFs.lib.PTFdatabase as PTFdatabase
+
+from NB_PTFs.lib.refresh_modules import refresh_modules
+refresh_modules([log, common, PTFdatabase])
+
+# Pressures (kPa) below this, including saturation at 0 kPa, are placed at this pressure on the log scale
+minPressure = 0.1
+
+def getPressureGrid():
+
+    # Grid pressures in kPa, or None if pressureGrid is not set in the user settings
+    grid = common.getNumberListSetting("pressureGrid")
+
+    if grid is None:
+        return None
+
+    return checkGrid(grid)
+
+def checkGrid(grid):
+
+    grid = np.asarray(grid, dtype=np.float64).reshape(-1)
+
+    if len(grid) == 0 or np.any(grid < 0.0) or not np.all(np.isfinite(grid)):
+        log.error('Pressures of the grid should be zero or positive (kPa)')
+        sys.exit()
+
+    return np.unique(grid)
+
+def logPressure(pressures):
+    return np.log10(np.maximum(np.asarray(pressures, dtype=np.float64), minPressure))
+
+def makeMonotonic(WC):
+
+    '''
+    Returns the water contents (soils x increasing pressures) made non-increasing along the pressures.
+    Curves that already do not rise are unchanged.
+    '''
+
+    WC = np.asarray(WC, dtype=np.float64)
+
+    fromWet = np.minimum.accumulate(WC, axis=1)
+    fromDry = np.maximum.accumulate(WC[:, ::-1], axis=1)[:, ::-1]
+
+    return 0.5 * (fromWet + fromDry)
+
+def interpolationWeights(pressures, grid):
+
+    '''
+    Returns, for each grid pressure, the columns below and above it in pressures (increasing),
+    the weight of the column above and whether the grid pressure is inside the pressures
+    '''
+
+    x = logPressure(pressures)
+    xGrid = logPressure(grid)
+
+    upper = np.clip(np.searchsorted(x, xGrid), 1, max(1, len(x) - 1))
+    lower = upper - 1
+
+    if len(x) == 1:
+        upper = lower = np.zeros(len(xGrid), dtype=int)
+        weight = np.zeros(len(xGrid))
+    else:
+        with np.errstate(divide='ignore', invalid='ignore'):
+            weight = np.where(x[upper] > x[lower], (xGrid - x[lower]) / (x[upper] - x[lower]), 0.0)
+
+    inside = (xGrid >= x[0]) & (xGrid <= x[-1])
+
+    return lower, upper, weight, inside
+
+def resampleWC(pressures, WC, grid, monotonic=True):
+
+    '''
+    Water contents of all soils at the grid pressures (kPa), as a (soils x grid) matrix.
+    pressures are the pressures (kPa) of the columns of WC (soils x pressures).
+    '''
+
+    pressures = np.asarray(pressures, dtype=np.float64).reshape(-1)
+    WC = np.asarray(WC, dtype=np.float64).reshape(-1, len(pressures))
+    grid = checkGrid(grid)
+
+    # Columns in order of increasing pressure
+    order = np.argsort(pressures, kind='mergesort')
+    pressures = pressures[order]
+    WC = WC[:, order]
+
+    if monotonic:
+        WC = makeMonotonic(WC)
+
+    lower, upper, weight, inside = interpolationWeights(pressures, grid)
+
+    resampled = WC[:, lower] * (1.0 - weight) + WC[:, upper] * weight
+    resampled[:, ~inside] = np.nan
+
+    return resampled
+
+def resamplePTF(PTFOption, WC, grid, monotonic=True):
+
+    # Resamples the water contents of a point-PTF (soils x PTF pressures) onto the grid
+    PTFInfo = PTFdatabase.checkPTF(PTFOption, "pointPTF")
+
+    return resampleWC([float(pressure) for pressure in PTFInfo.PTFPressures], WC, grid, monotonic)
+
+def gridFields(grid):
+
+    # Headings of the resampled water contents
+    return ['WC_' + ('%g' % pressure) + 'kPa' for pressure in grid]
@@ -1,4 +1,3 @@
-import arcpy
 import os
 import sys
 import time
@@ -7,14 +6,15 @@ import xml.etree.cElementTree as ET
 
 import NB_PTFs.lib.log as log
 import NB_PTFs.lib.common as common
+import NB_PTFs.lib.metrics as metrics
 
 from NB_PTFs.lib.refresh_modules import refresh_modules
-refresh_modules([log, common])
+refresh_modules([log, common, metrics])
 
 ### Global timing variables ###
 
 times = []
-startTime = time.clock()
+startTime = metrics.timer()  # time.clock is not available in Python 3.8 and later
 times.append(startTime)
 
 def initProgress(folder, rerun):
@@ -38,6 +38,7 @@ def initProgress(folder, rerun):
         # Write scratch GDB to XML file if not already present
         scratchGDBNode = root.find('ScratchGDB')
         if scratchGDBNode is None:
+            import arcpy
             scratchGDBNode = createXMLNode(root, 'ScratchGDB')
             scratchGDBNode.text = str(arcpy.env.scratchGDB)
 
@@ -91,7 +92,7 @@ def logProgress(codeBlockName, folder):
 
         # Calculate and update timings
         currentTimeFormatted = time.asctime(time.localtime(time.time()))
-        currentTime = time.clock()
+        currentTime = metrics.timer()
         prevElapsed = round(currentTime - times[-1], 1)
         startElapsed = round(currentTime - startTime, 1)
 
@@ -0,0 +1,608 @@
+'''
+raster_io: reads and writes single-band GeoTIFF rasters in blocks of rows
+
+Rasters are read through GDAL when it is installed, otherwise with the NumPy
+reader below, which reads classic and BigTIFF files, striped or tiled, either
+uncompressed or deflate-compressed (without a predictor, or with horizontal
+differencing for integer rasters). Other compressions need GDAL.
+
+Only the rows of one block are held in memory. Outputs are written as float32
+rasters with the georeferencing of the first input, one block of rows at a
+time, with -9999 as the nodata value.
+
+PixelBlock holds the valid pixels of a block of rows (those with a value in
+every input raster) as the records of a table, so the PTF functions, which
+read and write table columns, can be run on it unchanged.
+
+Set rasterBackend to numpy in the user settings to read with the NumPy reader
+when GDAL is installed.
+'''
+
+import os
+import sys
+import struct
+import zlib
+import numpy as np
+import NB_PTFs.lib.log as log
+import NB_PTFs.lib.table_io as table_io
+from NB_PTFs.lib.external import six # Python 2/3 compatibility module
+
+from NB_PTFs.lib.refresh_modules import refresh_modules, getUserSetting
+refresh_modules([log, table_io])
+
+# Value written to the output rasters where there is no result
+noDataValue = -9999.0
+
+# Pixels per block of rows, unless chunkSize is set in the user settings
+defaultBlockPixels = 1000000
+
+# TIFF tags
+tagWidth = 256
+tagHeight = 257
+tagBitsPerSample = 258
+tagCompression = 259
+tagPhotometric = 262
+tagStripOffsets = 273
+tagSamplesPerPixel = 277
+tagRowsPerStrip = 278
+tagStripByteCounts = 279
+tagPlanarConfig = 284
+tagPredictor = 317
+tagTileWidth = 322
+tagTileLength = 323
+tagTileOffsets = 324
+tagTileByteCounts = 325
+tagSampleFormat = 339
+tagNoData = 42113
+
+# GeoTIFF tags copied from the input to the outputs
+geoTags = [33550, 33922, 34264, 34735, 34736, 34737]
+
+# TIFF field types: struct format and size
+fieldTypes = {1: ('B', 1), 2: ('s', 1), 3: ('H', 2), 4: ('I', 4), 5: ('II', 8), 6: ('b', 1), 7: ('B', 1),
+              8: ('h', 2), 9: ('i', 4), 10: ('ii', 8), 11: ('f', 4), 12: ('d', 8), 16: ('Q', 8), 17: ('q', 8), 18: ('Q', 8)}
+
+# (SampleFormat, BitsPerSample): NumPy type
+sampleTypes = {(1, 8): 'u1', (1, 16): 'u2', (1, 32): 'u4', (1, 64): 'u8',
+               (2, 8): 'i1', (2, 16): 'i2', (2, 32): 'i4', (2, 64): 'i8',
+               (3, 32): 'f4', (3, 64): 'f8'}
+
+def getBlockRows(width):
+
+    # Rows per block, so that a block holds about chunkSize (or defaultBlockPixels) pixels
+    blockPixels = table_io.getChunkSize() or defaultBlockPixels
+
+    return max(1, int(blockPixels) // max(1, width))
+
+def useGDAL():
+
+    if getUserSetting("rasterBackend") == 'numpy':
+        return False
+
+    try:
+        from osgeo import gdal
+        return True
+    except ImportError:
+        return False
+
+def openRaster(path):
+
+    ''' Opens a single-band raster for reading in blocks of rows '''
+
+    if not os.path.exists(path):
+        log.error('Raster ' + str(path) + ' not found')
+        sys.exit()
+
+    if useGDAL():
+        return GDALRaster(path)
+
+    return GeoTiffRaster(path)
+
+def createRaster(path, reference):
+
+    ''' Creates a float32 output raster with the size and georeferencing of the reference raster '''
+
+    if isinstance(reference, GDALRaster):
+        return GDALWriter(path, reference)
+
+    return GeoTiffWriter(path, reference)
+
+def checkAligned(rasters):
+
+    # The input rasters should have the same size and georeferencing
+    first = rasters[0]
+
+    for raster in rasters[1:]:
+        if (raster.width, raster.height) != (first.width, first.height) or not raster.sameGrid(first):
+            log.error('Raster ' + str(raster.path) + ' is not aligned with ' + str(first.path) + ', please resample the inputs to one grid')
+            sys.exit()
+
+class GeoTiffRaster(object):
+
+    ''' Single-band GeoTIFF read with NumPy '''
+
+    def __init__(self, path):
+
+        self.path = path
+        self.file = open(path, 'rb')
+        self.cache = (None, None) # Last strip or row of tiles read
+
+        header = self.file.read(16)
+        if header[0:2] == b'II':
+            self.order = '<'
+        elif header[0:2] == b'MM':
+            self.order = '>'
+        else:
+            log.error(str(path) + ' is not a TIFF file')
+            sys.exit()
+
+        version = struct.unpack(self.order + 'H', header[2:4])[0]
+
+        if version == 42:
+            self.bigTiff = False
+            ifdOffset = struct.unpack(self.order + 'I', header[4:8])[0]
+        elif version == 43:
+            self.bigTiff = True
+            ifdOffset = struct.unpack(self.order + 'Q', header[8:16])[0]
+        else:
+            log.error(str(path) + ' is not a TIFF file')
+            sys.exit()
+
+        self.tags = self.readIFD(ifdOffset)
+
+        self.width = int(self.tag(tagWidth)[0])
+        self.height = int(self.tag(tagHeight)[0])
+        self.samples = int(self.tag(tagSamplesPerPixel, [1])[0])
+        self.planar = int(self.tag(tagPlanarConfig, [1])[0])
+        self.compression = int(self.tag(tagCompression, [1])[0])
+        self.predictor = int(self.tag(tagPredictor, [1])[0])
+
+        bits = int(self.tag(tagBitsPerSample, [8])[0])
+        sampleFormat = int(self.tag(tagSampleFormat, [1])[0])
+
+        if (sampleFormat, bits) not in sampleTypes:
+            log.error('Data type of raster ' + str(path) + ' not supported')
+            sys.exit()
+
+        self.dtype = np.dtype(self.order + sampleTypes[(sampleFormat, bits)])
+
+        if self.compression not in [1, 8, 32946]:
+            log.error('Compression of raster ' + str(path) + ' not supported without GDAL, please save it uncompressed or with deflate')
+            sys.exit()
+
+        if self.predictor not in [1, 2] or (self.predictor == 2 and self.dtype.kind == 'f'):
+            log.error('Predictor of raster ' + str(path) + ' not supported without GDAL')
+            sys.exit()
+
+        self.tiled = tagTileOffsets in self.tags
+
+        if self.tiled:
+            self.blockWidth = int(self.tag(tagTileWidth)[0])
+            self.blockHeight = int(self.tag(tagTileLength)[0])
+            self.offsets = self.tag(tagTileOffsets)
+            self.byteCounts = self.tag(tagTileByteCounts)
+        else:
+            self.blockWidth = self.width
+            self.blockHeight = min(int(self.tag(tagRowsPerStrip, [self.height])[0]), self.height)
+            self.offsets = self.tag(tagStripOffsets)
+            self.byteCounts = self.tag(tagStripByteCounts)
+
+        noData = self.tag(tagNoData)
+        try:
+            self.noData = float(noData.strip(b'\x00 ').decode('ascii')) if noData is not None else None
+        except ValueError:
+            self.noData = None
+
+    def __str__(self):
+        return str(self.path)
+
+    def tag(self, code, default=None):
+
+        if code not in self.tags:
+            return default
+
+        return self.tags[code][2]
+
+    def readIFD(self, offset):
+
+        # Returns tag: (field type, count, values); ASCII and undefined values are returned as bytes
+        f = self.file
+        f.seek(offset)
+
+        if self.bigTiff:
+            numEntries = struct.unpack(self.order + 'Q', f.read(8))[0]
+            entrySize, countFormat, valueSize = 20, 'Q', 8
+        else:
+            numEntries = struct.unpack(self.order + 'H', f.read(2))[0]
+            entrySize, countFormat, valueSize = 12, 'I', 4
+
+        entries = f.read(numEntries * entrySize)
+        tags = {}
+
+        for i in range(0, numEntries):
+            entry = entries[i * entrySize:(i + 1) * entrySize]
+            code, fieldType = struct.unpack(self.order + 'HH', entry[0:4])
+            count = struct.unpack(self.order + countFormat, entry[4:4 + struct.calcsize(countFormat)])[0]
+
+            if fieldType not in fieldTypes:
+                continue
+
+            typeFormat, typeSize = fieldTypes[fieldType]
+            size = typeSize * count
+            valueBytes = entry[entrySize - valueSize:]
+
+            if size > valueSize:
+                position = f.tell()
+                f.seek(struct.unpack(self.order + countFormat, valueBytes)[0])
+                data = f.read(size)
+                f.seek(position)
+            else:
+                data = valueBytes[0:size]
+
+            if fieldType in [2, 7]:
+                values = data
+            else:
+                values = struct.unpack(self.order + typeFormat * count, data)
+
+            tags[code] = (fieldType, count, values)
+
+        return tags
+
+    def geoTransform(self):
+
+        # (x origin, pixel width, 0, y origin, 0, -pixel height) from the tie point and pixel scale
+        scale = self.tag(33550)
+        tiePoint = self.tag(33922)
+        transform = self.tag(34264)
+
+        if transform is not None:
+            return (transform[3], transform[0], transform[1], transform[7], transform[4], transform[5])
+
+        if scale is None or tiePoint is None:
+            return None
+
+        return (tiePoint[3] - tiePoint[0] * scale[0], scale[0], 0.0, tiePoint[4] + tiePoint[1] * scale[1], 0.0, -scale[1])
+
+    def sameGrid(self, other):
+
+        thisTransform, otherTransform = self.geoTransform(), other.geoTransform()
+
+        if thisTransform is None or otherTransform is None:
+            return thisTransform == otherTransform
+
+        return np.allclose(thisTransform, otherTransform, rtol=0.0, atol=1.0e-6 * max(1.0, abs(thisTransform[1])))
+
+    def readBlock(self, index):
+
+        # Decoded strip or tile (rows x columns) of the first band
+        f = self.file
+        f.seek(int(self.offsets[index]))
+        data = f.read(int(self.byteCounts[index]))
+
+        if self.compression in [8, 32946]:
+            data = zlib.decompress(data)
+
+        samples = self.samples if self.planar == 1 else 1
+        values = np.frombuffer(data, dtype=self.dtype)
+
+        rows = len(values) // (self.blockWidth * samples)
+        values = values[0:rows * self.blockWidth * samples].reshape(rows, self.blockWidth, samples)[:, :, 0]
+
+        if self.predictor == 2:
+            values = np.cumsum(values, axis=1, dtype=self.dtype)
+
+        return values
+
+    def readStripRow(self, blockRow):
+
+        # All strips or tiles of one row of blocks, as (rows x width)
+        if self.cache[0] == blockRow:
+            return self.cache[1]
+
+        if self.tiled:
+            tilesAcross = (self.width + self.blockWidth - 1) // self.blockWidth
+            tiles = [self.readBlock(blockRow * tilesAcross + i) for i in range(0, tilesAcross)]
+            values = np.hstack(tiles)[:, 0:self.width]
+        else:
+            values = self.readBlock(blockRow)
+
+        rows = min(self.blockHeight, self.height - blockRow * self.blockHeight)
+        values = values[0:rows]
+
+        self.cache = (blockRow, values)
+
+        return values
+
+    def readRows(self, start, stop):
+
+        ''' Rows start to stop as a float64 array, with NaN where there is no data '''
+
+        first = start // self.blockHeight
+        last = (stop - 1) // self.blockHeight
+
+        parts = [self.readStripRow(blockRow) for blockRow in range(first, last + 1)]
+        values = np.vstack(parts)[start - first * self.blockHeight:stop - first * self.blockHeight].astype(np.float64)
+
+        if self.noData is not None:
+            values[values == self.noData] = np.nan
+
+        return values
+
+    def close(self):
+        self.file.close()
+
+class GeoTiffWriter(object):
+
+    '''
+    Float32 GeoTIFF written one block of rows at a time, with one row per strip.
+    The header and the strip offsets are written first, so the rows can be streamed to the file.
+    '''
+
+    def __init__(self, path, reference, bigTiff=None):
+
+        self.path = path
+        self.width = reference.width
+        self.height = reference.height
+        self.rowsWritten = 0
+
+        rowBytes = 4 * self.width
+        if bigTiff is None:
+            bigTiff = rowBytes * self.height > 2 ** 32 - 2 ** 24
+
+        self.bigTiff = bigTiff
+
+        offsetType = 16 if bigTiff else 4
+        noData = ('%g' % noDataValue).encode('ascii') + b'\x00'
+
+        # Tag, field type, values (bytes for ASCII); the strip offsets are filled in below
+        entries = [(tagWidth, 4, [self.width]),
+                   (tagHeight, 4, [self.height]),
+                   (tagBitsPerSample, 3, [32]),
+                   (tagCompression, 3, [1]),
+                   (tagPhotometric, 3, [1]),
+                   (tagStripOffsets, offsetType, [0] * self.height),
+                   (tagSamplesPerPixel, 3, [1]),
+                   (tagRowsPerStrip, 4, [1]),
+                   (tagStripByteCounts, 4, [rowBytes] * self.height),
+                   (tagPlanarConfig, 3, [1]),
+                   (tagSampleFormat, 3, [3]),
+                   (tagNoData, 2, noData)]
+
+        if isinstance(reference, GeoTiffRaster):
+            for code in geoTags:
+                if code in reference.tags:
+                    fieldType, count, values = reference.tags[code]
+                    entries.append((code, fieldType, values))
+
+        entries.sort(key=lambda entry: entry[0])
+
+        header, dataStart = self.buildHeader(entries, rowBytes)
+
+        self.file = open(path, 'wb')
+        self.file.write(header)
+        self.file.seek(dataStart)
+
+    def buildHeader(self, entries, rowBytes):
+
+        # Lays out the header, the IFD and the values that do not fit in the IFD, then the image data
+        if self.bigTiff:
+            headerSize, countFormat, entrySize, valueSize, numFormat = 16, 'Q', 20, 8, 'Q'
+        else:
+            headerSize, countFormat, entrySize, valueSize, numFormat = 8, 'I', 12, 4, 'H'
+
+        ifdSize = struct.calcsize('<' + numFormat) + entrySize * len(entries) + valueSize
+        extraStart = headerSize + ifdSize
+
+        def packValues(fieldType, values):
+            if fieldType in [2, 7]:
+                return bytes(values)
+            typeFormat = fieldTypes[fieldType][0]
+            return struct.pack('<' + typeFormat * (len(values) // len(typeFormat) if len(typeFormat) > 1 else len(values)), *values)
+
+        # Size of the extra values, to find where the image data starts
+        extraSize = 0
+        for code, fieldType, values in entries:
+            size = len(packValues(fieldType, values))
+            if size > valueSize:
+                extraSize += size + (size % 2)
+
+        dataStart = extraStart + extraSize
+        dataStart += (-dataStart) % 16
+
+        entries = [(code, fieldType, [dataStart + row * rowBytes for row in range(0, self.height)] if code == tagStripOffsets else values)
+                   for code, fieldType, values in entries]
+
+        if self.bigTiff:
+            header = b'II' + struct.pack('<HHHQ', 43, 8, 0, headerSize)
+        else:
+            header = b'II' + struct.pack('<HI', 42, headerSize)
+
+        ifd = struct.pack('<' + numFormat, len(entries))
+        extra = b''
+
+        for code, fieldType, values in entries:
+            packed = packValues(fieldType, values)
+            count = len(values) if fieldType in [2, 7] else len(packed) // fieldTypes[fieldType][1]
+
+            if len(packed) > valueSize:
+                valueBytes = struct.pack('<' + countFormat, extraStart + len(extra))
+                extra += packed + b'\x00' * (len(packed) % 2)
+            else:
+                valueBytes = packed + b'\x00' * (valueSize - len(packed))
+
+            ifd += struct.pack('<HH' + countFormat, code, fieldType, count) + valueBytes
+
+        ifd += struct.pack('<' + countFormat, 0)
+
+        header += ifd + extra
+        header += b'\x00' * (dataStart - len(header))
+
+        return header, dataStart
+
+    def writeRows(self, values):
+
+        # Appends a block of rows (rows x width); NaN is written as nodata
+        values = np.where(np.isfinite(values), values, noDataValue).astype('<f4')
+
+        self.file.write(values.tobytes())
+        self.rowsWritten += values.shape[0]
+
+    def close(self):
+
+        if self.rowsWritten != self.height:
+            log.error('Raster ' + str(self.path) + ' has ' + str(self.rowsWritten) + ' of ' + str(self.height) + ' rows')
+            sys.exit()
+
+        self.file.close()
+
+class GDALRaster(object):
+
+    ''' Single-band raster read with GDAL '''
+
+    def __init__(self, path):
+
+        from osgeo import gdal
+
+        self.path = path
+        self.dataset = gdal.Open(path)
+
+        if self.dataset is None:
+            log.error('Raster ' + str(path) + ' could not be opened')
+            sys.exit()
+
+        self.band = self.dataset.GetRasterBand(1)
+        self.width = self.dataset.RasterXSize
+        self.height = self.dataset.RasterYSize
+        self.noData = self.band.GetNoDataValue()
+
+    def __str__(self):
+        return str(self.path)
+
+    def geoTransform(self):
+        return self.dataset.GetGeoTransform()
+
+    def sameGrid(self, other):
+        return np.allclose(self.geoTransform(), other.geoTransform(), rtol=0.0, atol=1.0e-6 * max(1.0, abs(self.geoTransform()[1])))
+
+    def readRows(self, start, stop):
+
+        values = self.band.ReadAsArray(0, start, self.width, stop - start).astype(np.float64)
+
+        if self.noData is not None:
+            values[values == self.noData] = np.nan
+
+        return values
+
+    def close(self):
+        self.band = None
+        self.dataset = None
+
+class GDALWriter(object):
+
+    ''' Float32 GeoTIFF written with GDAL, one block of rows at a time '''
+
+    def __init__(self, path, reference):
+
+        from osgeo import gdal
+
+        self.path = path
+        self.rowsWritten = 0
+
+        driver = gdal.GetDriverByName('GTiff')
+        self.dataset = driver.Create(path, reference.width, reference.height, 1, gdal.GDT_Float32, ['BIGTIFF=IF_SAFER', 'COMPRESS=DEFLATE'])
+        self.dataset.SetGeoTransform(reference.dataset.GetGeoTransform())
+        self.dataset.SetProjection(reference.dataset.GetProjection())
+
+        self.band = self.dataset.GetRasterBand(1)
+        self.band.SetNoDataValue(noDataValue)
+
+    def writeRows(self, values):
+
+        values = np.where(np.isfinite(values), values, noDataValue).astype(np.float32)
+
+        self.band.WriteArray(values, 0, self.rowsWritten)
+        self.rowsWritten += values.shape[0]
+
+    def close(self):
+        self.band.FlushCache()
+        self.band = None
+        self.dataset = None
+
+class PixelBlock(object):
+
+    '''
+    The valid pixels of a block of rows, read and written like the records of a table.
+    Input rasters are read as fields; the pixel number is the OID and the soil name.
+    '''
+
+    def __init__(self, columns, pixels, start):
+
+        self.columns = dict((str(field).upper(), column) for field, column in columns.items())
+        self.fieldNames = list(columns.keys())
+        self.pixels = pixels
+        self.numRecords = len(pixels)
+        self.start = start
+        self.written = []
+
+        self.columns['SOILNAME'] = np.array([str(pixel) for pixel in pixels], dtype=object)
+        self.columns['TEXTURE'] = np.array([''] * self.numRecords, dtype=object)
+
+    def __str__(self):
+        return 'raster block from row ' + str(self.start)
+
+    @property
+    def isFirst(self):
+        return self.start == 0
+
+    @property
+    def oidField(self):
+        return table_io.pseudoOIDField
+
+    @property
+    def fields(self):
+        return self.fieldNames + ['soilname', 'texture'] + [field for field in self.written if field not in self.fieldNames]
+
+    def lookupField(self, fieldName):
+
+        for field in self.fields:
+            if field.upper() == str(fieldName).upper():
+                return field
+
+        return None
+
+    def hasField(self, fieldName):
+        return str(fieldName).upper() == self.oidField.upper() or str(fieldName).upper() in self.columns
+
+    def readColumns(self, fieldNames):
+
+        if isinstance(fieldNames, six.string_types):
+            fieldNames = [fieldNames]
+
+        columns = []
+        for fieldName in fieldNames:
+
+            if str(fieldName).upper() == self.oidField.upper():
+                columns.append(np.asarray(self.pixels))
+
+            elif str(fieldName).upper() in self.columns:
+                columns.append(self.columns[str(fieldName).upper()])
+
+            else:
+                log.error("Raster for field " + str(fieldName) + " not given")
+                sys.exit()
+
+        return columns
+
+    def readColumn(self, fieldName):
+        return self.readColumns([fieldName])[0]
+
+    def writeColumns(self, fieldNames, columns):
+
+        for fieldName, values in zip(fieldNames, columns):
+            if str(fieldName).upper() not in [field.upper() for field in self.written]:
+                self.written.append(fieldName)
+
+            self.columns[str(fieldName).upper()] = table_io.toColumn(values)
+
+    def flush(self):
+        pass
@@ -1,34 +1,109 @@
-import arcpy
+'''
+The user settings are read once, when first needed. NB_PTFs.pyt reloads this module when the toolbox
+is loaded, so the settings, the list of reloaded modules and the reload statistics last for one session.
+
+In production mode refresh_modules does nothing. It is switched on by setProductionMode(True), by the
+environment variable NB_PTFS_PRODUCTION (e.g. for batch runs) or by <productionMode>Yes</productionMode>
+in the user settings file.
+'''
+
 import os
+import time
 import xml.etree.cElementTree as ET
 import traceback
 import configuration
 from NB_PTFs.lib.external.six.moves import reload_module
 
+userSettings = None
+productionMode = os.environ.get('NB_PTFS_PRODUCTION', '').lower() in ['1', 'yes', 'true']
+
+# Modules reloaded in this session, so that each one is only reloaded once
+reloadedModules = set()
+reloadStats = {'reloads': 0, 'seconds': 0.0}
+reloadDepth = 0
+
+def readUserSettings():
+
+    ''' Returns a dictionary of the values in the user settings file, read on the first call only '''
+
+    global userSettings
+
+    if userSettings is None:
+        userSettings = {}
+
+        try:
+            if os.path.exists(configuration.userSettingsFile):
+
+                tree = ET.parse(configuration.userSettingsFile)
+                root = tree.getroot()
+
+                for node in root:
+                    userSettings[node.tag] = node.text
+
+        except Exception:
+            pass # If any errors occur, ignore them.
+            # arcpy.AddError(traceback.format_exc())
+
+    return userSettings
+
+def getUserSetting(name, default=None):
+
+    value = readUserSettings().get(name)
+    if value is None:
+        return default
+
+    return value
+
+def setProductionMode(production=True):
+    global productionMode
+    productionMode = production
+
 def refresh_modules(modules):
 
-    if type(modules) is not list:
-        modules = [modules]
+    global reloadDepth
 
-    refresh = False
-    try:
-        if os.path.exists(configuration.userSettingsFile):
+    if productionMode:
+        return
 
-            tree = ET.parse(configuration.userSettingsFile)
-            root = tree.getroot()
-            refresh = root.find("developerMode").text
+    if type(modules) is not list:
+        modules = [modules]
 
-            if refresh == 'Yes':
-                refresh = True
-            else:
-                refresh = False
+    if getUserSetting("productionMode") == 'Yes':
+        return
 
-    except Exception:
-        pass # If any errors occur, ignore them.
-        # arcpy.AddError(traceback.format_exc())
+    refresh = getUserSetting("developerMode") == 'Yes'
 
     # arcpy.AddMessage('Refresh: ' + str(refresh))
     if refresh:
         for module in modules:
+            if module.__name__ in reloadedModules:
+                continue
+
+            # Mark the module first, as reloading it refreshes its own dependencies
+            reloadedModules.add(module.__name__)
+
             # arcpy.AddMessage(str(module))
-            reload_module(module)
+            startTime = time.time()
+            reloadDepth += 1
+
+            try:
+                reload_module(module)
+            finally:
+                reloadDepth -= 1
+
+            # Nested reloads are timed within the outermost one
+            reloadStats['reloads'] += 1
+            if reloadDepth == 0:
+                reloadStats['seconds'] += time.time() - startTime
+
+def reportReloads():
+
+    ''' Logs how many modules were reloaded in this session and how long it took '''
+
+    import NB_PTFs.lib.log as log
+
+    if productionMode:
+        log.info('Production mode: modules are not reloaded')
+
+    elif reloadStats['reloads'] > 0:
+        log.info('Developer mode: ' + str(reloadStats['reloads']) + ' modules reloaded in ' + str(round(reloadStats['seconds'], 3)) + ' seconds')
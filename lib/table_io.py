@@ -0,0 +1,960 @@
+'''
+table_io: columnar access to the attribute tables of the input and output layers
+
+A Table reads the fields required by a PTF as whole NumPy columns and writes
+result columns back in one bulk operation, instead of moving one row at a
+time through arcpy cursors. The output is only created when results are
+written, so the input layer no longer needs to be copied before computing.
+
+Backends:
+- dbf: shapefile (.shp) or dBASE (.dbf) attribute tables, read and written
+  directly with NumPy. The geometry files of a shapefile are copied as-is.
+- csv: comma separated tables
+- arcpy: any layer or feature class arcpy can read (e.g. file geodatabases)
+
+Chunked mode: blocks() yields the table in blocks of a fixed number of
+records (chunkSize in the user settings), so a pipeline reads, checks,
+calculates and writes one block at a time. Input fields of a shapefile are
+parsed per block from the memory-mapped attribute table, the output columns
+are collected on disk for large tables and the output table is written in
+blocks, so the memory used does not grow with the number of records.
+'''
+
+import sys
+import os
+import csv
+import shutil
+import struct
+import datetime
+import numpy as np
+import NB_PTFs.lib.log as log
+import NB_PTFs.lib.metrics as metrics
+from NB_PTFs.lib.external import six # Python 2/3 compatibility module
+
+from NB_PTFs.lib.refresh_modules import refresh_modules, getUserSetting
+refresh_modules([log, metrics])
+
+# Field added to tables without an object ID (record number, starting at 0)
+pseudoOIDField = "FID"
+
+# Maximum length of a field name in a dBASE table
+maxFieldNameLength = 10
+
+# Deferred columns of tables with more records than this are held on disk until written
+spillRecords = 1000000
+
+# Number of records formatted and written at a time when saving a dBASE table
+saveBlockRecords = 100000
+
+def getChunkSize(maxRecords=None):
+
+    # Records per block in the chunked mode, or None to process the whole table at once
+    # With maxRecords (e.g. to bound the memory of the curves), blocks have at most maxRecords records
+    try:
+        chunkSize = int(getUserSetting("chunkSize"))
+    except (TypeError, ValueError):
+        chunkSize = None
+
+    if chunkSize is not None and chunkSize <= 0:
+        chunkSize = None
+
+    if maxRecords is not None and (chunkSize is None or chunkSize > maxRecords):
+        return maxRecords
+
+    return chunkSize
+
+def getBackend(path):
+
+    # Chooses the backend from the file extension of the table
+    ext = os.path.splitext(str(path))[1].lower()
+
+    if ext in ['.shp', '.dbf']:
+        return 'dbf'
+    elif ext in ['.csv', '.txt']:
+        return 'csv'
+    else:
+        return 'arcpy'
+
+def getOutputPath(outputFolder, baseName, inputPath):
+
+    # Returns the output table path, using the same table format as the input where possible
+    ext = os.path.splitext(str(inputPath))[1].lower()
+
+    if ext in ['.csv', '.txt', '.dbf']:
+        return os.path.join(outputFolder, baseName + ext)
+    else:
+        return os.path.join(outputFolder, baseName + '.shp')
+
+def openTable(inputPath, outputPath=None, backend=None, deferred=False, spillFolder=None):
+
+    '''
+    Opens the attribute table of inputPath for reading.
+    Columns written to the table are saved to outputPath (created on the first write).
+    If outputPath is None, written columns are kept in memory only.
+
+    If deferred is True, written columns are collected and only saved when flush() is called,
+    so the output table gets one schema change and one write pass. For large tables the
+    collected columns are held in files in spillFolder (if given) instead of in memory.
+    '''
+
+    if backend is None:
+        backend = getBackend(inputPath)
+
+    if backend == 'dbf':
+        table = DBFTable(inputPath, outputPath)
+
+    elif backend == 'csv':
+        table = CSVTable(inputPath, outputPath)
+
+    elif backend == 'arcpy':
+        table = ArcpyTable(inputPath, outputPath)
+
+    else:
+        log.error("Table backend not recognised: " + str(backend))
+        sys.exit()
+
+    table.deferred = deferred
+    table.spillFolder = spillFolder
+
+    return table
+
+def dbfFieldNames(fields):
+
+    '''
+    Field names as written to a dBASE table: cut to maxFieldNameLength characters and,
+    where two names would be the same, numbered (_1, _2, ...) as ArcGIS does
+    '''
+
+    names = []
+    used = set()
+
+    for field in fields:
+        name = str(field)[0:maxFieldNameLength]
+        number = 0
+
+        while name.upper() in used:
+            number += 1
+            suffix = '_' + str(number)
+            name = str(field)[0:maxFieldNameLength - len(suffix)] + suffix
+
+        if name != field:
+            log.info('Field ' + str(field) + ' written as ' + name + ' (dBASE field names have up to ' + str(maxFieldNameLength) + ' characters)')
+
+        names.append(name)
+        used.add(name.upper())
+
+    return names
+
+def toColumn(values):
+
+    # Converts a list or array of values to a float column, or an object column if the values are not numeric
+    if isinstance(values, np.ndarray) and values.dtype.kind in 'biuf':
+        return values.astype(np.float64)
+
+    values = list(values)
+
+    try:
+        return np.array([np.nan if value is None else float(value) for value in values], dtype=np.float64)
+
+    except (TypeError, ValueError):
+        column = np.empty(len(values), dtype=object)
+        column[:] = ['' if value is None else value for value in values]
+        return column
+
+class Table(object):
+
+    ''' Attribute table held as columns '''
+
+    def __init__(self, inputPath, outputPath):
+
+        self.inputPath = inputPath
+        self.outputPath = outputPath
+
+        self.fields = []       # Field names, in table order
+        self.columns = {}      # Upper-case field name: parsed column
+        self.numRecords = 0
+
+        self.deferred = False  # Collect written columns until flush() is called
+        self.spillFolder = None
+        self.pending = []      # Field names written but not yet saved
+        self.spillFiles = []
+
+        self.start = 0         # First record of the block (the whole table is the first block)
+        self.blockFields = []  # Upper-case names of the columns filled in blocks
+        self.savedFields = []  # Columns filled in blocks and already saved
+
+    def __str__(self):
+        return str(self.inputPath)
+
+    @property
+    def isFirst(self):
+        return self.start == 0
+
+    @property
+    def oidField(self):
+        return pseudoOIDField
+
+    def lookupField(self, fieldName):
+
+        # Returns the field name as stored in the table (field names are not case sensitive)
+        for field in self.fields:
+            if field.upper() == str(fieldName).upper():
+                return field
+
+        return None
+
+    def hasField(self, fieldName):
+
+        if str(fieldName).upper() == self.oidField.upper():
+            return True
+
+        return self.lookupField(fieldName) is not None
+
+    def readColumns(self, fieldNames):
+
+        # Returns a list of columns (NumPy arrays), one for each field name
+        if isinstance(fieldNames, six.string_types):
+            fieldNames = [fieldNames]
+
+        columns = []
+        for fieldName in fieldNames:
+
+            if str(fieldName).upper() == self.oidField.upper() and self.lookupField(fieldName) is None:
+                columns.append(np.arange(self.numRecords))
+                continue
+
+            field = self.lookupField(fieldName)
+
+            if field is None:
+                log.error("Field " + str(fieldName) + " not found in " + str(self.inputPath))
+                sys.exit()
+
+            if field.upper() not in self.columns:
+
+                if field.upper() in self.savedFields:
+                    log.error("Field " + str(field) + " was written in blocks and is only available in " + str(self.outputPath))
+                    sys.exit()
+
+                with metrics.stage('read', self.numRecords):
+                    self.columns[field.upper()] = self.parseColumn(field)
+
+            columns.append(self.columns[field.upper()])
+
+        return columns
+
+    def readColumn(self, fieldName):
+        return self.readColumns([fieldName])[0]
+
+    def setColumns(self, fieldNames, columns):
+
+        # Stores columns in memory and returns the field names used
+        usedNames = []
+
+        for fieldName, values in zip(fieldNames, columns):
+            column = toColumn(values)
+
+            if len(column) != self.numRecords:
+                log.error("Column " + str(fieldName) + " has " + str(len(column)) + " values, expected " + str(self.numRecords))
+                sys.exit()
+
+            field = self.lookupField(fieldName)
+            if field is None:
+                field = str(fieldName)
+                self.fields.append(field)
+
+            self.columns[field.upper()] = column
+            usedNames.append(field)
+
+        return usedNames
+
+    def writeColumns(self, fieldNames, columns):
+
+        # Writes the columns to the output table in one operation
+        fieldNames = self.setColumns(fieldNames, columns)
+
+        if self.deferred:
+            for field in fieldNames:
+                if field not in self.pending:
+                    self.pending.append(field)
+
+                if self.spillFolder is not None and self.numRecords > spillRecords:
+                    self.spillColumn(field)
+
+        elif self.outputPath is not None:
+            with metrics.stage('write', self.numRecords):
+                self.save(fieldNames)
+
+    def blocks(self, chunkSize=None):
+
+        '''
+        Yields the table in blocks of chunkSize records (TableBlock), which are read
+        and written like a table. Without a chunk size the table itself is the only block.
+        Columns written to the blocks are saved to the output table by flush().
+        '''
+
+        if chunkSize is None:
+            chunkSize = getChunkSize()
+
+        if chunkSize is None or chunkSize >= self.numRecords:
+            yield self
+            return
+
+        for start in range(0, self.numRecords, chunkSize):
+            stop = min(start + chunkSize, self.numRecords)
+
+            log.info('Processing records ' + str(start + 1) + ' to ' + str(stop) + ' of ' + str(self.numRecords))
+            yield TableBlock(self, start, stop)
+
+    def allocateColumn(self, field, kind):
+
+        # Creates an empty output column, held on disk for large numeric columns
+        if kind != 'f':
+            column = np.empty(self.numRecords, dtype=object)
+            column[:] = ''
+            return column
+
+        if self.spillFolder is not None and self.numRecords > spillRecords:
+            spillFile = os.path.join(self.spillFolder, 'spill_' + str(len(self.spillFiles)) + '_' + field + '.dat')
+
+            column = np.memmap(spillFile, dtype=np.float64, mode='w+', shape=(self.numRecords,))
+            self.spillFiles.append((field, spillFile))
+
+        else:
+            column = np.empty(self.numRecords, dtype=np.float64)
+
+        column[:] = np.nan
+        return column
+
+    def setBlock(self, fieldNames, columns, start, stop):
+
+        # Stores the values of records start to stop of the columns; saved when flush() is called
+        usedNames = []
+
+        for fieldName, values in zip(fieldNames, columns):
+            column = toColumn(values)
+
+            if len(column) != stop - start:
+                log.error("Column " + str(fieldName) + " has " + str(len(column)) + " values, expected " + str(stop - start))
+                sys.exit()
+
+            field = self.lookupField(fieldName)
+            if field is None:
+                field = str(fieldName)
+                self.fields.append(field)
+
+            key = field.upper()
+
+            if key not in self.blockFields:
+                self.columns[key] = self.allocateColumn(field, column.dtype.kind)
+                self.blockFields.append(key)
+
+            elif column.dtype.kind != 'f' and self.columns[key].dtype.kind == 'f':
+                # A text block in a column started as numbers
+                self.columns[key] = np.array(self.columns[key], dtype=object)
+
+            self.columns[key][start:stop] = column
+
+            if field not in self.pending:
+                self.pending.append(field)
+
+            usedNames.append(field)
+
+        return usedNames
+
+    def flush(self):
+
+        # Saves all collected columns to the output table in one operation
+        if self.pending and self.outputPath is not None:
+            with metrics.stage('write', self.numRecords):
+                self.save(self.pending)
+            log.info(str(len(self.pending)) + ' fields written to ' + str(self.outputPath))
+
+        self.pending = []
+
+        # Columns held on disk are no longer needed once saved
+        for field, spillFile in self.spillFiles:
+
+            # Columns written in blocks are not loaded into memory again
+            if field.upper() in self.blockFields:
+                self.savedFields.append(field.upper())
+                del self.columns[field.upper()]
+            else:
+                self.columns[field.upper()] = np.array(self.columns[field.upper()])
+
+            os.remove(spillFile)
+
+        self.spillFiles = []
+        self.blockFields = []
+
+    def spillColumn(self, field):
+
+        # Moves a numeric column from memory to a file in the spill folder
+        column = self.columns[field.upper()]
+
+        if column.dtype.kind != 'f' or isinstance(column, np.memmap):
+            return
+
+        spillFile = os.path.join(self.spillFolder, 'spill_' + str(len(self.spillFiles)) + '_' + field + '.dat')
+
+        spilled = np.memmap(spillFile, dtype=np.float64, mode='w+', shape=column.shape)
+        spilled[:] = column
+        spilled.flush()
+
+        self.columns[field.upper()] = spilled
+        self.spillFiles.append((field, spillFile))
+
+    # Whether parseColumn can parse part of a column
+    blockReads = True
+
+    def parseColumn(self, field, start=0, stop=None):
+        raise NotImplementedError
+
+    def save(self, fieldNames):
+        raise NotImplementedError
+
+class TableBlock(object):
+
+    ''' Records start to stop of a table, read and written like a table '''
+
+    def __init__(self, table, start, stop):
+
+        self.table = table
+        self.start = start
+        self.stop = stop
+        self.numRecords = stop - start
+        self.columns = {}
+
+    def __str__(self):
+        return str(self.table)
+
+    @property
+    def isFirst(self):
+        return self.start == 0
+
+    @property
+    def oidField(self):
+        return self.table.oidField
+
+    @property
+    def fields(self):
+        return self.table.fields
+
+    def lookupField(self, fieldName):
+        return self.table.lookupField(fieldName)
+
+    def hasField(self, fieldName):
+        return self.table.hasField(fieldName)
+
+    def readColumns(self, fieldNames):
+
+        if isinstance(fieldNames, six.string_types):
+            fieldNames = [fieldNames]
+
+        table = self.table
+        columns = []
+
+        for fieldName in fieldNames:
+
+            if str(fieldName).upper() == table.oidField.upper() and table.lookupField(fieldName) is None:
+                columns.append(np.arange(self.start, self.stop))
+                continue
+
+            field = table.lookupField(fieldName)
+
+            if field is None:
+                log.error("Field " + str(fieldName) + " not found in " + str(table.inputPath))
+                sys.exit()
+
+            key = field.upper()
+
+            if key not in self.columns:
+
+                # Columns written or already read are sliced, input fields are parsed for this block only
+                if key in table.columns:
+                    self.columns[key] = np.array(table.columns[key][self.start:self.stop])
+
+                elif table.blockReads:
+                    with metrics.stage('read', self.numRecords):
+                        self.columns[key] = table.parseColumn(field, self.start, self.stop)
+
+                else:
+                    self.columns[key] = table.readColumn(field)[self.start:self.stop]
+
+            columns.append(self.columns[key])
+
+        return columns
+
+    def readColumn(self, fieldName):
+        return self.readColumns([fieldName])[0]
+
+    def writeColumns(self, fieldNames, columns):
+
+        columns = [toColumn(values) for values in columns]
+        fieldNames = self.table.setBlock(fieldNames, columns, self.start, self.stop)
+
+        # Kept for reading back in this block, without referring to the table's columns held on disk
+        for field, column in zip(fieldNames, columns):
+            self.columns[field.upper()] = column
+
+    def flush(self):
+
+        # The table saves the blocks once all of them are written
+        pass
+
+class TableView(TableBlock):
+
+    '''
+    All records of a table, read through the table (so each field is parsed once).
+    Columns written to a view are kept in the view only, e.g. to run several PTFs
+    that write the same output fields on one input table.
+    '''
+
+    def __init__(self, table):
+        super(TableView, self).__init__(table, 0, table.numRecords)
+
+    def hasField(self, fieldName):
+        return str(fieldName).upper() in self.columns or self.table.hasField(fieldName)
+
+    def readColumns(self, fieldNames):
+
+        if isinstance(fieldNames, six.string_types):
+            fieldNames = [fieldNames]
+
+        columns = []
+        for fieldName in fieldNames:
+
+            if str(fieldName).upper() in self.columns:
+                columns.append(self.columns[str(fieldName).upper()])
+            else:
+                columns.append(self.table.readColumn(fieldName))
+
+        return columns
+
+    def writeColumns(self, fieldNames, columns):
+
+        for fieldName, values in zip(fieldNames, columns):
+            column = toColumn(values)
+
+            if len(column) != self.numRecords:
+                log.error("Column " + str(fieldName) + " has " + str(len(column)) + " values, expected " + str(self.numRecords))
+                sys.exit()
+
+            self.columns[str(fieldName).upper()] = column
+
+class TableSample(TableView):
+
+    '''
+    The records of a table (or of a block) at the given positions, read through the table.
+    Columns written to a sample are kept in the sample only.
+    '''
+
+    def __init__(self, table, indices):
+
+        super(TableSample, self).__init__(table)
+
+        self.indices = np.asarray(indices, dtype=np.int64)
+        self.numRecords = len(self.indices)
+        self.stop = self.numRecords
+
+    def readColumns(self, fieldNames):
+
+        if isinstance(fieldNames, six.string_types):
+            fieldNames = [fieldNames]
+
+        columns = []
+        for fieldName in fieldNames:
+
+            if str(fieldName).upper() in self.columns:
+                columns.append(self.columns[str(fieldName).upper()])
+            else:
+                columns.append(np.asarray(self.table.readColumn(fieldName))[self.indices])
+
+        return columns
+
+class DBFTable(Table):
+
+    ''' dBASE attribute table of a shapefile, read and written with NumPy '''
+
+    numericWidth = 19
+    numericDecimals = 11
+    maxTextWidth = 254
+
+    def __init__(self, inputPath, outputPath):
+
+        super(DBFTable, self).__init__(inputPath, outputPath)
+
+        self.dbfFile = os.path.splitext(inputPath)[0] + '.dbf'
+
+        if not os.path.exists(self.dbfFile):
+            log.error("Attribute table not found: " + str(self.dbfFile))
+            sys.exit()
+
+        self.encoding = self.readEncoding(inputPath)
+        self.outputCreated = False
+
+        with open(self.dbfFile, 'rb') as f:
+            data = f.read(32)
+            self.numRecords, headerLength, recordLength = struct.unpack('<IHH', data[4:12])
+            data += f.read(headerLength - 32)
+
+        # Field descriptors
+        self.specs = {}
+        names = ['deleted']
+        formats = ['S1']
+        offsets = [0]
+        offset = 1
+
+        numFields = (headerLength - 33) // 32
+        for i in range(0, numFields):
+            descriptor = data[32 + (32 * i):64 + (32 * i)]
+
+            if descriptor[0:1] == b'\r':
+                break
+
+            name = descriptor[0:11].split(b'\x00')[0].decode(self.encoding, 'replace').strip()
+            fieldType = descriptor[11:12].decode('ascii')
+            length = six.indexbytes(descriptor, 16)
+            decimals = six.indexbytes(descriptor, 17)
+
+            self.fields.append(name)
+            self.specs[name.upper()] = (fieldType, length, decimals)
+
+            names.append('f' + str(i))
+            formats.append('S' + str(length))
+            offsets.append(offset)
+            offset += length
+
+        recordType = np.dtype({'names': names, 'formats': formats, 'offsets': offsets, 'itemsize': recordLength})
+
+        # The records are memory-mapped, so only the parts read are loaded
+        if self.numRecords > 0:
+            self.records = np.memmap(self.dbfFile, dtype=recordType, mode='r', offset=headerLength, shape=(self.numRecords,))
+        else:
+            self.records = np.empty(0, dtype=recordType)
+
+        # Raw (unparsed) values of the input fields, used when saving unchanged fields
+        self.raw = {}
+        for i, name in enumerate(self.fields):
+            self.raw[name.upper()] = 'f' + str(i)
+
+    def readEncoding(self, path):
+
+        # Reads the code page of the shapefile (.cpg), defaulting to UTF-8
+        cpgFile = os.path.splitext(path)[0] + '.cpg'
+
+        encoding = 'utf-8'
+        if os.path.exists(cpgFile):
+            with open(cpgFile, 'r') as f:
+                codePage = f.read().strip()
+
+            if codePage.upper().startswith('ANSI '):
+                codePage = 'cp' + codePage[5:]
+
+            try:
+                import codecs
+                codecs.lookup(codePage)
+                encoding = codePage
+            except LookupError:
+                pass
+
+        return encoding
+
+    def setColumns(self, fieldNames, columns):
+
+        usedNames = super(DBFTable, self).setColumns(fieldNames, columns)
+
+        # Overwritten input fields are saved from their new values
+        for field in usedNames:
+            self.raw.pop(field.upper(), None)
+
+        return usedNames
+
+    def setBlock(self, fieldNames, columns, start, stop):
+
+        usedNames = super(DBFTable, self).setBlock(fieldNames, columns, start, stop)
+
+        for field in usedNames:
+            self.raw.pop(field.upper(), None)
+
+        return usedNames
+
+    def parseColumn(self, field, start=0, stop=None):
+
+        fieldType, length, decimals = self.specs[field.upper()]
+        raw = self.records[self.raw[field.upper()]][start:stop]
+
+        if fieldType in ['N', 'F']:
+            values = np.char.strip(raw).astype('S32')
+            missing = (values == b'') | np.char.startswith(values, b'*')
+            values[missing] = b'nan'
+
+            try:
+                return values.astype(np.float64)
+
+            except ValueError:
+                return toColumn([self.parseNumber(value) for value in values])
+
+        else:
+            column = np.empty(len(raw), dtype=object)
+            column[:] = [value.decode(self.encoding, 'replace').strip() for value in raw]
+            return column
+
+    def parseNumber(self, value):
+
+        try:
+            return float(value)
+        except ValueError:
+            return np.nan
+
+    def fieldSpec(self, column):
+
+        # Returns the dBASE field specification of a column
+        if column.dtype.kind == 'f':
+            return ('N', self.numericWidth, self.numericDecimals)
+
+        width = 1
+        for start in range(0, len(column), saveBlockRecords):
+            encoded = [six.text_type(value).encode(self.encoding, 'replace') for value in column[start:start + saveBlockRecords]]
+            width = max([width] + [len(value) for value in encoded])
+
+        return ('C', min(width, self.maxTextWidth), 0)
+
+    def formatValues(self, column, spec):
+
+        # Returns the fixed-width values of a column (or part of a column)
+        fieldType, width, decimals = spec
+
+        if fieldType == 'N':
+            valid = np.isfinite(column)
+            values = np.empty(len(column), dtype='S' + str(width))
+            values[:] = b' ' * width
+
+            if valid.any():
+                text = np.char.mod('%' + str(width) + '.' + str(decimals) + 'f', column[valid])
+
+                # Values too wide for the field are written in exponent notation
+                wide = np.char.str_len(text) > width
+                if wide.any():
+                    text[wide] = np.char.mod('%' + str(width) + '.' + str(decimals) + 'e', column[valid][wide])
+
+                values[valid] = np.char.encode(text, 'ascii')
+
+            return values
+
+        else:
+            encoded = [six.text_type(value).encode(self.encoding, 'replace') for value in column]
+
+            return np.array([value[0:width].ljust(width) for value in encoded], dtype='S' + str(width))
+
+    def save(self, fieldNames):
+
+        # Writes the complete dBASE table, formatting saveBlockRecords records at a time
+        if not self.outputCreated:
+            self.copyGeometry()
+            self.outputCreated = True
+
+        names = ['deleted']
+        formats = ['S1']
+        descriptors = []
+        specs = []
+
+        dbfNames = dbfFieldNames(self.fields)
+
+        for i, field in enumerate(self.fields):
+
+            if field.upper() in self.raw:
+                spec = self.specs[field.upper()]
+            else:
+                spec = self.fieldSpec(self.columns[field.upper()])
+
+            fieldType, length, decimals = spec
+
+            name = dbfNames[i].encode('ascii', 'replace')
+            descriptors.append(struct.pack('<11sc4xBB14x', name, fieldType.encode('ascii'), length, decimals))
+
+            names.append('f' + str(i))
+            formats.append('S' + str(length))
+            specs.append(spec)
+
+        recordType = np.dtype({'names': names, 'formats': formats})
+
+        today = datetime.date.today()
+        headerLength = 32 + (32 * len(descriptors)) + 1
+        header = struct.pack('<BBBBIHH20x', 3, today.year - 1900, today.month, today.day,
+                             self.numRecords, headerLength, recordType.itemsize)
+
+        outputDBF = os.path.splitext(self.outputPath)[0] + '.dbf'
+
+        # The input records are memory-mapped, so they are loaded before the input table is overwritten
+        if os.path.normcase(os.path.abspath(outputDBF)) == os.path.normcase(os.path.abspath(self.dbfFile)):
+            self.records = np.array(self.records)
+
+        with open(outputDBF, 'wb') as f:
+            f.write(header)
+            f.write(b''.join(descriptors))
+            f.write(b'\r')
+
+            for start in range(0, self.numRecords, saveBlockRecords):
+                stop = min(start + saveBlockRecords, self.numRecords)
+
+                records = np.empty(stop - start, dtype=recordType)
+                records['deleted'] = self.records['deleted'][start:stop]
+
+                for i, field in enumerate(self.fields):
+                    if field.upper() in self.raw:
+                        records['f' + str(i)] = self.records[self.raw[field.upper()]][start:stop]
+                    else:
+                        records['f' + str(i)] = self.formatValues(self.columns[field.upper()][start:stop], specs[i])
+
+                records['deleted'][records['deleted'] != b'*'] = b' '
+                f.write(records.tobytes())
+
+            f.write(b'\x1a')
+
+    def copyGeometry(self):
+
+        # Copies the geometry and projection files of the input shapefile next to the output table
+        inputBase = os.path.splitext(self.inputPath)[0]
+        outputBase = os.path.splitext(self.outputPath)[0]
+
+        if os.path.normcase(os.path.abspath(inputBase)) == os.path.normcase(os.path.abspath(outputBase)):
+            return
+
+        for ext in ['.shp', '.shx', '.prj', '.cpg', '.sbn', '.sbx']:
+            if os.path.exists(inputBase + ext):
+                shutil.copyfile(inputBase + ext, outputBase + ext)
+
+class CSVTable(Table):
+
+    ''' Comma separated table '''
+
+    def __init__(self, inputPath, outputPath):
+
+        super(CSVTable, self).__init__(inputPath, outputPath)
+
+        if not os.path.exists(inputPath):
+            log.error("Input table not found: " + str(inputPath))
+            sys.exit()
+
+        with open(inputPath, 'r') as f:
+            reader = csv.reader(f)
+            rows = [row for row in reader if len(row) > 0]
+
+        self.fields = [field.strip() for field in rows[0]]
+        self.numRecords = len(rows) - 1
+
+        self.text = {}
+        for i, field in enumerate(self.fields):
+            self.text[field.upper()] = [row[i].strip() if i < len(row) else '' for row in rows[1:]]
+
+    def parseColumn(self, field, start=0, stop=None):
+        return toColumn([None if value == '' else value for value in self.text[field.upper()][start:stop]])
+
+    def save(self, fieldNames):
+
+        columns = self.readColumns(self.fields)
+
+        if six.PY2:
+            f = open(self.outputPath, 'wb')
+        else:
+            f = open(self.outputPath, 'w', newline='')
+
+        with f:
+            writer = csv.writer(f)
+            writer.writerow(self.fields)
+
+            for i in range(0, self.numRecords):
+                writer.writerow(['' if column.dtype.kind == 'f' and np.isnan(column[i]) else column[i] for column in columns])
+
+# arcpy field types read as float columns; integer fields cannot hold NaN, so their nulls are read as integerNull first
+floatFieldTypes = ['Double', 'Single']
+integerFieldTypes = ['Integer', 'SmallInteger', 'BigInteger']
+integerNull = -32768
+
+class ArcpyTable(Table):
+
+    ''' Any table arcpy can read, using NumPy array conversion for reads and one cursor pass per write '''
+
+    def __init__(self, inputPath, outputPath):
+
+        import arcpy
+
+        super(ArcpyTable, self).__init__(inputPath, outputPath)
+
+        self.outputCreated = False
+        self.fields = [field.name for field in arcpy.ListFields(inputPath)]
+        self.numRecords = int(arcpy.GetCount_management(inputPath).getOutput(0))
+        self.oidName = str(arcpy.Describe(inputPath).oidFieldName)
+
+    @property
+    def oidField(self):
+        return self.oidName
+
+    # Blocks are sliced from whole columns, as arcpy reads a field in one conversion
+    blockReads = False
+
+    def parseColumn(self, field, start=0, stop=None):
+
+        import arcpy
+
+        source = self.outputPath if self.outputCreated else self.inputPath
+
+        # Nulls reach the data checks as missing values: NaN in numeric fields, '' in text fields (the OID is never null)
+        fieldTypes = [info.type for info in arcpy.ListFields(source, field) if info.name.upper() == field.upper()]
+        fieldType = fieldTypes[0] if fieldTypes else None
+
+        if fieldType == 'OID':
+            nullValues = None
+        elif fieldType in floatFieldTypes:
+            nullValues = {field: np.nan}
+        elif fieldType in integerFieldTypes:
+            nullValues = {field: integerNull}
+        else:
+            nullValues = {field: ''}
+
+        array = arcpy.da.TableToNumPyArray(source, [field], null_value=nullValues)
+        column = toColumn(array[field][start:stop])
+
+        if fieldType in integerFieldTypes:
+            column[column == integerNull] = np.nan
+
+        return column
+
+    def save(self, fieldNames):
+
+        import arcpy
+
+        if not self.outputCreated:
+            arcpy.CopyFeatures_management(self.inputPath, self.outputPath)
+            self.outputCreated = True
+
+        existing = [field.name.upper() for field in arcpy.ListFields(self.outputPath)]
+
+        for field in fieldNames:
+            if field.upper() not in existing:
+
+                if self.columns[field.upper()].dtype.kind == 'f':
+                    arcpy.AddField_management(self.outputPath, field, "DOUBLE", 10, 6)
+                else:
+                    arcpy.AddField_management(self.outputPath, field, "TEXT")
+
+        columns = [self.columns[field.upper()] for field in fieldNames]
+
+        recordNum = 0
+        with arcpy.da.UpdateCursor(self.outputPath, fieldNames) as cursor:
+            for row in cursor:
+                row = [self.toValue(column[recordNum]) for column in columns]
+
+                cursor.updateRow(row)
+                recordNum += 1
+
+    def toValue(self, value):
+
+        # Converts NumPy values to Python values for the cursor (NaN is written as null)
+        if isinstance(value, np.generic):
+            value = value.item()
+
+        if isinstance(value, float) and np.isnan(value):
+            return None
+
+        return value
@@ -1,6 +1,5 @@
 # Holds the threshold checks for PTFs
 
-import arcpy
 import os
 import sys
 
@@ -0,0 +1,235 @@
+'''
+validation: columnar data checks for the PTF inputs and outputs
+
+The checks in checks_PTFs.py are run one record at a time and log every
+violation. Here each rule is evaluated as a boolean mask over all records,
+so a whole column is checked in one pass.
+
+The Validator keeps the warning column (the flag of the last check of each
+record, as in the per-record checks) and a count of the records that break
+each rule. summarise() then logs one line per rule, e.g.
+
+    3,214 records with SSC more than 101, please check records: 4, 17, 23 ...
+
+instead of one line per record.
+
+Records outside the domain of the equations of a PTF (e.g. the log of a zero
+carbon content or of a negative water content) do not stop the tool:
+checkResults() sets all their results to NaN, written as empty values, and
+counts them in the summary.
+
+When a table is processed in blocks, holdSummaries() collects the counts of
+all blocks and releaseSummaries() logs them once at the end.
+'''
+
+import numpy as np
+from collections import OrderedDict
+import NB_PTFs.lib.log as log
+import NB_PTFs.lib.metrics as metrics
+
+from NB_PTFs.lib.refresh_modules import refresh_modules
+refresh_modules([log, metrics])
+
+# Number of record identifiers listed in the summary of each rule
+maxListed = 10
+
+# Counts collected over several validators while summaries are held (None when not held)
+heldCounts = None
+
+def mergeCounts(counts, newCounts):
+
+    for message, (count, listed) in newCounts.items():
+        if message in counts:
+            counts[message][0] += count
+            counts[message][1] = (counts[message][1] + listed)[:maxListed]
+        else:
+            counts[message] = [count, list(listed)]
+
+def logCounts(counts):
+
+    for message, (count, listed) in counts.items():
+
+        recordList = ', '.join([str(record) for record in listed])
+        if count > len(listed):
+            recordList += ' ...'
+
+        log.warning('{:,} records with {}, please check records: {}'.format(count, message, recordList))
+
+def holdSummaries():
+
+    # Summaries are collected until releaseSummaries() is called
+    global heldCounts
+    heldCounts = OrderedDict()
+
+def releaseSummaries():
+
+    # Logs the summaries collected since holdSummaries()
+    global heldCounts
+
+    if heldCounts is not None:
+        logCounts(heldCounts)
+
+    heldCounts = None
+
+def discardSummaries():
+
+    # Drops the summaries collected since holdSummaries(), e.g. when the checks are reported elsewhere
+    global heldCounts
+    heldCounts = None
+
+class Validator(object):
+
+    def __init__(self, records):
+
+        # records holds the identifier of each record (OID or soil name) used in the summary
+        self.records = np.asarray(records)
+        self.numRecords = len(self.records)
+        self.warningArray = self.emptyFlags()
+
+        # Rule message: [number of records, identifiers of the first records]
+        self.counts = OrderedDict()
+
+    def emptyFlags(self):
+        return np.array([''] * self.numRecords, dtype=object)
+
+    def addCount(self, message, mask):
+
+        count = int(np.count_nonzero(mask))
+
+        if count == 0:
+            return
+
+        listed = self.records[np.flatnonzero(mask)[:maxListed]]
+
+        if message in self.counts:
+            self.counts[message][0] += count
+        else:
+            self.counts[message] = [count, list(listed)]
+
+    def applyRules(self, rules, setWarning=True):
+
+        '''
+        Applies a list of (mask, warning flag, message) rules.
+        As in the per-record checks, a later rule overrides the flag of an earlier one.
+        Returns the flag of each record; with setWarning the flags become the warning column.
+        '''
+
+        with metrics.stage('validate', self.numRecords):
+            flags = self.emptyFlags()
+
+            for mask, flag, message in rules:
+                mask = np.asarray(mask, dtype=bool)
+                flags[mask] = flag
+                self.addCount(message, mask)
+
+        if setWarning:
+            self.warningArray = flags
+
+        return flags
+
+    def checkValue(self, name, values, setWarning=True):
+
+        values = np.asarray(values, dtype=np.float64)
+
+        rules = [(values < 0.0, str(name) + ' is negative', str(name) + ' negative'),
+                 (values > 100.0, str(name) + ' is over 100', str(name) + ' over 100')]
+
+        return self.applyRules(rules, setWarning)
+
+    def checkSSC(self, sand, silt, clay):
+
+        sand = np.asarray(sand, dtype=np.float64)
+        silt = np.asarray(silt, dtype=np.float64)
+        clay = np.asarray(clay, dtype=np.float64)
+        SSC = sand + silt + clay
+
+        rules = [(sand < 0.0, 'Sand is negative', 'sand content negative'),
+                 (silt < 0.0, 'Silt is negative', 'silt content negative'),
+                 (clay < 0.0, 'Clay is negative', 'clay content negative'),
+                 (SSC < 99.0, 'SSC less than 99', 'SSC less than 99'),
+                 (SSC > 101.0, 'SSC more than 101', 'SSC more than 101')]
+
+        return self.applyRules(rules)
+
+    def checkCarbon(self, carbon, carbContent):
+
+        carbon = np.asarray(carbon, dtype=np.float64)
+
+        if carbContent == 'OC':
+            msg = 'organic carbon (OC)'
+        elif carbContent == 'OM':
+            msg = 'organic matter (OM)'
+        else:
+            msg = 'carbon'
+
+        rules = [(carbon < 0.0, 'Carbon negative', msg + ' content negative'),
+                 (carbon > 100.0, 'OC or OM over 100', msg + ' content over 100 percent')]
+
+        return self.applyRules(rules)
+
+    def checkBatjes(self, sand, silt, clay, carbon):
+
+        # Batjes (1996): sand, silt and clay should not be smaller than 5; OC should not be smaller than 0.1%
+        rules = [(np.asarray(sand, dtype=np.float64) < 5.0, 'Sand less than 5', 'sand less than 5 (Batjes, 1996)'),
+                 (np.asarray(silt, dtype=np.float64) < 5.0, 'Silt less than 5', 'silt less than 5 (Batjes, 1996)'),
+                 (np.asarray(clay, dtype=np.float64) < 5.0, 'Clay less than 5', 'clay less than 5 (Batjes, 1996)'),
+                 (np.asarray(carbon, dtype=np.float64) < 0.1, 'Carbon less than 0.1', 'carbon less than 0.1 (Batjes, 1996)')]
+
+        return self.applyRules(rules)
+
+    def checkNegOutput(self, outputs):
+
+        # Counts the records with a negative soil moisture value; outputs is a (records x values) array
+        outputs = np.asarray(outputs, dtype=np.float64).reshape(self.numRecords, -1)
+        mask = (outputs < 0.0).any(axis=1)
+
+        self.addCount('a negative soil moisture value', mask)
+
+        return mask
+
+    def checkNegValue(self, name, values, valid=None):
+
+        # Counts the records with a negative output value; records where valid is False are skipped
+        mask = np.asarray(values, dtype=np.float64) < 0.0
+
+        if valid is not None:
+            mask &= np.asarray(valid, dtype=bool)
+
+        self.addCount(str(name) + ' negative', mask)
+
+        return mask
+
+    def checkResults(self, results):
+
+        '''
+        Counts the records outside the domain of the equations of a PTF (e.g. the log of a zero
+        carbon content), i.e. with a NaN or infinite result, and sets all their results to NaN.
+        results is a sequence of result columns or (records x values) arrays.
+        Returns the results as float arrays.
+        '''
+
+        columns = [np.array(column, dtype=np.float64) for column in results]
+        invalid = np.zeros(self.numRecords, dtype=bool)
+
+        for column in columns:
+            invalid |= ~np.isfinite(column.reshape(self.numRecords, -1)).all(axis=1)
+
+        self.addCount('results that cannot be calculated (set to NaN)', invalid)
+
+        for column in columns:
+            column[invalid] = np.nan
+
+        return columns
+
+    def warnings(self):
+        return self.warningArray.tolist()
+
+    def summarise(self):
+
+        # Logs one warning per broken rule and resets the counts
+        if heldCounts is not None:
+            mergeCounts(heldCounts, self.counts)
+        else:
+            logCounts(self.counts)
+
+        self.counts = OrderedDict()
@@ -1,16 +1,19 @@
-import arcpy
 import os
 import sys
 import csv
+import numpy as np
 
 from NB_PTFs.lib.external import six # Python 2/3 compatibility module
 import configuration
 import NB_PTFs.lib.log as log
 import NB_PTFs.lib.common as common
 import NB_PTFs.lib.PTFdatabase as PTFdatabase
+import NB_PTFs.lib.plot_pool as plot_pool
+import NB_PTFs.lib.metrics as metrics
+import NB_PTFs.lib.validation as validation
 
 from NB_PTFs.lib.refresh_modules import refresh_modules
-refresh_modules([log, common, PTFdatabase])
+refresh_modules([log, common, PTFdatabase, plot_pool, metrics, validation])
 
 def calcVGfxn(pressure, theta_res, theta_sat, alpha, n, m):
     
@@ -28,7 +31,7 @@ def calcMVGfxn(pressure, K_sat, alpha, n, m, l):
     # Calculate Mualem-van Genuchten
 
     # Calc Se
-    Se_MVG = 1.0 / float((1.0 + (alpha * pressure) ** n) ** m)
+    Se_MVG = 1.0 / ((1.0 + (alpha * pressure) ** n) ** m)
 
     # Calc K_Se
     K_Se_MVG = K_sat * Se_MVG ** l * (1.0 - (1.0 - Se_MVG ** (1.0 / m)) ** m) ** 2.0
@@ -46,303 +49,244 @@ def calcthetaHKfxn(pressure, WC_res, WC_sat, alpha, n, m, K_sat, l):
 
     # Calculate thetaH and Ktheta for MVG
     thetaH = calcVGfxn(pressure, WC_res, WC_sat, alpha, n, m)            
-    Ktheta = K_sat * (((thetaH - WC_res) / float(WC_sat - WC_res))**l) * (1.0 - (1.0 - ((thetaH - WC_res) / float(WC_sat - WC_res))**(1.0/m))**m)**2.0
+    Ktheta = K_sat * (((thetaH - WC_res) / (WC_sat - WC_res))**l) * (1.0 - (1.0 - ((thetaH - WC_res) / (WC_sat - WC_res))**(1.0/m))**m)**2.0
             
     return thetaH, Ktheta
 
-def writeVGParams(outputShp, WC_residualArray, WC_satArray, alpha_VGArray, n_VGArray, m_VGArray):
-    # Write VG parameters to the shapefile
+def toMatrixInputs(pressures, *params):
 
-    # Add fields
-    arcpy.AddField_management(outputShp, "WC_res", "DOUBLE", 10, 6)
-    arcpy.AddField_management(outputShp, "WC_sat", "DOUBLE", 10, 6)
-    arcpy.AddField_management(outputShp, "alpha_VG", "DOUBLE", 10, 6)
-    arcpy.AddField_management(outputShp, "n_VG", "DOUBLE", 10, 6)
-    arcpy.AddField_management(outputShp, "m_VG", "DOUBLE", 10, 6)
+    # Returns the pressures as a (1 x P) row and each parameter as an (N x 1) column
+    # so that the curve functions broadcast to an (N x P) matrix (soils x pressures)
+    pressureRow = np.asarray(pressures, dtype=np.float64).reshape(1, -1)
+    paramColumns = [np.asarray(param, dtype=np.float64).reshape(-1, 1) for param in params]
 
-    outputFields = ["WC_res", "WC_sat", "alpha_VG", "n_VG", "m_VG"]
+    return [pressureRow] + paramColumns
+
+def calcVGMatrix(pressures, WC_res, WC_sat, alpha, n, m):
+
+    # Water content theta(h) for N soils at P pressures (kPa), returned as an (N x P) matrix
+    h, WC_res, WC_sat, alpha, n, m = toMatrixInputs(pressures, WC_res, WC_sat, alpha, n, m)
+
+    return calcVGfxn(h, WC_res, WC_sat, alpha, n, m)
+
+def calcMVGMatrix(pressures, K_sat, alpha, n, m, l):
+
+    # Effective saturation Se(h) and K(Se) for N soils at P pressures, returned as two (N x P) matrices
+    h, K_sat, alpha, n, m, l = toMatrixInputs(pressures, K_sat, alpha, n, m, l)
+
+    return calcMVGfxn(h, K_sat, alpha, n, m, l)
+
+def calcKhMatrix(pressures, K_sat, alpha, n, m, l):
+
+    # Hydraulic conductivity K(h) for N soils at P pressures, returned as an (N x P) matrix
+    h, K_sat, alpha, n, m, l = toMatrixInputs(pressures, K_sat, alpha, n, m, l)
+
+    return calcKhfxn(h, K_sat, alpha, n, m, l)
+
+def calcVGInverse(WC, WC_res, WC_sat, alpha, n, m):
+
+    '''
+    Pressure h(theta) in kPa at which N soils reach the water contents WC, in closed form.
+    WC is (N x T) or a list of T water contents for all soils; returns an (N x T) matrix.
+    Water contents at or above theta_sat give 0 kPa, those at or below theta_res are never reached (NaN).
+    '''
+
+    WC = np.asarray(WC, dtype=np.float64)
+    WC_res, WC_sat, alpha, n, m = [np.asarray(param, dtype=np.float64).reshape(-1, 1) for param in [WC_res, WC_sat, alpha, n, m]]
+
+    if WC.ndim < 2:
+        WC = WC.reshape(1, -1)
+
+    with np.errstate(divide='ignore', invalid='ignore', over='ignore'):
+        Se = (WC - WC_res) / (WC_sat - WC_res)
+        h = ((np.minimum(Se, 1.0) ** (-1.0 / m) - 1.0) ** (1.0 / n)) / alpha
+
+    h = np.where(Se >= 1.0, 0.0, h)
+    h = np.where(Se > 0.0, h, np.nan)
+
+    return h
+
+def calcKthetaFromWC(thetaH, WC_res, WC_sat, m, K_sat, l):
+
+    # K(theta) from water contents already calculated with calcVGfxn (soils in rows)
+    WC_res, WC_sat, m, K_sat, l = [np.asarray(param, dtype=np.float64).reshape(-1, 1) for param in [WC_res, WC_sat, m, K_sat, l]]
+
+    Se = (thetaH - WC_res) / (WC_sat - WC_res)
+
+    return K_sat * (Se**l) * (1.0 - (1.0 - Se**(1.0/m))**m)**2.0
+
+# Pressures (kPa) of the curves used by the plots and the per-soil CSVs
+curvePressures = np.linspace(0.0, 1500.0, 1501)
+
+class CurveCache(object):
+
+    '''
+    Curves of all the soils of one block over curvePressures, as (N x 1501) matrices
+    (calc_vg uses blocks of at most common.maxCurveSoils soils, so each matrix is about 50 MB at most).
+    Each curve is calculated on first use and then shared by the plots, the per-soil CSVs
+    and the water contents at the default, custom and critical pressures.
+    '''
+
+    def __init__(self, WC_res, WC_sat, alpha, n, m, K_sat=None, l=None):
+
+        self.WC_res = WC_res
+        self.WC_sat = WC_sat
+        self.alpha = alpha
+        self.n = n
+        self.m = m
+        self.K_sat = K_sat
+        self.l = l
+
+        self.pressures = curvePressures
+        self.curves = {}
+        self.numSoils = np.size(WC_sat)
+
+    def waterContent(self):
+
+        # theta(h)
+        if 'WC' not in self.curves:
+            with metrics.stage('compute', self.numSoils):
+                self.curves['WC'] = calcVGMatrix(self.pressures, self.WC_res, self.WC_sat, self.alpha, self.n, self.m)
+
+        return self.curves['WC']
+
+    def conductivity(self):
+
+        # K(h)
+        if 'Kh' not in self.curves:
+            with metrics.stage('compute', self.numSoils):
+                self.curves['Kh'] = calcKhMatrix(self.pressures, self.K_sat, self.alpha, self.n, self.m, self.l)
+
+        return self.curves['Kh']
+
+    def thetaK(self):
 
-    recordNum = 0
-    with arcpy.da.UpdateCursor(outputShp, outputFields) as cursor:
-        for row in cursor:
-            row[0] = WC_residualArray[recordNum]
-            row[1] = WC_satArray[recordNum]
-            row[2] = alpha_VGArray[recordNum]
-            row[3] = n_VGArray[recordNum]
-            row[4] = m_VGArray[recordNum]
+        # theta(h) and K(theta), with K(theta) calculated from the cached water contents
+        if 'Ktheta' not in self.curves:
+            WC = self.waterContent()
 
-            cursor.updateRow(row)
-            recordNum += 1
+            with metrics.stage('compute', self.numSoils):
+                self.curves['Ktheta'] = calcKthetaFromWC(WC, self.WC_res, self.WC_sat, self.m, self.K_sat, self.l)
+
+        return self.waterContent(), self.curves['Ktheta']
+
+    def gridIndices(self, pressures):
+
+        # Columns of the pressures in the curves, or None if a pressure is not on the curve pressures
+        pressures = np.asarray(pressures, dtype=np.float64).reshape(-1)
+        indices = np.clip(np.searchsorted(self.pressures, pressures), 0, len(self.pressures) - 1)
+
+        if np.all(self.pressures[indices] == pressures):
+            return indices
+
+        return None
+
+    def waterContentAt(self, pressures):
+
+        indices = self.gridIndices(pressures)
+        if indices is None:
+            return calcVGMatrix(pressures, self.WC_res, self.WC_sat, self.alpha, self.n, self.m)
+
+        return self.waterContent()[:, indices]
+
+    def conductivityAt(self, pressures):
+
+        indices = self.gridIndices(pressures)
+        if indices is None:
+            return calcKhMatrix(pressures, self.K_sat, self.alpha, self.n, self.m, self.l)
+
+        return self.conductivity()[:, indices]
+
+def writeVGParams(outputTable, WC_residualArray, WC_satArray, alpha_VGArray, n_VGArray, m_VGArray):
+    # Write VG parameters to the shapefile
+
+    outputFields = ["WC_res", "WC_sat", "alpha_VG", "n_VG", "m_VG"]
+    outputTable.writeColumns(outputFields, [WC_residualArray, WC_satArray, alpha_VGArray, n_VGArray, m_VGArray])
 
 def plotVG(outputFolder, WC_residualArray,
            WC_satArray, alpha_VGArray, n_VGArray,
-           m_VGArray, nameArray, fcValue, sicValue, pwpValue):
+           m_VGArray, nameArray, fcValue, sicValue, pwpValue, curveCache=None, firstBlock=True):
     
     # Create Van Genuchten plots
-    import matplotlib.pyplot as plt
-    import numpy as np
 
     # Check what unit the user wants to output
     PTFUnit = common.getInputValue(outputFolder, 'Pressure_units_plot')
+    pressureUnit, unitMult = plot_pool.getPlotUnit(PTFUnit)
 
     # Check what axis was chosen
     AxisChoice = common.getInputValue(outputFolder, 'Plot_axis')
+    swapAxes = plot_pool.checkAxisChoice(AxisChoice)
+
+    # Water content curves of all soils, calculated once and shared by the CSVs, checks and plots
+    if curveCache is None:
+        curveCache = CurveCache(WC_residualArray, WC_satArray, alpha_VGArray, n_VGArray, m_VGArray)
+
+    psi_kPa = curveCache.pressures
+    vg_WCMatrix = curveCache.waterContent()
+
+    # Water contents of all soils in one file (curveExport in the user settings)
+    with metrics.stage('write', len(nameArray)):
+        common.writeCurves(outputFolder, 'VG_waterContents', nameArray, psi_kPa, vg_WCMatrix, 'Pressures_kPa', 'WaterContents',
+                           append=not firstBlock)
 
-    if PTFUnit == 'kPa':
-        pressureUnit = 'kPa'
-        alphaMult = 1.0        
+    # Call check for theta at 0 vs theta_sat + 1%, counted in the data-check summary
+    theta_sat_threshold = np.asarray(WC_satArray, dtype=np.float64) * 1.1
 
-    elif PTFUnit == 'cm':
-        pressureUnit = 'cm'
-        alphaMult = 0.1
+    validator = validation.Validator(nameArray)
+    validator.addCount('water content at 0kPa larger than theta(saturation) + 1 percent', vg_WCMatrix[:, 0] > theta_sat_threshold)
+    validator.summarise()
 
-    elif PTFUnit == 'm':
-        pressureUnit = 'm'
-        alphaMult = 10.0
+    # Only the soils of the first block are plotted in the chunked mode
+    if not firstBlock:
+        return
 
-    else:
-        log.error('Pressure unit for PTF not recognised')
+    # Convert the pressures to negative for plotting
+    psi_neg = -unitMult * psi_kPa
+    thresholds = plot_pool.thresholdLines(fcValue, sicValue, pwpValue, -unitMult)
 
-    # Define output folder for CSVs
-    outFolder = os.path.join(outputFolder, 'VG_waterContents')
-    if not os.path.exists(outFolder):
-        os.mkdir(outFolder)
+    # Limits based on the WCsat and 1500kPa of the curve
+    wcBottom = np.maximum(vg_WCMatrix[:, -1] - 0.01, 0)
+    wcTop = np.minimum(np.asarray(WC_satArray, dtype=np.float64) + 0.1, 1)
+
+    soils = plot_pool.capSoils(range(0, len(nameArray)))
+    jobs = []
 
     # Plot 1: pressure on the x-axis and water content on the y-axis
-    for i in range(0, len(nameArray)):
+    for i in soils:
         outName = 'vg_' + str(nameArray[i]) + '.png'
-        outPath = os.path.join(outputFolder, outName)
         title = 'Van Genuchten plot for ' + str(nameArray[i])
 
-        # Set pressure vector
-        psi_kPa = np.linspace(0.0, 1500.0, 1501)
-
-        # Calculate WC over the pressure vector above
-        vg_WC = calcVGfxn(psi_kPa, WC_residualArray[i], WC_satArray[i], alpha_VGArray[i], n_VGArray[i], m_VGArray[i])
-
-        common.writeWCCSV(outFolder, nameArray[i], psi_kPa, vg_WC, 'Pressures_kPa', 'WaterContents')
-
-        # For plotting purposes, adjust psi_plot based on user-input
-        if PTFUnit == 'kPa':
-            pressureUnit = 'kPa'
-            psi_plot = psi_kPa
-
-            fc_plot = float(fcValue) * -1.0
-            sic_plot = float(sicValue) * -1.0
-            pwp_plot = float(pwpValue) * -1.0
-
-        elif PTFUnit == 'cm':
-            pressureUnit = 'cm'
-            psi_plot = 10.0 * psi_kPa
-
-            fc_plot = float(fcValue) * -10.0
-            sic_plot = float(sicValue) * -10.0
-            pwp_plot = float(pwpValue) * -10.0
-
-        elif PTFUnit == 'm':
-            pressureUnit = 'm'
-            psi_plot = 0.1 * psi_kPa
-
-            fc_plot = float(fcValue) * -0.1
-            sic_plot = float(sicValue) * -0.1
-            pwp_plot = float(pwpValue) * -0.1
-
-        # Call check for theta at 0 vs theta_sat + 1%        
-        theta_0kPa = calcVGfxn(0, WC_residualArray[i], WC_satArray[i], alpha_VGArray[i], n_VGArray[i], m_VGArray[i])
-        theta_sat_threshold = WC_satArray[i] * 1.1
-
-        if theta_0kPa > theta_sat_threshold:
-            log.warning('Water content at 0kPa is larger than theta(saturation) + 1 percent')
-
-        # Limits ased on the WCsat and 1500kPa of the curve
-        theta_1500kPa = calcVGfxn(1500, WC_residualArray[i], WC_satArray[i], alpha_VGArray[i], n_VGArray[i], m_VGArray[i])
-        wcBottom = max(theta_1500kPa - 0.01, 0)
-        wcTop = min(WC_satArray[i] + 0.1, 1)
-
-        # Convert psi_plot to negative for plotting
-        psi_neg = -1.0 * psi_plot
-
-        if AxisChoice == 'Y-axis':
-            # Plotting
-            plt.plot(psi_neg, vg_WC, label=str(nameArray[i]))
-            plt.xscale('symlog')
-            plt.axvline(x=fc_plot, color='g', linestyle='dashed', label='FC')
-            plt.axvline(x=sic_plot, color='m', linestyle='dashed', label='SIC')
-            plt.axvline(x=pwp_plot, color='r', linestyle='dashed', label='PWP')
-            plt.xlabel('Pressure (' + str(pressureUnit) + ')')
-            plt.ylabel('Volumetric water content')
-            plt.ylim([wcBottom, wcTop])
-            plt.title(title)
-            plt.legend(loc="best")
-            plt.savefig(outPath, transparent=False)
-            plt.close()
-            log.info('Plot created for soil ' + str(nameArray[i]))
-
-        elif AxisChoice == 'X-axis':
-            plt.plot(vg_WC, psi_neg, label=str(nameArray[i]))
-            plt.yscale('symlog')
-            plt.axhline(y=fc_plot, color='g', linestyle='dashed', label='FC')
-            plt.axhline(y=sic_plot, color='m', linestyle='dashed', label='SIC')
-            plt.axhline(y=pwp_plot, color='r', linestyle='dashed', label='PWP')
-            plt.ylabel('Pressure (' + str(pressureUnit) + ')')
-            plt.xlabel('Volumetric water content')
-            plt.xlim([wcBottom, wcTop])
-            plt.title(title)
-            plt.legend(loc="best")
-            plt.savefig(outPath, transparent=False)
-            plt.close()
-            log.info('Plot created for soil ' + str(nameArray[i]))
-
-        else:
-            log.error('Invalid choice for axis plotting, please select Y-axis or X-axis')
-            sys.exit()
-
-    # Plot 2: log pressure on the x-axis, WC on the y-axis
-    outPath = os.path.join(outputFolder, 'plotVG_logPressure.png')
-    title = 'Van Genuchten plots of ' + str(len(nameArray)) + ' soils (log scale)'
-
-    # Define pressure vector 
-    psi_kPa = np.linspace(0.0, 1500.0, 1501)
-
-    labels = []
-    for i in range(0, len(nameArray)):
-
-        # Calculate WC 
-        vg_WC = calcVGfxn(psi_kPa, WC_residualArray[i], WC_satArray[i], alpha_VGArray[i], n_VGArray[i], m_VGArray[i])
-        
-        if PTFUnit == 'kPa':
-            pressureUnit = 'kPa'
-            psi_plot = psi_kPa
-
-        elif PTFUnit == 'cm':
-            pressureUnit = 'cm'
-            psi_plot = 10.0 * psi_kPa
-
-        elif PTFUnit == 'm':
-            pressureUnit = 'm'
-            psi_plot = 0.1 * psi_kPa
-
-        # Convert psi to negative for plotting purposes
-        psi_neg = -1.0 * psi_plot
-
-        if AxisChoice == 'Y-axis':
-            plt.plot(psi_neg, vg_WC, label=str(nameArray[i]))
-
-        elif AxisChoice == 'X-axis':
-            plt.plot(vg_WC, psi_neg, label=str(nameArray[i]))
-
-        else:
-            log.error('Invalid choice for axis plotting, please select Y-axis or X-axis')
-            sys.exit()
-    
-    if AxisChoice == 'Y-axis':
-        plt.xscale('symlog')
-        plt.axvline(x=fc_plot, color='g', linestyle='dashed', label='FC')
-        plt.axvline(x=sic_plot, color='m', linestyle='dashed', label='SIC')
-        plt.axvline(x=pwp_plot, color='r', linestyle='dashed', label='PWP')
-        plt.title(title)
-        plt.ylabel('Water content')
-        plt.xlabel('Pressure (' + str(pressureUnit) + ')')
-        plt.legend(ncol=2, fontsize=12, loc="best")
-        plt.savefig(outPath, transparent=False)
-        plt.close()
-        log.info('Plot created with water content on the y-axis')
-
-    elif AxisChoice == 'X-axis':
-        plt.yscale('symlog')
-        plt.axhline(y=fc_plot, color='g', linestyle='dashed', label='FC')
-        plt.axhline(y=sic_plot, color='m', linestyle='dashed', label='SIC')
-        plt.axhline(y=pwp_plot, color='r', linestyle='dashed', label='PWP')
-        plt.title(title)
-        plt.xlabel('Water content')
-        plt.ylabel('Pressure (' + str(pressureUnit) + ')')
-        plt.legend(ncol=2, fontsize=12, loc="best")
-        plt.savefig(outPath, transparent=False)
-        plt.close()
-        log.info('Plot created with water content on the x-axis')
-
-    else:
-        log.error('Invalid choice for axis plotting, please select Y-axis or X-axis')
-        sys.exit()
-
-    # Plot 3: pressure on the x-axis, WC on the y-axis
-    outPath = os.path.join(outputFolder, 'plotVG_Pressure.png')
-    title = 'Van Genuchten plots of ' + str(len(nameArray)) + ' soils'
-
-    # Define pressure vector 
-    psi_kPa = np.linspace(0.0, 1500.0, 1501)
-
-    labels = []
-    for i in range(0, len(nameArray)):
-
-        # Calculate WC 
-        vg_WC = calcVGfxn(psi_kPa, WC_residualArray[i], WC_satArray[i], alpha_VGArray[i], n_VGArray[i], m_VGArray[i])
-        
-        if PTFUnit == 'kPa':
-            pressureUnit = 'kPa'
-            psi_plot = psi_kPa
-
-        elif PTFUnit == 'cm':
-            pressureUnit = 'cm'
-            psi_plot = 10.0 * psi_kPa
-
-        elif PTFUnit == 'm':
-            pressureUnit = 'm'
-            psi_plot = 0.1 * psi_kPa
-
-        # Convert psi to negative for plotting purposes
-        psi_neg = -1.0 * psi_plot
-
-        if AxisChoice == 'Y-axis':
-            plt.plot(psi_neg, vg_WC, label=str(nameArray[i]))
-
-        elif AxisChoice == 'X-axis':
-            plt.plot(vg_WC, psi_neg, label=str(nameArray[i]))
-
-        else:
-            log.error('Invalid choice for axis plotting, please select Y-axis or X-axis')
-            sys.exit()
-    
-    if AxisChoice == 'Y-axis':
-    
-        plt.axvline(x=fc_plot, color='g', linestyle='dashed', label='FC')
-        plt.axvline(x=sic_plot, color='m', linestyle='dashed', label='SIC')
-        plt.axvline(x=pwp_plot, color='r', linestyle='dashed', label='PWP')
-        plt.title(title)
-        plt.ylabel('Water content')
-        plt.xlabel('Pressure (' + str(pressureUnit) + ')')
-        plt.legend(ncol=2, fontsize=12, loc="best")
-        plt.savefig(outPath, transparent=False)
-        plt.close()
-        log.info('Plot created with water content on the y-axis')
-
-    elif AxisChoice == 'X-axis':
-        plt.axhline(y=fc_plot, color='g', linestyle='dashed', label='FC')
-        plt.axhline(y=sic_plot, color='m', linestyle='dashed', label='SIC')
-        plt.axhline(y=pwp_plot, color='r', linestyle='dashed', label='PWP')
-        plt.title(title)
-        plt.xlabel('Water content')
-        plt.ylabel('Pressure (' + str(pressureUnit) + ')')
-        plt.legend(ncol=2, fontsize=12, loc="best")
-        plt.savefig(outPath, transparent=False)
-        plt.close()
-        log.info('Plot created with water content on the x-axis')
-
-    else:
-        log.error('Invalid choice for axis plotting, please select Y-axis or X-axis')
-        sys.exit()
+        jobs.append(plot_pool.curveJob(os.path.join(outputFolder, outName), title,
+                                       [(psi_neg, vg_WCMatrix[i], str(nameArray[i]))],
+                                       'Pressure (' + str(pressureUnit) + ')', 'Volumetric water content',
+                                       xscale='symlog', ylim=[wcBottom[i], wcTop[i]], lines=thresholds,
+                                       legend={'loc': 'best'}, swapAxes=swapAxes,
+                                       message='Plot created for soil ' + str(nameArray[i])))
+
+    # Plots 2 and 3: all soils with log pressure and pressure
+    curves = [(psi_neg, vg_WCMatrix[i], str(nameArray[i])) for i in soils]
+    message = 'Plot created with water content on the ' + ('x-axis' if swapAxes else 'y-axis')
+
+    jobs.append(plot_pool.curveJob(os.path.join(outputFolder, 'plotVG_logPressure.png'),
+                                   'Van Genuchten plots of ' + str(len(soils)) + ' soils (log scale)',
+                                   curves, 'Pressure (' + str(pressureUnit) + ')', 'Water content',
+                                   xscale='symlog', lines=thresholds, legend={'ncol': 2, 'fontsize': 12, 'loc': 'best'},
+                                   swapAxes=swapAxes, message=message))
+
+    jobs.append(plot_pool.curveJob(os.path.join(outputFolder, 'plotVG_Pressure.png'),
+                                   'Van Genuchten plots of ' + str(len(soils)) + ' soils',
+                                   curves, 'Pressure (' + str(pressureUnit) + ')', 'Water content',
+                                   lines=thresholds, legend={'ncol': 2, 'fontsize': 12, 'loc': 'best'},
+                                   swapAxes=swapAxes, message=message))
+
+    plot_pool.renderPlots(jobs)
     
 def calcPressuresVG(name, WC_residual, WC_sat, alpha_VG, n_VG, m_VG, vgPressures):
 
     # Calculates water content at user-input pressures
-    wcValues = [name]
-
-    for pressure in vgPressures:
+    waterContents = calcVGMatrix(vgPressures, WC_residual, WC_sat, alpha_VG, n_VG, m_VG)[0]
 
-        waterContent = calcVGfxn(pressure, WC_residual, WC_sat, alpha_VG, n_VG, m_VG)
-        wcValues.append(waterContent)
-
-    return wcValues
+    return [name] + list(waterContents)
 
 def writeWaterContent(outputFolder, record, headings, wcArrays):
 
@@ -363,302 +307,84 @@ def writeWaterContent(outputFolder, record, headings, wcArrays):
 
 def calcMVG(K_sat, alpha_VG, n_VG, m_VG, l_MvG):
 
-    # Initialise empty arrays
-    Se_1kPaArray = []
-    Se_3kPaArray = []
-    Se_10kPaArray = []
-    Se_33kPaArray = []
-    Se_100kPaArray = []
-    Se_1500kPaArray = []
-
-    K_Se_1kPaArray = []
-    K_Se_3kPaArray = []
-    K_Se_10kPaArray = []
-    K_Se_33kPaArray = []
-    K_Se_100kPaArray = []
-    K_Se_1500kPaArray = []
-    
-    for x in range(0, len(alpha_VG)):
-
-        # Calculate Se and K_Se at different pressures
-        Se_1kPa, K_Se_1kPa = calcMVGfxn(1.0, K_sat[x], alpha_VG[x], n_VG[x], m_VG[x], l_MvG[x])
-        Se_3kPa, K_Se_3kPa = calcMVGfxn(3.0, K_sat[x], alpha_VG[x], n_VG[x], m_VG[x], l_MvG[x])
-        Se_10kPa, K_Se_10kPa = calcMVGfxn(10.0, K_sat[x], alpha_VG[x], n_VG[x], m_VG[x], l_MvG[x])
-        Se_33kPa, K_Se_33kPa = calcMVGfxn(33.0, K_sat[x], alpha_VG[x], n_VG[x], m_VG[x], l_MvG[x])
-        Se_100kPa, K_Se_100kPa = calcMVGfxn(100.0, K_sat[x], alpha_VG[x], n_VG[x], m_VG[x], l_MvG[x])
-        Se_1500kPa, K_Se_1500kPa = calcMVGfxn(1500.0, K_sat[x], alpha_VG[x], n_VG[x], m_VG[x], l_MvG[x])
-
-        Se_1kPaArray.append(Se_1kPa)
-        Se_3kPaArray.append(Se_3kPa)
-        Se_10kPaArray.append(Se_10kPa)
-        Se_33kPaArray.append(Se_33kPa)
-        Se_100kPaArray.append(Se_100kPa)
-        Se_1500kPaArray.append(Se_1500kPa)
-
-        K_Se_1kPaArray.append(K_Se_1kPa)
-        K_Se_3kPaArray.append(K_Se_3kPa)
-        K_Se_10kPaArray.append(K_Se_10kPa)
-        K_Se_33kPaArray.append(K_Se_33kPa)
-        K_Se_100kPaArray.append(K_Se_100kPa)
-        K_Se_1500kPaArray.append(K_Se_1500kPa)
-
-    return Se_1kPaArray, Se_3kPaArray, Se_10kPaArray, Se_33kPaArray, Se_100kPaArray, Se_1500kPaArray, K_Se_1kPaArray, K_Se_3kPaArray, K_Se_10kPaArray, K_Se_33kPaArray, K_Se_100kPaArray, K_Se_1500kPaArray
-
-def writeOutputMVG(outputShp, Se_1kPaArray, Se_3kPaArray, Se_10kPaArray, Se_33kPaArray, Se_100kPaArray, Se_1500kPaArray, K_Se_1kPaArray, K_Se_3kPaArray, K_Se_10kPaArray, K_Se_33kPaArray, K_Se_100kPaArray, K_Se_1500kPaArray):
-    # Write the outputs to the output shapefile
+    # Calculate Se and K_Se at the default pressures for all soils at once
+    pressures = [1.0, 3.0, 10.0, 33.0, 100.0, 1500.0]
+    Se, K_Se = calcMVGMatrix(pressures, K_sat, alpha_VG, n_VG, m_VG, l_MvG)
+
+    # One array per pressure: Se at each pressure, then K_Se at each pressure
+    return tuple([Se[:, i] for i in range(0, len(pressures))] + [K_Se[:, i] for i in range(0, len(pressures))])
 
-    # Add fields
-    arcpy.AddField_management(outputShp, "Se1kPa", "DOUBLE", 10, 6)
-    arcpy.AddField_management(outputShp, "Se3kPa", "DOUBLE", 10, 6)
-    arcpy.AddField_management(outputShp, "Se10kPa", "DOUBLE", 10, 6)
-    arcpy.AddField_management(outputShp, "Se33kPa", "DOUBLE", 10, 6)
-    arcpy.AddField_management(outputShp, "Se100kPa", "DOUBLE", 10, 6)
-    arcpy.AddField_management(outputShp, "Se1500kPa", "DOUBLE", 10, 6)
-
-    arcpy.AddField_management(outputShp, "KSe1kPa", "DOUBLE", 10, 6)
-    arcpy.AddField_management(outputShp, "KSe3kPa", "DOUBLE", 10, 6)
-    arcpy.AddField_management(outputShp, "KSe10kPa", "DOUBLE", 10, 6)
-    arcpy.AddField_management(outputShp, "KSe33kPa", "DOUBLE", 10, 6)
-    arcpy.AddField_management(outputShp, "KSe100kPa", "DOUBLE", 10, 6)
-    arcpy.AddField_management(outputShp, "KSe1500kPa", "DOUBLE", 10, 6)
+def writeOutputMVG(outputTable, Se_1kPaArray, Se_3kPaArray, Se_10kPaArray, Se_33kPaArray, Se_100kPaArray, Se_1500kPaArray, K_Se_1kPaArray, K_Se_3kPaArray, K_Se_10kPaArray, K_Se_33kPaArray, K_Se_100kPaArray, K_Se_1500kPaArray):
+    # Write the outputs to the output shapefile
 
     outputFields = ["Se1kPa", "Se3kPa", "Se10kPa", "Se33kPa", "Se100kPa", "Se1500kPa", "KSe1kPa", "KSe3kPa", "KSe10kPa", "KSe33kPa", "KSe100kPa", "KSe1500kPa"]
+    outputColumns = [Se_1kPaArray, Se_3kPaArray, Se_10kPaArray, Se_33kPaArray, Se_100kPaArray, Se_1500kPaArray,
+                     K_Se_1kPaArray, K_Se_3kPaArray, K_Se_10kPaArray, K_Se_33kPaArray, K_Se_100kPaArray, K_Se_1500kPaArray]
 
-    recordNum = 0
-    with arcpy.da.UpdateCursor(outputShp, outputFields) as cursor:
-        for row in cursor:
-            row[0] = Se_1kPaArray[recordNum]
-            row[1] = Se_3kPaArray[recordNum]
-            row[2] = Se_10kPaArray[recordNum]
-            row[3] = Se_33kPaArray[recordNum]
-            row[4] = Se_100kPaArray[recordNum]
-            row[5] = Se_1500kPaArray[recordNum]
-            row[6] = K_Se_1kPaArray[recordNum]
-            row[7] = K_Se_3kPaArray[recordNum]
-            row[8] = K_Se_10kPaArray[recordNum]
-            row[9] = K_Se_33kPaArray[recordNum]
-            row[10] = K_Se_100kPaArray[recordNum]
-            row[11] = K_Se_1500kPaArray[recordNum]
-
-            cursor.updateRow(row)
-            recordNum += 1
-
-def plotMVG(outputFolder, K_satArray, alpha_VGArray, n_VGArray, m_VGArray, l_MvGArray, WC_satArray, WC_residualArray, nameArray):
-    # Create Van Genuchten plots
-    import matplotlib.pyplot as plt
-    import numpy as np
+    outputTable.writeColumns(outputFields, outputColumns)
+
+def plotMVG(outputFolder, K_satArray, alpha_VGArray, n_VGArray, m_VGArray, l_MvGArray, WC_satArray, WC_residualArray, nameArray, curveCache=None, firstBlock=True):
+    # Create Mualem-van Genuchten plots
 
     # Check what axis was chosen
     AxisChoice = common.getInputValue(outputFolder, 'Plot_axis')
+    swapAxes = plot_pool.checkAxisChoice(AxisChoice)
+
+    # K(h), theta(h) and K(theta) curves of all soils, calculated once and shared by all plots
+    if curveCache is None:
+        curveCache = CurveCache(WC_residualArray, WC_satArray, alpha_VGArray, n_VGArray, m_VGArray, K_satArray, l_MvGArray)
+
+    h = curveCache.pressures
+    k_hMatrix = curveCache.conductivity()
+    thetaHMatrix, KthetaMatrix = curveCache.thetaK()
 
-    # Define output folder for CSVs
-    outFolder = os.path.join(outputFolder, 'MVG')
-    if not os.path.exists(outFolder):
-        os.mkdir(outFolder)
+    with metrics.stage('write', len(nameArray)):
+        common.writeCurves(outputFolder, 'MVG', nameArray, h, k_hMatrix, 'Pressure_kPa', 'Ksat', append=not firstBlock)
 
-    ################################
-    ### Plot 0: individual plots ###
-    ################################
+    # Only the soils of the first block are plotted in the chunked mode
+    if not firstBlock:
+        return
+
+    soils = plot_pool.capSoils(range(0, len(nameArray)))
+    jobs = []
 
     # Plot 0: individual plots of K(h) on the y-axis and h on the x-axis
-    for i in range(0, len(nameArray)):
+    for i in soils:
         outName = 'MVG_' + str(nameArray[i]) + '.png'
-        outPath = os.path.join(outputFolder, outName)
         title = 'Mualem-Van Genuchten plot for ' + str(nameArray[i])
 
-        # h
-        h = np.linspace(0.0, 1500.0, 1501)
+        jobs.append(plot_pool.curveJob(os.path.join(outputFolder, outName), title,
+                                       [(h, k_hMatrix[i], str(nameArray[i]))], '- kPa', 'K(h)',
+                                       xscale='log', yscale='log', legend={}, swapAxes=swapAxes,
+                                       message='MVG plot created for soil ' + str(nameArray[i])))
 
-        # K(h)
-        k_h = calcKhfxn(h, K_satArray[i], alpha_VGArray[i], n_VGArray[i], m_VGArray[i], l_MvGArray[i])
-        
-        common.writeWCCSV(outFolder, nameArray[i], h, k_h, 'Pressure_kPa', 'Ksat')
-
-        if AxisChoice == 'Y-axis':
-            plt.plot(h, k_h, label=str(nameArray[i]))
-            plt.legend()
-            plt.yscale('log')
-            plt.xscale('log')
-            plt.title(title)
-            plt.xlabel('- kPa')
-            plt.ylabel('K(h)')
-            plt.savefig(outPath, transparent=False)
-            plt.close()
-            log.info('MVG plot created for soil ' + str(nameArray[i]))
-
-        elif AxisChoice == 'X-axis':
-            plt.plot(k_h, h, label=str(nameArray[i]))
-            plt.legend()
-            plt.xscale('log')
-            plt.yscale('log')
-            plt.title(title)
-            plt.ylabel('- kPa')
-            plt.xlabel('K(h)')
-            plt.savefig(outPath, transparent=False)
-            plt.close()
-            log.info('MVG plot created for soil ' + str(nameArray[i]))
-
-        else:
-            log.error('Invalid choice for axis plotting, please select Y-axis or X-axis')
-            sys.exit()
-
-    #########################################
-    ### Plot 1: one plot with all records ###
-    #########################################
+    title = 'Mualem-van Genuchten plots of ' + str(len(soils)) + ' soils'
+    legend = {'ncol': 2, 'fontsize': 12}
 
     # Plot 1: K(h) on the y-axis, h on the x-axis
-    outPath = os.path.join(outputFolder, 'plotMVG.png')
-    title = 'Mualem-van Genuchten plots of ' + str(len(nameArray)) + ' soils'
-
-    x = np.linspace(0.0, 1500.0, 1500)
-    labels = []
-    for i in range(0, len(nameArray)):
-        y = calcKhfxn(x, K_satArray[i], alpha_VGArray[i], n_VGArray[i], m_VGArray[i], l_MvGArray[i])
-        
-        if AxisChoice == 'Y-axis':
-            plt.plot(x, y, label=str(nameArray[i]))
-
-        elif AxisChoice == 'X-axis':
-            plt.plot(y, x, label=str(nameArray[i]))
-        
-        else:
-            log.error('Invalid choice for axis plotting, please select Y-axis or X-axis')
-            sys.exit()
-
-    if AxisChoice == 'Y-axis':
-        plt.yscale('log')
-        plt.xscale('log')
-        plt.title(title)
-        plt.ylabel('k(h)')
-        plt.xlabel('- kPa')
-        plt.legend(ncol=2, fontsize=12)
-        plt.xlim([1, 150000])
-        plt.savefig(outPath, transparent=False)
-        plt.close()
-        log.info('Plot created')
-
-    elif AxisChoice == 'X-axis':
-        plt.yscale('log')
-        plt.xscale('log')
-        plt.title(title)
-        plt.xlabel('k(h)')
-        plt.ylabel('- kPa')
-        plt.legend(ncol=2, fontsize=12)
-        plt.ylim([1, 150000])
-        plt.savefig(outPath, transparent=False)
-        plt.close()
-        log.info('Plot created')
-
-    else:
-        log.error('Invalid choice for axis plotting, please select Y-axis or X-axis')
-        sys.exit()
-        
-    #########################################
-    ### Plot 2: one plot with all records ###
-    #########################################
+    jobs.append(plot_pool.curveJob(os.path.join(outputFolder, 'plotMVG.png'), title,
+                                   [(h, k_hMatrix[i], str(nameArray[i])) for i in soils], '- kPa', 'k(h)',
+                                   xscale='log', yscale='log', xlim=[1, 150000], legend=legend,
+                                   swapAxes=swapAxes, message='Plot created'))
 
     # Plot 2: k(theta) vs theta(h)
-    outPath2 = os.path.join(outputFolder, 'plotMVG_Ktheta.png')
-    title = 'Mualem-van Genuchten plots of ' + str(len(nameArray)) + ' soils'
-
-    pressureVal = np.linspace(0.0, 1500.0, 1500)
-    for i in range(0, len(nameArray)):
-        thetaH, Ktheta = calcthetaHKfxn(pressureVal, WC_residualArray[i], WC_satArray[i], alpha_VGArray[i], n_VGArray[i], m_VGArray[i], K_satArray[i], l_MvGArray[i])          
-        
-        if AxisChoice == 'Y-axis':
-            plt.plot(thetaH, Ktheta, label=str(nameArray[i]))
-
-        elif AxisChoice == 'X-axis':
-            plt.plot(Ktheta, thetaH, label=str(nameArray[i]))
-
-        else:
-            log.error('Invalid choice for axis plotting, please select Y-axis or X-axis')
-            sys.exit()
-
-    if AxisChoice == 'Y-axis':
-        plt.title(title)
-        plt.yscale('log')
-        plt.ylabel('k(theta)')
-        plt.xlabel('theta(h)')
-        plt.legend(ncol=2, fontsize=12)
-        plt.xlim([0, 1])
-        plt.savefig(outPath2, transparent=False)
-        plt.close()
-        log.info('Plot created')
-
-    elif AxisChoice == 'X-axis':
-        plt.title(title)
-        plt.xscale('log')
-        plt.xlabel('k(theta)')
-        plt.ylabel('theta(h)')
-        plt.legend(ncol=2, fontsize=12)
-        plt.ylim([0, 1])
-        plt.savefig(outPath2, transparent=False)
-        plt.close()
-        log.info('Plot created')
-
-    else:
-        log.error('Invalid choice for axis plotting, please select Y-axis or X-axis')
-        sys.exit()
-
-    #########################################
-    ### Plot 3: one plot with all records ###
-    #########################################
+    jobs.append(plot_pool.curveJob(os.path.join(outputFolder, 'plotMVG_Ktheta.png'), title,
+                                   [(thetaHMatrix[i], KthetaMatrix[i], str(nameArray[i])) for i in soils], 'theta(h)', 'k(theta)',
+                                   yscale='log', xlim=[0, 1], legend=legend,
+                                   swapAxes=swapAxes, message='Plot created'))
 
     # Plot 3: k(theta) vs h
-    outPath3 = os.path.join(outputFolder, 'plotMVG_Ktheta_h.png')
-    title = 'Mualem-van Genuchten plots of ' + str(len(nameArray)) + ' soils'
-
-    pressureVal = np.linspace(1.0, 1500.0, 1500)
-    for i in range(0, len(nameArray)):
-        thetaH, Ktheta = calcthetaHKfxn(pressureVal, WC_residualArray[i], WC_satArray[i], alpha_VGArray[i], n_VGArray[i], m_VGArray[i], K_satArray[i], l_MvGArray[i])
-        
-        if AxisChoice == 'Y-axis':
-            plt.plot(pressureVal, Ktheta, label=str(nameArray[i]))
-
-        elif AxisChoice == 'X-axis':
-            plt.plot(Ktheta, pressureVal, label=str(nameArray[i]))
-
-        else:
-            log.error('Invalid choice for axis plotting, please select Y-axis or X-axis')
-            sys.exit()
-
-    if AxisChoice == 'Y-axis':
-        plt.title(title)
-        plt.yscale('log')
-        plt.xscale('log')
-        plt.ylabel('k(theta)')
-        plt.xlabel('h (- cm)')
-        plt.legend(ncol=2, fontsize=12)
-        plt.xlim([1, 150000])
-        plt.savefig(outPath3, transparent=False)
-        plt.close()
-        log.info('Plot created')
-
-    elif AxisChoice == 'X-axis':
-        plt.title(title)
-        plt.yscale('log')
-        plt.xscale('log')
-        plt.xlabel('k(theta)')
-        plt.ylabel('h (- cm)')
-        plt.legend(ncol=2, fontsize=12)
-        plt.ylim([1, 150000])
-        plt.savefig(outPath3, transparent=False)
-        plt.close()
-        log.info('Plot created')
-
-    else:
-        log.error('Invalid choice for axis plotting, please select Y-axis or X-axis')
-        sys.exit()
+    jobs.append(plot_pool.curveJob(os.path.join(outputFolder, 'plotMVG_Ktheta_h.png'), title,
+                                   [(h, KthetaMatrix[i], str(nameArray[i])) for i in soils], 'h (- cm)', 'k(theta)',
+                                   xscale='log', yscale='log', xlim=[1, 150000], legend=legend,
+                                   swapAxes=swapAxes, message='Plot created'))
+
+    plot_pool.renderPlots(jobs)
 
 
 def calcPressuresMVG(name, K_sat, alpha_VG, n_VG, m_VG, l_MvG, vgPressures):
 
     # Calculates K at user-input pressures
-    kValues = [name]
-
-    for pressure in vgPressures:
-        k_h = calcKhfxn(pressure, K_sat, alpha_VG, n_VG, m_VG, l_MvG)
-        kValues.append(k_h)
+    kValues = calcKhMatrix(vgPressures, K_sat, alpha_VG, n_VG, m_VG, l_MvG)[0]
 
-    return kValues
\ No newline at end of file
+    return [name] + list(kValues)
\ No newline at end of file
@@ -6,34 +6,141 @@ import sys
 import os
 import configuration
 import numpy as np
-import arcpy
 import math
 import NB_PTFs.lib.log as log
 import NB_PTFs.lib.common as common
 import NB_PTFs.lib.checks_PTFs as checks_PTFs
+import NB_PTFs.lib.validation as validation
+import NB_PTFs.lib.kernel_pool as kernel_pool
 from NB_PTFs.lib.external import six # Python 2/3 compatibility module
 
 from NB_PTFs.lib.refresh_modules import refresh_modules
-refresh_modules([log, common, checks_PTFs])
+refresh_modules([log, common, checks_PTFs, validation, kernel_pool])
 
-def Wosten_1999(outputShp, VGOption, carbonConFactor, carbContent, MVGChoice):
+# Kernels: calculate the VG parameters of all records in cols (sand, silt, clay, carbon, BD, CEC, pH) at once
 
-    # Arrays to write to shapefile    
-    warningArray = []
-    K_satArray = []
-    WC_satArray = []
-    WC_residualArray = []
-    alpha_VGArray = []
-    n_VGArray = []
-    m_VGArray = []
-    l_MvGArray = []
+def _Wosten_1999(c, VGOption, carbonConFactor):
+
+    sandPerc, siltPerc, clayPerc, carbPerc, BDg_cm3 = c['sand'], c['silt'], c['clay'], c['carbon'], c['BD']
+
+    # Topsoil (1) or subsoil (0)
+    top = 1.0 if VGOption == 'Wosten_1999_top' else 0.0
+
+    WC_residual = np.where((clayPerc < 18.0) & (sandPerc > 65.0), 0.025, 0.01)
+
+    K_sat = (10.0 / 24.0) * np.exp(7.755 + (0.0352 * siltPerc) + (0.93 * top) - (0.976 * BDg_cm3**2) - (0.000484 * clayPerc**2) - (0.000322 * siltPerc**2) + (0.001 * siltPerc**(-1)) - (0.0748 * (carbPerc*float(carbonConFactor))**(-1)) - (0.643 * np.log(siltPerc)) - (0.0139 * BDg_cm3 * clayPerc) - (0.167 * BDg_cm3 * carbPerc*float(carbonConFactor)) + (0.0298 * top * clayPerc) - (0.03305 * top * siltPerc))
+
+    WC_sat = 0.7919 + (0.001691 * clayPerc) - (0.29619 * BDg_cm3) - (0.000001491 * siltPerc**2) + (0.0000821 * ((carbPerc * float(carbonConFactor)))**2) + (0.02427 * clayPerc **(-1.0) + (0.01113 * siltPerc**(-1.0)) +  (0.01472 * np.log(siltPerc)) - 0.0000733 * ((carbPerc * float(carbonConFactor))) * clayPerc) - (0.000619 * BDg_cm3 * clayPerc) - (0.001183 * BDg_cm3 * (carbPerc * float(carbonConFactor))) - (0.0001664 * top * siltPerc)
+
+    # Wosten originally has alpha in cm-1
+    alpha_cm = np.exp(- 14.96 + (0.03135 * clayPerc) + (0.0351 * siltPerc) + (0.646 * (carbPerc * float(carbonConFactor))) + (15.29 * BDg_cm3) - (0.192 * top) - (4.671 * BDg_cm3 ** 2.0) - (0.000781 * clayPerc ** 2) - (0.00687 * (carbPerc * float(carbonConFactor)) ** 2.0) + (0.0449 * ((carbPerc * float(carbonConFactor)))**(-1.0)) + (0.0663 * np.log(siltPerc)) + (0.1482 * np.log((carbPerc * float(carbonConFactor)))) - (0.04546 * BDg_cm3 * siltPerc) - (0.4852 * BDg_cm3 * (carbPerc * float(carbonConFactor))) + (0.00673 * top * clayPerc))
+    alpha_VG = 10.0 * alpha_cm # Converted from cm-1 to kPa-1 for internal consistency
+
+    n_VG = 1.0 + np.exp(-25.23 - (0.02195 * clayPerc) + (0.0074 * siltPerc) - (0.1940 * (carbPerc * float(carbonConFactor))) + (45.5 * BDg_cm3) - (7.24 * BDg_cm3 ** 2.0) +  (0.0003658 * clayPerc **2.0) + (0.002885 * ((carbPerc * float(carbonConFactor)))**2.0) - (12.81 * (BDg_cm3)**(-1.0)) - (0.1524 * (siltPerc)**(-1.0)) - (0.01958 * ((carbPerc * float(carbonConFactor)))** (-1.0)) - (0.2876 * np.log(siltPerc)) - (0.0709 * np.log((carbPerc * float(carbonConFactor)))) - (44.6 * np.log(BDg_cm3)) - (0.02264 * BDg_cm3 * clayPerc) + (0.0896 * BDg_cm3 * (carbPerc * float(carbonConFactor))) + (0.00718 * top * clayPerc))
+    m_VG = 1.0 - (1.0 / n_VG)
+
+    l_MvG_norm = 0.0202 + (0.0006193 * clayPerc**2) - (0.001136 * (carbPerc*float(carbonConFactor))**2) - (0.2316 * np.log(carbPerc*float(carbonConFactor))) - (0.03544 * BDg_cm3 * clayPerc) + (0.00283 * BDg_cm3 * siltPerc) + (0.0488 * BDg_cm3 * (carbPerc * float(carbonConFactor)))
+    l_MvG =  10 * (np.exp(l_MvG_norm) - 1) / (np.exp(l_MvG_norm)+1)
+
+    return WC_residual, WC_sat, alpha_VG, n_VG, m_VG, l_MvG, K_sat
+
+def _Vereecken_1989(c, carbonConFactor):
+
+    sandPerc, clayPerc, carbPerc, BDg_cm3 = c['sand'], c['clay'], c['carbon'], c['BD']
+
+    WC_sat = 0.81 - (0.283 * BDg_cm3) + (0.001 * clayPerc)
+    WC_residual = 0.015 + (0.005 * clayPerc) + (0.014 * carbPerc*float(carbonConFactor))
+
+    # Vereecken et al. (1989) calculates alpha in cm-1
+    alpha_cm = np.exp(-2.486 + (0.025 * sandPerc) - (0.351 * carbPerc*float(carbonConFactor)) - (2.617 * BDg_cm3) - (0.023*clayPerc))
+    alpha_VG = 10.0 * alpha_cm # Converted from cm-1 to kPa-1
+
+    n_VG = np.exp(0.053 - (0.009 * sandPerc) - (0.013 * clayPerc) + (0.00015 * sandPerc**2))
+    m_VG = np.ones(len(sandPerc))
+
+    return WC_residual, WC_sat, alpha_VG, n_VG, m_VG
+
+def _ZachariasWessolek_2007(c):
+
+    sandPerc, clayPerc, BDg_cm3 = c['sand'], c['clay'], c['BD']
+
+    # Separate equations for soils with less and more than 66.5% sand
+    lowSand = sandPerc < 66.5
+
+    WC_residual = np.zeros(len(sandPerc))
+    WC_sat = np.where(lowSand, 0.788 + (0.001 * clayPerc) - (0.263 * BDg_cm3),
+                      0.89 - (0.001 * clayPerc) - (0.322 * BDg_cm3))
+
+    # Alpha in kPa-1
+    alpha_VG = np.where(lowSand, np.exp(-0.648 + (0.023 * sandPerc) + (0.044 * clayPerc) - (3.168 * BDg_cm3)),
+                        np.exp(- 4.197 + (0.013 * sandPerc) + (0.076 * clayPerc) - (0.276 * BDg_cm3)))
+
+    n_VG = np.where(lowSand, 1.392 - (0.418 * sandPerc**(-0.024)) + (1.212 * clayPerc**(-0.704)),
+                    - 2.562 + (7 * 10**(-9) * sandPerc**4.004) + (3.75 * clayPerc**(-0.016)))
+    m_VG = 1.0 - (1.0 / n_VG)
+
+    return WC_residual, WC_sat, alpha_VG, n_VG, m_VG
+
+def _Weynants_2009(c, carbonConFactor):
+
+    sandPerc, clayPerc, carbPerc, BDg_cm3 = c['sand'], c['clay'], c['carbon'], c['BD']
+
+    WC_residual = np.zeros(len(sandPerc))
+    WC_sat = 0.6355 + (0.0013 * clayPerc) - (0.1631 * BDg_cm3)
+
+    # Alpha in cm-1
+    alpha_cm = np.exp(- 4.3003 - (0.0097 * clayPerc) + (0.0138 * sandPerc) - (0.0992 * carbPerc*float(carbonConFactor)))
+    alpha_VG = 10.0 * alpha_cm # Convert to kPa-1
+
+    n_VG = np.exp(- 1.0846 - (0.0236 * clayPerc) - (0.0085 * sandPerc) + (0.0001 * sandPerc**2)) + 1
+    m_VG = 1.0 - (1.0 / n_VG)
+
+    l_MvG = - 1.8642 - (0.1317 * clayPerc) + (0.0067 * sandPerc)
+
+    K_sat = np.exp(1.9582 + (0.0308 * sandPerc) - (0.6142 * BDg_cm3) - (0.1566 * (carbPerc * float(carbonConFactor)))) * (10.0 / 24.0)
+
+    return WC_residual, WC_sat, alpha_VG, n_VG, m_VG, l_MvG, K_sat
+
+def _Dashtaki_2010(c):
+
+    sandPerc, clayPerc, BDg_cm3 = c['sand'], c['clay'], c['BD']
+
+    WC_residual = 0.034 + (0.0032 * clayPerc)
+    WC_sat = 0.85 - (0.00061 * sandPerc) - (0.258 * BDg_cm3)
+
+    # Alpha in cm-1
+    alpha_cm = np.abs(1/(- 476 - (4.1 * sandPerc) + (499 * BDg_cm3)))
+    alpha_VG = 10.0 * alpha_cm # Converted from cm-1 to kPa-1 for internal consistency
+
+    n_VG = 1.56 - (0.00228 * sandPerc)
+    m_VG = 1.0 - (1.0 / n_VG)
+
+    return WC_residual, WC_sat, alpha_VG, n_VG, m_VG
+
+def _HodnettTomasella_2002(c, carbonConFactor):
+
+    sandPerc, siltPerc, clayPerc, carbPerc, BDg_cm3, CECcmol_kg, pH = c['sand'], c['silt'], c['clay'], c['carbon'], c['BD'], c['CEC'], c['pH']
+
+    WC_sat = 0.81799 + (9.9 * 10**(-4) * clayPerc) - (0.3142 * BDg_cm3) + (1.8 * 10**(-4) * CECcmol_kg) + (0.00451 * pH) - (5 * 10**(-6) * sandPerc * clayPerc)
+    WC_residual = 0.22733 - (0.00164 * sandPerc) + (0.00235 * CECcmol_kg) - (0.00831 * pH) + (1.8 * 10**(-5) * clayPerc**2) + (2.6 * 10**(-5) * sandPerc * clayPerc)
+
+    # Original equation had values in kPa-1
+    # No internal conversion needed
+    alpha_VG = np.exp(- 0.02294 - (0.03526 * siltPerc) + (0.024 * carbPerc*float(carbonConFactor)) - (0.00076 * CECcmol_kg) - (0.11331 * pH) + (0.00019 * siltPerc**2))
+
+    n_VG = np.exp(0.62986 - (0.00833 * clayPerc) - (0.00529 * carbPerc*float(carbonConFactor)) + (0.00593 * pH) + (7 * 10**(-5) * clayPerc**2) - (1.4 * 10**(-4) * sandPerc * siltPerc))
+    m_VG = 1.0 - (1.0 / n_VG)
+
+    return WC_residual, WC_sat, alpha_VG, n_VG, m_VG
+
+def Wosten_1999(outputTable, VGOption, carbonConFactor, carbContent, MVGChoice):
 
     log.info("Calculating van Genuchten parameters using Wosten et al. (1999)")
 
     # Requirements: sand, silt, clay, OM, and BD
 
     # Get OID field
-    OIDField = common.getOIDField(outputShp)
+    OIDField = common.getOIDField(outputTable)
 
     if carbContent == 'OC':
         reqFields = [OIDField, "Sand", "Silt", "Clay", "OC", "BD", "soilname", "texture"]
@@ -42,124 +149,39 @@ def Wosten_1999(outputShp, VGOption, carbonConFactor, carbContent, MVGChoice):
         reqFields = [OIDField, "Sand", "Silt", "Clay", "OM", "BD", "soilname", "texture"]
         carbonConFactor = 1.0
 
-    checks_PTFs.checkInputFields(reqFields, outputShp)
+    checks_PTFs.checkInputFields(reqFields, outputTable)
 
     # Retrieve info from input
-    record = []
-    sandPerc = []
-    siltPerc = []
-    clayPerc = []
-    carbPerc = []
-    BDg_cm3 = []
-    nameArray = []
-    textureArray = []
-
-    with arcpy.da.SearchCursor(outputShp, reqFields) as searchCursor:
-        for row in searchCursor:
-            objectID = row[0]
-            sand = row[1]
-            silt = row[2]
-            clay = row[3]
-            carbon = row[4]
-            BD = row[5]
-            name = row[6]
-            texture = row[7]
-
-            record.append(objectID)
-            sandPerc.append(sand)
-            siltPerc.append(silt)
-            clayPerc.append(clay)
-            carbPerc.append(carbon)
-            BDg_cm3.append(BD)
-            nameArray.append(name)
-            textureArray.append(texture)
-
-    for x in range(0, len(record)):
-
-        # Data checks
-        warningFlag = checks_PTFs.checkSSC(sandPerc[x], siltPerc[x], clayPerc[x], record[x])
-        warningFlag = checks_PTFs.checkCarbon(carbPerc[x], carbContent, record[x])
-        warningFlag = checks_PTFs.checkValue("Bulk density", BDg_cm3[x], record[x])
-        warningArray.append(warningFlag)
-
-        # Calculate VG parameters                    
-        if clayPerc[x] < 18.0 and sandPerc[x] > 65.0:
-            WC_residual = 0.025
-        else:
-            WC_residual = 0.01
-
-        if VGOption == 'Wosten_1999_top':
-
-            K_sat = (10.0 / 24.0) * math.exp(7.755 + (0.0352 * siltPerc[x]) + (0.93 * 1) - (0.976 * BDg_cm3[x]**2) - (0.000484 * clayPerc[x]**2) - (0.000322 * siltPerc[x]**2) + (0.001 * siltPerc[x]**(-1)) - (0.0748 * (carbPerc[x]*float(carbonConFactor))**(-1)) - (0.643 * math.log(siltPerc[x])) - (0.0139 * BDg_cm3[x] * clayPerc[x]) - (0.167 * BDg_cm3[x] * carbPerc[x]*float(carbonConFactor)) + (0.0298 * 1 * clayPerc[x]) - (0.03305 * 1 * siltPerc[x]))
-
-            WC_sat = 0.7919 + (0.001691 * clayPerc[x]) - (0.29619 * BDg_cm3[x]) - (0.000001491 * siltPerc[x]**2) + (0.0000821 * ((carbPerc[x] * float(carbonConFactor)))**2) + (0.02427 * clayPerc[x] **(-1.0) + (0.01113 * siltPerc[x]**(-1.0)) +  (0.01472 * math.log(siltPerc[x])) - 0.0000733 * ((carbPerc[x] * float(carbonConFactor))) * clayPerc[x]) - (0.000619 * BDg_cm3[x] * clayPerc[x]) - (0.001183 * BDg_cm3[x] * (carbPerc[x] * float(carbonConFactor))) - (0.0001664 * 1.0 * siltPerc[x])
-                        
-            # Alpha with 10.0 multiplier (convert alpha in cm-1 to kPa-1)
-            alpha_cm = math.exp(- 14.96 + (0.03135 * clayPerc[x]) + (0.0351 * siltPerc[x]) + (0.646 * (carbPerc[x] * float(carbonConFactor))) + (15.29 * BDg_cm3[x]) - (0.192 * 1.0) - (4.671 * BDg_cm3[x] ** 2.0) - (0.000781 * clayPerc[x] ** 2) - (0.00687 * (carbPerc[x] * float(carbonConFactor)) ** 2.0) + (0.0449 * ((carbPerc[x] * float(carbonConFactor)))**(-1.0)) + (0.0663 * math.log(siltPerc[x])) + (0.1482 * math.log((carbPerc[x] * float(carbonConFactor)))) - (0.04546 * BDg_cm3[x] * siltPerc[x]) - (0.4852 * BDg_cm3[x] * (carbPerc[x] * float(carbonConFactor))) + (0.00673 * 1.0 * clayPerc[x]))
-            alpha_VG = 10.0 * alpha_cm # Converted from cm-1 to kPa-1 for internal consistency
-
-            n_VG = 1.0 + math.exp(-25.23 - (0.02195 * clayPerc[x]) + (0.0074 * siltPerc[x]) - (0.1940 * (carbPerc[x] * float(carbonConFactor))) + (45.5 * BDg_cm3[x]) - (7.24 * BDg_cm3[x] ** 2.0) +  (0.0003658 * clayPerc[x] **2.0) + (0.002885 * ((carbPerc[x] * float(carbonConFactor)))**2.0) - (12.81 * (BDg_cm3[x])**(-1.0)) - (0.1524 * (siltPerc[x])**(-1.0)) - (0.01958 * ((carbPerc[x] * float(carbonConFactor)))** (-1.0)) - (0.2876 * math.log(siltPerc[x])) - (0.0709 * math.log((carbPerc[x] * float(carbonConFactor)))) - (44.6 * math.log(BDg_cm3[x])) - (0.02264 * BDg_cm3[x] * clayPerc[x]) + (0.0896 * BDg_cm3[x] * (carbPerc[x] * float(carbonConFactor))) + (0.00718 * 1.0 * clayPerc[x]))
-            m_VG = 1.0 - (1.0 / float(n_VG))
-
-            l_MvG_norm = 0.0202 + (0.0006193 * clayPerc[x]**2) - (0.001136 * (carbPerc[x]*float(carbonConFactor))**2) - (0.2316 * math.log(carbPerc[x]*float(carbonConFactor))) - (0.03544 * BDg_cm3[x] * clayPerc[x]) + (0.00283 * BDg_cm3[x] * siltPerc[x]) + (0.0488 * BDg_cm3[x] * (carbPerc[x] * float(carbonConFactor)))
-            l_MvG =  10 * (math.exp(l_MvG_norm) - 1) / (math.exp(l_MvG_norm)+1)
-
-        elif VGOption == 'Wosten_1999_sub':
-
-            K_sat = (10.0 / 24.0) * math.exp(7.755 + (0.0352 * siltPerc[x]) + (0.93 * 0) - (0.976 * BDg_cm3[x]**2) - (0.000484 * clayPerc[x]**2) - (0.000322 * siltPerc[x]**2) + (0.001 * siltPerc[x]**(-1)) - (0.0748 * (carbPerc[x]*float(carbonConFactor))**(-1)) - (0.643 * math.log(siltPerc[x])) - (0.0139 * BDg_cm3[x] * clayPerc[x]) - (0.167 * BDg_cm3[x] * carbPerc[x]*float(carbonConFactor)) + (0.0298 * 0* clayPerc[x]) - (0.03305 * 0 * siltPerc[x]))
-
-            WC_sat = 0.7919 + (0.001691 * clayPerc[x]) - (0.29619 * BDg_cm3[x]) - (0.000001491 * siltPerc[x]**2) + (0.0000821 * ((carbPerc[x] * float(carbonConFactor)))**2) + (0.02427 * clayPerc[x] **(-1.0) + (0.01113 * siltPerc[x]**(-1.0)) +  (0.01472 * math.log(siltPerc[x])) - 0.0000733 * ((carbPerc[x] * float(carbonConFactor))) * clayPerc[x]) - (0.000619 * BDg_cm3[x] * clayPerc[x]) - (0.001183 * BDg_cm3[x] * (carbPerc[x] * float(carbonConFactor))) - (0.0001664 * 0.0 * siltPerc[x])
-            
-            # Wosten originally has alpha in cm-1
-            alpha_cm = math.exp(- 14.96 + (0.03135 * clayPerc[x]) + (0.0351 * siltPerc[x]) + (0.646 * (carbPerc[x] * float(carbonConFactor))) + (15.29 * BDg_cm3[x]) - (0.192 * 0.0) - (4.671 * BDg_cm3[x] ** 2.0) - (0.000781 * clayPerc[x] ** 2) - (0.00687 * (carbPerc[x] * float(carbonConFactor)) ** 2.0) + (0.0449 * ((carbPerc[x] * float(carbonConFactor)))**(-1.0)) + (0.0663 * math.log(siltPerc[x])) + (0.1482 * math.log((carbPerc[x] * float(carbonConFactor)))) - (0.04546 * BDg_cm3[x] * siltPerc[x]) - (0.4852 * BDg_cm3[x] * (carbPerc[x] * float(carbonConFactor))) + (0.00673 * 0.0 * clayPerc[x]))
-            alpha_VG = 10.0 * alpha_cm # Converted from cm-1 to kPa-1 for internal consistency
-            
-            n_VG = 1.0 + math.exp(-25.23 - (0.02195 * clayPerc[x]) + (0.0074 * siltPerc[x]) - (0.1940 * (carbPerc[x] * float(carbonConFactor))) + (45.5 * BDg_cm3[x]) - (7.24 * BDg_cm3[x] ** 2.0) +  (0.0003658 * clayPerc[x] **2.0) + (0.002885 * ((carbPerc[x] * float(carbonConFactor)))**2.0) - (12.81 * (BDg_cm3[x])**(-1.0)) - (0.1524 * (siltPerc[x])**(-1.0)) - (0.01958 * ((carbPerc[x] * float(carbonConFactor)))** (-1.0)) - (0.2876 * math.log(siltPerc[x])) - (0.0709 * math.log((carbPerc[x] * float(carbonConFactor)))) - (44.6 * math.log(BDg_cm3[x])) - (0.02264 * BDg_cm3[x] * clayPerc[x]) + (0.0896 * BDg_cm3[x] * (carbPerc[x] * float(carbonConFactor))) + (0.00718 * 0.0 * clayPerc[x]))
-            m_VG = 1.0 - (1.0 / float(n_VG))
-
-            l_MvG_norm = 0.0202 + (0.0006193 * clayPerc[x]**2) - (0.001136 * (carbPerc[x]*float(carbonConFactor))**2) - (0.2316 * math.log(carbPerc[x]*float(carbonConFactor))) - (0.03544 * BDg_cm3[x] * clayPerc[x]) + (0.00283 * BDg_cm3[x] * siltPerc[x]) + (0.0488 * BDg_cm3[x] * (carbPerc[x] * float(carbonConFactor)))
-            l_MvG =  10 * (math.exp(l_MvG_norm) - 1) / (math.exp(l_MvG_norm)+1)
-
-        WC_satArray.append(WC_sat)
-        WC_residualArray.append(WC_residual)
-        alpha_VGArray.append(alpha_VG)
-        n_VGArray.append(n_VG)
-        m_VGArray.append(m_VG)
-        l_MvGArray.append(l_MvG)
-        
-        K_satArray.append(K_sat)
-            
-    # Write K_sat and warning results to output shapefile
-    arcpy.AddField_management(outputShp, "warning", "TEXT")
-    arcpy.AddField_management(outputShp, "K_sat", "DOUBLE", 10, 6)
+    record, sandPerc, siltPerc, clayPerc, carbPerc, BDg_cm3, nameArray, textureArray = outputTable.readColumns(reqFields)
 
-    outputFields = ["warning", "K_sat"]
-    
-    recordNum = 0
-    with arcpy.da.UpdateCursor(outputShp, outputFields) as cursor:
-        for row in cursor:
-            row[0] = warningArray[recordNum]
-            row[1] = K_satArray[recordNum]
+    # Data checks for all records at once
+    validator = validation.Validator(record)
+    validator.checkSSC(sandPerc, siltPerc, clayPerc)
+    validator.checkCarbon(carbPerc, carbContent)
+    validator.checkValue("Bulk density", BDg_cm3)
+    warningArray = validator.warnings()
 
-            cursor.updateRow(row)
-            recordNum += 1
+    # Calculate VG parameters for all records at once (in record blocks over kernelWorkers processes)
+    cols = {'sand': sandPerc, 'silt': siltPerc, 'clay': clayPerc, 'carbon': carbPerc, 'BD': BDg_cm3}
+    results = kernel_pool.runKernel(_Wosten_1999, cols, (VGOption, carbonConFactor))
 
-    return WC_residualArray, WC_satArray, alpha_VGArray, n_VGArray, m_VGArray, l_MvGArray, K_satArray
+    # Records outside the domain of the equations (e.g. a log of zero) get NaN for all results
+    WC_residualArray, WC_satArray, alpha_VGArray, n_VGArray, m_VGArray, l_MvGArray, K_satArray = validator.checkResults(results)
 
-def Vereecken_1989(outputShp, VGOption, carbonConFactor, carbContent):
+    validator.summarise()
 
-    # Arrays to write to shapefile    
-    warningArray = []
-    WC_satArray = []
-    WC_residualArray = []
-    alpha_VGArray = []
-    n_VGArray = []
-    m_VGArray = []
+    # Write K_sat and warning results to output shapefile
+    outputFields = ["warning", "K_sat"]
+    outputTable.writeColumns(outputFields, [warningArray, K_satArray])
+
+    return WC_residualArray, WC_satArray, alpha_VGArray, n_VGArray, m_VGArray, l_MvGArray, K_satArray
+
+def Vereecken_1989(outputTable, VGOption, carbonConFactor, carbContent):
 
     log.info("Calculating van Genuchten parameters using Vereecken et al. (1989)")
 
     # Get OID field
-    OIDField = common.getOIDField(outputShp)
+    OIDField = common.getOIDField(outputTable)
 
     if carbContent == 'OC':
         reqFields = [OIDField, "Sand", "Clay", "OC", "BD", "soilname", "texture"]                    
@@ -168,163 +190,74 @@ def Vereecken_1989(outputShp, VGOption, carbonConFactor, carbContent):
     elif carbContent == 'OM':
         reqFields = [OIDField, "Sand", "Clay", "OM", "BD", "soilname", "texture"]
         
-    checks_PTFs.checkInputFields(reqFields, outputShp)
+    checks_PTFs.checkInputFields(reqFields, outputTable)
 
     # Retrieve info from input
-    record = []
-    sandPerc = []
-    clayPerc = []
-    carbPerc = []
-    BDg_cm3 = []
-    nameArray = []
-    textureArray = []
-
-    with arcpy.da.SearchCursor(outputShp, reqFields) as searchCursor:
-        for row in searchCursor:
-            objectID = row[0]
-            sand = row[1]
-            clay = row[2]
-            carbon = row[3]
-            BD = row[4]
-            name = row[5]
-            texture = row[6]
-
-            record.append(objectID)
-            sandPerc.append(sand)
-            clayPerc.append(clay)
-            carbPerc.append(carbon)
-            BDg_cm3.append(BD)
-            nameArray.append(name)
-            textureArray.append(texture)
-
-    for x in range(0, len(record)):
-
-        # Data checks
-        warningFlag = checks_PTFs.checkCarbon(carbPerc[x], carbContent, record[x])
-        warningFlag = checks_PTFs.checkValue("Sand", sandPerc[x], record[x])
-        warningFlag = checks_PTFs.checkValue("Clay", clayPerc[x], record[x])
-        warningFlag = checks_PTFs.checkValue("Bulk density", BDg_cm3[x], record[x])
-        warningArray.append(warningFlag)
-
-        WC_sat = 0.81 - (0.283 * BDg_cm3[x]) + (0.001 * clayPerc[x])
-        WC_residual = 0.015 + (0.005 * clayPerc[x]) + (0.014 * carbPerc[x]*float(carbonConFactor))
-        
-        # Vereecken et al. (1989) calculates alpha in cm-1
-        alpha_cm = math.exp(-2.486 + (0.025 * sandPerc[x]) - (0.351 * carbPerc[x]*float(carbonConFactor)) - (2.617 * BDg_cm3[x]) - (0.023*clayPerc[x]))
-        alpha_VG = 10.0 * alpha_cm # Converted from cm-1 to kPa-1
+    record, sandPerc, clayPerc, carbPerc, BDg_cm3, nameArray, textureArray = outputTable.readColumns(reqFields)
 
-        n_VG = math.exp(0.053 - (0.009 * sandPerc[x]) - (0.013 * clayPerc[x]) + (0.00015 * sandPerc[x]**2))
-        m_VG = 1.0
+    # Data checks for all records at once
+    validator = validation.Validator(record)
+    validator.checkCarbon(carbPerc, carbContent)
+    validator.checkValue("Sand", sandPerc)
+    validator.checkValue("Clay", clayPerc)
+    validator.checkValue("Bulk density", BDg_cm3)
+    warningArray = validator.warnings()
 
-        WC_satArray.append(WC_sat)
-        WC_residualArray.append(WC_residual)
-        alpha_VGArray.append(alpha_VG)
-        n_VGArray.append(n_VG)
-        m_VGArray.append(m_VG)
+    # Calculate VG parameters for all records at once (in record blocks over kernelWorkers processes)
+    cols = {'sand': sandPerc, 'clay': clayPerc, 'carbon': carbPerc, 'BD': BDg_cm3}
+    results = kernel_pool.runKernel(_Vereecken_1989, cols, (carbonConFactor,))
 
-    common.writeWarning(outputShp, warningArray)
+    # Records outside the domain of the equations (e.g. a log of zero) get NaN for all results
+    WC_residualArray, WC_satArray, alpha_VGArray, n_VGArray, m_VGArray = validator.checkResults(results)
 
-    return WC_residualArray, WC_satArray, alpha_VGArray, n_VGArray, m_VGArray
+    validator.summarise()
 
-def ZachariasWessolek_2007(outputShp, VGOption, carbonConFactor, carbContent):
+    common.writeWarning(outputTable, warningArray)
+
+    return WC_residualArray, WC_satArray, alpha_VGArray, n_VGArray, m_VGArray
 
-    # Arrays to write to shapefile    
-    warningArray = []
-    WC_satArray = []
-    WC_residualArray = []
-    alpha_VGArray = []
-    n_VGArray = []
-    m_VGArray = []
+def ZachariasWessolek_2007(outputTable, VGOption, carbonConFactor, carbContent):
 
     log.info("Calculating van Genuchten parameters using Zacharias and Wessolek (2007)")
 
     # Get OID field
-    OIDField = common.getOIDField(outputShp)
+    OIDField = common.getOIDField(outputTable)
 
     # Requirements: Sand, clay, and BD
     reqFields = [OIDField, "Sand", "Clay", "BD", "soilname", "texture"]
-    checks_PTFs.checkInputFields(reqFields, outputShp)
+    checks_PTFs.checkInputFields(reqFields, outputTable)
 
     # Retrieve info from input
-    record = []
-    sandPerc = []
-    clayPerc = []
-    BDg_cm3 = []
-    nameArray = []
-    textureArray = []
-
-    with arcpy.da.SearchCursor(outputShp, reqFields) as searchCursor:
-        for row in searchCursor:
-            objectID = row[0]
-            sand = row[1]
-            clay = row[2]                        
-            BD = row[3]
-            name = row[4]
-            texture = row[5]
-
-            record.append(objectID)
-            sandPerc.append(sand)
-            clayPerc.append(clay)
-            BDg_cm3.append(BD)
-            nameArray.append(name)
-            textureArray.append(texture)
-
-    for x in range(0, len(record)):
-
-        # Data checks
-        warningFlag = checks_PTFs.checkValue("Sand", sandPerc[x], record[x])
-        warningFlag = checks_PTFs.checkValue("Clay", clayPerc[x], record[x])
-        warningFlag = checks_PTFs.checkValue("Bulk density", BDg_cm3[x], record[x])
-        warningArray.append(warningFlag)
-
-        if sandPerc[x] < 66.5:
-            WC_residual = 0
-            WC_sat = 0.788 + (0.001 * clayPerc[x]) - (0.263 * BDg_cm3[x])
-            
-            # Alpha in kPa-1
-            alpha_VG = math.exp(-0.648 + (0.023 * sandPerc[x]) + (0.044 * clayPerc[x]) - (3.168 * BDg_cm3[x]))
-            
-            n_VG = 1.392 - (0.418 * sandPerc[x]**(-0.024)) + (1.212 * clayPerc[x]**(-0.704))
-            m_VG = 1.0 - (1.0 / float(n_VG))
-
-        else:
-            WC_residual = 0 
-            WC_sat = 0.89 - (0.001 * clayPerc[x]) - (0.322 * BDg_cm3[x])
-            
-            # Alpha in kPa-1
-            alpha_VG = math.exp(- 4.197 + (0.013 * sandPerc[x]) + (0.076 * clayPerc[x]) - (0.276 * BDg_cm3[x]))
-            
-            n_VG = - 2.562 + (7 * 10**(-9) * sandPerc[x]**4.004) + (3.75 * clayPerc[x]**(-0.016))
-            m_VG = 1.0 - (1.0 / float(n_VG))
-
-        WC_satArray.append(WC_sat)
-        WC_residualArray.append(WC_residual)
-        alpha_VGArray.append(alpha_VG)
-        n_VGArray.append(n_VG)
-        m_VGArray.append(m_VG)
-
-    common.writeWarning(outputShp, warningArray)
+    record, sandPerc, clayPerc, BDg_cm3, nameArray, textureArray = outputTable.readColumns(reqFields)
 
-    return WC_residualArray, WC_satArray, alpha_VGArray, n_VGArray, m_VGArray
+    # Data checks for all records at once
+    validator = validation.Validator(record)
+    validator.checkValue("Sand", sandPerc)
+    validator.checkValue("Clay", clayPerc)
+    validator.checkValue("Bulk density", BDg_cm3)
+    warningArray = validator.warnings()
+
+    # Calculate VG parameters for all records at once (in record blocks over kernelWorkers processes)
+    cols = {'sand': sandPerc, 'clay': clayPerc, 'BD': BDg_cm3}
+    results = kernel_pool.runKernel(_ZachariasWessolek_2007, cols)
+
+    # Records outside the domain of the equations (e.g. a log of zero) get NaN for all results
+    WC_residualArray, WC_satArray, alpha_VGArray, n_VGArray, m_VGArray = validator.checkResults(results)
+
+    validator.summarise()
+
+    common.writeWarning(outputTable, warningArray)
 
-def Weynants_2009(outputShp, VGOption, carbonConFactor, carbContent, MVGChoice):
+    return WC_residualArray, WC_satArray, alpha_VGArray, n_VGArray, m_VGArray
 
-    # Arrays to write to shapefile    
-    warningArray = []
-    K_satArray = []
-    WC_satArray = []
-    WC_residualArray = []
-    alpha_VGArray = []
-    n_VGArray = []
-    m_VGArray = []
-    l_MvGArray = []
+def Weynants_2009(outputTable, VGOption, carbonConFactor, carbContent, MVGChoice):
 
     log.info("Calculating van Genuchten parameters using Weynants et al. (2009)")
 
     # Requirements: sand, clay, OC, and BD
 
     # Get OID field
-    OIDField = common.getOIDField(outputShp)
+    OIDField = common.getOIDField(outputTable)
 
     if carbContent == 'OC':
         reqFields = [OIDField, "Sand", "Clay", "OC", "BD", "soilname", "texture"]
@@ -333,160 +266,75 @@ def Weynants_2009(outputShp, VGOption, carbonConFactor, carbContent, MVGChoice):
     elif carbContent == 'OM':
         reqFields = [OIDField, "Sand", "Clay", "OM", "BD", "soilname", "texture"]
         
-    checks_PTFs.checkInputFields(reqFields, outputShp)
+    checks_PTFs.checkInputFields(reqFields, outputTable)
 
     # Retrieve info from input
-    record = []
-    sandPerc = []
-    clayPerc = []
-    carbPerc = []
-    BDg_cm3 = []
-    nameArray = []
-    textureArray = []
-
-    with arcpy.da.SearchCursor(outputShp, reqFields) as searchCursor:
-        for row in searchCursor:
-            objectID = row[0]
-            sand = row[1]
-            clay = row[2]
-            carbon = row[3]
-            BD = row[4]
-            name = row[5]
-            texture = row[6]
-
-            record.append(objectID)
-            sandPerc.append(sand)
-            clayPerc.append(clay)
-            carbPerc.append(carbon)
-            BDg_cm3.append(BD)
-            nameArray.append(name)
-            textureArray.append(texture)
-
-    for x in range(0, len(record)):
-
-        # Data checks
-        warningFlag = checks_PTFs.checkCarbon(carbPerc[x], carbContent, record[x])
-        warningFlag = checks_PTFs.checkValue("Sand", sandPerc[x], record[x])
-        warningFlag = checks_PTFs.checkValue("Clay", clayPerc[x], record[x])
-        warningFlag = checks_PTFs.checkValue("Bulk density", BDg_cm3[x], record[x])
-        warningArray.append(warningFlag)
-
-        WC_residual = 0
-        WC_sat = 0.6355 + (0.0013 * clayPerc[x]) - (0.1631 * BDg_cm3[x])
-        
-        # Alpha in cm-1
-        alpha_cm = math.exp(- 4.3003 - (0.0097 * clayPerc[x]) + (0.0138 * sandPerc[x]) - (0.0992 * carbPerc[x]*float(carbonConFactor)))
-        alpha_VG = 10.0 * alpha_cm # Convert to kPa-1
+    record, sandPerc, clayPerc, carbPerc, BDg_cm3, nameArray, textureArray = outputTable.readColumns(reqFields)
 
-        n_VG = math.exp(- 1.0846 - (0.0236 * clayPerc[x]) - (0.0085 * sandPerc[x]) + (0.0001 * sandPerc[x]**2)) + 1 
-        m_VG = 1.0 - (1.0 / float(n_VG))
+    # Data checks for all records at once
+    validator = validation.Validator(record)
+    validator.checkCarbon(carbPerc, carbContent)
+    validator.checkValue("Sand", sandPerc)
+    validator.checkValue("Clay", clayPerc)
+    validator.checkValue("Bulk density", BDg_cm3)
+    warningArray = validator.warnings()
 
-        l_MvG = - 1.8642 - (0.1317 * clayPerc[x]) + (0.0067 * sandPerc[x])
+    # Calculate VG parameters for all records at once (in record blocks over kernelWorkers processes)
+    cols = {'sand': sandPerc, 'clay': clayPerc, 'carbon': carbPerc, 'BD': BDg_cm3}
+    results = kernel_pool.runKernel(_Weynants_2009, cols, (carbonConFactor,))
 
-        K_sat = math.exp(1.9582 + (0.0308 * sandPerc[x]) - (0.6142 * BDg_cm3[x]) - (0.1566 * (carbPerc[x] * float(carbonConFactor)))) * (10.0 / 24.0)
+    # Records outside the domain of the equations (e.g. a log of zero) get NaN for all results
+    WC_residualArray, WC_satArray, alpha_VGArray, n_VGArray, m_VGArray, l_MvGArray, K_satArray = validator.checkResults(results)
 
-        WC_satArray.append(WC_sat)
-        WC_residualArray.append(WC_residual)
-        alpha_VGArray.append(alpha_VG)
-        n_VGArray.append(n_VG)
-        m_VGArray.append(m_VG)
-        l_MvGArray.append(l_MvG)
-        K_satArray.append(K_sat)
+    validator.summarise()
 
-    common.writeWarning(outputShp, warningArray)
+    common.writeWarning(outputTable, warningArray)
 
     return WC_residualArray, WC_satArray, alpha_VGArray, n_VGArray, m_VGArray, l_MvGArray, K_satArray
 
-def Dashtaki_2010(outputShp, VGOption, carbonConFactor, carbContent):
-
-    # Arrays to write to shapefile    
-    warningArray = []
-    K_satArray = []
-    WC_satArray = []
-    WC_residualArray = []
-    alpha_VGArray = []
-    n_VGArray = []
-    m_VGArray = []
+def Dashtaki_2010(outputTable, VGOption, carbonConFactor, carbContent):
 
     log.info("Calculating van Genuchten parameters using Dashtaki et al. (2010)")
 
     # Requirements: Sand, clay, and BD
 
     # Get OID field
-    OIDField = common.getOIDField(outputShp)
+    OIDField = common.getOIDField(outputTable)
 
     reqFields = [OIDField, "Sand", "Clay", "BD", "soilname", "texture"]
-    checks_PTFs.checkInputFields(reqFields, outputShp)
+    checks_PTFs.checkInputFields(reqFields, outputTable)
 
     # Retrieve info from input
-    record = []
-    sandPerc = []
-    clayPerc = []
-    BDg_cm3 = []
-    nameArray = []
-    textureArray = []
-
-    with arcpy.da.SearchCursor(outputShp, reqFields) as searchCursor:
-        for row in searchCursor:
-            objectID = row[0]
-            sand = row[1]
-            clay = row[2]
-            BD = row[3]
-            name = row[4]
-            texture = row[5]
-
-            record.append(objectID)
-            sandPerc.append(sand)
-            clayPerc.append(clay)
-            BDg_cm3.append(BD)
-            nameArray.append(name)
-            textureArray.append(texture)
-
-    for x in range(0, len(record)):
-
-        # Data checks
-        warningFlag = checks_PTFs.checkValue("Sand", sandPerc[x], record[x])
-        warningFlag = checks_PTFs.checkValue("Clay", clayPerc[x], record[x])
-        warningFlag = checks_PTFs.checkValue("Bulk density", BDg_cm3[x], record[x])
-        warningArray.append(warningFlag)
-
-        # Calculate water content using Dashtaki et al. (2010) - Sand, Clay, BD
-        WC_residual = 0.034 + (0.0032 * clayPerc[x])
-        WC_sat = 0.85 - (0.00061 * sandPerc[x]) - (0.258 * BDg_cm3[x])
-        
-        # Alpha in cm-1
-        alpha_cm = abs(1/(- 476 - (4.1 * sandPerc[x]) + (499 * BDg_cm3[x])))
-        alpha_VG = 10.0 * alpha_cm # Converted from cm-1 to kPa-1 for internal consistency
-        
-        n_VG = 1.56 - (0.00228 * sandPerc[x])
-        m_VG = 1.0 - (1.0 / float(n_VG))
+    record, sandPerc, clayPerc, BDg_cm3, nameArray, textureArray = outputTable.readColumns(reqFields)
 
-        WC_satArray.append(WC_sat)
-        WC_residualArray.append(WC_residual)
-        alpha_VGArray.append(alpha_VG)
-        n_VGArray.append(n_VG)
-        m_VGArray.append(m_VG)
+    # Data checks for all records at once
+    validator = validation.Validator(record)
+    validator.checkValue("Sand", sandPerc)
+    validator.checkValue("Clay", clayPerc)
+    validator.checkValue("Bulk density", BDg_cm3)
+    warningArray = validator.warnings()
 
-    common.writeWarning(outputShp, warningArray)
+    # Calculate VG parameters for all records at once (in record blocks over kernelWorkers processes)
+    cols = {'sand': sandPerc, 'clay': clayPerc, 'BD': BDg_cm3}
+    results = kernel_pool.runKernel(_Dashtaki_2010, cols)
 
-    return WC_residualArray, WC_satArray, alpha_VGArray, n_VGArray, m_VGArray
+    # Records outside the domain of the equations (e.g. a log of zero) get NaN for all results
+    WC_residualArray, WC_satArray, alpha_VGArray, n_VGArray, m_VGArray = validator.checkResults(results)
+
+    validator.summarise()
 
-def HodnettTomasella_2002(outputShp, VGOption, carbonConFactor, carbContent):
+    common.writeWarning(outputTable, warningArray)
 
-    # Arrays to write to shapefile    
-    warningArray = []
-    WC_satArray = []
-    WC_residualArray = []
-    alpha_VGArray = []
-    n_VGArray = []
-    m_VGArray = []
+    return WC_residualArray, WC_satArray, alpha_VGArray, n_VGArray, m_VGArray
+
+def HodnettTomasella_2002(outputTable, VGOption, carbonConFactor, carbContent):
 
     log.info("Calculating van Genuchten parameters using Hodnett and Tomasella (2002)")
 
     # Requirements: Sand, Silt, Clay, OC, BD, CEC, pH
     
     # Get OID field
-    OIDField = common.getOIDField(outputShp)
+    OIDField = common.getOIDField(outputTable)
 
     if carbContent == 'OC':
         reqFields = [OIDField, "Sand", "Silt", "Clay", "OC", "BD", "CEC", "pH", "soilname", "texture"]
@@ -495,70 +343,29 @@ def HodnettTomasella_2002(outputShp, VGOption, carbonConFactor, carbContent):
     elif carbContent == 'OM':
         reqFields = [OIDField, "Sand", "Silt", "Clay", "OC", "BD", "CEC", "pH", "soilname", "texture"]
         
-    checks_PTFs.checkInputFields(reqFields, outputShp)
+    checks_PTFs.checkInputFields(reqFields, outputTable)
 
     # Retrieve info from input
-    record = []
-    sandPerc = []
-    siltPerc = []
-    clayPerc = []
-    carbPerc = []
-    BDg_cm3 = []
-    CECcmol_kg = []
-    pH = []
-    nameArray = []
-    textureArray = []
-
-    with arcpy.da.SearchCursor(outputShp, reqFields) as searchCursor:
-        for row in searchCursor:
-            objectID = row[0]
-            sand = row[1]
-            silt = row[2]
-            clay = row[3]  
-            carbon = row[4]                      
-            BD = row[5]
-            CEC = row[6]
-            pHValue = row[7]
-            name = row[8]
-            texture = row[9]
-
-            record.append(objectID)
-            sandPerc.append(sand)
-            siltPerc.append(silt)
-            clayPerc.append(clay)
-            carbPerc.append(carbon)
-            BDg_cm3.append(BD)
-            CECcmol_kg.append(CEC)
-            pH.append(pHValue)
-            nameArray.append(name)
-            textureArray.append(texture)
-
-    for x in range(0, len(record)):
-
-        # Data checks
-        warningFlag = checks_PTFs.checkSSC(sandPerc[x], siltPerc[x], clayPerc[x], record[x])
-        warningFlag = checks_PTFs.checkCarbon(carbPerc[x], carbContent, record[x])
-        warningFlag = checks_PTFs.checkValue("Bulk density", BDg_cm3[x], record[x])
-        warningFlag = checks_PTFs.checkValue("CEC", CECcmol_kg[x], record[x])
-        warningFlag = checks_PTFs.checkValue("pH", pH[x], record[x])
-        warningArray.append(warningFlag)
-
-        WC_sat = 0.81799 + (9.9 * 10**(-4) * clayPerc[x]) - (0.3142 * BDg_cm3[x]) + (1.8 * 10**(-4) * CECcmol_kg[x]) + (0.00451 * pH[x]) - (5 * 10**(-6) * sandPerc[x] * clayPerc[x])
-        WC_residual = 0.22733 - (0.00164 * sandPerc[x]) + (0.00235 * CECcmol_kg[x]) - (0.00831 * pH[x]) + (1.8 * 10**(-5) * clayPerc[x]**2) + (2.6 * 10**(-5) * sandPerc[x] * clayPerc[x])
-        
-        # Original equation had values in kPa-1
-        # No internal conversion needed
-        alpha_VG = math.exp(- 0.02294 - (0.03526 * siltPerc[x]) + (0.024 * carbPerc[x]*float(carbonConFactor)) - (0.00076 * CECcmol_kg[x]) - (0.11331 * pH[x]) + (0.00019 * siltPerc[x]**2))                    
-        
-        n_VG = math.exp(0.62986 - (0.00833 * clayPerc[x]) - (0.00529 * carbPerc[x]*float(carbonConFactor)) + (0.00593 * pH[x]) + (7 * 10**(-5) * clayPerc[x]**2) - (1.4 * 10**(-4) * sandPerc[x] * siltPerc[x]))
-        m_VG = 1.0 - (1.0 / float(n_VG))
+    record, sandPerc, siltPerc, clayPerc, carbPerc, BDg_cm3, CECcmol_kg, pH, nameArray, textureArray = outputTable.readColumns(reqFields)
+
+    # Data checks for all records at once
+    validator = validation.Validator(record)
+    validator.checkSSC(sandPerc, siltPerc, clayPerc)
+    validator.checkCarbon(carbPerc, carbContent)
+    validator.checkValue("Bulk density", BDg_cm3)
+    validator.checkValue("CEC", CECcmol_kg)
+    validator.checkValue("pH", pH)
+    warningArray = validator.warnings()
+
+    # Calculate VG parameters for all records at once (in record blocks over kernelWorkers processes)
+    cols = {'sand': sandPerc, 'silt': siltPerc, 'clay': clayPerc, 'carbon': carbPerc, 'BD': BDg_cm3, 'CEC': CECcmol_kg, 'pH': pH}
+    results = kernel_pool.runKernel(_HodnettTomasella_2002, cols, (carbonConFactor,))
+
+    # Records outside the domain of the equations (e.g. a log of zero) get NaN for all results
+    WC_residualArray, WC_satArray, alpha_VGArray, n_VGArray, m_VGArray = validator.checkResults(results)
 
-        WC_satArray.append(WC_sat)
-        WC_residualArray.append(WC_residual)
-        alpha_VGArray.append(alpha_VG)
-        n_VGArray.append(n_VG)
-        m_VGArray.append(m_VG)
+    validator.summarise()
 
-    common.writeWarning(outputShp, warningArray)
+    common.writeWarning(outputTable, warningArray)
 
     return WC_residualArray, WC_satArray, alpha_VGArray, n_VGArray, m_VGArray
@@ -0,0 +1,241 @@
+'''
+vg_fit: fits van Genuchten parameters to the water contents of point-PTFs
+
+theta_r, theta_s, alpha and n (with m = 1 - 1/n) are fitted for all soils at
+once with a batched Levenberg-Marquardt solver: the residuals, Jacobians and
+4 x 4 normal equations of all soils are calculated as arrays, and each soil
+keeps its own damping factor, so every iteration is a handful of NumPy
+operations whatever the number of soils. Soils drop out of the iterations
+once they have converged.
+
+Each soil is started from the best of a grid of (alpha, n) curves. For a given
+alpha and n the curve is linear in theta_r and theta_s, so those are solved
+in closed form for all soils at once and the soil starts from the grid curve
+that fits it best; soils with similar water contents start from the same
+curve.
+
+alpha is fitted in 1/kPa (the pressures of the point-PTFs are in kPa), so the
+parameters can be written with vanGenuchten.writeVGParams and used with the
+van Genuchten functions. The fit runs over record blocks in the kernel pool
+(kernelWorkers in the user settings).
+'''
+
+import sys
+import numpy as np
+import NB_PTFs.lib.log as log
+import NB_PTFs.lib.PTFdatabase as PTFdatabase
+import NB_PTFs.lib.kernel_pool as kernel_pool
+import NB_PTFs.lib.point_engine as point_engine
+
+from NB_PTFs.lib.refresh_modules import refresh_modules
+refresh_modules([log, PTFdatabase, kernel_pool, point_engine])
+
+# Grid of the starting curves (alpha in 1/kPa)
+startAlpha = np.logspace(-3.0, 1.0, 17)
+startN = np.array([1.05, 1.1, 1.15, 1.2, 1.3, 1.4, 1.5, 1.7, 2.0, 2.5, 3.0, 4.0])
+
+# Bounds of the fitted parameters
+minN = 1.01
+maxN = 10.0
+minAlpha = 1.0e-5
+maxAlpha = 100.0
+
+maxIterations = 100
+tolerance = 1.0e-10
+
+def curveS(h, alpha, n):
+
+    # Effective saturation (soils x pressures) and u = (alpha * h) ** n
+    m = 1.0 - 1.0 / n
+    u = (alpha * h) ** n
+    S = (1.0 + u) ** (-m)
+
+    return S, u, m
+
+def startParameters(h, WC):
+
+    ''' Best (theta_r, theta_s, alpha, n) of the starting grid for each soil, with theta_r and theta_s solved in closed form '''
+
+    numSoils = WC.shape[0]
+
+    best = np.full(numSoils, np.inf)
+    params = np.zeros((numSoils, 4))
+
+    for alpha in startAlpha:
+        for n in startN:
+            S = curveS(h[0], alpha, n)[0]
+
+            # Least squares for WC = theta_r * (1 - S) + theta_s * S, the same design for all soils
+            design = np.column_stack([1.0 - S, S])
+            coefs = point_engine.sumTerms(WC, np.linalg.pinv(design))
+
+            coefs[:, 0] = np.clip(coefs[:, 0], 0.0, None)
+            coefs[:, 1] = np.clip(coefs[:, 1], coefs[:, 0] + 1.0e-4, 1.0)
+
+            cost = ((point_engine.sumTerms(coefs, design) - WC) ** 2).sum(axis=1)
+            better = cost < best
+
+            best[better] = cost[better]
+            params[better, 0:2] = coefs[better]
+            params[better, 2] = alpha
+            params[better, 3] = n
+
+    return params
+
+def toFitted(params):
+
+    # theta_r, theta_s, ln(alpha) and ln(n - 1) are the fitted variables
+    return np.column_stack([params[:, 0], params[:, 1], np.log(params[:, 2]), np.log(params[:, 3] - 1.0)])
+
+def fromFitted(q):
+
+    # Keeps the variables within the bounds
+    q = q.copy()
+    q[:, 0] = np.clip(q[:, 0], 0.0, 0.99)
+    q[:, 1] = np.clip(q[:, 1], q[:, 0] + 1.0e-4, 1.0)
+    q[:, 2] = np.clip(q[:, 2], np.log(minAlpha), np.log(maxAlpha))
+    q[:, 3] = np.clip(q[:, 3], np.log(minN - 1.0), np.log(maxN - 1.0))
+
+    return q
+
+def residuals(q, h, WC):
+
+    S = curveS(h, np.exp(q[:, 2:3]), 1.0 + np.exp(q[:, 3:4]))[0]
+
+    return q[:, 0:1] + (q[:, 1:2] - q[:, 0:1]) * S - WC
+
+def jacobian(q, h):
+
+    # Derivatives of the water contents (soils x pressures x 4) with respect to the fitted variables
+    theta_r, theta_s = q[:, 0:1], q[:, 1:2]
+    alpha = np.exp(q[:, 2:3])
+    n = 1.0 + np.exp(q[:, 3:4])
+
+    S, u, m = curveS(h, alpha, n)
+
+    # log(alpha * h) is not used where h is 0 (u is 0 there)
+    logAh = np.log(np.where(h > 0.0, alpha * h, 1.0))
+
+    dS_dlogAlpha = -m * n * u * (1.0 + u) ** (-m - 1.0)
+    dS_dn = S * (-np.log1p(u) / n ** 2 - m * u * logAh / (1.0 + u))
+    dS_dlogN = dS_dn * (n - 1.0)
+
+    J = np.empty(S.shape + (4,))
+    J[:, :, 0] = 1.0 - S
+    J[:, :, 1] = S
+    J[:, :, 2] = (theta_s - theta_r) * dS_dlogAlpha
+    J[:, :, 3] = (theta_s - theta_r) * dS_dlogN
+
+    return J
+
+def fitKernel(cols, pressures):
+
+    '''
+    Kernel for the kernel pool: cols holds the water content at each pressure (keys WC0, WC1 ...).
+    Returns theta_r, theta_s, alpha, n, m, the RMSE of the fit and the number of iterations of each soil.
+    '''
+
+    WC = np.column_stack([cols['WC' + str(i)] for i in range(0, len(pressures))])
+    h = np.asarray(pressures, dtype=np.float64).reshape(1, -1)
+
+    numSoils = WC.shape[0]
+    valid = np.all(np.isfinite(WC), axis=1)
+
+    q = np.zeros((numSoils, 4))
+    iterations = np.zeros(numSoils)
+
+    if valid.any():
+        q[valid] = fromFitted(toFitted(startParameters(h, WC[valid])))
+
+    cost = np.full(numSoils, np.nan)
+    cost[valid] = (residuals(q[valid], h, WC[valid]) ** 2).sum(axis=1)
+
+    damping = np.full(numSoils, 1.0e-3)
+    active = valid.copy()
+
+    for iteration in range(0, maxIterations):
+
+        idx = np.flatnonzero(active)
+        if len(idx) == 0:
+            break
+
+        qa, WCa = q[idx], WC[idx]
+
+        r = residuals(qa, h, WCa)
+        J = jacobian(qa, h)
+
+        # Damped normal equations of all active soils
+        JTJ = np.einsum('spi,spj->sij', J, J)
+        g = np.einsum('spi,sp->si', J, r)
+
+        diag = np.einsum('sii->si', JTJ)
+        A = JTJ + (damping[idx, None] * (diag + 1.0e-12))[:, :, None] * np.eye(4)
+
+        try:
+            step = np.linalg.solve(A, -g[:, :, None])[:, :, 0]
+        except np.linalg.LinAlgError:
+            step = -g * 1.0e-3
+
+        qNew = fromFitted(qa + step)
+        costNew = (residuals(qNew, h, WCa) ** 2).sum(axis=1)
+
+        accepted = np.isfinite(costNew) & (costNew <= cost[idx])
+        improvement = np.where(accepted, cost[idx] - costNew, 0.0)
+
+        q[idx[accepted]] = qNew[accepted]
+        cost[idx[accepted]] = costNew[accepted]
+        iterations[idx] += 1
+
+        damping[idx] = np.where(accepted, damping[idx] * 0.3, damping[idx] * 10.0)
+
+        # Converged when the cost no longer falls, or the step is rejected at a high damping
+        done = (accepted & (improvement <= tolerance * (1.0 + cost[idx]))) | (damping[idx] > 1.0e10)
+        active[idx[done]] = False
+
+    theta_r = np.where(valid, q[:, 0], np.nan)
+    theta_s = np.where(valid, q[:, 1], np.nan)
+    alpha = np.where(valid, np.exp(q[:, 2]), np.nan)
+    n = np.where(valid, 1.0 + np.exp(q[:, 3]), np.nan)
+    m = 1.0 - 1.0 / n
+    rmse = np.sqrt(cost / max(1, len(pressures)))
+
+    return theta_r, theta_s, alpha, n, m, rmse, iterations
+
+def fitVG(pressures, WC):
+
+    '''
+    Fits the van Genuchten parameters of all soils to their water contents WC (soils x pressures, kPa).
+    Returns WC_res, WC_sat, alpha, n, m and the RMSE of each fit.
+    '''
+
+    pressures = np.asarray(pressures, dtype=np.float64).reshape(-1)
+    WC = np.asarray(WC, dtype=np.float64).reshape(-1, len(pressures))
+
+    if len(pressures) < 4:
+        log.error('At least four pressures are needed to fit the van Genuchten parameters, the PTF gives ' + str(len(pressures)))
+        sys.exit()
+
+    cols = dict(('WC' + str(i), WC[:, i]) for i in range(0, len(pressures)))
+    WC_res, WC_sat, alpha, n, m, rmse, iterations = kernel_pool.runKernel(fitKernel, cols, (pressures,))
+
+    numFailed = int(np.count_nonzero(~np.isfinite(rmse)))
+    if numFailed > 0:
+        log.warning('van Genuchten parameters not fitted for ' + str(numFailed) + ' soils with missing water contents')
+
+    log.info('van Genuchten parameters fitted for ' + str(len(rmse) - numFailed) + ' soils, mean RMSE ' +
+             str(round(float(np.nanmean(rmse)) if numFailed < len(rmse) else 0.0, 5)) +
+             ', at most ' + str(int(np.max(iterations)) if len(iterations) else 0) + ' iterations')
+
+    return WC_res, WC_sat, alpha, n, m, rmse
+
+def fitPointPTF(PTFOption, results):
+
+    '''
+    Fits the van Genuchten parameters to the results list of a point-PTF
+    (the warning column followed by the water content at each pressure of the PTF)
+    '''
+
+    PTFInfo = PTFdatabase.checkPTF(PTFOption, "pointPTF")
+    WC = np.column_stack([np.asarray(column, dtype=np.float64) for column in results[1:]])
+
+    return fitVG([float(pressure) for pressure in PTFInfo.PTFPressures], WC)
@@ -1,5 +1,4 @@
 import configuration
-import arcpy
 import math
 import os
 import sys
@@ -7,225 +6,157 @@ import numpy as np
 import csv
 import NB_PTFs.lib.log as log
 import NB_PTFs.lib.common as common
+import NB_PTFs.lib.table_io as table_io
 import NB_PTFs.lib.thresholds as thresholds
 import NB_PTFs.lib.PTFdatabase as PTFdatabase
 import NB_PTFs.lib.brooksCorey as brooksCorey
 import NB_PTFs.lib.bc_PTFs as bc_PTFs
 import NB_PTFs.lib.checks_PTFs as checks_PTFs
+import NB_PTFs.lib.validation as validation
+import NB_PTFs.lib.metrics as metrics
 from NB_PTFs.lib.external import six # Python 2/3 compatibility module
 
 from NB_PTFs.lib.refresh_modules import refresh_modules
-refresh_modules([log, common, thresholds, PTFdatabase, brooksCorey, bc_PTFs, checks_PTFs])
+refresh_modules([log, common, table_io, thresholds, PTFdatabase, brooksCorey, bc_PTFs, checks_PTFs, validation, metrics])
 
 def function(outputFolder, inputShp, PTFOption, BCPressArray, fcVal, sicVal, pwpVal, carbContent, carbonConFactor):
 
+    run = metrics.startRun('brooks_corey', outputFolder)
+
     try:
-        # Set temporary variables
-        prefix = os.path.join(arcpy.env.scratchGDB, "bc_")
+        # Set output filename
+        outputPath = table_io.getOutputPath(outputFolder, "BrooksCorey", inputShp)
 
-        tempSoils = prefix + "tempSoils"
+        # Open the input table; results are written to the output table
+        outputTable = table_io.openTable(inputShp, outputPath, deferred=True, spillFolder=outputFolder)
 
-        # Set output filename
-        outputShp = os.path.join(outputFolder, "BrooksCorey.shp")
+        # PTFs should return: warning, WC_res, WC_sat, lambda_BC, hb_BC
+        PTFdatabase.checkPTF(PTFOption, "bcPTF")
+        options = {'carbonConFactor': carbonConFactor, 'carbContent': carbContent}
 
-        # Copy the input shapefile to the output folder
-        arcpy.CopyFeatures_management(inputShp, outputShp)
+        # Read, check, calculate and write one block of records at a time (chunkSize in the user settings)
+        validation.holdSummaries()
 
-        # Get the nameArray
-        nameArray = []
-        with arcpy.da.SearchCursor(outputShp, "soilname") as searchCursor:
-            for row in searchCursor:
-                name = row[0]
-                nameArray.append(name)
+        # Blocks have at most common.maxCurveSoils records, to bound the memory of the curve matrix
+        for block in outputTable.blocks(table_io.getChunkSize(common.maxCurveSoils)):
+            metrics.addRecords(block.numRecords)
 
-        # PTFs should return: WC_res, WC_sat, lambda_BC, hb_BC
+            # Get the nameArray
+            nameArray = list(block.readColumn("soilname"))
 
-        if PTFOption == "Cosby_1984_SandC_BC":
-            warning, WC_res, WC_sat, lambda_BC, hb_BC = bc_PTFs.Cosby_1984_SandC_BC(outputShp, PTFOption)
+            warning, WC_res, WC_sat, lambda_BC, hb_BC = PTFdatabase.runKernel(PTFOption, [block, PTFOption], options)
 
-        elif PTFOption == "Cosby_1984_SSC_BC":
-            warning, WC_res, WC_sat, lambda_BC, hb_BC = bc_PTFs.Cosby_1984_SSC_BC(outputShp, PTFOption)
+            # Write to shapefile
+            brooksCorey.writeBCParams(block, warning, WC_res, WC_sat, lambda_BC, hb_BC)
 
-        elif PTFOption == "RawlsBrakensiek_1985_BC":
-            warning, WC_res, WC_sat, lambda_BC, hb_BC = bc_PTFs.RawlsBrakensiek_1985_BC(outputShp, PTFOption)
+            log.info("Brooks-Corey parameters written to output shapefile")
+            
+            # Write the curves and create plots (of the first block only in the chunked mode)
+            brooksCorey.plotBrooksCorey(outputFolder, WC_res, WC_sat, hb_BC, lambda_BC, nameArray, fcVal, sicVal, pwpVal, firstBlock=block.isFirst)
 
-        elif PTFOption == "CampbellShiozawa_1992_BC":
-            warning, WC_res, WC_sat, lambda_BC, hb_BC = bc_PTFs.CampbellShiozawa_1992_BC(outputShp, PTFOption)
+            ###############################################
+            ### Calculate water content using BC params ###
+            ###############################################
 
-        elif PTFOption == "Saxton_1986_BC":
-            warning, WC_res, WC_sat, lambda_BC, hb_BC = bc_PTFs.Saxton_1986_BC(outputShp, PTFOption)
+            # Soils that we were not able to calculate BC parameters for (lambda_BC == -9999)
+            # are masked by the Brooks-Corey kernel and get -9999 at every pressure
+            valid = (np.asarray(lambda_BC) != brooksCorey.invalidLambda)
 
-        elif PTFOption == "SaxtonRawls_2006_BC":
-            warning, WC_res, WC_sat, lambda_BC, hb_BC = bc_PTFs.SaxtonRawls_2006_BC(outputShp, PTFOption, carbonConFactor, carbContent)
+            # Calculate water content at default pressures for all soils at once (soils x pressures)
+            pressures = [1.0, 3.0, 10.0, 33.0, 100.0, 200.0, 1000.0, 1500.0]
+            bc_WC = brooksCorey.calcBrooksCoreyMatrix(pressures, hb_BC, WC_res, WC_sat, lambda_BC)
 
-        else:
-            log.error("Brooks-Corey option not recognised: " + str(PTFOption))
-            sys.exit()
+            WC_1kPaArray, WC_3kPaArray, WC_10kPaArray, WC_33kPaArray, WC_100kPaArray, WC_200kPaArray, WC_1000kPaArray, WC_1500kPaArray = bc_WC.T
 
-        # Write to shapefile
-        brooksCorey.writeBCParams(outputShp, warning, WC_res, WC_sat, lambda_BC, hb_BC)
+            common.writeOutputWC(block, WC_1kPaArray, WC_3kPaArray, WC_10kPaArray, WC_33kPaArray, WC_100kPaArray, WC_200kPaArray, WC_1000kPaArray, WC_1500kPaArray)
 
-        log.info("Brooks-Corey parameters written to output shapefile")
-            
-        # Create plots
-        brooksCorey.plotBrooksCorey(outputFolder, WC_res, WC_sat, hb_BC, lambda_BC, nameArray, fcVal, sicVal, pwpVal)
-
-        ###############################################
-        ### Calculate water content using BC params ###
-        ###############################################
-
-        # Check for any soils that we were not able to calculate BC parameters for
-        # lambda_BC[i] == -9999
-        
-        errors = []
-        for i in range(0, len(lambda_BC)):
-            if lambda_BC[i] == -9999:
-                log.warning('Invalid lambda found for ' + str(nameArray[i]))
-                errors.append(i)
-
-        # Calculate water content at default pressures
-        WC_1kPaArray = []
-        WC_3kPaArray = []
-        WC_10kPaArray = []
-        WC_33kPaArray = []
-        WC_100kPaArray = []
-        WC_200kPaArray = []
-        WC_1000kPaArray = []
-        WC_1500kPaArray = []
-
-        for i in range(0, len(nameArray)):
+            # Write water content at user-input pressures
 
-            pressures = [1.0, 3.0, 10.0, 33.0, 100.0, 200.0, 1000.0, 1500.0]
+            # Initialise the pressure head array
+            x = np.array(BCPressArray)
+            bcPressures = x.astype(float)
 
-            if lambda_BC[i] != -9999:
-                bc_WC = brooksCorey.calcBrooksCoreyFXN(pressures, hb_BC[i], WC_res[i], WC_sat[i], lambda_BC[i])
+            # For the headings
+            headings = ['Name']
 
-            else:
-                bc_WC = [-9999] * len(pressures)
+            for pressure in bcPressures:
+                headName = 'WC_' + str(pressure) + "kPa"
+                headings.append(headName)
 
-            WC_1kPaArray.append(bc_WC[0])
-            WC_3kPaArray.append(bc_WC[1])
-            WC_10kPaArray.append(bc_WC[2])
-            WC_33kPaArray.append(bc_WC[3])
-            WC_100kPaArray.append(bc_WC[4])
-            WC_200kPaArray.append(bc_WC[5])
-            WC_1000kPaArray.append(bc_WC[6])
-            WC_1500kPaArray.append(bc_WC[7])
+            wcHeadings = headings[1:]
 
-        common.writeOutputWC(outputShp, WC_1kPaArray, WC_3kPaArray, WC_10kPaArray, WC_33kPaArray, WC_100kPaArray, WC_200kPaArray, WC_1000kPaArray, WC_1500kPaArray)
+            # Calculate soil moisture content at custom pressures
+            bc_WCCustom = brooksCorey.calcBrooksCoreyMatrix(bcPressures, hb_BC, WC_res, WC_sat, lambda_BC)
 
-        # Write water content at user-input pressures
+            wcArrays = []
+            for i in range(0, len(nameArray)):
+                wcArrays.append([nameArray[i]] + list(bc_WCCustom[i]))
 
-        # Initialise the pressure head array
-        x = np.array(BCPressArray)
-        bcPressures = x.astype(np.float)
+            # Write to output CSV (later blocks are appended)
+            outCSV = os.path.join(outputFolder, 'WaterContent.csv')
 
-        # For the headings
-        headings = ['Name']
+            with open(outCSV, 'w' if block.isFirst else 'a') as csv_file:
+                writer = csv.writer(csv_file)
+                if block.isFirst:
+                    writer.writerow(headings)
 
-        for pressure in bcPressures:
-            headName = 'WC_' + str(pressure) + "kPa"
-            headings.append(headName)
+                for i in range(0, len(nameArray)):
+                    row = wcArrays[i]
+                    writer.writerow(row)
 
-        wcHeadings = headings[1:]
+                msg = 'Output CSV with water content saved to: ' + str(outCSV)
+                log.info(msg)
 
-        wcArrays = []
+            csv_file.close()
 
-        # Calculate soil moisture content at custom VG pressures
-        for i in range(0, len(nameArray)):
+            ##################################################
+            ### Calculate water content at critical points ###
+            ##################################################
 
-            if lambda_BC[i] != -9999:
-                wcValues = brooksCorey.calcBrooksCoreyFXN(bcPressures, hb_BC[i], WC_res[i], WC_sat[i], lambda_BC[i])
-            else:
-                wcValues = [-9999] * len(bcPressures)
+            wcCriticalPressures = [0.0, float(fcVal), float(sicVal), float(pwpVal)]
+            wcCriticals = brooksCorey.calcBrooksCoreyMatrix(wcCriticalPressures, hb_BC, WC_res, WC_sat, lambda_BC)
 
-            wcValues.insert(0, nameArray[i])
+            wc_satCalc, wc_fcCalc, wc_sicCalc, wc_pwpCalc = wcCriticals.T
 
-            wcArrays.append(wcValues)
+            # Derived water contents are -9999 for soils with an invalid lambda
+            invalidValue = float(brooksCorey.invalidLambda)
 
-        # Write to output CSV
-        outCSV = os.path.join(outputFolder, 'WaterContent.csv')
+            wc_DW = np.where(valid, wc_satCalc - wc_fcCalc, invalidValue)
+            wc_RAW = np.where(valid, wc_fcCalc - wc_sicCalc, invalidValue)
+            wc_NRAW = np.where(valid, wc_sicCalc - wc_pwpCalc, invalidValue)
+            wc_PAW = np.where(valid, wc_fcCalc - wc_pwpCalc, invalidValue)
 
-        with open(outCSV, 'w') as csv_file:
-            writer = csv.writer(csv_file)
-            writer.writerow(headings)
+            # Negative water contents are reported as one summary line per quantity
+            validator = validation.Validator(nameArray)
+            validator.checkNegValue("Drainable water", wc_DW, valid)
+            validator.checkNegValue("Readily available water", wc_RAW, valid)
+            validator.checkNegValue("Not readily available water", wc_NRAW, valid)
+            validator.checkNegValue("Plant available water", wc_PAW, valid)
+            validator.summarise()
 
-            for i in range(0, len(nameArray)):
-                row = wcArrays[i]
-                writer.writerow(row)
-
-            msg = 'Output CSV with water content saved to: ' + str(outCSV)
-            log.info(msg)
-
-        csv_file.close()
-
-        ##################################################
-        ### Calculate water content at critical points ###
-        ##################################################
-
-        # Initialise water content arrays
-        wc_satCalc = []
-        wc_fcCalc = []
-        wc_sicCalc = []
-        wc_pwpCalc = []
-
-        wc_DW = []
-        wc_RAW = []
-        wc_NRAW = []
-        wc_PAW = []
-
-        wcCriticalPressures = [0.0, fcVal, sicVal, pwpVal]
-
-        for x in range(0, len(nameArray)):
-
-            if lambda_BC[x] != -9999:
-                wcCriticals = brooksCorey.calcBrooksCoreyFXN(wcCriticalPressures, hb_BC[x], WC_res[x], WC_sat[x], lambda_BC[x])
-
-                wc_sat = wcCriticals[0]
-                wc_fc = wcCriticals[1]
-                wc_sic = wcCriticals[2]
-                wc_pwp = wcCriticals[3]
-
-                drainWater = wc_sat - wc_fc
-                readilyAvailWater = wc_fc - wc_sic
-                notRAW = wc_sic - wc_pwp
-                PAW = wc_fc - wc_pwp
-
-                checks_PTFs.checkNegValue("Drainable water", drainWater, nameArray[i])
-                checks_PTFs.checkNegValue("Readily available water", readilyAvailWater, nameArray[i])
-                checks_PTFs.checkNegValue("Not readily available water", notRAW, nameArray[i])
-                checks_PTFs.checkNegValue("Not readily available water", PAW, nameArray[i])
-
-            else:
-                wc_sat = -9999
-                wc_fc = -9999
-                wc_sic = -9999
-                wc_pwp = -9999
-                drainWater = -9999
-                readilyAvailWater = -9999
-                notRAW = -9999
-                PAW = -9999
-
-            wc_satCalc.append(wc_sat)
-            wc_fcCalc.append(wc_fc)
-            wc_sicCalc.append(wc_sic)
-            wc_pwpCalc.append(wc_pwp)
-            wc_DW.append(drainWater)
-            wc_RAW.append(readilyAvailWater)
-            wc_NRAW.append(notRAW)
-            wc_PAW.append(PAW)
-
-        common.writeOutputCriticalWC(outputShp, wc_satCalc, wc_fcCalc, wc_sicCalc, wc_pwpCalc, wc_DW, wc_RAW, wc_NRAW, wc_PAW)
+            common.writeOutputCriticalWC(block, wc_satCalc, wc_fcCalc, wc_sicCalc, wc_pwpCalc, wc_DW, wc_RAW, wc_NRAW, wc_PAW)
+
+            # Pressure at target water contents, for all soils at once (targetWC and PAWDepletion in the user settings)
+            inverseFields, targetWC = common.getInverseTargets(wc_fcCalc, wc_pwpCalc)
+
+            if inverseFields:
+                h_target = brooksCorey.calcBrooksCoreyInverse(targetWC, hb_BC, WC_res, WC_sat, lambda_BC)
+                common.writeOutputInverse(block, inverseFields, h_target)
+
+        validation.releaseSummaries()
+
+        # Zip the curves written block by block (npz curve export)
+        with metrics.stage('write'):
+            common.flushCurves()
+
+        # Save all output fields in one pass
+        outputTable.flush()
+
+        return metrics.finishRun(run)
 
     except Exception:
-        arcpy.AddError("Brooks-Corey function failed")
+        log.error("Brooks-Corey function failed")
         raise
 
     finally:
-        # Remove feature layers from memory
-        try:
-            for lyr in common.listFeatureLayers(locals()):
-                arcpy.Delete_management(locals()[lyr])
-                exec(lyr + ' = None') in locals()
-        except Exception:
-            pass
\ No newline at end of file
+        metrics.finishRun(run)
@@ -4,334 +4,247 @@ Function to calculate van Genuchten parameters and SMRC
 
 import sys
 import os
-import arcpy
 import csv
 import numpy as np
 import NB_PTFs.lib.log as log
 import NB_PTFs.lib.common as common
+import NB_PTFs.lib.table_io as table_io
 import NB_PTFs.lib.vanGenuchten as vanGenuchten
 import NB_PTFs.lib.vg_PTFs as vg_PTFs
+import NB_PTFs.lib.PTFdatabase as PTFdatabase
 import NB_PTFs.lib.checks_PTFs as checks_PTFs
+import NB_PTFs.lib.validation as validation
+import NB_PTFs.lib.metrics as metrics
 from NB_PTFs.lib.external import six # Python 2/3 compatibility module
 
 from NB_PTFs.lib.refresh_modules import refresh_modules
-refresh_modules([log, common, vanGenuchten, vg_PTFs, checks_PTFs])
+refresh_modules([log, common, table_io, vanGenuchten, vg_PTFs, PTFdatabase, checks_PTFs, validation, metrics])
 
 def function(outputFolder, inputShp, VGOption, VGPressArray, MVGChoice, fcVal, sicVal, pwpVal, carbContent, carbonConFactor):
 
-    try:
-        # Set temporary variables
-        prefix = os.path.join(arcpy.env.scratchGDB, "soil_")
+    run = metrics.startRun('calc_vg', outputFolder)
 
+    try:
         # Set output filename
         if MVGChoice == True:
-            outputShp = os.path.join(outputFolder, "soil_mvg.shp")
+            outputPath = table_io.getOutputPath(outputFolder, "soil_mvg", inputShp)
         else:
-            outputShp = os.path.join(outputFolder, "soil_vg.shp")
+            outputPath = table_io.getOutputPath(outputFolder, "soil_vg", inputShp)
 
-        # Copy the input shapefile to the output folder
-        arcpy.CopyFeatures_management(inputShp, outputShp)
+        # Open the input table; results are written to the output table
+        outputTable = table_io.openTable(inputShp, outputPath, deferred=True, spillFolder=outputFolder)
 
-        ##############################################
-        ### Calculate the van Genuchten parameters ###
-        ##############################################
+        # Call VG PTF here using the PTF registry
+        # All VG PTFs return the van Genuchten parameter arrays
+        # PTFs with the option to calculate Mualem-van Genuchten also return l_MvG and K_sat
+        PTFdatabase.checkPTF(VGOption, "vgPTF")
+        options = {'carbonConFactor': carbonConFactor, 'carbContent': carbContent, 'MVGChoice': MVGChoice}
 
-        # Get the nameArray
-        nameArray = []
-        with arcpy.da.SearchCursor(outputShp, "soilname") as searchCursor:
-            for row in searchCursor:
-                name = row[0]
+        # Read, check, calculate and write one block of records at a time (chunkSize in the user settings)
+        validation.holdSummaries()
 
-                nameArray.append(name)
+        # Blocks have at most common.maxCurveSoils records, to bound the memory of the curve matrices
+        for block in outputTable.blocks(table_io.getChunkSize(common.maxCurveSoils)):
+            metrics.addRecords(block.numRecords)
 
-        # Initialise the van Genuchten parameter arrays
-        # All VG PTFs should return these arrays        
-        WC_residualArray = []
-        WC_satArray = []
-        alpha_VGArray = []
-        n_VGArray = []
-        m_VGArray = []
+            ##############################################
+            ### Calculate the van Genuchten parameters ###
+            ##############################################
 
-        # Call VG PTF here depending on VGOption
-        if str(VGOption[0:11]) == "Wosten_1999":
-            # Has option to calculate Mualem-van Genuchten
-            WC_residualArray, WC_satArray, alpha_VGArray, n_VGArray, m_VGArray, l_MvGArray, K_satArray = vg_PTFs.Wosten_1999(outputShp, VGOption, carbonConFactor, carbContent, MVGChoice)
+            # Get the nameArray
+            nameArray = list(block.readColumn("soilname"))
 
-        elif VGOption == "Vereecken_1989":
-            WC_residualArray, WC_satArray, alpha_VGArray, n_VGArray, m_VGArray = vg_PTFs.Vereecken_1989(outputShp, VGOption, carbonConFactor, carbContent)
+            results = PTFdatabase.runKernel(VGOption, [block, VGOption], options)
 
-        elif VGOption == "ZachariasWessolek_2007":
-            WC_residualArray, WC_satArray, alpha_VGArray, n_VGArray, m_VGArray = vg_PTFs.ZachariasWessolek_2007(outputShp, VGOption, carbonConFactor, carbContent)
-        
-        elif VGOption == "Weynants_2009":
-            # Has option to calculate Mualem-van Genuchten
-            WC_residualArray, WC_satArray, alpha_VGArray, n_VGArray, m_VGArray, l_MvGArray, K_satArray = vg_PTFs.Weynants_2009(outputShp, VGOption, carbonConFactor, carbContent, MVGChoice)
+            WC_residualArray, WC_satArray, alpha_VGArray, n_VGArray, m_VGArray = results[0:5]
 
-        elif VGOption == "Dashtaki_2010_vg":
-            WC_residualArray, WC_satArray, alpha_VGArray, n_VGArray, m_VGArray = vg_PTFs.Dashtaki_2010(outputShp, VGOption, carbonConFactor, carbContent)
+            if len(results) > 5:
+                l_MvGArray, K_satArray = results[5:7]
+            else:
+                l_MvGArray, K_satArray = None, None
 
-        elif VGOption == "HodnettTomasella_2002":
-            WC_residualArray, WC_satArray, alpha_VGArray, n_VGArray, m_VGArray = vg_PTFs.HodnettTomasella_2002(outputShp, VGOption, carbonConFactor, carbContent)
+            # Curves over 0-1500 kPa, calculated once and shared by the plots, CSVs and water contents below
+            curveCache = vanGenuchten.CurveCache(WC_residualArray, WC_satArray, alpha_VGArray, n_VGArray, m_VGArray, K_satArray, l_MvGArray)
 
-        else:
-            log.error("Van Genuchten option not recognised: " + str(VGOption))
-            sys.exit()
- 
-        # Write VG parameter results to output shapefile
-        vanGenuchten.writeVGParams(outputShp, WC_residualArray, WC_satArray, alpha_VGArray, n_VGArray, m_VGArray)
-
-        # Plot VG parameters
-        vanGenuchten.plotVG(outputFolder, WC_residualArray,
-                            WC_satArray, alpha_VGArray, n_VGArray,
-                            m_VGArray, nameArray, fcVal, sicVal, pwpVal)
-
-        ###############################################
-        ### Calculate water content using VG params ###
-        ###############################################
-
-        # Calculate water content at default pressures
-        WC_1kPaArray = []
-        WC_3kPaArray = []
-        WC_10kPaArray = []
-        WC_33kPaArray = []
-        WC_100kPaArray = []
-        WC_200kPaArray = []
-        WC_1000kPaArray = []
-        WC_1500kPaArray = []
-
-        for x in range(0, len(nameArray)):
-            WC_1kPa = vanGenuchten.calcVGfxn(1.0, WC_residualArray[x], WC_satArray[x], alpha_VGArray[x], n_VGArray[x], m_VGArray[x])
-            WC_3kPa = vanGenuchten.calcVGfxn(3.0, WC_residualArray[x], WC_satArray[x], alpha_VGArray[x], n_VGArray[x], m_VGArray[x])
-            WC_10kPa = vanGenuchten.calcVGfxn(10.0, WC_residualArray[x], WC_satArray[x], alpha_VGArray[x], n_VGArray[x], m_VGArray[x])
-            WC_33kPa = vanGenuchten.calcVGfxn(33.0, WC_residualArray[x], WC_satArray[x], alpha_VGArray[x], n_VGArray[x], m_VGArray[x])
-            WC_100kPa = vanGenuchten.calcVGfxn(100.0, WC_residualArray[x], WC_satArray[x], alpha_VGArray[x], n_VGArray[x], m_VGArray[x])
-            WC_200kPa = vanGenuchten.calcVGfxn(200.0, WC_residualArray[x], WC_satArray[x], alpha_VGArray[x], n_VGArray[x], m_VGArray[x])
-            WC_1000kPa = vanGenuchten.calcVGfxn(1000.0, WC_residualArray[x], WC_satArray[x], alpha_VGArray[x], n_VGArray[x], m_VGArray[x])
-            WC_1500kPa = vanGenuchten.calcVGfxn(1500.0, WC_residualArray[x], WC_satArray[x], alpha_VGArray[x], n_VGArray[x], m_VGArray[x])
-
-            WC_1kPaArray.append(WC_1kPa)
-            WC_3kPaArray.append(WC_3kPa)
-            WC_10kPaArray.append(WC_10kPa)
-            WC_33kPaArray.append(WC_33kPa)
-            WC_100kPaArray.append(WC_100kPa)
-            WC_200kPaArray.append(WC_200kPa)
-            WC_1000kPaArray.append(WC_1000kPa)
-            WC_1500kPaArray.append(WC_1500kPa)
-
-        common.writeOutputWC(outputShp, WC_1kPaArray, WC_3kPaArray, WC_10kPaArray, WC_33kPaArray, WC_100kPaArray, WC_200kPaArray, WC_1000kPaArray, WC_1500kPaArray)
-
-        # Write water content at user-input pressures
-
-        # Initialise the pressure head array
-        x = np.array(VGPressArray)
-        vgPressures = x.astype(np.float)
-
-        # For the headings
-        headings = ['Name']
-
-        for pressure in vgPressures:
-            headName = 'WC_' + str(pressure) + "kPa"
-            headings.append(headName)
-
-        wcHeadings = headings[1:]
-
-        # Initialise water content arrays
-        wcArrays = []
-
-        # Calculate soil moisture content at custom VG pressures
-        for x in range(0, len(nameArray)):
-            wcValues = vanGenuchten.calcPressuresVG(nameArray[x], WC_residualArray[x], WC_satArray[x], alpha_VGArray[x], n_VGArray[x], m_VGArray[x], vgPressures)
-            wcArrays.append(wcValues)
-
-        # Write to output CSV
-        outCSV = os.path.join(outputFolder, 'WaterContent.csv')
-
-        with open(outCSV, 'w') as csv_file:
-            writer = csv.writer(csv_file)
-            writer.writerow(headings)
-
-            for i in range(0, len(nameArray)):
-                row = wcArrays[i]
-                writer.writerow(row)
-
-            msg = 'Output CSV with water content saved to: ' + str(outCSV)
-            log.info(msg)
-
-        csv_file.close()
-
-        ##################################################
-        ### Calculate water content at critical points ###
-        ##################################################
-
-        # Initialise water content arrays
-        wc_satCalc = []
-        wc_fcCalc = []
-        wc_sicCalc = []
-        wc_pwpCalc = []
-
-        wc_DW = []
-        wc_RAW = []
-        wc_NRAW = []
-        wc_PAW = []
-
-        for i in range(0, len(nameArray)):
-            wc_sat = vanGenuchten.calcVGfxn(0, WC_residualArray[i], WC_satArray[i], alpha_VGArray[i], n_VGArray[i], m_VGArray[i])
-            wc_fc = vanGenuchten.calcVGfxn(float(fcVal), WC_residualArray[i], WC_satArray[i], alpha_VGArray[i], n_VGArray[i], m_VGArray[i])
-            wc_sic = vanGenuchten.calcVGfxn(float(sicVal), WC_residualArray[i], WC_satArray[i], alpha_VGArray[i], n_VGArray[i], m_VGArray[i])
-            wc_pwp = vanGenuchten.calcVGfxn(float(pwpVal), WC_residualArray[i], WC_satArray[i], alpha_VGArray[i], n_VGArray[i], m_VGArray[i])
-
-            drainWater = wc_sat - wc_fc
-            readilyAvailWater = wc_fc - wc_sic
-            notRAW = wc_sic - wc_pwp
-            PAW = wc_fc - wc_pwp
-
-            checks_PTFs.checkNegValue("Drainable water", drainWater, nameArray[i])
-            checks_PTFs.checkNegValue("Readily available water", readilyAvailWater, nameArray[i])
-            checks_PTFs.checkNegValue("Not readily available water", notRAW, nameArray[i])
-            checks_PTFs.checkNegValue("Not readily available water", PAW, nameArray[i])
-
-            wc_satCalc.append(wc_sat)
-            wc_fcCalc.append(wc_fc)
-            wc_sicCalc.append(wc_sic)
-            wc_pwpCalc.append(wc_pwp)
-            wc_DW.append(drainWater)
-            wc_RAW.append(readilyAvailWater)
-            wc_NRAW.append(notRAW)
-            wc_PAW.append(PAW)
-
-        common.writeOutputCriticalWC(outputShp, wc_satCalc, wc_fcCalc, wc_sicCalc, wc_pwpCalc, wc_DW, wc_RAW, wc_NRAW, wc_PAW)
-
-        ############################################
-        ### Calculate using Mualem-van Genuchten ###
-        ############################################
+            # Write VG parameter results to output shapefile
+            vanGenuchten.writeVGParams(block, WC_residualArray, WC_satArray, alpha_VGArray, n_VGArray, m_VGArray)
 
-        if MVGChoice == True:
-            if VGOption in ["Wosten_1999_top", "Wosten_1999_sub", "Weynants_2009"]:
-                # Allow for calculation of MVG
-                log.info("Calculating and plotting MVG")
+            # Write the VG curves and plot VG parameters (of the first block only in the chunked mode)
+            vanGenuchten.plotVG(outputFolder, WC_residualArray,
+                                WC_satArray, alpha_VGArray, n_VGArray,
+                                m_VGArray, nameArray, fcVal, sicVal, pwpVal, curveCache, firstBlock=block.isFirst)
 
-                # Write l_MvGArray to outputShp
-                arcpy.AddField_management(outputShp, "l_MvG", "DOUBLE", 10, 6)
+            ###############################################
+            ### Calculate water content using VG params ###
+            ###############################################
 
-                recordNum = 0
-                with arcpy.da.UpdateCursor(outputShp, "l_MvG") as cursor:
-                    for row in cursor:
-                        row[0] = l_MvGArray[recordNum]
+            # Calculate water content at default pressures for all soils at once (soils x pressures)
+            defaultPressures = [1.0, 3.0, 10.0, 33.0, 100.0, 200.0, 1000.0, 1500.0]
+            WC_default = curveCache.waterContentAt(defaultPressures)
 
-                        cursor.updateRow(row)
-                        recordNum += 1
+            WC_1kPaArray, WC_3kPaArray, WC_10kPaArray, WC_33kPaArray, WC_100kPaArray, WC_200kPaArray, WC_1000kPaArray, WC_1500kPaArray = WC_default.T
 
-                # Plot MVG
-                vanGenuchten.plotMVG(outputFolder, K_satArray, alpha_VGArray, n_VGArray, m_VGArray, l_MvGArray, WC_satArray, WC_residualArray, nameArray)
+            common.writeOutputWC(block, WC_1kPaArray, WC_3kPaArray, WC_10kPaArray, WC_33kPaArray, WC_100kPaArray, WC_200kPaArray, WC_1000kPaArray, WC_1500kPaArray)
 
-                # Calculate K at default pressures
-                
-                # Calculate at the pressures using the function
-                K_1kPaArray = []
-                K_3kPaArray = []
-                K_10kPaArray = []
-                K_33kPaArray = []
-                K_100kPaArray = []
-                K_200kPaArray = []
-                K_1000kPaArray = []
-                K_1500kPaArray = []
+            # Write water content at user-input pressures
+
+            # Initialise the pressure head array
+            x = np.array(VGPressArray)
+            vgPressures = x.astype(float)
+
+            # For the headings
+            headings = ['Name']
+
+            for pressure in vgPressures:
+                headName = 'WC_' + str(pressure) + "kPa"
+                headings.append(headName)
+
+            wcHeadings = headings[1:]
+
+            # Calculate soil moisture content at custom VG pressures
+            WC_custom = curveCache.waterContentAt(vgPressures)
+
+            wcArrays = []
+            for x in range(0, len(nameArray)):
+                wcArrays.append([nameArray[x]] + list(WC_custom[x]))
+
+            # Write to output CSV (later blocks are appended)
+            outCSV = os.path.join(outputFolder, 'WaterContent.csv')
+
+            with open(outCSV, 'w' if block.isFirst else 'a') as csv_file:
+                writer = csv.writer(csv_file)
+                if block.isFirst:
+                    writer.writerow(headings)
 
                 for i in range(0, len(nameArray)):
-                    K_1kPa = vanGenuchten.calcKhfxn(1.0, K_satArray[i], alpha_VGArray[i], n_VGArray[i], m_VGArray[i], l_MvGArray[i])
-                    K_3kPa = vanGenuchten.calcKhfxn(3.0, K_satArray[i], alpha_VGArray[i], n_VGArray[i], m_VGArray[i], l_MvGArray[i])
-                    K_10kPa = vanGenuchten.calcKhfxn(10.0, K_satArray[i], alpha_VGArray[i], n_VGArray[i], m_VGArray[i], l_MvGArray[i])
-                    K_33kPa = vanGenuchten.calcKhfxn(33.0, K_satArray[i], alpha_VGArray[i], n_VGArray[i], m_VGArray[i], l_MvGArray[i])
-                    K_100kPa = vanGenuchten.calcKhfxn(100.0, K_satArray[i], alpha_VGArray[i], n_VGArray[i], m_VGArray[i], l_MvGArray[i])
-                    K_200kPa = vanGenuchten.calcKhfxn(200.0, K_satArray[i], alpha_VGArray[i], n_VGArray[i], m_VGArray[i], l_MvGArray[i])
-                    K_1000kPa = vanGenuchten.calcKhfxn(1000.0, K_satArray[i], alpha_VGArray[i], n_VGArray[i], m_VGArray[i], l_MvGArray[i])
-                    K_1500kPa = vanGenuchten.calcKhfxn(1500.0, K_satArray[i], alpha_VGArray[i], n_VGArray[i], m_VGArray[i], l_MvGArray[i])
-
-                    K_1kPaArray.append(K_1kPa)
-                    K_3kPaArray.append(K_3kPa)
-                    K_10kPaArray.append(K_10kPa)
-                    K_33kPaArray.append(K_33kPa)
-                    K_100kPaArray.append(K_100kPa)
-                    K_200kPaArray.append(K_200kPa)
-                    K_1000kPaArray.append(K_1000kPa)
-                    K_1500kPaArray.append(K_1500kPa)
-
-                # Write to the shapefile
-                MVGFields = ["K_1kPa", "K_3kPa", "K_10kPa", "K_33kPa", "K_100kPa", "K_200kPa", "K_1000kPa", "K_1500kPa"]
+                    row = wcArrays[i]
+                    writer.writerow(row)
+
+                msg = 'Output CSV with water content saved to: ' + str(outCSV)
+                log.info(msg)
+
+            csv_file.close()
+
+            ##################################################
+            ### Calculate water content at critical points ###
+            ##################################################
+
+            # Water content at saturation, field capacity, SIC and PWP for all soils at once
+            criticalPressures = [0.0, float(fcVal), float(sicVal), float(pwpVal)]
+            WC_critical = curveCache.waterContentAt(criticalPressures)
+
+            wc_satCalc, wc_fcCalc, wc_sicCalc, wc_pwpCalc = WC_critical.T
+
+            wc_DW = wc_satCalc - wc_fcCalc
+            wc_RAW = wc_fcCalc - wc_sicCalc
+            wc_NRAW = wc_sicCalc - wc_pwpCalc
+            wc_PAW = wc_fcCalc - wc_pwpCalc
+
+            # Negative water contents are reported as one summary line per quantity
+            validator = validation.Validator(nameArray)
+            validator.checkNegValue("Drainable water", wc_DW)
+            validator.checkNegValue("Readily available water", wc_RAW)
+            validator.checkNegValue("Not readily available water", wc_NRAW)
+            validator.checkNegValue("Plant available water", wc_PAW)
+            validator.summarise()
+
+            common.writeOutputCriticalWC(block, wc_satCalc, wc_fcCalc, wc_sicCalc, wc_pwpCalc, wc_DW, wc_RAW, wc_NRAW, wc_PAW)
+
+            # Pressure at target water contents, for all soils at once (targetWC and PAWDepletion in the user settings)
+            inverseFields, targetWC = common.getInverseTargets(wc_fcCalc, wc_pwpCalc)
+
+            if inverseFields:
+                h_target = vanGenuchten.calcVGInverse(targetWC, WC_residualArray, WC_satArray, alpha_VGArray, n_VGArray, m_VGArray)
+                common.writeOutputInverse(block, inverseFields, h_target)
+
+            ############################################
+            ### Calculate using Mualem-van Genuchten ###
+            ############################################
+
+            if MVGChoice == True:
+                if VGOption in ["Wosten_1999_top", "Wosten_1999_sub", "Weynants_2009"]:
+                    # Allow for calculation of MVG
+                    log.info("Calculating and plotting MVG")
+
+                    # Write l_MvGArray to the output table
+                    block.writeColumns(["l_MvG"], [l_MvGArray])
+
+                    # Write the MVG curves and plot MVG (of the first block only in the chunked mode)
+                    vanGenuchten.plotMVG(outputFolder, K_satArray, alpha_VGArray, n_VGArray, m_VGArray, l_MvGArray, WC_satArray, WC_residualArray, nameArray, curveCache,
+                                         firstBlock=block.isFirst)
+
+                    # Calculate K at default pressures
                 
-                # Add fields
-                for field in MVGFields:
-                    arcpy.AddField_management(outputShp, field, "DOUBLE", 10, 6)
+                    # Calculate at the pressures for all soils at once
+                    K_default = curveCache.conductivityAt(defaultPressures)
 
-                recordNum = 0
-                with arcpy.da.UpdateCursor(outputShp, MVGFields) as cursor:
-                    for row in cursor:
-                        row[0] = K_1kPaArray[recordNum]
-                        row[1] = K_3kPaArray[recordNum]
-                        row[2] = K_10kPaArray[recordNum]
-                        row[3] = K_33kPaArray[recordNum]
-                        row[4] = K_100kPaArray[recordNum]
-                        row[5] = K_200kPaArray[recordNum]
-                        row[6] = K_1000kPaArray[recordNum]
-                        row[7] = K_1500kPaArray[recordNum]
+                    K_1kPaArray, K_3kPaArray, K_10kPaArray, K_33kPaArray, K_100kPaArray, K_200kPaArray, K_1000kPaArray, K_1500kPaArray = K_default.T
 
-                        cursor.updateRow(row)
-                        recordNum += 1
+                    # Write to the shapefile
+                    MVGFields = ["K_1kPa", "K_3kPa", "K_10kPa", "K_33kPa", "K_100kPa", "K_200kPa", "K_1000kPa", "K_1500kPa"]
+                
+                    block.writeColumns(MVGFields, [K_1kPaArray, K_3kPaArray, K_10kPaArray, K_33kPaArray, K_100kPaArray, K_200kPaArray, K_1000kPaArray, K_1500kPaArray])
 
-                log.info("Unsaturated hydraulic conductivity at default pressures written to output shapefile")
+                    log.info("Unsaturated hydraulic conductivity at default pressures written to output shapefile")
 
-                # Calculate K at custom pressures
+                    # Calculate K at custom pressures
 
-                # Initialise the pressure head array
-                x = np.array(VGPressArray)
-                vgPressures = x.astype(np.float)
+                    # Initialise the pressure head array
+                    x = np.array(VGPressArray)
+                    vgPressures = x.astype(float)
 
-                # For the headings
-                headings = ['Name']
+                    # For the headings
+                    headings = ['Name']
 
-                for pressure in vgPressures:
-                    headName = 'K_' + str(pressure) + "kPa"
-                    headings.append(headName)
+                    for pressure in vgPressures:
+                        headName = 'K_' + str(pressure) + "kPa"
+                        headings.append(headName)
 
-                kHeadings = headings[1:]
+                    kHeadings = headings[1:]
 
-                # Initialise K arrays
-                kArrays = []
+                    # Calculate K content at custom VG pressures
+                    K_custom = curveCache.conductivityAt(vgPressures)
 
-                # Calculate K content at custom VG pressures
-                for x in range(0, len(nameArray)):
-                    kValues = vanGenuchten.calcPressuresMVG(nameArray[x], K_satArray[x], alpha_VGArray[x], n_VGArray[x], m_VGArray[x], l_MvGArray[x], vgPressures)
-                    kArrays.append(kValues)
+                    kArrays = []
+                    for x in range(0, len(nameArray)):
+                        kArrays.append([nameArray[x]] + list(K_custom[x]))
                 
-                # Write to output CSV
-                outCSV = os.path.join(outputFolder, 'K_MVG.csv')
+                    # Write to output CSV (later blocks are appended)
+                    outCSV = os.path.join(outputFolder, 'K_MVG.csv')
 
-                with open(outCSV, 'w') as csv_file:
-                    writer = csv.writer(csv_file)
-                    writer.writerow(headings)
+                    with open(outCSV, 'w' if block.isFirst else 'a') as csv_file:
+                        writer = csv.writer(csv_file)
+                        if block.isFirst:
+                            writer.writerow(headings)
 
-                    for i in range(0, len(nameArray)):
-                        row = kArrays[i]
-                        writer.writerow(row)
+                        for i in range(0, len(nameArray)):
+                            row = kArrays[i]
+                            writer.writerow(row)
 
-                    msg = 'Output CSV with unsaturated hydraulic conductivity saved to: ' + str(outCSV)
-                    log.info(msg)
+                        msg = 'Output CSV with unsaturated hydraulic conductivity saved to: ' + str(outCSV)
+                        log.info(msg)
 
-                csv_file.close()
+                    csv_file.close()
 
-            else:
-                log.error("Selected PTF does not calculate Mualem-van Genuchten parameters")
-                log.error("Please select a different PTF")
-                sys.exit()
+                else:
+                    log.error("Selected PTF does not calculate Mualem-van Genuchten parameters")
+                    log.error("Please select a different PTF")
+                    sys.exit()
+
+        validation.releaseSummaries()
+
+        # Zip the curves written block by block (npz curve export)
+        with metrics.stage('write'):
+            common.flushCurves()
+
+        # Save all output fields in one pass
+        outputTable.flush()
+
+        return metrics.finishRun(run)
 
     except Exception:
-        arcpy.AddError("van Genuchten function failed")
+        log.error("van Genuchten function failed")
         raise
 
     finally:
-        # Remove feature layers from memory
-        try:
-            for lyr in common.listFeatureLayers(locals()):
-                arcpy.Delete_management(locals()[lyr])
-                exec(lyr + ' = None') in locals()
-        except Exception:
-            pass
\ No newline at end of file
+        metrics.finishRun(run)
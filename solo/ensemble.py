@@ -0,0 +1,284 @@
+'''
+Function to run an ensemble of PTFs over one read of the input table
+
+The inputs are read and checked once. Each selected PTF (point, VG, BC or
+Ksat) is then calculated on a view of the same table, so the fields are only
+parsed once and the PTFs do not overwrite each other's output fields.
+
+The water contents of all PTFs are written side by side to one CSV, with the
+ensemble mean, spread (standard deviation), minimum, maximum and number of
+PTFs at each pressure. Point-PTFs only contribute at their own pressures,
+unless they are resampled onto all the pressures within their range.
+'''
+
+import sys
+import os
+import csv
+import numpy as np
+import NB_PTFs.lib.log as log
+import NB_PTFs.lib.common as common
+import NB_PTFs.lib.table_io as table_io
+import NB_PTFs.lib.PTFdatabase as PTFdatabase
+import NB_PTFs.lib.vanGenuchten as vanGenuchten
+import NB_PTFs.lib.brooksCorey as brooksCorey
+import NB_PTFs.lib.checks_PTFs as checks_PTFs
+import NB_PTFs.lib.validation as validation
+import NB_PTFs.lib.metrics as metrics
+import NB_PTFs.lib.pressure_grid as pressure_grid
+from NB_PTFs.lib.external import six # Python 2/3 compatibility module
+
+from NB_PTFs.lib.refresh_modules import refresh_modules
+refresh_modules([log, common, table_io, PTFdatabase, vanGenuchten, brooksCorey, checks_PTFs, validation, pressure_grid, metrics])
+
+# Pressures (kPa) used when none are given, on top of the pressures of the selected point-PTFs
+defaultPressures = [1.0, 3.0, 10.0, 33.0, 100.0, 200.0, 1000.0, 1500.0]
+
+# Input fields checked once for the whole ensemble, with the names used in the summaries
+checkedFields = [("BD", "Bulk density"), ("CEC", "CEC"), ("pH", "pH"), ("WC_sat", "Input saturation")]
+
+def pressureLabel(pressure):
+    return '%g' % float(pressure)
+
+def getPressures(PTFOptions, pressures=None):
+
+    # Returns the sorted pressures of the ensemble
+    if pressures is None:
+        pressures = list(defaultPressures)
+
+        for PTFOption in PTFOptions:
+            PTFInfo = PTFdatabase.checkPTF(PTFOption)
+            if PTFInfo.PTFType == "pointPTF":
+                pressures += [float(pressure) for pressure in PTFInfo.PTFPressures]
+
+    return sorted(set([float(pressure) for pressure in pressures]))
+
+def getInputFields(PTFOptions, carbContent):
+
+    # Union of the input fields of the PTFs, in the order they are first needed
+    inputFields = []
+
+    for PTFOption in PTFOptions:
+        for field in PTFdatabase.getInputFields(PTFOption, carbContent):
+            if field not in inputFields:
+                inputFields.append(field)
+
+    return inputFields
+
+def checkInputs(view, inputFields, carbContent):
+
+    # Data checks for all records and all PTFs at once
+    nameArray = view.readColumn("soilname")
+    validator = validation.Validator(nameArray)
+
+    sscFields = [field for field in ["Sand", "Silt", "Clay"] if field in inputFields]
+
+    if len(sscFields) == 3:
+        validator.checkSSC(*view.readColumns(sscFields))
+    else:
+        for field in sscFields:
+            validator.checkValue(field, view.readColumn(field))
+
+    if carbContent in inputFields:
+        validator.checkCarbon(view.readColumn(carbContent), carbContent)
+
+    for field, name in checkedFields:
+        if field in inputFields:
+            validator.checkValue(name, view.readColumn(field))
+
+    return validator
+
+def runPTF(outputFolder, table, PTFOption, pressures, options, resample=False):
+
+    '''
+    Calculates one PTF on its own view of the table.
+    Returns the water content at the pressures (NaN where the PTF does not give one) and K_sat (or None).
+    '''
+
+    PTFInfo = PTFdatabase.checkPTF(PTFOption)
+    PTFType = PTFInfo.PTFType
+    view = table_io.TableView(table)
+
+    WC = np.full((view.numRecords, len(pressures)), np.nan)
+    K_sat = None
+    invalid = None
+
+    # The inputs were checked once for the ensemble, so the checks of each PTF are not reported again
+    validation.holdSummaries()
+
+    try:
+        if PTFType == "pointPTF":
+            results = PTFdatabase.runKernel(PTFOption, [outputFolder, view, PTFOption], options)
+
+            if resample:
+                WC[:] = pressure_grid.resamplePTF(PTFOption, np.column_stack(results[1:]), pressures)
+
+            for i, pressure in enumerate(PTFInfo.PTFPressures):
+                if float(pressure) in pressures:
+                    WC[:, pressures.index(float(pressure))] = np.asarray(results[i + 1], dtype=np.float64)
+
+        elif PTFType == "vgPTF":
+            results = PTFdatabase.runKernel(PTFOption, [view, PTFOption], options)
+            WC[:] = vanGenuchten.calcVGMatrix(pressures, *results[0:5])
+
+            if len(results) > 5:
+                K_sat = results[6]
+
+        elif PTFType == "bcPTF":
+            warning, WC_res, WC_sat, lambda_BC, hb_BC = PTFdatabase.runKernel(PTFOption, [view, PTFOption], options)
+            WC[:] = brooksCorey.calcBrooksCoreyMatrix(pressures, hb_BC, WC_res, WC_sat, lambda_BC)
+
+            # Soils without Brooks-Corey parameters are left out of the ensemble
+            invalid = (np.asarray(lambda_BC, dtype=np.float64) == brooksCorey.invalidLambda)
+            WC[invalid, :] = np.nan
+
+        elif PTFType == "ksatPTF":
+            warning, K_sat = PTFdatabase.runKernel(PTFOption, [outputFolder, view], options)
+
+    finally:
+        validation.discardSummaries()
+
+    # Point-PTFs and the Saxton and Rawls (2006) Brooks-Corey PTF write K_sat to the table
+    if K_sat is None and "K_SAT" in view.columns:
+        K_sat = view.columns["K_SAT"]
+
+    if K_sat is not None:
+        K_sat = np.array(K_sat, dtype=np.float64)
+
+        if invalid is not None:
+            K_sat[invalid] = np.nan
+
+    return WC, K_sat
+
+def ensembleStats(values):
+
+    '''
+    Mean, standard deviation, minimum, maximum and number of values over the PTFs (last axis),
+    ignoring missing values. Records without any value get NaN.
+    '''
+
+    present = np.isfinite(values)
+    count = present.sum(axis=-1)
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        mean = np.where(present, values, 0.0).sum(axis=-1) / count
+        spread = np.sqrt(np.where(present, (values - mean[..., np.newaxis]) ** 2, 0.0).sum(axis=-1) / count)
+
+    minimum = np.where(count > 0, np.where(present, values, np.inf).min(axis=-1), np.nan)
+    maximum = np.where(count > 0, np.where(present, values, -np.inf).max(axis=-1), np.nan)
+
+    return mean, spread, minimum, maximum, count
+
+def formatValue(value):
+
+    # Missing values are left empty in the CSV
+    if isinstance(value, float) and not np.isfinite(value):
+        return ''
+
+    return value
+
+def function(outputFolder, inputShp, PTFOptions, pressures=None, carbContent='OC', carbonConFactor=1.724, resample=False):
+
+    run = metrics.startRun('ensemble', outputFolder)
+
+    try:
+        if isinstance(PTFOptions, six.string_types):
+            PTFOptions = [PTFOptions]
+
+        if len(PTFOptions) == 0:
+            log.error("Please select at least one PTF for the ensemble")
+            sys.exit()
+
+        for PTFOption in PTFOptions:
+            PTFdatabase.checkPTF(PTFOption)
+
+        pressures = getPressures(PTFOptions, pressures)
+
+        # Open the input table once; the results are only written to the ensemble CSV
+        table = table_io.openTable(inputShp)
+        view = table_io.TableView(table)
+        metrics.addRecords(table.numRecords)
+
+        inputFields = getInputFields(PTFOptions, carbContent)
+        checks_PTFs.checkInputFields(["soilname"] + inputFields, table)
+
+        log.info('Running an ensemble of ' + str(len(PTFOptions)) + ' PTFs on ' + str(table.numRecords) + ' records')
+
+        # Read and check the inputs of all PTFs in one pass
+        view.readColumns(inputFields)
+        validator = checkInputs(view, inputFields, carbContent)
+        nameArray = list(view.readColumn("soilname"))
+
+        options = {'carbonConFactor': carbonConFactor, 'carbContent': carbContent, 'MVGChoice': True}
+
+        WCs = []
+        K_sats = []
+
+        for PTFOption in PTFOptions:
+            # Each PTF is a stage of the run
+            with metrics.stage(str(PTFOption), table.numRecords):
+                WC, K_sat = runPTF(outputFolder, table, PTFOption, pressures, options, resample)
+
+            # Output checks are reported once per PTF
+            if PTFdatabase.checkPTF(PTFOption).PTFType != "ksatPTF":
+                negative = (WC < 0.0).any(axis=1)
+                validator.addCount(str(PTFOption) + ' giving a negative soil moisture value', negative)
+                WCs.append(WC)
+
+            if K_sat is not None:
+                validator.addCount(str(PTFOption) + ' giving a negative K_sat', K_sat < 0.0)
+                K_sats.append((PTFOption, K_sat))
+
+        validator.summarise()
+
+        #######################################
+        ### Write the ensemble to one CSV   ###
+        #######################################
+
+        headings = ['soilname', 'warning']
+        columns = [np.asarray(nameArray, dtype=object), np.asarray(validator.warnings(), dtype=object)]
+
+        WCOptions = [PTFOption for PTFOption in PTFOptions if PTFdatabase.checkPTF(PTFOption).PTFType != "ksatPTF"]
+
+        for PTFOption, WC in zip(WCOptions, WCs):
+            for j, pressure in enumerate(pressures):
+                headings.append(str(PTFOption) + '_WC_' + pressureLabel(pressure) + 'kPa')
+                columns.append(WC[:, j])
+
+        if len(WCs) > 0:
+            # Soils x pressures x PTFs
+            mean, spread, minimum, maximum, count = ensembleStats(np.stack(WCs, axis=-1))
+
+            for j, pressure in enumerate(pressures):
+                label = 'WC_' + pressureLabel(pressure) + 'kPa'
+                headings += [label + '_mean', label + '_sd', label + '_min', label + '_max', label + '_n']
+                columns += [mean[:, j], spread[:, j], minimum[:, j], maximum[:, j], count[:, j]]
+
+        if len(K_sats) > 0:
+            for PTFOption, K_sat in K_sats:
+                headings.append(str(PTFOption) + '_K_sat')
+                columns.append(K_sat)
+
+            mean, spread, minimum, maximum, count = ensembleStats(np.stack([K_sat for PTFOption, K_sat in K_sats], axis=-1))
+
+            headings += ['K_sat_mean', 'K_sat_sd', 'K_sat_min', 'K_sat_max', 'K_sat_n']
+            columns += [mean, spread, minimum, maximum, count]
+
+        outCSV = os.path.join(outputFolder, 'ensemble.csv')
+
+        with metrics.stage('write', table.numRecords), open(outCSV, 'w') as csv_file:
+            writer = csv.writer(csv_file)
+            writer.writerow(headings)
+
+            for row in zip(*[column.tolist() for column in columns]):
+                writer.writerow([formatValue(value) for value in row])
+
+        log.info('Ensemble of ' + ', '.join(PTFOptions) + ' saved to: ' + str(outCSV))
+
+        return metrics.finishRun(run)
+
+    except Exception:
+        log.error("Ensemble function failed")
+        raise
+
+    finally:
+        metrics.finishRun(run)
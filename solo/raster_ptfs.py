@@ -0,0 +1,177 @@
+'''
+Function to calculate point-PTFs, VG, BC or Ksat PTFs on aligned input rasters
+
+The input rasters (one for each input field of the PTF, e.g. Sand, Clay, OC
+and BD) are read one block of rows at a time. The pixels with a value in
+every input are calculated with the PTF functions as the records of a table,
+and each output (water content at a pressure, VG or BC parameter, K_sat) is
+written to its own GeoTIFF in the output folder, so memory use depends on the
+block size (chunkSize in the user settings) and not on the size of the grid.
+'''
+
+import sys
+import os
+import numpy as np
+from collections import OrderedDict
+import NB_PTFs.lib.log as log
+import NB_PTFs.lib.raster_io as raster_io
+import NB_PTFs.lib.PTFdatabase as PTFdatabase
+import NB_PTFs.lib.vanGenuchten as vanGenuchten
+import NB_PTFs.lib.brooksCorey as brooksCorey
+import NB_PTFs.lib.validation as validation
+import NB_PTFs.lib.metrics as metrics
+
+from NB_PTFs.lib.refresh_modules import refresh_modules
+refresh_modules([log, raster_io, PTFdatabase, vanGenuchten, brooksCorey, validation, metrics])
+
+# Pressures (kPa) of the water content rasters of the VG and BC PTFs, unless others are given
+defaultPressures = [1.0, 3.0, 10.0, 33.0, 100.0, 200.0, 1000.0, 1500.0]
+
+# Fields of the table interface that do not come from a raster
+tableFields = ['soilname', 'texture']
+
+def calcBlock(outputFolder, block, PTFOption, pressures, options):
+
+    # Runs the PTF on the pixels of one block; the results are written to the block
+    PTFType = PTFdatabase.checkPTF(PTFOption).PTFType
+
+    if PTFType == "pointPTF":
+        PTFdatabase.runKernel(PTFOption, [outputFolder, block, PTFOption], options)
+
+    elif PTFType == "vgPTF":
+        results = PTFdatabase.runKernel(PTFOption, [block, PTFOption], options)
+        WC_residualArray, WC_satArray, alpha_VGArray, n_VGArray, m_VGArray = results[0:5]
+
+        vanGenuchten.writeVGParams(block, WC_residualArray, WC_satArray, alpha_VGArray, n_VGArray, m_VGArray)
+
+        if len(results) > 5 and options['MVGChoice']:
+            block.writeColumns(["l_MvG"], [results[5]])
+
+        WC = vanGenuchten.calcVGMatrix(pressures, WC_residualArray, WC_satArray, alpha_VGArray, n_VGArray, m_VGArray)
+        block.writeColumns(pressureFields(pressures), list(WC.T))
+
+    elif PTFType == "bcPTF":
+        warning, WC_res, WC_sat, lambda_BC, hb_BC = PTFdatabase.runKernel(PTFOption, [block, PTFOption], options)
+
+        # Pixels without Brooks-Corey parameters are left without a value
+        valid = (np.asarray(lambda_BC, dtype=np.float64) != brooksCorey.invalidLambda)
+
+        WC = brooksCorey.calcBrooksCoreyMatrix(pressures, hb_BC, WC_res, WC_sat, lambda_BC)
+        WC[~valid, :] = np.nan
+
+        params = [np.where(valid, param, np.nan) for param in [WC_res, WC_sat, lambda_BC, hb_BC]]
+        block.writeColumns(["WC_res", "WC_sat", "lambda_BC", "hb_BC"], params)
+        block.writeColumns(pressureFields(pressures), list(WC.T))
+
+    elif PTFType == "ksatPTF":
+        warningArray, K_satArray = PTFdatabase.runKernel(PTFOption, [outputFolder, block], options)
+        block.writeColumns(["K_sat"], [K_satArray])
+
+def pressureFields(pressures):
+    return ['WC_' + ('%g' % pressure) + 'kPa' for pressure in pressures]
+
+def function(outputFolder, rasterInputs, PTFOption, pressures=None, carbContent='OC', carbonConFactor=1.724, MVGChoice=False):
+
+    '''
+    rasterInputs is a dictionary of input field name (e.g. Sand, Clay, OC, BD): raster path.
+    Writes one raster per output to outputFolder, named <PTFOption>_<output>.tif.
+    Returns the stage timings of the run (see metrics.py).
+    '''
+
+    PTFdatabase.checkPTF(PTFOption)
+
+    if pressures is None:
+        pressures = defaultPressures
+
+    pressures = [float(pressure) for pressure in pressures]
+
+    # Open the rasters of the inputs of the PTF
+    inputFields = [field for field in PTFdatabase.getInputFields(PTFOption, carbContent) if field not in tableFields]
+    inputs = dict((str(field).upper(), path) for field, path in rasterInputs.items())
+
+    for field in inputFields:
+        if field.upper() not in inputs:
+            log.error('Raster for ' + str(field) + ' not given, ' + str(PTFOption) + ' needs rasters of ' + ', '.join(inputFields))
+            sys.exit()
+
+    rasters = OrderedDict((field, raster_io.openRaster(inputs[field.upper()])) for field in inputFields)
+    raster_io.checkAligned(list(rasters.values()))
+
+    reference = list(rasters.values())[0]
+    width, height = reference.width, reference.height
+    blockRows = raster_io.getBlockRows(width)
+
+    log.info('Calculating ' + str(PTFOption) + ' on ' + str(width) + ' x ' + str(height) + ' pixels, ' + str(blockRows) + ' rows at a time')
+
+    options = {'carbonConFactor': carbonConFactor, 'carbContent': carbContent, 'MVGChoice': MVGChoice}
+
+    # Output rasters are created when their first values are calculated
+    writers = OrderedDict()
+
+    def writeEmptyRows(writer, numRows):
+        for start in range(0, numRows, blockRows):
+            writer.writeRows(np.full((min(blockRows, numRows - start), width), np.nan))
+
+    run = metrics.startRun('raster_ptfs', outputFolder)
+
+    try:
+        validation.holdSummaries()
+
+        for start in range(0, height, blockRows):
+            stop = min(start + blockRows, height)
+
+            with metrics.stage('read', (stop - start) * width):
+                values = OrderedDict((field, raster.readRows(start, stop).reshape(-1)) for field, raster in rasters.items())
+
+            valid = np.ones((stop - start) * width, dtype=bool)
+            for column in values.values():
+                valid &= np.isfinite(column)
+
+            outputs = OrderedDict()
+
+            if valid.any():
+                pixels = np.flatnonzero(valid) + start * width
+                metrics.addRecords(len(pixels))
+
+                block = raster_io.PixelBlock(OrderedDict((field, column[valid]) for field, column in values.items()), pixels, start)
+
+                calcBlock(outputFolder, block, PTFOption, pressures, options)
+
+                for field in block.written:
+                    if field.upper() != 'WARNING':
+                        outputs[field] = block.readColumn(field)
+
+            for field in outputs:
+                if field not in writers:
+                    outPath = os.path.join(outputFolder, str(PTFOption) + '_' + str(field) + '.tif')
+                    writers[field] = raster_io.createRaster(outPath, reference)
+                    writeEmptyRows(writers[field], start)
+
+            with metrics.stage('write', (stop - start) * width):
+                for field, writer in writers.items():
+                    grid = np.full((stop - start) * width, np.nan)
+
+                    if field in outputs:
+                        grid[valid] = np.asarray(outputs[field], dtype=np.float64)
+
+                    writer.writeRows(grid.reshape(stop - start, width))
+
+            if stop < height:
+                log.info('Rows ' + str(start) + ' to ' + str(stop) + ' of ' + str(height) + ' calculated')
+
+        validation.releaseSummaries()
+
+        if not writers:
+            log.warning('No pixels with a value in every input raster, no output rasters written')
+
+        for field, writer in writers.items():
+            writer.close()
+            log.info('Output raster saved to: ' + str(writer.path))
+
+        return metrics.finishRun(run)
+
+    finally:
+        metrics.finishRun(run)
+
+        for raster in rasters.values():
+            raster.close()
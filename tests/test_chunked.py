@@ -0,0 +1,95 @@
+'''
+Runs the pipelines in blocks of records (chunkSize in the user settings) and
+in one go, and checks that they write the same output tables and CSVs, byte
+for byte. The plots are not compared.
+
+    python -m pytest tests
+
+The blocks of 7 records leave a last block of one record, so the results of a
+record should not depend on the number of records calculated with it.
+'''
+
+import os
+import sys
+import pytest
+
+np = pytest.importorskip('numpy')
+pytest.importorskip('matplotlib')
+
+# The toolbox modules are imported as NB_PTFs.<package>.<module>
+repoPath = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if repoPath not in sys.path:
+    sys.path.insert(0, repoPath)
+
+import configuration
+
+import NB_PTFs.lib.refresh_modules as refresh_modules
+import NB_PTFs.lib.common as common
+import NB_PTFs.benchmarks.soils as soils
+import NB_PTFs.solo.calc_vg as calc_vg
+import NB_PTFs.solo.brooks_corey as brooks_corey
+import NB_PTFs.solo.calc_point_ptfs as calc_point_ptfs
+
+numRecords = 50
+chunkSize = 7
+
+# Settings of the tool (inputs.xml in the output folder) read by the plots
+inputValues = {'Pressure_units_plot': 'kPa', 'Plot_axis': 'Y-axis', 'FieldCapacity': '33', 'SIC': '100', 'PWP': '1500'}
+
+# User settings of both runs, so that the optional outputs are compared too
+userSettings = {'maxPlots': '2', 'fitVG': 'Yes', 'pressureGrid': '0,5,50,500', 'targetWC': '0.2', 'PAWDepletion': '50'}
+
+pipelines = {
+    'calc_vg': lambda folder, table: calc_vg.function(folder, table, 'Wosten_1999_top', [5.0, 50.0], True, 33, 100, 1500, 'OC', 1.724),
+    'brooks_corey': lambda folder, table: brooks_corey.function(folder, table, 'Cosby_1984_SandC_BC', [5.0, 50.0], 33, 100, 1500, 'OC', 1.724),
+    'calc_point_ptfs': lambda folder, table: calc_point_ptfs.function(folder, table, 'Rawls_1982', 33, 100, 1500, 'OC', 1.724),
+}
+
+def listOutputs(folder):
+
+    # Output files of a run (relative paths), without the plots and logs
+    outputs = []
+
+    for root, dirs, files in os.walk(folder):
+        dirs[:] = [name for name in dirs if name != 'logs']
+
+        for name in files:
+            if not name.endswith('.png'):
+                outputs.append(os.path.relpath(os.path.join(root, name), folder))
+
+    return sorted(outputs)
+
+def readBytes(path):
+
+    with open(path, 'rb') as outFile:
+        return outFile.read()
+
+def runPipeline(pipeline, folder, table, chunk, monkeypatch):
+
+    monkeypatch.setitem(refresh_modules.readUserSettings(), 'chunkSize', str(chunk))
+
+    os.makedirs(folder)
+    pipelines[pipeline](folder, table)
+
+    return folder
+
+@pytest.mark.parametrize('curveExport', common.curveExportFormats)
+@pytest.mark.parametrize('pipeline', sorted(pipelines))
+def test_chunked_outputs(pipeline, curveExport, tmpdir, monkeypatch):
+
+    settings = refresh_modules.readUserSettings()
+    for name, value in list(userSettings.items()) + [('curveExport', curveExport)]:
+        monkeypatch.setitem(settings, name, value)
+
+    monkeypatch.setattr(common, 'getInputValue', lambda folder, name: inputValues.get(name))
+
+    table = soils.getTable(str(tmpdir), numRecords, 0, 'csv')
+
+    whole = runPipeline(pipeline, os.path.join(str(tmpdir), 'whole'), table, 0, monkeypatch)
+    chunked = runPipeline(pipeline, os.path.join(str(tmpdir), 'chunked'), table, chunkSize, monkeypatch)
+
+    outputs = listOutputs(whole)
+    assert outputs == listOutputs(chunked)
+
+    for name in outputs:
+        assert readBytes(os.path.join(whole, name)) == readBytes(os.path.join(chunked, name)), name
@@ -0,0 +1,142 @@
+'''
+Compares the kernel of every PTF of the registry with its reference path (the
+per-record functions, see cross_check) on a fixed sample: the synthetic soils
+of the benchmarks plus a few records at the edges of the input ranges.
+
+    python -m pytest tests
+
+Some records are outside the domain of the equations of a PTF, where the
+reference stops with an error (e.g. the log of a negative water content in
+Saxton and Rawls, 2006) or returns a NaN or infinite value (e.g. the log of a
+zero carbon content in Nguyen et al., 2014). The PTFs are not stopped by these
+records: all their results are set to NaN (validation.Validator.checkResults).
+'''
+
+import os
+import sys
+import csv
+import pytest
+
+np = pytest.importorskip('numpy')
+
+# The toolbox modules are imported as NB_PTFs.<package>.<module>
+repoPath = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if repoPath not in sys.path:
+    sys.path.insert(0, repoPath)
+
+import configuration
+
+import NB_PTFs.lib.refresh_modules as refresh_modules
+import NB_PTFs.lib.log as log
+import NB_PTFs.lib.table_io as table_io
+import NB_PTFs.lib.validation as validation
+import NB_PTFs.lib.cross_check as cross_check
+import NB_PTFs.lib.PTFdatabase as PTFdatabase
+import NB_PTFs.benchmarks.soils as soils
+
+numRecords = 1000
+tolerance = 1e-9
+
+options = {'carbonConFactor': 1.724, 'carbContent': 'OC', 'MVGChoice': True}
+
+# Records at the edges of the input ranges: soilname, texture, Sand, Silt, Clay, OC, OM, BD, CEC, pH, WC_sat, wc_satCalc, wc_fcCalc
+edgeRecords = [
+    ['edge_carbon0', 'loam', 40, 40, 20, 0, 0, 1.4, 15, 6.5, 0.47, 0.45, 0.3],
+    ['edge_silt0', 'sandy clay loam', 70, 0, 30, 1.2, 2.07, 1.5, 20, 6.0, 0.43, 0.41, 0.28],
+    ['edge_clay0', 'loamy sand', 80, 20, 0, 1.2, 2.07, 1.6, 5, 6.0, 0.4, 0.38, 0.12],
+    ['edge_sand0', 'silty clay', 0, 55, 45, 2, 3.45, 1.2, 35, 7.0, 0.55, 0.52, 0.42],
+    ['edge_sand100', 'sand', 100, 0, 0, 0.1, 0.17, 1.65, 2, 5.5, 0.38, 0.36, 0.08],
+]
+
+# PTFs whose reference cannot calculate some records of the sample
+domainErrors = ['SaxtonRawls_2006', 'Nguyen_2014', 'Wosten_1999_top', 'Wosten_1999_sub', 'ZachariasWessolek_2007']
+
+@pytest.fixture(scope='module')
+def samplePath(tmpdir_factory):
+
+    # The synthetic soils followed by the edge records
+    folder = str(tmpdir_factory.mktemp('kernels'))
+    path = os.path.join(folder, 'sample.csv')
+
+    with open(soils.getTable(folder, numRecords, 0, 'csv')) as inFile:
+        text = inFile.read()
+
+    with open(path, 'w') as outFile:
+        outFile.write(text)
+        csv.writer(outFile, lineterminator='\n').writerows(edgeRecords)
+
+    return path
+
+def getArgs(PTFOption, folder, table):
+
+    # Positional arguments of the kernel and the position of the table in them
+    PTFType = PTFdatabase.checkPTF(PTFOption).PTFType
+
+    if PTFType == "pointPTF":
+        return [folder, table, PTFOption], 1
+    elif PTFType == "ksatPTF":
+        return [folder, table], 1
+
+    return [table, PTFOption], 0
+
+def runPTF(PTFOption, samplePath, monkeypatch):
+
+    '''
+    Runs the kernel of a PTF on the whole sample and its reference one record at a time.
+    Returns the results of the kernel, the indices of the records calculated by the reference,
+    their results and the indices of the records not calculated.
+    '''
+
+    monkeypatch.setitem(refresh_modules.readUserSettings(), 'crossCheck', '0')
+
+    folder = os.path.dirname(samplePath)
+    table = table_io.openTable(samplePath, os.path.join(folder, 'output_' + PTFOption + '.csv'))
+    args, tableIndex = getArgs(PTFOption, folder, table_io.TableView(table))
+
+    reference = lambda sampleArgs: PTFdatabase.runReference(PTFOption, sampleArgs, options)
+
+    validation.holdSummaries()
+
+    try:
+        with log.quiet:
+            results = PTFdatabase.runKernel(PTFOption, args, options)
+            indices, referenceResults, skipped = cross_check.runRecords(reference, args, tableIndex, np.arange(table.numRecords))
+    finally:
+        validation.discardSummaries()
+
+    results = [cross_check.toValues(result) for result in results]
+    referenceResults = cross_check.setInvalid([cross_check.toValues(result) for result in referenceResults])
+
+    return results, indices, referenceResults, skipped
+
+def invalidRecords(results):
+
+    # Records with a NaN for every numeric result
+    numeric = [values.reshape(len(values), -1) for values in results if values.dtype.kind == 'f']
+
+    return np.flatnonzero(np.all([np.isnan(values).all(axis=1) for values in numeric], axis=0))
+
+@pytest.mark.parametrize('PTFOption', sorted(PTFdatabase.PTFs))
+def test_kernel_matches_reference(PTFOption, samplePath, monkeypatch):
+
+    results, indices, referenceResults, skipped = runPTF(PTFOption, samplePath, monkeypatch)
+
+    assert len(results) == len(referenceResults)
+
+    for i in range(0, len(results)):
+        maxAbs, maxRel, differs = cross_check.compareResult(results[i][indices], referenceResults[i], tolerance)
+        assert len(differs) == 0, (PTFOption, i, indices[differs[0:10]])
+
+    # The records the reference cannot calculate get NaN for all results
+    assert set(skipped) <= set(invalidRecords(results))
+
+@pytest.mark.parametrize('PTFOption', domainErrors)
+def test_domain_errors_give_nan(PTFOption, samplePath, monkeypatch):
+
+    results, indices, referenceResults, skipped = runPTF(PTFOption, samplePath, monkeypatch)
+
+    # Records the reference cannot calculate, or calculates as NaN or infinite
+    expected = sorted(set(skipped) | set(indices[invalidRecords(referenceResults)]))
+
+    assert len(expected) > 0
+    assert list(invalidRecords(results)) == expected
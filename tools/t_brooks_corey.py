@@ -7,7 +7,7 @@ import NB_PTFs.lib.progress as progress
 import NB_PTFs.solo.brooks_corey as brooks_corey
 import NB_PTFs.lib.PTFdatabase as PTFdatabase
 
-from NB_PTFs.lib.refresh_modules import refresh_modules
+from NB_PTFs.lib.refresh_modules import refresh_modules, reportReloads
 refresh_modules([log, common, brooks_corey, PTFdatabase])
 
 def function(params):
@@ -39,6 +39,7 @@ def function(params):
 
         # Set up logging output to file
         log.setupLogging(outputFolder)
+        reportReloads()
 
         # Write input params to XML
         common.writeParamsToXML(params, outputFolder)
@@ -114,3 +115,7 @@ def function(params):
     except Exception:
         log.exception("Brooks-Corey tool failed")
         raise
+
+    finally:
+        # Writes the messages still queued and closes the log file
+        log.stopLogging()
@@ -8,7 +8,7 @@ import NB_PTFs.lib.progress as progress
 import NB_PTFs.solo.calc_ksat as CalcKsat
 import NB_PTFs.lib.PTFdatabase as PTFdatabase
 
-from NB_PTFs.lib.refresh_modules import refresh_modules
+from NB_PTFs.lib.refresh_modules import refresh_modules, reportReloads
 refresh_modules([log, common, CalcKsat, PTFdatabase])
 
 def function(params):
@@ -37,6 +37,7 @@ def function(params):
 
         # Set up logging output to file
         log.setupLogging(outputFolder)
+        reportReloads()
 
         # Write input params to XML
         common.writeParamsToXML(params, outputFolder)
@@ -117,3 +118,7 @@ def function(params):
     except Exception:
         log.exception("Saturated hydraulic conductivity tool failed")
         raise
+
+    finally:
+        # Writes the messages still queued and closes the log file
+        log.stopLogging()
@@ -8,7 +8,7 @@ import NB_PTFs.lib.progress as progress
 import NB_PTFs.solo.calc_point_ptfs as calc_point_ptfs
 import NB_PTFs.lib.PTFdatabase as PTFdatabase
 
-from NB_PTFs.lib.refresh_modules import refresh_modules
+from NB_PTFs.lib.refresh_modules import refresh_modules, reportReloads
 refresh_modules([log, common, calc_point_ptfs, PTFdatabase])
 
 def function(params):
@@ -36,6 +36,7 @@ def function(params):
 
         # Set up logging output to file
         log.setupLogging(outputFolder)
+        reportReloads()
 
         # Write input params to XML
         common.writeParamsToXML(params, outputFolder)
@@ -134,9 +135,9 @@ def function(params):
 
         PTFOut = [("PTFOption", PTFOption),
                   ("PTFType", PTFType),
-                  ("PTFPressures", str(PTFPressures)),
+                  ("PTFPressures", str(list(PTFPressures))),
                   ("PTFUnit", PTFUnit),
-                  ("PTFFields", str(PTFFields))]
+                  ("PTFFields", str(list(PTFFields)))]
 
         # Write to XML file
         PTFXML = os.path.join(outputFolder, "ptfinfo.xml")
@@ -154,3 +155,7 @@ def function(params):
     except Exception:
         log.exception("Point-PTF tool failed")
         raise
+
+    finally:
+        # Writes the messages still queued and closes the log file
+        log.stopLogging()
@@ -8,7 +8,7 @@ import NB_PTFs.lib.progress as progress
 import NB_PTFs.solo.calc_vg as calc_vg
 import NB_PTFs.lib.PTFdatabase as PTFdatabase
 
-from NB_PTFs.lib.refresh_modules import refresh_modules
+from NB_PTFs.lib.refresh_modules import refresh_modules, reportReloads
 refresh_modules([log, common, calc_vg, PTFdatabase])
 
 def function(params):
@@ -39,6 +39,7 @@ def function(params):
 
         # Set up logging output to file
         log.setupLogging(outputFolder)
+        reportReloads()
 
         # Write input params to XML
         common.writeParamsToXML(params, outputFolder)
@@ -119,3 +120,7 @@ def function(params):
     except Exception:
         log.exception("van Genuchten tool failed")
         raise
+
+    finally:
+        # Writes the messages still queued and closes the log file
+        log.stopLogging()